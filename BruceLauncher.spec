@@ -1,12 +1,18 @@
 # -*- mode: python ; coding: utf-8 -*-
+from PyInstaller.utils.hooks import collect_data_files, collect_submodules
 
+# esptool работает прямо внутри лаунчера так что ему нужны json со стабами и все targets
+esptool_datas = collect_data_files('esptool')
+esptool_imports = collect_submodules('esptool')
+# окно подгружается только когда не передали команду командной строки
+gui_imports = ['bruce_gui']
 
 a = Analysis(
     ['C:\\preparingtorealisbrucew\\bruce_launcher.py'],
     pathex=[],
     binaries=[],
-    datas=[],
-    hiddenimports=[],
+    datas=esptool_datas,
+    hiddenimports=esptool_imports + gui_imports,
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -37,3 +43,26 @@ exe = EXE(
     entitlements_file=None,
     icon=['C:\\preparingtorealisbrucew\\icon.ico'],
 )
+
+# тот же лаунчер но с консолью для командной строки у оконного exe sys.stdout нет и вывод команд терялся бы
+cli_exe = EXE(
+    pyz,
+    a.scripts,
+    a.binaries,
+    a.datas,
+    [],
+    name='BruceLauncherCLI',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=True,
+    upx_exclude=[],
+    runtime_tmpdir=None,
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=['C:\\preparingtorealisbrucew\\icon.ico'],
+)
@@ -0,0 +1 @@
+"""офлайн бенчмарки лаунчера github esptool и плата подменены локальными заменителями"""
@@ -0,0 +1,201 @@
+"""подделка python -m esptool для бенчмарков печатает то же что настоящий но без платы
+
+аргументы такие же как у лаунчера --chip --port --baud и дальше команда
+write-flash read-flash erase-flash flash-id (и старые имена с подчеркиванием)
+read-flash пишет в файл пустой флеш 0xFF так что бэкап потом тоже можно гонять
+
+темп задается через переменные окружения чтоб командная строка не отличалась от настоящей
+FAKE_ESPTOOL_RATE  байт в секунду по линку 0 как можно быстрее по умолчанию baud / 10
+FAKE_ESPTOOL_STEP  байт на одну строку прогресса по умолчанию 16384 как блок у esptool
+FAKE_ESPTOOL_STYLE 4 или 5 какую версию esptool изображать по умолчанию 5
+"""
+import os
+import sys
+import time
+
+MAC = "24:0a:c4:00:00:01"
+CHIPS = {
+    "esp32": ("ESP32-D0WD-V3 (revision v3.1)", "Wi-Fi, BT, Dual Core + LP Core, 240MHz, Vref calibration in eFuse"),
+    "esp32s3": ("ESP32-S3 (QFN56) (revision v0.2)", "Wi-Fi, BT 5 (LE), Dual Core + LP Core, 240MHz, Embedded PSRAM 8MB"),
+}
+
+
+class Options:
+    def __init__(self, argv: list):
+        self.chip = "esp32"
+        self.port = "/dev/ttyUSB0"
+        self.baud = 115200
+        self.command = ""
+        self.args = []
+        rest = list(argv)
+        while rest and rest[0].startswith("-"):
+            name = rest.pop(0)
+            value = rest.pop(0) if rest else ""
+            if name in ("--chip", "-c"):
+                self.chip = value if value != "auto" else "esp32"
+            elif name in ("--port", "-p"):
+                self.port = value
+            elif name in ("--baud", "-b"):
+                self.baud = int(value)
+        if rest:
+            self.command = rest.pop(0).replace("_", "-")
+            self.args = rest
+        self.rate = float(os.environ.get("FAKE_ESPTOOL_RATE", self.baud / 10))
+        self.step = max(1, int(os.environ.get("FAKE_ESPTOOL_STEP", 16384)))
+        self.style = int(os.environ.get("FAKE_ESPTOOL_STYLE", 5))
+
+
+def out(line: str):
+    sys.stdout.write(line + "\n")
+
+
+def pace(started: float, done: int, rate: float):
+    """ждем столько сколько шли бы эти байты по линку"""
+    if rate <= 0:
+        return
+    delay = started + done / rate - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def bar(percent: float, width: int = 30) -> str:
+    filled = int(width * percent / 100)
+    head = ">" if filled < width else ""
+    return "[" + "=" * filled + head + " " * (width - filled - len(head)) + "]"
+
+
+def write_line(style: int, address: int, done: int, size: int) -> str:
+    percent = done * 100.0 / size
+    if style >= 5:
+        return f"Writing at 0x{address:08x} {bar(percent)} {percent:5.1f}% {done}/{size} bytes..."
+    return f"Writing at 0x{address:08x}... ({int(percent)} %)"
+
+
+def wrote_line(size: int, compressed: int, offset: int, elapsed: float) -> str:
+    kbit = size * 8 / max(elapsed, 0.001) / 1000
+    return (f"Wrote {size} bytes ({compressed} compressed) at 0x{offset:08x} in {elapsed:.1f} seconds "
+            f"({kbit:.1f} kbit/s).")
+
+
+def connect(opt: Options):
+    chip, features = CHIPS.get(opt.chip, CHIPS["esp32"])
+    if opt.style >= 5:
+        out("esptool v5.0.2")
+        out(f"Connected to {chip.split(' ')[0]} on {opt.port}:")
+        out(f"Chip type:          {chip}")
+        out(f"Features:           {features}")
+        out("Crystal frequency:  40MHz")
+        out(f"MAC:                {MAC}")
+        out("")
+        out("Uploading stub flasher...")
+        out("Running stub flasher...")
+        out("Stub flasher running.")
+        if opt.baud != 115200:
+            out(f"Changing baud rate to {opt.baud}...")
+            out("Changed.")
+        out("")
+    else:
+        out("esptool.py v4.8.1")
+        out(f"Serial port {opt.port}")
+        out("Connecting....")
+        out(f"Chip is {chip}")
+        out(f"Features: {features}")
+        out("Crystal is 40MHz")
+        out(f"MAC: {MAC}")
+        out("Uploading stub...")
+        out("Running stub...")
+        out("Stub running...")
+        if opt.baud != 115200:
+            out(f"Changing baud rate to {opt.baud}")
+            out("Changed.")
+
+
+def leave(opt: Options):
+    out("")
+    if opt.style >= 5:
+        out("Hard resetting via RTS pin...")
+    else:
+        out("Leaving...")
+        out("Hard resetting via RTS pin...")
+
+
+def erase(opt: Options):
+    if opt.style >= 5:
+        out("Erasing flash memory (this may take a while)...")
+        out("Flash memory erased successfully in 2.1 seconds.")
+    else:
+        out("Erasing flash (this may take a while)...")
+        out("Chip erase completed successfully in 2.1s")
+
+
+def write_flash(opt: Options):
+    args = [a for a in opt.args if not a.startswith("-")]
+    if "--erase-all" in opt.args or "-e" in opt.args:
+        erase(opt)
+    pairs = list(zip(args[0::2], args[1::2]))
+    for address, path in pairs:
+        offset = int(address, 0)
+        size = os.path.getsize(path)
+        # настоящий esptool жмет zlib так что по линку идет примерно половина
+        compressed = max(1, size // 2)
+        end = offset + ((size + 0xFFF) & ~0xFFF) - 1
+        out(f"Flash will be erased from 0x{offset:08x} to 0x{end:08x}...")
+        out(f"Compressed {size} bytes to {compressed}...")
+        started = time.monotonic()
+        done = 0
+        while done < size:
+            out(write_line(opt.style, offset + done, done, size))
+            sys.stdout.flush()
+            done = min(size, done + opt.step)
+            pace(started, done // 2, opt.rate)
+        out(wrote_line(size, compressed, offset, time.monotonic() - started))
+        out("Hash of data verified.")
+
+
+def read_flash(opt: Options):
+    address, size, path = opt.args[:3]
+    offset = int(address, 0)
+    size = int(size, 0)
+    started = time.monotonic()
+    done = 0
+    blank = b"\xff" * opt.step
+    with open(path, "wb") as f:
+        while done < size:
+            chunk = min(opt.step, size - done)
+            f.write(blank[:chunk])
+            done += chunk
+            pace(started, done, opt.rate)
+            percent = done * 100.0 / size
+            if opt.style >= 5:
+                out(f"Reading from 0x{offset + done:08x} {bar(percent)} {percent:5.1f}% {done}/{size} bytes...")
+            else:
+                sys.stdout.write(f"\r{done} ({int(percent)} %)")
+            sys.stdout.flush()
+    if opt.style < 5:
+        out("")
+    elapsed = max(time.monotonic() - started, 0.001)
+    out(f"Read {size} bytes from 0x{offset:08x} in {elapsed:.1f} seconds ({size * 8 / elapsed / 1000:.1f} kbit/s).")
+
+
+def main(argv: list = None) -> int:
+    opt = Options(sys.argv[1:] if argv is None else argv)
+    if opt.command not in ("write-flash", "read-flash", "erase-flash", "flash-id"):
+        sys.stderr.write(f"fake esptool: unsupported command {opt.command!r}\n")
+        return 2
+    connect(opt)
+    if opt.command == "write-flash":
+        write_flash(opt)
+    elif opt.command == "read-flash":
+        read_flash(opt)
+    elif opt.command == "erase-flash":
+        erase(opt)
+    else:
+        out("Flash Manufacturer: 20")
+        out("Flash Device: 4018")
+        out("Detected flash size: 16MB")
+    leave(opt)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,466 @@
+"""бенчмарки лаунчера без сети и без платы
+
+python -m benchmarks                 все бенчмарки и сравнение с benchmarks/baseline.json
+python -m benchmarks --only download,serial --repeat 5
+python -m benchmarks --save-baseline после того как убедились что цифры хорошие
+
+результаты пишутся json файлом (--output) у каждой метрики значение единицы и в какую сторону лучше
+код выхода 1 если какая то метрика просела сильнее --tolerance относительно базы
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from threading import Event, Thread
+
+from bruce_core.container import BackupContainer, save_image
+from bruce_core.download import RangedDownloader, stream_download
+from bruce_core.logbuf import LogBuffer
+from bruce_core.progress import EsptoolOutputParser, ProgressTracker, parse_esptool_line
+from bruce_core.releases import ReleaseIndex, bin_assets, match_assets, parse_release, pick_release
+
+from benchmarks import standins
+from benchmarks.fake_esptool import write_line, wrote_line
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+RESULTS_VERSION = 1
+# на сколько метрика может быть хуже базы пока это еще шум
+TOLERANCE = 0.15
+# гуи забирает лог и консоль по таймеру примерно 30 раз в секунду
+UI_TICK = 0.033
+MB = 1024 * 1024
+# темп для консоли в несколько раз быстрее чем 921600 бод с которыми вообще бывают платы
+SERIAL_RATE = 4 * 921600 // 10
+
+EXIT_OK = 0
+EXIT_REGRESSION = 1
+EXIT_USAGE = 2
+
+
+class Metric:
+    """одно измерение better это higher lower или пусто если метрика только для справки"""
+
+    def __init__(self, name: str, value: float, unit: str, better: str = "higher"):
+        self.name = name
+        self.value = value
+        self.unit = unit
+        self.better = better
+
+    def beats(self, other: "Metric") -> bool:
+        if self.better == "lower":
+            return self.value < other.value
+        return self.value > other.value
+
+    def to_dict(self) -> dict:
+        return {"value": round(self.value, 4), "unit": self.unit, "better": self.better}
+
+
+def timed(fn, *args, **kwargs) -> float:
+    started = time.perf_counter()
+    fn(*args, **kwargs)
+    return max(time.perf_counter() - started, 1e-9)
+
+
+# релизы
+
+def bench_releases(ctx) -> list:
+    raw = standins.github_releases(ctx.scale(500, 100))
+    payload = json.dumps(raw)
+    releases = []
+
+    def parse():
+        releases[:] = [parse_release(rel) for rel in json.loads(payload)]
+
+    elapsed = timed(parse)
+    tags = [rel["tag"] for rel in releases[::25]]
+
+    def select():
+        for kind in ["latest", "beta"] + tags:
+            rel = pick_release(releases, kind)
+            bins = bin_assets(rel)
+            for board in standins.BOARDS:
+                match_assets(bins, board)
+
+    picks = (2 + len(tags)) * len(standins.BOARDS)
+    metrics = [
+        Metric("releases.parse", len(raw) / elapsed, "releases/s"),
+        Metric("releases.select", picks / timed(select), "picks/s"),
+    ]
+
+    with standins.FakeGitHub(raw) as github:
+        index = ReleaseIndex(os.path.join(ctx.tmp, "releases.json"), github.url + "/releases")
+        cold = timed(index.refresh)
+        # все страницы уже с etag так что в ответ одни 304 эти короткие замеры шумят и берем лучший
+        warm = min(timed(index.refresh) for _ in range(5))
+    metrics.append(Metric("releases.refresh_cold", cold * 1000, "ms", "lower"))
+    metrics.append(Metric("releases.refresh_304", warm * 1000, "ms", "lower"))
+    return metrics
+
+
+# скачивание
+
+def bench_download(ctx) -> list:
+    size = ctx.scale(64, 16) * MB
+    data = os.urandom(size)
+    metrics = []
+    with standins.FakeGitHub(assets={"fw.bin": data}) as github:
+        url = github.url + "/assets/fw.bin"
+        dest = os.path.join(ctx.tmp, "fw.bin")
+        elapsed = timed(stream_download, url, dest)
+        metrics.append(Metric("download.stream", size / MB / elapsed, "MB/s"))
+        for connections in (1, 4):
+            os.remove(dest)
+            downloader = RangedDownloader(connections=connections)
+            elapsed = timed(downloader.download, url, dest)
+            metrics.append(Metric(f"download.ranged_{connections}", size / MB / elapsed, "MB/s"))
+    if os.path.getsize(dest) != size:
+        raise RuntimeError("download size mismatch")
+    return metrics
+
+
+# вывод esptool
+
+def esptool_lines(style: int, size: int, step: int) -> list:
+    lines = [write_line(style, 0x10000 + done, done, size) for done in range(0, size, step)]
+    lines.append(wrote_line(size, size // 2, 0x10000, 12.3))
+    return lines
+
+
+def pipe_output(stream, log: LogBuffer, tracker: ProgressTracker) -> int:
+    """то же что BruceLauncher._pipe_esptool_output только без окна"""
+    count = 0
+    for line in stream:
+        line = line.rstrip("\n")
+        event = parse_esptool_line(line)
+        if event is not None and not event.final and event.percent is not None:
+            log.push(line, collapse_key=f"esptool:{event.stage}")
+        else:
+            log.push(line)
+        if event is not None:
+            tracker.update(event)
+        count += 1
+    return count
+
+
+def ui_drain(stop: Event, drain):
+    """гуи поток который по таймеру забирает накопленное"""
+    while not stop.wait(UI_TICK):
+        drain()
+    drain()
+
+
+def bench_esptool(ctx) -> list:
+    metrics = []
+    for style in (4, 5):
+        lines = esptool_lines(style, 16 * MB, 256)
+        elapsed = timed(lambda: [parse_esptool_line(line) for line in lines])
+        metrics.append(Metric(f"esptool.parse_v{style}", len(lines) / elapsed, "lines/s"))
+
+    # те же строки кусками как они приходят из pty с разрывами посреди строки
+    text = "\r".join(esptool_lines(5, 16 * MB, 256))
+    parser = EsptoolOutputParser()
+    chunks = [text[i:i + 4000] for i in range(0, len(text), 4000)]
+    elapsed = timed(lambda: ([parser.feed(chunk) for chunk in chunks], parser.flush()))
+    metrics.append(Metric("esptool.stream_parse", len(text) / MB / elapsed, "MB/s"))
+
+    # настоящий конвейер отдельный процесс поддельного esptool построчно в лог и трекер прогресса
+    firmware = os.path.join(ctx.tmp, "firmware.bin")
+    size = ctx.scale(32, 8) * MB
+    with open(firmware, "wb") as f:
+        f.truncate(size)
+    env = dict(os.environ, FAKE_ESPTOOL_RATE=str(ctx.esptool_rate), FAKE_ESPTOOL_STEP="512", FAKE_ESPTOOL_STYLE="5")
+    cmd = [sys.executable, standins.FAKE_ESPTOOL, "--chip", "esp32", "--port", "/dev/ttyFAKE", "--baud", "921600",
+           "write-flash", "0x10000", firmware]
+    log = LogBuffer(5000)
+    tracker = ProgressTracker()
+    stop = Event()
+    drainer = Thread(target=ui_drain, args=(stop, log.drain), daemon=True)
+    drainer.start()
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1, env=env)
+    count = pipe_output(proc.stdout, log, tracker)
+    proc.wait()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    drainer.join()
+    if proc.returncode != 0 or not tracker.final:
+        raise RuntimeError(f"fake esptool failed with code {proc.returncode}")
+    metrics.append(Metric("esptool.pipeline", count / elapsed, "lines/s"))
+    metrics.append(Metric("esptool.log_lag", log.max_lag * 1000, "ms", "lower"))
+    return metrics
+
+
+# серийная консоль
+
+def pty_ingest(data: bytes, rate: float = 0) -> tuple:
+    """гонит data через pty в SerialReader как плата в порт rate байт в секунду 0 без пауз
+
+    вернет (секунды, выкинутые байты) гуи тем временем забирает текст по таймеру
+    """
+    import serial
+
+    from bruce_core.serialio import SerialReader
+
+    size = len(data)
+    master, slave = os.openpty()
+    ser = serial.Serial(os.ttyname(slave), 921600, timeout=0.05)
+    reader = SerialReader(ser)
+
+    def write():
+        view = memoryview(data)
+        started = time.perf_counter()
+        for i in range(0, size, 4096):
+            os.write(master, view[i:i + 4096])
+            if rate:
+                delay = started + (i + 4096) / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+    stop = Event()
+    drainer = Thread(target=ui_drain, args=(stop, reader.drain), daemon=True)
+    writer = Thread(target=write, daemon=True)
+    try:
+        started = time.perf_counter()
+        reader.start()
+        drainer.start()
+        writer.start()
+        deadline = started + 120
+        while reader.total_bytes < size and time.perf_counter() < deadline:
+            time.sleep(0.005)
+        elapsed = time.perf_counter() - started
+    finally:
+        reader.stop()
+        stop.set()
+        drainer.join()
+        ser.close()
+        os.close(master)
+        os.close(slave)
+    if reader.total_bytes < size:
+        raise RuntimeError(f"serial reader got {reader.total_bytes} of {size} bytes")
+    return elapsed, reader.dropped_bytes
+
+
+def bench_serial(ctx) -> list:
+    if not sys.platform.startswith("linux"):
+        ctx.skip("serial", "needs a Linux pty")
+        return []
+    data = standins.console_text(ctx.scale(32, 8) * MB)
+    # без пауз буфер гуи переполняется и часть текста выкидывается так задумано поэтому это только для справки
+    elapsed, flood_dropped = pty_ingest(data)
+    # а в темпе быстрого порта терять нельзя ничего
+    paced = data[:int(ctx.serial_rate * ctx.scale(3, 1))]
+    _, paced_dropped = pty_ingest(paced, ctx.serial_rate)
+    return [
+        Metric("serial.pty_ingest", len(data) / MB / elapsed, "MB/s"),
+        Metric("serial.flood_dropped", flood_dropped, "bytes", ""),
+        Metric("serial.paced_dropped", paced_dropped, "bytes", "lower"),
+    ]
+
+
+# бэкапы
+
+def bench_backup(ctx) -> list:
+    size = ctx.scale(16, 4) * MB
+    image = standins.flash_image(size)
+    bbk = os.path.join(ctx.tmp, "backup.bbk")
+    raw = os.path.join(ctx.tmp, "backup.bin")
+    elapsed_bbk = timed(save_image, bbk, image, 0, {"chip": "ESP32"})
+    elapsed_raw = timed(save_image, raw, image)
+
+    def verify():
+        with BackupContainer(bbk) as container:
+            if not container.verify():
+                raise RuntimeError("container verify failed")
+
+    elapsed_verify = timed(verify)
+    return [
+        Metric("backup.bbk_write", size / MB / elapsed_bbk, "MB/s"),
+        Metric("backup.bin_write", size / MB / elapsed_raw, "MB/s"),
+        Metric("backup.bbk_verify", size / MB / elapsed_verify, "MB/s"),
+        Metric("backup.bbk_ratio", os.path.getsize(bbk) / size, "ratio", "lower"),
+    ]
+
+
+BENCHMARKS = {
+    "releases": bench_releases,
+    "download": bench_download,
+    "esptool": bench_esptool,
+    "serial": bench_serial,
+    "backup": bench_backup,
+}
+
+
+class Context:
+    def __init__(self, tmp: str, quick: bool = False, esptool_rate: float = 0, serial_rate: float = SERIAL_RATE):
+        self.tmp = tmp
+        self.quick = quick
+        self.esptool_rate = esptool_rate
+        self.serial_rate = serial_rate
+        self.skipped = {}
+
+    def scale(self, full: int, quick: int) -> int:
+        return quick if self.quick else full
+
+    def skip(self, name: str, reason: str):
+        self.skipped[name] = reason
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        commit = ""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+    }
+
+
+def run(names: list, repeat: int, quick: bool, esptool_rate: float, serial_rate: float, log) -> dict:
+    """каждый бенчмарк repeat раз и из повторов берем лучшее значение каждой метрики"""
+    best = {}
+    errors = {}
+    with tempfile.TemporaryDirectory(prefix="bruce-bench-") as tmp:
+        ctx = Context(tmp, quick, esptool_rate, serial_rate)
+        for name in names:
+            for attempt in range(repeat):
+                try:
+                    metrics = BENCHMARKS[name](ctx)
+                except Exception as e:
+                    errors[name] = str(e) or type(e).__name__
+                    log(f"{name}: failed: {errors[name]}")
+                    break
+                for metric in metrics:
+                    if metric.name not in best or metric.beats(best[metric.name]):
+                        best[metric.name] = metric
+                if name in ctx.skipped:
+                    log(f"{name}: skipped ({ctx.skipped[name]})")
+                    break
+                log(f"{name}: run {attempt + 1}/{repeat} done")
+    return {
+        "version": RESULTS_VERSION,
+        "created": round(time.time(), 3),
+        "quick": quick,
+        "repeat": repeat,
+        "benchmarks": names,
+        "environment": environment(),
+        "metrics": {name: best[name].to_dict() for name in sorted(best)},
+        "skipped": ctx.skipped,
+        "errors": errors,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """строки сравнения (метрика база сейчас изменение статус) статус ok better regression или new"""
+    rows = []
+    # с --only остальные бенчмарки не запускались и пропавшими их не считаем
+    ran = set(results.get("benchmarks") or BENCHMARKS)
+    base_metrics = {
+        name: metric for name, metric in baseline.get("metrics", {}).items() if name.split(".", 1)[0] in ran
+    }
+    for name, metric in results["metrics"].items():
+        base = base_metrics.get(name)
+        if base is None or not metric["better"]:
+            rows.append((name, base and base.get("value"), metric["value"], None, "new" if base is None else "ok"))
+            continue
+        if not base.get("value"):
+            # от нуля процент не посчитать так что любой рост того что должно быть меньше уже просадка
+            worse = metric["value"] > 0 if metric["better"] == "lower" else False
+            rows.append((name, base.get("value"), metric["value"], None, "regression" if worse else "ok"))
+            continue
+        change = (metric["value"] - base["value"]) / base["value"]
+        if metric["better"] == "lower":
+            change = -change
+        if change < -tolerance:
+            status = "regression"
+        elif change > tolerance:
+            status = "better"
+        else:
+            status = "ok"
+        rows.append((name, base["value"], metric["value"], change, status))
+    for name in sorted(set(base_metrics) - set(results["metrics"])):
+        rows.append((name, base_metrics[name].get("value"), None, None, "missing"))
+    return rows
+
+
+def format_table(results: dict, rows: list) -> str:
+    lines = [f"{'metric':24} {'baseline':>12} {'current':>12} {'unit':>10} {'change':>8}  status"]
+    metrics = results["metrics"]
+    for name, base, value, change, status in rows:
+        unit = metrics[name]["unit"] if name in metrics else ""
+        base_text = f"{base:12.2f}" if base is not None else f"{'-':>12}"
+        value_text = f"{value:12.2f}" if value is not None else f"{'-':>12}"
+        change_text = f"{change * 100:+7.1f}%" if change is not None else f"{'':>8}"
+        lines.append(f"{name:24} {base_text} {value_text} {unit:>10} {change_text}  {status}")
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="python -m benchmarks", description="Offline benchmarks for Bruce Launcher.")
+    p.add_argument("--only", help=f"comma separated benchmarks to run: {', '.join(BENCHMARKS)}")
+    p.add_argument("--repeat", type=int, default=3, help="runs per benchmark, the best value of each metric is kept")
+    p.add_argument("--quick", action="store_true", help="smaller data sizes for a fast smoke run")
+    p.add_argument("--esptool-rate", type=float, default=0,
+                   help="link speed of the fake esptool in bytes/s, 0 for as fast as possible")
+    p.add_argument("--serial-rate", type=float, default=SERIAL_RATE,
+                   help="bytes/s for the paced serial console run, the fast run always floods the pty")
+    p.add_argument("--output", "-o", help="write the results JSON here")
+    p.add_argument("--baseline", default=BASELINE_PATH, help="baseline results to compare with")
+    p.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    p.add_argument("--tolerance", type=float, default=TOLERANCE,
+                   help="how much worse than the baseline a metric may get before it counts as a regression")
+    return p
+
+
+def main(argv: list = None) -> int:
+    args = build_parser().parse_args(argv)
+    names = list(BENCHMARKS)
+    if args.only:
+        names = [name.strip() for name in args.only.split(",") if name.strip()]
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            sys.stderr.write(f"unknown benchmark(s): {', '.join(unknown)}\n")
+            return EXIT_USAGE
+
+    def log(msg: str):
+        sys.stderr.write(msg + "\n")
+        sys.stderr.flush()
+
+    results = run(names, max(1, args.repeat), args.quick, args.esptool_rate, args.serial_rate, log)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    baseline = {}
+    if os.path.isfile(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("quick") != results["quick"]:
+            log("baseline was recorded with a different --quick setting, sizes differ")
+    rows = compare(results, baseline, args.tolerance)
+    print(format_table(results, rows))
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        log(f"baseline saved to {args.baseline}")
+    if results["errors"]:
+        return EXIT_REGRESSION
+    if any(status == "regression" for *_, status in rows):
+        return EXIT_REGRESSION
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
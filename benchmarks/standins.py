@@ -0,0 +1,201 @@
+"""локальные заменители github и платы чтоб бенчмарки шли без сети и без железа"""
+import hashlib
+import json
+import os
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAKE_ESPTOOL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_esptool.py")
+
+BOARDS = (
+    "m5stack-cardputer", "m5stack-cplus2", "m5stack-cplus1_1", "m5stack-core2", "m5stack-cores3", "lilygo-t-embed-cc1101",
+    "lilygo-t-deck", "lilygo-t-display-s3", "CYD-2432S028", "CYD-2USB", "esp32-s3-devkitc-1", "esp32-c5", "marauder-mini",
+    "smoochiee-board", "phantom_s3", "headless-esp32",
+)
+
+
+def github_releases(count: int, assets_per_release: int = 45, seed: int = 1) -> list:
+    """сырые релизы в том виде как их отдает api github со всеми лишними полями"""
+    rnd = random.Random(seed)
+    releases = []
+    for n in range(count):
+        major, minor, patch = 1, 20 - n // 40, (n // 4) % 10
+        tag = f"{major}.{minor}.{patch}" + (f"-beta{n % 4}" if n % 4 else "")
+        assets = []
+        for i in range(assets_per_release):
+            board = BOARDS[i % len(BOARDS)]
+            name = f"Bruce-{board}.bin" if i < len(BOARDS) * 2 else f"Bruce-{board}-{i}.elf.zip"
+            assets.append({
+                "url": f"https://api.github.com/repos/BruceDevices/firmware/releases/assets/{n * 1000 + i}",
+                "id": n * 1000 + i,
+                "node_id": hashlib.md5(name.encode()).hexdigest(),
+                "name": name,
+                "label": "",
+                "uploader": {"login": "github-actions[bot]", "id": 41898282, "type": "Bot", "site_admin": False},
+                "content_type": "application/octet-stream",
+                "state": "uploaded",
+                "size": rnd.randint(900_000, 3_800_000),
+                "download_count": rnd.randint(0, 50_000),
+                "created_at": "2025-01-01T00:00:00Z",
+                "updated_at": "2025-01-01T00:00:00Z",
+                "browser_download_url": f"https://github.com/BruceDevices/firmware/releases/download/{tag}/{name}",
+            })
+        releases.append({
+            "url": f"https://api.github.com/repos/BruceDevices/firmware/releases/{n}",
+            "id": n,
+            "tag_name": tag,
+            "target_commitish": "main",
+            "name": f"Bruce {tag}",
+            "draft": False,
+            "prerelease": bool(n % 4),
+            "created_at": "2025-01-01T00:00:00Z",
+            "published_at": "2025-01-01T00:00:00Z",
+            "author": {"login": "bmorcelli", "id": 1, "type": "User", "site_admin": False},
+            "assets": assets,
+            "body": "## Changes\n" + "\n".join(f"- fix {rnd.getrandbits(32):08x}" for _ in range(20)),
+        })
+    return releases
+
+
+def console_text(size: int, seed: int = 2) -> bytes:
+    """похоже на вывод bruce в консоль \\r\\n кириллица и длинные строки вперемешку"""
+    rnd = random.Random(seed)
+    lines = [
+        "[  %d][I][WiFi.cpp:312] scan done: %d networks",
+        "[  %d][D][BLE] adv 24:0a:c4:%02x:%02x:%02x rssi=-%d",
+        "[  %d][W][sd] Карта не найдена, повтор через %d мс",
+        "[  %d][I][ir] NEC addr=0x%04X cmd=0x%04X",
+    ]
+    out = bytearray()
+    t = 0
+    while len(out) < size:
+        t += rnd.randint(1, 40)
+        fmt = rnd.choice(lines)
+        args = (t,) + tuple(rnd.randint(0, 255) for _ in range(fmt.count("%") - 1))
+        line = fmt % args
+        if rnd.random() < 0.05:
+            line += " " + "x" * rnd.randint(200, 2000)
+        out += line.encode("utf-8") + b"\r\n"
+    return bytes(out[:size])
+
+
+def flash_image(size: int, seed: int = 3) -> bytes:
+    """как снятый флеш примерно треть прошивки (почти не жмется) немного nvs и текста а остальное пустое"""
+    rnd = random.Random(seed)
+    app = rnd.randbytes(size // 3)
+    text = console_text(size // 8, seed)
+    return app + text + b"\xff" * (size - len(app) - len(text))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, code: int, body: bytes = b"", headers: dict = None):
+        self.send_response(code)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        path, _, query = self.path.partition("?")
+        if path == "/releases":
+            params = dict(p.split("=", 1) for p in query.split("&") if "=" in p)
+            page = int(params.get("page", 1))
+            etag, body = server.pages.get(page, ('"empty"', b"[]"))
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, headers={"ETag": etag})
+                return
+            last = len(server.pages)
+            link = f'<{server.url}/releases?per_page=100&page={last}>; rel="last"'
+            self._send(200, body, {"Content-Type": "application/json", "ETag": etag, "Link": link,
+                                   "X-RateLimit-Remaining": "4999"})
+            return
+        if path.startswith("/assets/"):
+            data = server.assets.get(path[len("/assets/"):])
+            if data is None:
+                self._send(404)
+                return
+            self._send_range(data)
+            return
+        self._send(404)
+
+    def _send_range(self, data: bytes):
+        total = len(data)
+        etag = self.server.asset_etags[id(data)]
+        header = self.headers.get("Range", "")
+        self.server.ranges_asked.append(header)
+        if not header.startswith("bytes=") or not self.server.ranges:
+            self._send_stream(200, data, 0, total - 1, {"ETag": etag, "Accept-Ranges": "bytes"})
+            return
+        start, _, end = header[len("bytes="):].partition("-")
+        start = int(start)
+        end = min(int(end) if end else total - 1, total - 1)
+        self._send_stream(206, data, start, end, {"ETag": etag, "Content-Range": f"bytes {start}-{end}/{total}"})
+
+    def _send_stream(self, code: int, data: bytes, start: int, end: int, headers: dict):
+        self.send_response(code)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        view = memoryview(data)
+        pos = start
+        try:
+            while pos <= end:
+                chunk = view[pos:min(end + 1, pos + 256 * 1024)]
+                self.wfile.write(chunk)
+                pos += len(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class FakeGitHub:
+    """http сервер на 127.0.0.1 со списком релизов по страницам и файлами с поддержкой Range
+
+    страницы отдаются с ETag и на If-None-Match отвечают 304 как настоящий api
+    с ranges=False файлы всегда отдаются целиком как у сервера без поддержки Range
+    """
+
+    def __init__(self, releases: list = None, assets: dict = None, per_page: int = 100, ranges: bool = True):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.url = self.url
+        self._httpd.pages = {}
+        releases = releases or []
+        for n in range(0, max(1, len(releases)), per_page):
+            body = json.dumps(releases[n:n + per_page]).encode("utf-8")
+            self._httpd.pages[n // per_page + 1] = (f'"{hashlib.md5(body).hexdigest()}"', body)
+        self._httpd.assets = dict(assets or {})
+        self._httpd.asset_etags = {id(data): f'"{hashlib.md5(data).hexdigest()}"' for data in self._httpd.assets.values()}
+        self._httpd.ranges = ranges
+        # заголовки Range всех запросов к файлам по порядку чтоб было видно откуда продолжали
+        self._httpd.ranges_asked = []
+        self._thread = None
+
+    @property
+    def ranges_asked(self) -> list:
+        return self._httpd.ranges_asked
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeGitHub":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        return False
@@ -0,0 +1,4 @@
+"""всякая логика лаунчера без гуи релизы кэши esptool и прочее
+
+тут специально нету импортов qt чтоб это все можно было дергать откуда угодно
+"""
@@ -0,0 +1,77 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Thread
+
+
+class JobResult:
+    """итог одной задачи по одному устройству"""
+
+    def __init__(self, key, ok: bool, error: Exception = None, started: float = 0.0, finished: float = 0.0,
+                 value=None, skipped: bool = False):
+        self.key = key
+        self.ok = ok
+        self.error = error
+        self.started = started
+        self.finished = finished
+        self.value = value
+        self.skipped = skipped
+
+    @property
+    def duration(self) -> float:
+        return max(0.0, self.finished - self.started)
+
+
+class BatchRunner:
+    """гоняет одну и ту же задачу по куче устройств но не больше max_workers одновременно
+
+    fn(key) считается успешной если вернула что-то истинное и не кинула исключение
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max(1, max_workers)
+        self._cancel = Event()
+
+    def cancel(self):
+        """задачи которые еще не начались просто пропускаются а запущенные доработают"""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def _one(self, key, fn, on_start, on_done) -> JobResult:
+        if self._cancel.is_set():
+            result = JobResult(key, False, skipped=True)
+        else:
+            if on_start:
+                on_start(key)
+            started = time.time()
+            try:
+                value = fn(key)
+                result = JobResult(key, bool(value), started=started, finished=time.time(), value=value)
+            except Exception as e:
+                result = JobResult(key, False, error=e, started=started, finished=time.time())
+        if on_done:
+            on_done(result)
+        return result
+
+    def run(self, keys, fn, on_start=None, on_done=None) -> list:
+        """блокирующий запуск возвращает результаты в том же порядке что и keys"""
+        keys = list(keys)
+        if not keys:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(keys))) as pool:
+            futures = [pool.submit(self._one, key, fn, on_start, on_done) for key in keys]
+            return [f.result() for f in futures]
+
+    def start(self, keys, fn, on_start=None, on_done=None, on_finished=None) -> Thread:
+        """то же самое но в фоне а когда все закончится дергается on_finished(results)"""
+
+        def worker():
+            results = self.run(keys, fn, on_start, on_done)
+            if on_finished:
+                on_finished(results)
+
+        t = Thread(target=worker, daemon=True)
+        t.start()
+        return t
@@ -0,0 +1,219 @@
+import os
+import json
+import fnmatch
+from threading import Lock
+
+from bruce_core.esp import parse_size
+from bruce_core.releases import bin_assets
+
+MB = 1024 * 1024
+
+
+class BoardProfile:
+    """какая плата какой bin из релиза ей нужен и как с ней говорить
+
+    по usb vid/pid чипу и размеру флеша узнаем плату а по шаблону имени находим ее файл в релизе
+    baud это потолок скорости для платы если ее адаптер капризный а offset куда пишется bin
+    """
+
+    FIELDS = ("name", "title", "asset", "chip", "flash_size", "usb_ids", "baud", "offset")
+
+    def __init__(self, name: str, asset, chip: str = "", flash_size: int = None, usb_ids=(), title: str = "",
+                 baud: int = None, offset: int = 0):
+        self.name = name
+        self.title = title or name
+        # один шаблон или список шаблонов fnmatch по имени ассета без учета регистра
+        self.asset = [asset] if isinstance(asset, str) else list(asset)
+        self.chip = chip
+        self.flash_size = flash_size
+        self.usb_ids = [(int(vid), int(pid)) for vid, pid in usb_ids]
+        self.baud = baud
+        self.offset = offset
+
+    def matches_asset(self, name: str) -> bool:
+        name = (name or "").lower()
+        return any(fnmatch.fnmatchcase(name, pattern.lower()) for pattern in self.asset)
+
+    def score(self, chip: str = "", flash_size: int = None, vid: int = None, pid: int = None) -> int:
+        """насколько плата похожа на этот профиль 0 значит точно не он или сказать нечего"""
+        if chip and self.chip and chip != self.chip:
+            return 0
+        if flash_size and self.flash_size and flash_size != self.flash_size:
+            return 0
+        score = 0
+        if chip and self.chip:
+            score += 1
+        if flash_size and self.flash_size:
+            score += 1
+        # один и тот же usb мост стоит на куче плат так что совпадение только добавляет уверенности
+        if vid is not None and (vid, pid) in self.usb_ids:
+            score += 2
+        return score
+
+    def to_dict(self) -> dict:
+        data = {name: getattr(self, name) for name in self.FIELDS}
+        data["usb_ids"] = [f"{vid:04x}:{pid:04x}" for vid, pid in self.usb_ids]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BoardProfile":
+        """usb_ids в json строками "303a:1001" flash_size числом байт или строкой "16MB" """
+        usb_ids = []
+        for item in data.get("usb_ids", []):
+            vid, _, pid = str(item).partition(":")
+            usb_ids.append((int(vid, 16), int(pid, 16)))
+        flash_size = data.get("flash_size")
+        if isinstance(flash_size, str):
+            flash_size = parse_size(flash_size)
+        return cls(
+            data["name"],
+            data["asset"],
+            chip=data.get("chip", ""),
+            flash_size=flash_size,
+            usb_ids=usb_ids,
+            title=data.get("title", ""),
+            baud=data.get("baud"),
+            offset=int(str(data.get("offset", 0)), 0),
+        )
+
+    def __repr__(self):
+        return f"BoardProfile({self.name!r})"
+
+
+# usb мосты которые чаще всего стоят на платах под bruce
+_NATIVE_S3 = (0x303A, 0x1001)
+_CH9102 = (0x1A86, 0x55D4)
+_CH340 = (0x1A86, 0x7523)
+_CP210X = (0x10C4, 0xEA60)
+
+# встроенные профили свои можно добавить или переопределить по имени в boards.json
+DEVICE_PROFILES = [
+    BoardProfile("m5stack-cardputer", "*m5stack-cardputer*.bin", "esp32s3", 8 * MB, [_NATIVE_S3], "M5Stack Cardputer"),
+    BoardProfile("m5stack-cplus2", "*m5stack-cplus2*.bin", "esp32", 8 * MB, [_CH9102], "M5StickC Plus2"),
+    BoardProfile("m5stack-cplus1_1", "*m5stack-cplus1_1*.bin", "esp32", 4 * MB, [_CH9102],
+                 "M5StickC Plus 1.1", baud=1500000),
+    BoardProfile("m5stack-core2", "*m5stack-core2*.bin", "esp32", 16 * MB, [_CP210X, _CH9102], "M5Stack Core2"),
+    BoardProfile("m5stack-cores3", "*m5stack-cores3*.bin", "esp32s3", 16 * MB, [_NATIVE_S3], "M5Stack CoreS3"),
+    BoardProfile("lilygo-t-embed-cc1101", "*t-embed-cc1101*.bin", "esp32s3", 16 * MB, [_NATIVE_S3],
+                 "LilyGo T-Embed CC1101"),
+    BoardProfile("lilygo-t-deck", "*t-deck*.bin", "esp32s3", 16 * MB, [_NATIVE_S3], "LilyGo T-Deck"),
+    BoardProfile("lilygo-t-display-s3", "*t-display-s3*.bin", "esp32s3", 16 * MB, [_NATIVE_S3],
+                 "LilyGo T-Display S3"),
+    BoardProfile("cyd-2432s028", "*cyd-2432s028*.bin", "esp32", 4 * MB, [_CH340], "CYD 2432S028"),
+    BoardProfile("esp32-s3-devkitc-1", "*esp32-s3-devkitc*.bin", "esp32s3", 8 * MB, [_NATIVE_S3, _CP210X],
+                 "ESP32-S3-DevKitC-1"),
+]
+
+
+def load_profiles(path: str = None) -> list:
+    """встроенные профили плюс те что лежат в json профиль с тем же name заменяет встроенный"""
+    profiles = {p.name: p for p in DEVICE_PROFILES}
+    if path and os.path.isfile(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for item in data.get("boards", []):
+                profile = BoardProfile.from_dict(item)
+                profiles[profile.name] = profile
+        except Exception:
+            pass
+    return list(profiles.values())
+
+
+def find_profile(profiles: list, name: str):
+    name = (name or "").lower()
+    return next((p for p in profiles if p.name.lower() == name), None)
+
+
+def match_boards(profiles: list, chip: str = "", flash_size: int = None, vid: int = None, pid: int = None) -> list:
+    """профили которые подходят плате от самого похожего [(очки, профиль)]"""
+    scored = [(p.score(chip, flash_size, vid, pid), p) for p in profiles]
+    scored = [(score, p) for score, p in scored if score > 0]
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return scored
+
+
+def best_board(profiles: list, identity=None, vid: int = None, pid: int = None):
+    """профиль платы если его можно выбрать без человека иначе None
+
+    плата за которой уже закреплен профиль берет его а иначе нужен единственный лучший кандидат
+    один usb мост ничего не доказывает (ch340 стоит и на cyd и на любой дешевой devkit)
+    так что без совпадения чипа или размера флеша профиль сами не выбираем
+    """
+    if identity is None:
+        return None
+    pinned = find_profile(profiles, getattr(identity, "board", ""))
+    if pinned is not None:
+        return pinned
+    if vid is None:
+        vid, pid = identity.vid, identity.pid
+    chip, flash_size = identity.chip, identity.flash_size
+    scored = match_boards(profiles, chip, flash_size, vid, pid)
+    if not scored or (len(scored) > 1 and scored[0][0] == scored[1][0]):
+        return None
+    best = scored[0][1]
+    if best.score(chip, flash_size) == 0:
+        return None
+    return best
+
+
+class AssetIndex:
+    """заранее посчитанное какой bin в каком релизе подходит какому профилю
+
+    считается один раз на релиз когда пришел список а при прошивке это уже просто поиск в словаре
+    """
+
+    def __init__(self, profiles: list):
+        self.profiles = list(profiles)
+        self._lock = Lock()
+        # tag -> (имена ассетов, {имя профиля: ассет})
+        self._index = {}
+
+    def _build(self, rel: dict) -> dict:
+        mapping = {}
+        bins = bin_assets(rel)
+        for profile in self.profiles:
+            matched = [a for a in bins if profile.matches_asset(a.get("name"))]
+            if matched:
+                # если под шаблон попало несколько берем самое короткое имя оно обычно и есть базовая сборка
+                mapping[profile.name] = min(matched, key=lambda a: len(a.get("name") or ""))
+        return mapping
+
+    def update(self, releases: list):
+        """пересчитывает только новые релизы и те у которых поменялся набор файлов"""
+        with self._lock:
+            fresh = {}
+            for rel in releases:
+                tag = rel.get("tag")
+                names = tuple(sorted(a.get("name") or "" for a in rel.get("assets", [])))
+                known = self._index.get(tag)
+                fresh[tag] = known if known is not None and known[0] == names else (names, self._build(rel))
+            self._index = fresh
+
+    def assets(self, rel: dict) -> dict:
+        """{имя профиля: ассет} для релиза"""
+        with self._lock:
+            entry = self._index.get(rel.get("tag"))
+        if entry is None:
+            self.update_one(rel)
+            with self._lock:
+                entry = self._index.get(rel.get("tag"))
+        return entry[1]
+
+    def update_one(self, rel: dict):
+        names = tuple(sorted(a.get("name") or "" for a in rel.get("assets", [])))
+        mapping = self._build(rel)
+        with self._lock:
+            self._index[rel.get("tag")] = (names, mapping)
+
+    def asset_for(self, rel: dict, profile: BoardProfile):
+        if profile is None:
+            return None
+        return self.assets(rel).get(profile.name)
+
+    def profile_for_asset(self, rel: dict, asset: dict):
+        """профиль для которого этот ассет если он такой один"""
+        names = [name for name, a in self.assets(rel).items() if a.get("name") == asset.get("name")]
+        if len(names) != 1:
+            return None
+        return find_profile(self.profiles, names[0])
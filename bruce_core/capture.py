@@ -0,0 +1,120 @@
+import os
+import time
+import queue
+import struct
+from threading import Thread
+
+# файл записи это заголовок а дальше записи вида (время double, длина uint32, сырые байты)
+CAPTURE_MAGIC = b"BRUCECAP1\n"
+CAPTURE_EXT = ".bcap"
+_RECORD = struct.Struct("<dI")
+
+
+class CaptureWriter:
+    """пишет сырой поток с порта в файлы с отметкой времени на каждый кусок
+
+    сам поток чтения порта только кладет кусок в очередь а на диск пишет отдельный поток
+    так что медленный диск не тормозит вычитывание порта если очередь забилась кусок выкидывается
+    файл меняется на новый когда дорос до max_bytes или прожил max_seconds
+    """
+
+    def __init__(self, directory: str, prefix: str = "capture", max_bytes: int = 64 * 1024 * 1024,
+                 max_seconds: float = 3600, queue_size: int = 4096):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.bytes_written = 0
+        self.dropped_chunks = 0
+        self.dropped_bytes = 0
+        self.files = []
+        self.error = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._file_size = 0
+        self._file_started = 0.0
+        os.makedirs(directory, exist_ok=True)
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def current_path(self):
+        return self.files[-1] if self.files else None
+
+    def write(self, data: bytes, timestamp: float = None):
+        """никогда не блокирует вызывающий поток"""
+        try:
+            self._queue.put_nowait((timestamp if timestamp is not None else time.time(), bytes(data)))
+        except queue.Full:
+            self.dropped_chunks += 1
+            self.dropped_bytes += len(data)
+
+    def close(self, timeout: float = 5.0):
+        """ждем пока писатель допишет очередь но не дольше timeout
+        если он уже умер с ошибкой то забитую очередь никто не разберет и put без таймаута висел бы вечно
+        """
+        if self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+        self._thread.join(timeout)
+
+    def _new_path(self, timestamp: float) -> str:
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(timestamp))
+        path = os.path.join(self.directory, f"{self.prefix}_{stamp}{CAPTURE_EXT}")
+        n = 1
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f"{self.prefix}_{stamp}_{n}{CAPTURE_EXT}")
+            n += 1
+        return path
+
+    def _rotate(self, timestamp: float):
+        if self._file is not None:
+            self._file.close()
+        path = self._new_path(timestamp)
+        self._file = open(path, "wb")
+        self._file.write(CAPTURE_MAGIC)
+        self._file_size = len(CAPTURE_MAGIC)
+        self._file_started = timestamp
+        self.files.append(path)
+
+    def _run(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                timestamp, data = item
+                if (self._file is None or self._file_size >= self.max_bytes
+                        or timestamp - self._file_started >= self.max_seconds):
+                    self._rotate(timestamp)
+                self._file.write(_RECORD.pack(timestamp, len(data)))
+                self._file.write(data)
+                self._file_size += _RECORD.size + len(data)
+                self.bytes_written += len(data)
+                # сбрасываем на диск только когда очередь опустела чтоб не дергать fsync на каждый кусок
+                if self._queue.empty():
+                    self._file.flush()
+        except Exception as e:
+            self.error = e
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_capture(path: str):
+    """генератор (время, байты) по файлу записи оборванный хвост просто пропускается"""
+    with open(path, "rb") as f:
+        if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"not a capture file: {path}")
+        while True:
+            header = f.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                return
+            timestamp, length = _RECORD.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                return
+            yield timestamp, data
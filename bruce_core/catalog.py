@@ -0,0 +1,364 @@
+"""каталог бэкапов sqlite рядом с остальными файлами лаунчера
+
+про каждый бэкап помним чья это плата (mac) чип размер флеша версию прошивки когда снят размер и sha256 файла
+так что при восстановлении последний бэкап этой платы находится сразу без диалога с файлами
+а старые бэкапы можно чистить по правилам хранения
+"""
+import os
+import time
+import sqlite3
+from threading import Lock
+
+from bruce_core.container import BBK_EXT, BackupContainer, is_container, open_image
+from bruce_core.fwcache import file_sha256
+from bruce_core.partitions import image_firmware
+
+SCHEMA_VERSION = 1
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS backups (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mac TEXT NOT NULL DEFAULT '',
+    chip TEXT NOT NULL DEFAULT '',
+    flash_size INTEGER,
+    firmware TEXT NOT NULL DEFAULT '',
+    kind TEXT NOT NULL DEFAULT 'full',
+    partition TEXT NOT NULL DEFAULT '',
+    port TEXT NOT NULL DEFAULT '',
+    offset INTEGER NOT NULL DEFAULT 0,
+    image_size INTEGER NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL DEFAULT 0,
+    sha256 TEXT NOT NULL DEFAULT '',
+    image_sha256 TEXT NOT NULL DEFAULT '',
+    created REAL NOT NULL,
+    pinned INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS backups_device ON backups (mac, kind, created);
+CREATE INDEX IF NOT EXISTS backups_created ON backups (created);
+"""
+
+KINDS = ("full", "incremental", "partition")
+# инкрементальный бэкап тоже целый образ флеша так что восстанавливать можно и его
+IMAGE_KINDS = ("full", "incremental")
+
+
+class BackupRecord:
+    """одна строка каталога kind это full incremental или partition"""
+
+    FIELDS = ("path", "mac", "chip", "flash_size", "firmware", "kind", "partition", "port", "offset", "image_size",
+              "size", "sha256", "image_sha256", "created", "pinned")
+
+    def __init__(self, path: str, mac: str = "", chip: str = "", flash_size: int = None, firmware: str = "",
+                 kind: str = "full", partition: str = "", port: str = "", offset: int = 0, image_size: int = 0,
+                 size: int = 0, sha256: str = "", image_sha256: str = "", created: float = 0.0, pinned: bool = False,
+                 id: int = None):
+        self.id = id
+        self.path = path
+        self.mac = mac or ""
+        self.chip = chip or ""
+        self.flash_size = flash_size
+        self.firmware = firmware or ""
+        self.kind = kind
+        self.partition = partition or ""
+        self.port = port or ""
+        self.offset = offset
+        self.image_size = image_size
+        self.size = size
+        self.sha256 = sha256
+        self.image_sha256 = image_sha256
+        self.created = created
+        self.pinned = bool(pinned)
+
+    @property
+    def exists(self) -> bool:
+        return os.path.isfile(self.path)
+
+    @property
+    def group(self) -> tuple:
+        """бэкапы одной платы одного вида правила хранения считают внутри группы"""
+        return self.mac, self.kind, self.partition
+
+    def to_dict(self) -> dict:
+        data = {name: getattr(self, name) for name in self.FIELDS}
+        data["created"] = round(self.created, 3)
+        return data
+
+    @classmethod
+    def from_row(cls, row) -> "BackupRecord":
+        return cls(**dict(row))
+
+    def __repr__(self):
+        return f"BackupRecord({self.path!r}, {self.mac!r}, {self.kind!r})"
+
+
+class RetentionPolicy:
+    """что из старых бэкапов можно удалять 0 в любом поле значит без ограничения
+
+    keep_last сколько последних бэкапов держать на каждую плату и вид бэкапа
+    max_age_days старше этого удаляются max_total_mb общий потолок места на все бэкапы
+    самый свежий целый образ (полный или инкрементальный) каждой платы и закрепленные не удаляются никогда
+    """
+
+    def __init__(self, keep_last: int = 0, max_age_days: float = 0, max_total_mb: int = 0):
+        self.keep_last = keep_last
+        self.max_age_days = max_age_days
+        self.max_total_mb = max_total_mb
+
+    @property
+    def empty(self) -> bool:
+        return not (self.keep_last or self.max_age_days or self.max_total_mb)
+
+    @classmethod
+    def from_settings(cls, settings) -> "RetentionPolicy":
+        return cls(settings.backup_keep_last, settings.backup_max_age_days, settings.backup_max_total_mb)
+
+    def select(self, records: list, now: float = None) -> list:
+        """какие записи удалить records любые в любом порядке"""
+        now = time.time() if now is None else now
+        newest = sorted(records, key=lambda r: r.created, reverse=True)
+        protected = set()
+        latest_image = set()
+        for r in newest:
+            if r.pinned:
+                protected.add(r.path)
+            elif r.kind in IMAGE_KINDS and r.mac not in latest_image:
+                # без mac нельзя сказать чей это бэкап так что последний из безымянных тоже бережем
+                latest_image.add(r.mac)
+                protected.add(r.path)
+        doomed = []
+        seen = {}
+        for r in newest:
+            position = seen[r.group] = seen.get(r.group, 0) + 1
+            if r.path in protected:
+                continue
+            if self.keep_last and position > self.keep_last:
+                doomed.append(r)
+            elif self.max_age_days and now - r.created > self.max_age_days * 86400:
+                doomed.append(r)
+        if self.max_total_mb:
+            limit = self.max_total_mb * 1024 * 1024
+            gone = {r.path for r in doomed}
+            total = sum(r.size for r in newest if r.path not in gone)
+            for r in reversed(newest):
+                if total <= limit:
+                    break
+                if r.path in protected or r.path in gone:
+                    continue
+                doomed.append(r)
+                total -= r.size
+        return doomed
+
+
+class BackupCatalog:
+    """индекс бэкапов в sqlite общий для гуи командной строки и пакетных задач
+
+    add(saved) зовется сразу после save_image sha256 там уже посчитан при записи файла
+    доступ из разных потоков идет через один замок на соединение
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            try:
+                self._db.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.DatabaseError:
+                pass
+            self._db.executescript(_SCHEMA)
+            self._db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _query(self, sql: str, args=()) -> list:
+        with self._lock:
+            rows = self._db.execute(sql, args).fetchall()
+        return [BackupRecord.from_row(row) for row in rows]
+
+    # запись
+
+    def put(self, record: BackupRecord) -> BackupRecord:
+        """новая запись или замена старой с тем же путем файл перезаписали значит и запись новая"""
+        record.path = os.path.abspath(record.path)
+        fields = BackupRecord.FIELDS
+        values = [getattr(record, name) for name in fields]
+        with self._lock, self._db:
+            cur = self._db.execute(
+                f"INSERT OR REPLACE INTO backups ({', '.join(fields)}) VALUES ({', '.join('?' * len(fields))})",
+                values,
+            )
+            record.id = cur.lastrowid
+        return record
+
+    def add(self, saved, port: str = "", kind: str = "full") -> BackupRecord:
+        """запись по SavedImage из save_image версию прошивки читаем из заголовка приложения в файле"""
+        meta = saved.meta
+        if meta.get("partition"):
+            kind = "partition"
+        record = BackupRecord(
+            saved.path,
+            mac=meta.get("mac", ""),
+            chip=meta.get("chip", ""),
+            flash_size=meta.get("flash_size"),
+            firmware=meta.get("firmware") or self._firmware(saved.path, saved.offset),
+            kind=kind,
+            partition=meta.get("partition", ""),
+            port=port,
+            offset=saved.offset,
+            image_size=saved.image_size,
+            size=saved.size,
+            sha256=saved.sha256,
+            image_sha256=saved.image_sha256,
+            created=meta.get("created") or time.time(),
+        )
+        return self.put(record)
+
+    def add_file(self, path: str, meta: dict = None, port: str = "", kind: str = "full") -> BackupRecord:
+        """бэкап который писали не мы (esptool в отдельном процессе или старый файл) тут хэш отдельным проходом"""
+        meta = dict(meta or {})
+        offset = meta.get("offset", 0)
+        image_size = os.path.getsize(path)
+        image_sha256 = ""
+        if is_container(path):
+            with BackupContainer(path) as container:
+                meta = dict(container.meta, **meta)
+                offset = container.offset
+                image_size = container.image_size
+                image_sha256 = container.sha256.hex()
+        sha256 = file_sha256(path)
+        if meta.get("partition"):
+            kind = "partition"
+        record = BackupRecord(
+            path,
+            mac=meta.get("mac", ""),
+            chip=meta.get("chip", ""),
+            flash_size=meta.get("flash_size"),
+            firmware=meta.get("firmware") or self._firmware(path, offset),
+            kind=kind,
+            partition=meta.get("partition", ""),
+            port=port,
+            offset=offset,
+            image_size=image_size,
+            size=os.path.getsize(path),
+            sha256=sha256,
+            image_sha256=image_sha256 or sha256,
+            created=meta.get("created") or os.path.getmtime(path),
+        )
+        return self.put(record)
+
+    @staticmethod
+    def _firmware(path: str, offset: int) -> str:
+        try:
+            with open_image(path) as image:
+                return image_firmware(image, offset)
+        except Exception:
+            return ""
+
+    def set_pinned(self, path: str, pinned: bool = True):
+        with self._lock, self._db:
+            self._db.execute("UPDATE backups SET pinned = ? WHERE path = ?", (int(pinned), os.path.abspath(path)))
+
+    def remove(self, record: BackupRecord, delete_file: bool = True):
+        if delete_file:
+            try:
+                os.remove(record.path)
+            except FileNotFoundError:
+                pass
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM backups WHERE path = ?", (record.path,))
+
+    # поиск
+
+    def get(self, path: str):
+        found = self._query("SELECT * FROM backups WHERE path = ?", (os.path.abspath(path),))
+        return found[0] if found else None
+
+    def latest(self, mac: str, kinds: tuple = IMAGE_KINDS):
+        """последний бэкап этой платы из kinds файл которого еще на месте или None"""
+        if not mac:
+            return None
+        marks = ", ".join("?" * len(kinds))
+        for record in self._query(
+            f"SELECT * FROM backups WHERE mac = ? AND kind IN ({marks}) ORDER BY created DESC LIMIT 20",
+            (mac,) + tuple(kinds),
+        ):
+            if record.exists:
+                return record
+        return None
+
+    def search(self, text: str = "", mac: str = "", kind: str = "", limit: int = 500) -> list:
+        """от свежих к старым text ищется в пути mac чипе версии прошивки порту и метке раздела"""
+        where = []
+        args = []
+        if mac:
+            where.append("mac = ?")
+            args.append(mac)
+        if kind:
+            where.append("kind = ?")
+            args.append(kind)
+        for word in text.split():
+            pattern = f"%{word}%"
+            where.append("(path LIKE ? OR mac LIKE ? OR chip LIKE ? OR firmware LIKE ? OR port LIKE ? OR partition LIKE ?)")
+            args.extend([pattern] * 6)
+        sql = "SELECT * FROM backups"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return self._query(sql, args)
+
+    def devices(self) -> list:
+        """mac всех плат у которых есть бэкапы от недавних к давним"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT mac FROM backups WHERE mac != '' GROUP BY mac ORDER BY MAX(created) DESC"
+            ).fetchall()
+        return [row["mac"] for row in rows]
+
+    def total_size(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM backups").fetchone()[0]
+
+    # обслуживание
+
+    def verify(self, record: BackupRecord) -> bool:
+        """файл на месте и не поменялся с тех пор как его записали"""
+        return record.exists and file_sha256(record.path) == record.sha256
+
+    def sync(self) -> int:
+        """выкидывает записи про файлы которых больше нет вернет сколько выкинули"""
+        missing = [r for r in self._query("SELECT * FROM backups") if not r.exists]
+        for record in missing:
+            self.remove(record, delete_file=False)
+        return len(missing)
+
+    def scan(self, directory: str) -> list:
+        """заносит в каталог бэкапы из папки про которые он еще не знает например снятые до появления каталога"""
+        added = []
+        if not os.path.isdir(directory):
+            return added
+        known = {r.path for r in self._query("SELECT * FROM backups")}
+        for name in sorted(os.listdir(directory)):
+            path = os.path.abspath(os.path.join(directory, name))
+            if path in known or not name.lower().endswith((BBK_EXT, ".bin")) or not os.path.isfile(path):
+                continue
+            try:
+                added.append(self.add_file(path))
+            except Exception:
+                continue
+        return added
+
+    def prune(self, policy: RetentionPolicy, dry_run: bool = False) -> list:
+        """удаляет файлы и записи по правилам хранения вернет что удалили или удалили бы"""
+        if policy.empty:
+            return []
+        doomed = policy.select(self._query("SELECT * FROM backups"))
+        if not dry_run:
+            for record in doomed:
+                self.remove(record)
+        return doomed
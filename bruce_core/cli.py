@@ -0,0 +1,838 @@
+"""лаунчер из командной строки без окон и без qt
+
+bruce_launcher.py releases|flash|backup|restore|backups|monitor|provision|station делает то же что кнопки в гуи
+на той же логике релизов кэша прошивок и сессий esptool
+по умолчанию в stdout идут json строки по одной на событие а с --format text обычный текст
+код выхода говорит что именно пошло не так так что скрипты могут решать что делать дальше
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from threading import Event, Lock
+
+import serial
+
+from bruce_core.batch import BatchRunner
+from bruce_core.boards import AssetIndex, find_profile, load_profiles
+from bruce_core.capture import CaptureWriter
+from bruce_core.catalog import BackupCatalog, RetentionPolicy
+from bruce_core.container import BBK_EXT
+from bruce_core.devices import DeviceManager
+from bruce_core.diffflash import diff_flash
+from bruce_core.download import RangedDownloader
+from bruce_core.esp import VerifyError, is_link_error
+from bruce_core.fwcache import FirmwareCache
+from bruce_core.identity import IdentityStore
+from bruce_core.incremental import incremental_backup, manifest_path
+from bruce_core.linkprofile import LinkProfileStore
+from bruce_core.manifest import (
+    DeviceSpec,
+    Manifest,
+    ManifestError,
+    Provisioner,
+    load_manifest,
+    report_path,
+    run_manifest,
+    write_report,
+)
+from bruce_core.operations import backup_flash, default_backup_name, flash_image
+from bruce_core.partitions import (
+    backup_partitions,
+    image_partition_table,
+    read_partition_table,
+    safe_label,
+    select_partitions,
+)
+from bruce_core.ports import default_registry
+from bruce_core.progress import ProgressEvent, ProgressTracker, format_bytes, format_eta
+from bruce_core.releases import ReleaseIndex, bin_assets, match_assets, pick_release
+from bruce_core.restore import DEFAULT_RETRIES, verified_restore
+from bruce_core.serialio import SerialReader
+from bruce_core.settings import (
+    APP_VERSION,
+    BOARDS_PATH,
+    CAPTURES_DIR,
+    CATALOG_PATH,
+    DEVICES_PATH,
+    LINKS_PATH,
+    RELEASES_CACHE_PATH,
+    REPORTS_DIR,
+    AppSettings,
+)
+from bruce_core.station import Station
+
+EXIT_OK = 0
+# операция не удалась по причине которая не попала в остальные коды
+EXIT_ERROR = 1
+# неправильные аргументы так же отвечает сам argparse
+EXIT_USAGE = 2
+# порт не открылся плата не ответила или связь порвалась
+EXIT_DEVICE = 3
+# не достучались до github или не скачалась прошивка
+EXIT_NETWORK = 4
+# записали но флеш не совпал с тем что писали
+EXIT_VERIFY = 5
+# нет такого релиза файла в релизе раздела или файла на диске
+EXIT_NOT_FOUND = 6
+EXIT_INTERRUPTED = 130
+
+
+class CliError(Exception):
+    def __init__(self, message: str, code: int = EXIT_ERROR):
+        super().__init__(message)
+        self.code = code
+
+
+def exit_code_for(exc: BaseException) -> int:
+    if isinstance(exc, CliError):
+        return exc.code
+    if isinstance(exc, ManifestError):
+        return EXIT_USAGE
+    if isinstance(exc, VerifyError):
+        return EXIT_VERIFY
+    if is_link_error(exc):
+        return EXIT_DEVICE
+    if isinstance(exc, FileNotFoundError):
+        return EXIT_NOT_FOUND
+    return EXIT_ERROR
+
+
+class Reporter:
+    """все что команда сообщает наружу json строками или текстом
+
+    события log progress и в конце одно result или error
+    прогресс по каждой стадии прореживается до целых процентов чтоб не заваливать stdout
+    """
+
+    def __init__(self, fmt: str = "json", stream=None):
+        self.fmt = fmt
+        self.stream = stream or sys.stdout
+        self._lock = Lock()
+        self._trackers = {}
+        self._last = {}
+
+    def emit(self, event: str, **fields):
+        with self._lock:
+            if self.fmt == "json":
+                record = {"event": event, "time": round(time.time(), 3)}
+                record.update(fields)
+                self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            else:
+                text = self._text(event, fields)
+                if text is None:
+                    return
+                self.stream.write(text + "\n")
+            self.stream.flush()
+
+    @staticmethod
+    def _text(event: str, fields: dict):
+        if event == "log":
+            return fields["message"]
+        if event == "line":
+            return fields["text"]
+        if event == "progress":
+            parts = [f"{fields['stage']} {fields['percent']:.0f}%"]
+            if fields.get("rate"):
+                parts.append(f"{format_bytes(fields['rate'])}/s")
+            if fields.get("eta"):
+                parts.append(f"ETA {format_eta(fields['eta'])}")
+            return " · ".join(parts)
+        if event == "device":
+            text = f"{fields['port'] or fields['device']}: {fields['status']} in {fields['duration']:.1f} s"
+            return text + (f" ({fields['error']})" if fields.get("error") else "")
+        if event == "error":
+            return f"error: {fields['message']}"
+        if event == "result":
+            return fields.get("message")
+        return None
+
+    def log(self, message: str):
+        self.emit("log", message=message)
+
+    def progress(self, event: ProgressEvent, total: int = None):
+        tracker = self._trackers.get(event.stage)
+        if tracker is None:
+            tracker = self._trackers[event.stage] = ProgressTracker(total)
+        tracker.update(event)
+        if tracker.percent is None:
+            return
+        percent = int(tracker.percent)
+        # в текстовом режиме хватит каждых 10% а в json каждый процент
+        step = percent // 10 if self.fmt == "text" else percent
+        if not event.final and self._last.get(event.stage) == step:
+            return
+        self._last[event.stage] = step
+        self.emit(
+            "progress",
+            stage=event.stage,
+            percent=round(tracker.percent, 1),
+            done=tracker.done,
+            total=tracker.total,
+            rate=round(tracker.rate, 1) if tracker.rate else None,
+            eta=round(tracker.eta, 1) if tracker.eta and not tracker.final else None,
+        )
+        if event.final:
+            del self._trackers[event.stage]
+            self._last.pop(event.stage, None)
+
+    def callback(self, stage: str):
+        """progress(сделано, всего) для EspSession и операций из bruce_core"""
+
+        def cb(done: int, total: int):
+            self.progress(ProgressEvent(stage, done=done, total=total, final=done >= total))
+
+        return cb
+
+    def counter(self, stage: str):
+        """progress(сколько блоков, всего блоков) для сверки md5 где байты не считаются"""
+
+        def cb(done: int, total: int):
+            self.progress(ProgressEvent(stage, percent=done * 100.0 / total, final=done >= total))
+
+        return cb
+
+
+class Cli:
+    def __init__(self, args, reporter: Reporter):
+        self.args = args
+        self.out = reporter
+        self.settings = AppSettings()
+        if getattr(args, "chip", None):
+            self.settings.chip_type = args.chip
+        self._devices = None
+        self._catalog = None
+        self.boards = load_profiles(BOARDS_PATH)
+
+    @property
+    def devices(self) -> DeviceManager:
+        if self._devices is None:
+            self._devices = DeviceManager(
+                self.settings,
+                IdentityStore(DEVICES_PATH),
+                LinkProfileStore(LINKS_PATH),
+                log=self.out.log,
+                boards=self.boards,
+            )
+        return self._devices
+
+    @property
+    def catalog(self) -> BackupCatalog:
+        if self._catalog is None:
+            self._catalog = BackupCatalog(CATALOG_PATH)
+        return self._catalog
+
+    def prune_backups(self, policy: RetentionPolicy = None, dry_run: bool = False) -> list:
+        """чистит старые бэкапы по правилам хранения из настроек каждый удаленный файл пишется в лог"""
+        removed = self.catalog.prune(policy or RetentionPolicy.from_settings(self.settings), dry_run)
+        verb = "Would remove" if dry_run else "Removed"
+        for record in removed:
+            self.out.log(f"{verb} old backup {record.path} ({format_bytes(record.size)}).")
+        if removed and not dry_run:
+            self.out.log(f"Removed {len(removed)} old backup(s), {format_bytes(sum(r.size for r in removed))}.")
+        return removed
+
+    def board(self):
+        """профиль из --board а без него тот что узнали по плате на порту или None"""
+        name = getattr(self.args, "board", None)
+        if name:
+            board = find_profile(self.boards, name)
+            if board is None:
+                names = ", ".join(p.name for p in self.boards)
+                raise CliError(f"unknown board {name}, known boards: {names}", EXIT_NOT_FOUND)
+            return board
+        if not getattr(self.args, "port", None):
+            return None
+        return self.devices.board_for_port(self.args.port)
+
+    def firmware_cache(self) -> FirmwareCache:
+        return FirmwareCache(
+            self.settings.firmware_dir,
+            self.settings.firmware_cache_mb * 1024 * 1024,
+            downloader=RangedDownloader(connections=self.settings.download_connections),
+        )
+
+    # релизы
+
+    def load_releases(self, refresh: bool = True) -> list:
+        index = ReleaseIndex(RELEASES_CACHE_PATH)
+        if not refresh:
+            releases = index.cached()
+            if not releases:
+                raise CliError("release cache is empty, run without --offline first", EXIT_NETWORK)
+            return releases
+        result = index.refresh(timeout=self.args.timeout)
+        if result.status == "rate_limited":
+            until = time.strftime("%H:%M:%S", time.localtime(index.rate_limited_until()))
+            self.out.log(f"GitHub rate limit exceeded until {until}, using cached list.")
+        elif result.status == "error":
+            self.out.log(f"Failed to refresh releases ({result.error}), using cached list.")
+        if not result.releases:
+            raise CliError(f"no releases available: {result.error or result.status}", EXIT_NETWORK)
+        return result.releases
+
+    def cmd_releases(self) -> dict:
+        releases = self.load_releases(refresh=not self.args.offline)
+        if self.args.limit:
+            releases = releases[: self.args.limit]
+        items = [
+            {
+                "tag": rel.get("tag"),
+                "name": rel.get("name"),
+                "prerelease": bool(rel.get("prerelease")),
+                "assets": [a.get("name") for a in bin_assets(rel)],
+            }
+            for rel in releases
+        ]
+        if self.out.fmt == "text":
+            for item in items:
+                mark = " (prerelease)" if item["prerelease"] else ""
+                self.out.log(f"{item['tag']}{mark}: {item['name']}, {len(item['assets'])} bin files")
+        return {"releases": items, "message": f"{len(items)} releases"}
+
+    def _choose_asset(self, rel: dict, board=None) -> dict:
+        bins = bin_assets(rel)
+        if not bins:
+            raise CliError(f"release {rel.get('tag')} has no .bin files", EXIT_NOT_FOUND)
+        wanted = (self.args.asset or "").lower()
+        if not wanted:
+            if len(bins) == 1:
+                return bins[0]
+            asset = AssetIndex([board]).asset_for(rel, board) if board is not None else None
+            if asset is not None:
+                return asset
+            names = ", ".join(a.get("name") for a in bins)
+            if board is not None:
+                raise CliError(f"release {rel.get('tag')} has no .bin for board {board.name}: {names}",
+                               EXIT_NOT_FOUND)
+            raise CliError(f"release {rel.get('tag')} has several .bin files, pick one with --asset or --board: "
+                           f"{names}", EXIT_USAGE)
+        matches = match_assets(bins, wanted)
+        if len(matches) != 1:
+            names = ", ".join(a.get("name") for a in (matches or bins))
+            reason = "matches several" if matches else "matches none of"
+            raise CliError(f"--asset {self.args.asset} {reason} the .bin files: {names}",
+                           EXIT_USAGE if matches else EXIT_NOT_FOUND)
+        return matches[0]
+
+    # прошивка
+
+    def cmd_flash(self) -> dict:
+        args = self.args
+        cache = None
+        board = self.board()
+        if board is not None:
+            self.out.log(f"Board: {board.title}.")
+            if args.board:
+                self.devices.pin_board(args.port, board.name)
+        if args.file:
+            if not os.path.isfile(args.file):
+                raise CliError(f"file not found: {args.file}", EXIT_NOT_FOUND)
+            path = args.file
+            what = {"file": path}
+        else:
+            rel = pick_release(self.load_releases(refresh=not args.offline), args.release)
+            if rel is None:
+                raise CliError(f"no release matches {args.release}", EXIT_NOT_FOUND)
+            asset = self._choose_asset(rel, board)
+            what = {"release": rel.get("tag"), "asset": asset.get("name")}
+            self.out.log(f"Selected release {rel.get('tag')} ({asset.get('name')}).")
+            cache = self.firmware_cache()
+            path = cache.lookup(asset, pin=True)
+            if path:
+                self.out.log(f"Firmware {rel.get('tag')} ({asset.get('name')}) taken from cache.")
+            else:
+                self.out.log(f"Downloading firmware {rel.get('tag')} ({asset.get('name')})...")
+                try:
+                    path = cache.fetch(
+                        asset,
+                        progress=lambda done, total, rate: self.out.progress(
+                            ProgressEvent("download", done=done, total=total, final=done >= total)
+                        ),
+                        pin=True,
+                    )
+                except Exception as e:
+                    raise CliError(f"download failed: {e}", EXIT_NETWORK)
+
+        offset = args.offset
+        if offset is None:
+            offset = board.offset if board is not None else 0
+        stats = None
+
+        def work(session):
+            nonlocal stats
+            if args.erase:
+                self.out.log("Erasing flash (erase_flash)...")
+                session.erase_all()
+                flash_image(session, path, offset=offset, progress=self.out.callback("write"))
+            elif self.settings.differential_flash and not args.full:
+                stats = diff_flash(
+                    session, path, offset, progress=self.out.callback("write"), hash_progress=self.out.counter("hash")
+                )
+            else:
+                flash_image(session, path, offset=offset, progress=self.out.callback("write"))
+
+        try:
+            self.devices.with_session(args.port, work)
+        finally:
+            if cache is not None:
+                cache.release(path)
+                cache.evict()
+
+        result = dict(what, port=args.port, offset=offset, size=os.path.getsize(path))
+        if board is not None:
+            result["board"] = board.name
+        if stats is not None:
+            result.update(identical=stats.identical, written=stats.written, saved=stats.saved)
+        result["message"] = "Flashing completed successfully."
+        return result
+
+    # бэкап
+
+    def cmd_backup(self) -> dict:
+        args = self.args
+        if args.partitions:
+            return self._backup_partitions()
+        path = args.output or os.path.join(self.settings.backup_dir, default_backup_name(args.port))
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        result = {"port": args.port, "path": path}
+
+        def work(session):
+            size = args.size or session.flash_size()
+            if args.incremental:
+                stats = incremental_backup(
+                    session,
+                    path,
+                    manifest_path(self.settings.backup_dir, session.mac()),
+                    size,
+                    args.offset,
+                    progress=self.out.callback("read"),
+                    hash_progress=self.out.counter("hash"),
+                    catalog=self.catalog,
+                )
+                result.update(size=stats.size, transferred=stats.transferred, reused_blocks=stats.reused_blocks,
+                              blank_blocks=stats.blank_blocks)
+            else:
+                result["size"] = backup_flash(
+                    session, path, size, args.offset, progress=self.out.callback("read"), catalog=self.catalog
+                )
+
+        self.devices.with_session(args.port, work)
+        record = self.catalog.get(path)
+        if record is not None:
+            result.update(mac=record.mac, firmware=record.firmware, sha256=record.sha256)
+        self.prune_backups()
+        result["message"] = f"Backup created: {path}"
+        return result
+
+    def _backup_partitions(self) -> dict:
+        args = self.args
+        labels = [label.strip() for label in args.partitions.split(",") if label.strip()]
+        directory = args.output or self.settings.backup_dir
+        base_name = default_backup_name(args.port)[: -len(BBK_EXT)]
+        os.makedirs(directory, exist_ok=True)
+
+        def work(session):
+            try:
+                partitions = select_partitions(read_partition_table(session), labels)
+            except ValueError as e:
+                raise CliError(str(e), EXIT_NOT_FOUND)
+            return backup_partitions(
+                session,
+                partitions,
+                lambda p: os.path.join(directory, f"{base_name}_{safe_label(p.label)}{BBK_EXT}"),
+                progress=self.out.callback("read"),
+                catalog=self.catalog,
+            )
+
+        paths = self.devices.with_session(args.port, work)
+        self.prune_backups()
+        return {"port": args.port, "paths": paths, "message": "Partition backup created:\n" + "\n".join(paths)}
+
+    # восстановление
+
+    def cmd_restore(self) -> dict:
+        args = self.args
+        if bool(args.files) == args.latest:
+            raise CliError("give backup files or --latest", EXIT_USAGE)
+        files = list(args.files)
+        for path in files:
+            if not os.path.isfile(path):
+                raise CliError(f"file not found: {path}", EXIT_NOT_FOUND)
+        if args.latest:
+            # чья это плата узнаем по подключению а бэкап берем из каталога
+            # все это до сессии восстановления которую with_session может повторить на другой скорости
+            mac = self.devices.with_session(args.port, lambda session: session.mac())
+            record = self.catalog.latest(mac)
+            if record is None:
+                raise CliError(f"no backups of device {mac} in the catalog", EXIT_NOT_FOUND)
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(record.created))
+            self.out.log(f"Latest backup of {mac}: {record.path} ({created}).")
+            files.append(record.path)
+
+        partitions = None
+        if args.partitions:
+            if len(files) != 1:
+                raise CliError("--partitions works with a single full image", EXIT_USAGE)
+            table = image_partition_table(files[0])
+            if not table:
+                raise CliError(f"{files[0]} has no partition table", EXIT_NOT_FOUND)
+            try:
+                partitions = select_partitions(table, [s.strip() for s in args.partitions.split(",") if s.strip()])
+            except ValueError as e:
+                raise CliError(str(e), EXIT_NOT_FOUND)
+
+        def work(session):
+            return [
+                verified_restore(
+                    session,
+                    path,
+                    partitions,
+                    retries=args.retries,
+                    progress=self.out.callback("write"),
+                    verify_progress=self.out.counter("verify"),
+                )
+                for path in files
+            ]
+
+        reports = self.devices.with_session(args.port, work)
+        files = []
+        for report in reports:
+            for region in report.regions:
+                if region.retried or not region.ok:
+                    self.out.log(region.describe())
+            files.append({
+                "path": report.path,
+                "ok": report.ok,
+                "regions": len(report.regions),
+                "rewritten": len(report.retried),
+                "failed": [r.describe() for r in report.failed],
+            })
+        result = {"port": args.port, "files": files}
+        if not all(report.ok for report in reports):
+            raise CliError("some regions do not match the backup even after rewriting", EXIT_VERIFY)
+        result["message"] = "Backup restored successfully."
+        return result
+
+    # каталог бэкапов
+
+    def cmd_backups(self) -> dict:
+        args = self.args
+        result = {}
+        if args.scan:
+            gone = self.catalog.sync()
+            added = self.catalog.scan(self.settings.backup_dir)
+            self.out.log(f"Catalog scan: {len(added)} backup(s) added, {gone} missing file(s) dropped.")
+            result.update(added=len(added), dropped=gone)
+        if args.prune:
+            policy = RetentionPolicy.from_settings(self.settings)
+            if args.keep_last is not None:
+                policy.keep_last = args.keep_last
+            if args.max_age_days is not None:
+                policy.max_age_days = args.max_age_days
+            if args.max_total_mb is not None:
+                policy.max_total_mb = args.max_total_mb
+            removed = self.prune_backups(policy, args.dry_run)
+            result["pruned"] = [r.path for r in removed]
+            result["freed"] = sum(r.size for r in removed)
+        records = self.catalog.search(" ".join(args.query), args.device or "", args.kind or "", args.limit)
+        if self.out.fmt == "text":
+            for r in records:
+                created = time.strftime("%Y-%m-%d %H:%M", time.localtime(r.created))
+                what = r.partition if r.kind == "partition" else r.kind
+                flash = format_bytes(r.flash_size) if r.flash_size else "?"
+                self.out.log(f"{created}  {r.mac or '?':17}  {r.chip or '?':9} {flash:>8}  {r.firmware or '?':10} "
+                             f"{what:11} {format_bytes(r.size):>9}  {r.path}{' (pinned)' if r.pinned else ''}")
+        result["backups"] = [r.to_dict() for r in records]
+        result["message"] = f"{len(records)} backups, {format_bytes(self.catalog.total_size())} in total"
+        return result
+
+    # манифест
+
+    def cmd_provision(self) -> dict:
+        args = self.args
+        manifest = load_manifest(args.manifest)
+        ports = [(p.device, p.serial_number) for p in default_registry().snapshot()]
+        releases = []
+        if any(not spec.file for spec in manifest.devices):
+            releases = self.load_releases(refresh=not args.offline)
+        provisioner = Provisioner(
+            self.devices,
+            self.firmware_cache(),
+            releases,
+            self.settings.backup_dir,
+            self.settings.differential_flash,
+            AssetIndex(self.boards),
+            log=self.out.log,
+            catalog=self.catalog,
+        )
+        runner = BatchRunner(args.jobs or manifest.jobs or self.settings.parallel_jobs)
+        self.out.log(f"Provisioning from {args.manifest}, {runner.max_workers} device(s) in parallel...")
+
+        def on_done(result):
+            self.out.emit("device", **result.to_dict())
+
+        results = run_manifest(
+            manifest,
+            provisioner,
+            ports,
+            runner,
+            on_start=lambda port: self.out.log(f"{port}: started"),
+            on_done=on_done,
+            progress=self._provision_progress,
+            step=lambda port, name: self.out.log(f"{port}: {name}"),
+        )
+        for result in results:
+            if not result.port:
+                self.out.emit("device", **result.to_dict())
+        path = args.report or report_path(manifest, REPORTS_DIR)
+        report = write_report(path, manifest, results)
+        if report["failed"]:
+            raise CliError(f"{report['failed']} of {len(results)} devices failed, report: {path}", EXIT_ERROR)
+        return {"report": path, "ok": report["ok"], "message": f"All {report['ok']} devices done, report: {path}"}
+
+    def _provision_progress(self, port: str, stage: str, done: int, total: int):
+        if stage == "hash":
+            event = ProgressEvent(f"{port} {stage}", percent=done * 100.0 / total, final=done >= total)
+        else:
+            event = ProgressEvent(f"{port} {stage}", done=done, total=total, final=done >= total)
+        self.out.progress(event)
+
+    # станция
+
+    def cmd_station(self) -> dict:
+        args = self.args
+        if args.backup_only and args.file:
+            raise CliError("--backup-only does not flash, drop --file", EXIT_USAGE)
+        spec = DeviceSpec(
+            port=args.port or "",
+            release=args.release or "latest",
+            asset=args.asset or "",
+            board=args.board or "",
+            file=os.path.abspath(args.file) if args.file else "",
+            erase=args.erase,
+            backup=args.backup or args.backup_only,
+            flash=not args.backup_only,
+            offset=args.offset,
+        )
+        if spec.board and find_profile(self.boards, spec.board) is None:
+            names = ", ".join(p.name for p in self.boards)
+            raise CliError(f"unknown board {spec.board}, known boards: {names}", EXIT_NOT_FOUND)
+        if spec.file and not os.path.isfile(spec.file):
+            raise CliError(f"file not found: {args.file}", EXIT_NOT_FOUND)
+        releases = []
+        if spec.flash and not spec.file:
+            releases = self.load_releases(refresh=not args.offline)
+            if pick_release(releases, spec.release) is None:
+                raise CliError(f"no release matches {spec.release}", EXIT_NOT_FOUND)
+        provisioner = Provisioner(
+            self.devices,
+            self.firmware_cache(),
+            releases,
+            self.settings.backup_dir,
+            self.settings.differential_flash,
+            AssetIndex(self.boards),
+            log=self.out.log,
+            catalog=self.catalog,
+        )
+        finished = []
+        enough = Event()
+
+        def on_done(result):
+            self.out.emit("device", **result.to_dict())
+            if not result.skipped:
+                finished.append(result)
+                if args.count and len(finished) >= args.count:
+                    enough.set()
+
+        station = Station(
+            default_registry(),
+            provisioner,
+            spec,
+            max_workers=args.jobs or self.settings.parallel_jobs,
+            log=self.out.log,
+            on_start=lambda port: self.out.log(f"{port}: started"),
+            on_done=on_done,
+            progress=self._provision_progress,
+            step=lambda port, name: self.out.log(f"{port}: {name}"),
+        )
+        self.out.log(
+            f"Station ready, {station.max_workers} device(s) in parallel. Plug in boards, Ctrl+C to stop."
+        )
+        station.start(include_present=args.include_present)
+        deadline = time.monotonic() + args.duration if args.duration else None
+        try:
+            # короткими ожиданиями чтоб ctrl+c доходил и на windows
+            while not enough.wait(0.5):
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+        except KeyboardInterrupt:
+            # станцию останавливают ctrl+c это обычный выход
+            pass
+        self.out.log("Stopping station, waiting for running jobs...")
+        station.stop(wait=True)
+
+        path = args.report or report_path(Manifest([spec], path="station"), REPORTS_DIR)
+        report = write_report(path, Manifest([spec]), finished)
+        result = {"report": path, "ok": report["ok"], "failed": report["failed"]}
+        if report["failed"]:
+            raise CliError(f"{report['failed']} of {len(finished)} devices failed, report: {path}", EXIT_ERROR)
+        result["message"] = f"{report['ok']} devices done, report: {path}"
+        return result
+
+    # серийная консоль
+
+    def cmd_monitor(self) -> dict:
+        args = self.args
+        try:
+            ser = serial.Serial(args.port, args.baud, timeout=0.1)
+        except Exception as e:
+            raise CliError(f"failed to open {args.port}: {e}", EXIT_DEVICE)
+        capture = CaptureWriter(args.capture_dir or CAPTURES_DIR) if args.capture else None
+        errors = []
+        reader = SerialReader(ser, on_chunk=capture.write if capture else None, on_error=errors.append)
+        reader.start()
+        for command in args.send or []:
+            ser.write(command.encode("utf-8") + b"\n")
+        tail = ""
+        lines = 0
+        deadline = time.monotonic() + args.duration if args.duration else None
+        try:
+            while not errors and (deadline is None or time.monotonic() < deadline):
+                time.sleep(0.05)
+                text = tail + reader.drain()
+                *complete, tail = text.split("\n")
+                for line in complete:
+                    self.out.emit("line", text=line)
+                lines += len(complete)
+        except KeyboardInterrupt:
+            # в консоли ctrl+c это нормальный способ выйти а не ошибка
+            pass
+        finally:
+            reader.stop()
+            ser.close()
+            if capture is not None:
+                capture.close()
+        if tail:
+            self.out.emit("line", text=tail)
+            lines += 1
+        if errors:
+            raise CliError(f"serial port error: {errors[0]}", EXIT_DEVICE)
+        result = {"port": args.port, "lines": lines, "bytes": reader.total_bytes, "dropped": reader.dropped_bytes}
+        if capture is not None:
+            result["capture"] = capture.files
+        result["message"] = f"{lines} lines, {format_bytes(reader.total_bytes)} received."
+        return result
+
+
+def _int(text: str) -> int:
+    """смещения и размеры можно писать и 0x10000 и 65536"""
+    return int(text, 0)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="bruce_launcher",
+        description="Bruce Launcher without GUI. Without a command the regular window starts.",
+    )
+    parser.add_argument("--version", action="version", version=f"Bruce Launcher {APP_VERSION}")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--format", choices=("json", "text"), default="json",
+                        help="json lines (default) or plain text output")
+    common.add_argument("--timeout", type=float, default=10, help="network timeout in seconds")
+    sub = parser.add_subparsers(dest="command", metavar="command", required=True)
+
+    p = sub.add_parser("releases", parents=[common], help="list firmware releases")
+    p.add_argument("--offline", action="store_true", help="use the cached list without going to GitHub")
+    p.add_argument("--limit", type=int, default=0, help="show only the newest N releases")
+
+    device = argparse.ArgumentParser(add_help=False)
+    device.add_argument("--port", "-p", required=True, help="serial port of the device")
+    device.add_argument("--chip", help="esptool --chip, by default detected and remembered per device")
+
+    p = sub.add_parser("flash", parents=[common, device], help="flash a release or a local .bin")
+    what = p.add_mutually_exclusive_group(required=True)
+    what.add_argument("--release", "-r", help="latest, beta or a release tag")
+    what.add_argument("--file", "-f", help="local .bin file")
+    p.add_argument("--asset", "-a", help="name (or unique part of the name) of the .bin in the release")
+    p.add_argument("--board", "-b", help="board profile, picks the .bin for it; detected from the device if omitted")
+    p.add_argument("--offline", action="store_true", help="pick the release from the cached list")
+    p.add_argument("--offset", type=_int, help="flash offset, by default from the board profile or 0x0")
+    p.add_argument("--erase", action="store_true", help="erase the whole flash first")
+    p.add_argument("--full", action="store_true", help="write the whole image even if sectors did not change")
+
+    p = sub.add_parser("backup", parents=[common, device], help="read the device flash into a file")
+    p.add_argument("--output", "-o", help="backup file (.bbk or .bin) or folder for --partitions")
+    p.add_argument("--incremental", action="store_true", help="read only blocks changed since the last backup")
+    p.add_argument("--partitions", help="comma separated partition labels, one file per partition")
+    p.add_argument("--size", type=_int, help="bytes to read, by default the whole flash")
+    p.add_argument("--offset", type=_int, default=0, help="where to start reading, 0x0 by default")
+
+    p = sub.add_parser("restore", parents=[common, device], help="write backups back and verify them")
+    p.add_argument("files", nargs="*", help="backup files (.bbk or .bin)")
+    p.add_argument("--latest", action="store_true", help="restore the newest full or incremental backup of this device from the catalog")
+    p.add_argument("--partitions", help="restore only these partitions from a full image")
+    p.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="rewrites per region that failed to verify")
+
+    p = sub.add_parser("backups", parents=[common], help="search the backup catalog and prune old backups")
+    p.add_argument("query", nargs="*", help="words to look for in path, MAC, chip, firmware version, port or partition")
+    p.add_argument("--device", "-d", help="only backups of this MAC")
+    p.add_argument("--kind", choices=("full", "incremental", "partition"))
+    p.add_argument("--limit", type=int, default=50, help="show at most N backups, newest first (0 for all)")
+    p.add_argument("--scan", action="store_true", help="add backups from the backup folder the catalog does not know yet")
+    p.add_argument("--prune", action="store_true", help="delete old backups by the retention rules")
+    p.add_argument("--dry-run", action="store_true", help="with --prune only show what would be deleted")
+    p.add_argument("--keep-last", type=int, help="backups to keep per device and kind, by default from settings")
+    p.add_argument("--max-age-days", type=float, help="delete backups older than this, by default from settings")
+    p.add_argument("--max-total-mb", type=int, help="cap on the space all backups take, by default from settings")
+
+    p = sub.add_parser("provision", parents=[common], help="run a JSON/YAML manifest on the attached devices")
+    p.add_argument("manifest", help="manifest file (.json, .yaml or .yml)")
+    p.add_argument("--jobs", "-j", type=int, help="devices in parallel, by default from the manifest or settings")
+    p.add_argument("--report", "-o", help=f"where to write the JSON report, by default in {REPORTS_DIR}")
+    p.add_argument("--offline", action="store_true", help="pick releases from the cached list")
+
+    p = sub.add_parser("station", parents=[common], help="back up and/or flash every newly attached device")
+    what = p.add_mutually_exclusive_group()
+    what.add_argument("--release", "-r", help="latest (default), beta or a release tag")
+    what.add_argument("--file", "-f", help="local .bin file")
+    p.add_argument("--asset", "-a", help="name (or unique part of the name) of the .bin in the release")
+    p.add_argument("--board", "-b", help="board profile for every device, detected per device if omitted")
+    p.add_argument("--port", "-p", help="take only ports matching this pattern, e.g. /dev/ttyACM*")
+    p.add_argument("--offset", type=_int, help="flash offset, by default from the board profile or 0x0")
+    p.add_argument("--erase", action="store_true", help="erase the whole flash first")
+    p.add_argument("--backup", action="store_true", help="back up the flash before writing")
+    p.add_argument("--backup-only", action="store_true", help="only back up, do not flash")
+    p.add_argument("--jobs", "-j", type=int, help="devices in parallel, by default from settings")
+    p.add_argument("--count", "-n", type=int, default=0, help="stop after N devices")
+    p.add_argument("--duration", "-t", type=float, default=0, help="stop after N seconds, by default on Ctrl+C")
+    p.add_argument("--include-present", action="store_true", help="also take devices attached before the start")
+    p.add_argument("--report", "-o", help=f"where to write the JSON report, by default in {REPORTS_DIR}")
+    p.add_argument("--offline", action="store_true", help="pick the release from the cached list")
+
+    p = sub.add_parser("monitor", parents=[common], help="print the serial output of the device")
+    p.add_argument("--port", "-p", required=True, help="serial port of the device")
+    p.add_argument("--baud", "-b", type=int, default=115200)
+    p.add_argument("--duration", "-t", type=float, default=0, help="stop after N seconds, by default on Ctrl+C")
+    p.add_argument("--send", action="append", help="command to send after opening the port, can be repeated")
+    p.add_argument("--capture", action="store_true", help="also record the raw stream to a capture file")
+    p.add_argument("--capture-dir", help=f"where to put captures, {CAPTURES_DIR} by default")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    out = Reporter(args.format)
+    cli = Cli(args, out)
+    try:
+        result = getattr(cli, f"cmd_{args.command}")()
+    except KeyboardInterrupt:
+        out.emit("error", command=args.command, code=EXIT_INTERRUPTED, message="interrupted")
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        code = exit_code_for(e)
+        out.emit("error", command=args.command, code=code, message=str(e) or type(e).__name__)
+        return code
+    out.emit("result", command=args.command, code=EXIT_OK, **result)
+    return EXIT_OK
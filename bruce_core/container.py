@@ -0,0 +1,275 @@
+import os
+import json
+import time
+import zlib
+import struct
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+# .bbk это сжатый бэкап флеша поблочно
+# заголовок, json с метаданными, таблица блоков (тип, где лежит, сколько занимает, md5) и дальше данные
+# блоки из одних 0xFF вообще не хранятся а остальные жмутся zlib так же как их жмет esptool при записи
+# поэтому при восстановлении сжатый блок уходит на плату как есть без распаковки
+BBK_EXT = ".bbk"
+BBK_MAGIC = b"BRUCEBBK"
+BBK_VERSION = 1
+BLOCK_SIZE = 64 * 1024
+
+KIND_BLANK = 0
+KIND_ZLIB = 1
+KIND_RAW = 2
+
+_HEADER = struct.Struct("<8sHHIIQQ32sI")
+_ENTRY = struct.Struct("<BQI16s")
+
+
+class ContainerStats:
+    def __init__(self, image_size: int, stored: int, blank_blocks: int, blocks: int, elapsed: float,
+                 sha256: str = "", image_sha256: str = ""):
+        self.image_size = image_size
+        self.stored = stored
+        self.blank_blocks = blank_blocks
+        self.blocks = blocks
+        self.elapsed = elapsed
+        # sha256 самого файла .bbk и sha256 образа флеша который в нем лежит
+        self.sha256 = sha256
+        self.image_sha256 = image_sha256
+
+    @property
+    def ratio(self) -> float:
+        return self.stored / self.image_size if self.image_size else 0.0
+
+
+class ContainerBlock:
+    def __init__(self, index: int, offset: int, size: int, kind: int, data_offset: int, stored: int, md5: bytes):
+        self.index = index
+        self.offset = offset
+        self.size = size
+        self.kind = kind
+        self.data_offset = data_offset
+        self.stored = stored
+        self.md5 = md5
+
+    @property
+    def blank(self) -> bool:
+        return self.kind == KIND_BLANK
+
+
+class HashingWriter:
+    """обертка над файлом которая считает sha256 и размер того что в него пишется
+
+    хэш файла получается на ходу при записи и второй раз файл с диска читать не надо
+    """
+
+    def __init__(self, f):
+        self._f = f
+        self._sha = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self._sha.update(data)
+        self.size += len(data)
+        return self._f.write(data)
+
+    def hexdigest(self) -> str:
+        return self._sha.hexdigest()
+
+
+def is_container(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(BBK_MAGIC)) == BBK_MAGIC
+    except OSError:
+        return False
+
+
+def write_container(path: str, data, block_size: int = BLOCK_SIZE, offset: int = 0, meta: dict = None,
+                    workers: int = None, level: int = 9) -> ContainerStats:
+    """пакует образ флеша в .bbk блоки жмутся параллельно на всех ядрах zlib отпускает gil так что потоков хватает"""
+    started = time.time()
+    view = memoryview(data)
+    size = len(view)
+    count = (size + block_size - 1) // block_size
+    blank = b"\xff" * block_size
+
+    def pack(i):
+        raw = view[i * block_size:(i + 1) * block_size]
+        md5 = hashlib.md5(raw).digest()
+        if raw == blank[:len(raw)]:
+            return KIND_BLANK, b"", md5
+        comp = zlib.compress(raw, level)
+        if len(comp) >= len(raw):
+            return KIND_RAW, bytes(raw), md5
+        return KIND_ZLIB, comp, md5
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 2) as pool:
+        packed = list(pool.map(pack, range(count)))
+
+    meta_bytes = json.dumps(meta or {}, ensure_ascii=False).encode("utf-8")
+    image_sha = hashlib.sha256(view).digest()
+    header = _HEADER.pack(BBK_MAGIC, BBK_VERSION, 0, block_size, count, size, offset, image_sha, len(meta_bytes))
+    data_start = len(header) + len(meta_bytes) + count * _ENTRY.size
+
+    entries = []
+    pos = data_start
+    for kind, payload, md5 in packed:
+        entries.append(_ENTRY.pack(kind, pos if payload else 0, len(payload), md5))
+        pos += len(payload)
+
+    tmp = path + ".part"
+    with open(tmp, "wb") as raw:
+        f = HashingWriter(raw)
+        f.write(header)
+        f.write(meta_bytes)
+        f.write(b"".join(entries))
+        for _, payload, _ in packed:
+            if payload:
+                f.write(payload)
+    os.replace(tmp, path)
+    blank_blocks = sum(1 for kind, _, _ in packed if kind == KIND_BLANK)
+    return ContainerStats(size, pos, blank_blocks, count, time.time() - started, f.hexdigest(), image_sha.hex())
+
+
+class BackupContainer:
+    """чтение .bbk с доступом к любому блоку без распаковки всего файла"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "rb")
+        try:
+            head = self._f.read(_HEADER.size)
+            if len(head) < _HEADER.size:
+                raise ValueError(f"truncated backup container: {path}")
+            (magic, version, _flags, self.block_size, count, self.image_size, self.offset, self.sha256,
+             meta_len) = _HEADER.unpack(head)
+            if magic != BBK_MAGIC:
+                raise ValueError(f"not a backup container: {path}")
+            if version > BBK_VERSION:
+                raise ValueError(f"unsupported backup container version {version}")
+            self.meta = json.loads(self._f.read(meta_len).decode("utf-8") or "{}")
+            table = self._f.read(count * _ENTRY.size)
+            if len(table) < count * _ENTRY.size:
+                raise ValueError(f"truncated backup container: {path}")
+        except Exception:
+            self._f.close()
+            raise
+        self.blocks = []
+        for i in range(count):
+            kind, data_offset, stored, md5 = _ENTRY.unpack_from(table, i * _ENTRY.size)
+            start = i * self.block_size
+            self.blocks.append(ContainerBlock(i, start, min(self.block_size, self.image_size - start), kind,
+                                              data_offset, stored, md5))
+
+    def __enter__(self) -> "BackupContainer":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        self._f.close()
+
+    @property
+    def stored_bytes(self) -> int:
+        return os.path.getsize(self.path)
+
+    def stored_block(self, block: ContainerBlock) -> bytes:
+        """блок как он лежит в файле для zlib это готовый поток для flash_defl"""
+        if not block.stored:
+            return b""
+        self._f.seek(block.data_offset)
+        return self._f.read(block.stored)
+
+    def read_block(self, index: int) -> bytes:
+        block = self.blocks[index]
+        if block.kind == KIND_BLANK:
+            return b"\xff" * block.size
+        payload = self.stored_block(block)
+        if block.kind == KIND_ZLIB:
+            return zlib.decompress(payload)
+        return payload
+
+    def read(self, offset: int, length: int) -> bytes:
+        """кусок образа по смещению внутри образа а не внутри файла"""
+        out = []
+        end = min(offset + length, self.image_size)
+        while offset < end:
+            index = offset // self.block_size
+            block = self.read_block(index)
+            start = offset - index * self.block_size
+            piece = block[start:start + (end - offset)]
+            out.append(piece)
+            offset += len(piece)
+        return b"".join(out)
+
+    def verify(self) -> bool:
+        sha = hashlib.sha256()
+        for block in self.blocks:
+            raw = self.read_block(block.index)
+            if hashlib.md5(raw).digest() != block.md5:
+                return False
+            sha.update(raw)
+        return sha.digest() == self.sha256
+
+
+class RawImage:
+    """обычный .bin с тем же интерфейсом чтения что и у контейнера"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.image_size = os.path.getsize(path)
+        self._f = open(path, "rb")
+
+    def __enter__(self) -> "RawImage":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        self._f.close()
+
+    def read(self, offset: int, length: int) -> bytes:
+        self._f.seek(offset)
+        return self._f.read(length)
+
+
+def open_image(path: str):
+    return BackupContainer(path) if is_container(path) else RawImage(path)
+
+
+class SavedImage:
+    """что именно легло на диск для каталога бэкапов размер и sha256 файла посчитаны при записи"""
+
+    def __init__(self, path: str, size: int, sha256: str, image_size: int, image_sha256: str, offset: int = 0,
+                 meta: dict = None, stats: ContainerStats = None):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.image_size = image_size
+        self.image_sha256 = image_sha256
+        self.offset = offset
+        self.meta = dict(meta or {})
+        self.stats = stats
+
+
+# сырой .bin пишем кусками чтоб хэш считался по ходу а не одним куском в конце
+_WRITE_CHUNK = 1024 * 1024
+
+
+def save_image(path: str, data, offset: int = 0, meta: dict = None) -> SavedImage:
+    """сохраняет образ в .bbk или сырым .bin смотря какое расширение выбрали"""
+    if path.lower().endswith(BBK_EXT):
+        stats = write_container(path, data, offset=offset, meta=meta)
+        return SavedImage(path, stats.stored, stats.sha256, stats.image_size, stats.image_sha256, offset, meta, stats)
+    view = memoryview(data)
+    tmp = path + ".part"
+    with open(tmp, "wb") as raw:
+        f = HashingWriter(raw)
+        for start in range(0, len(view), _WRITE_CHUNK):
+            f.write(view[start:start + _WRITE_CHUNK])
+    os.replace(tmp, path)
+    # у сырого файла образ и есть файл
+    return SavedImage(path, f.size, f.hexdigest(), f.size, f.hexdigest(), offset, meta)
@@ -0,0 +1,201 @@
+import time
+
+from bruce_core.boards import best_board
+from bruce_core.esp import EspSession, is_link_error
+from bruce_core.identity import DeviceIdentity, IdentityStore, chip_arg, port_details, probe_identity
+from bruce_core.linkprofile import LinkProfile, LinkProfileStore, benchmark_baud, port_adapter
+from bruce_core.progress import format_bytes
+
+
+def _english(ru: str, en: str) -> str:
+    return en
+
+
+class DeviceManager:
+    """подключение к плате с учетом всего что про нее и про адаптер уже известно
+
+    один и тот же для гуи и командной строки чип и флеш берутся из identities
+    скорость и способ сброса из профиля адаптера а сбои связи откатывают скорость на ступень ниже
+    translate(ru, en) выбирает язык сообщений по умолчанию английский
+    boards это профили плат из bruce_core.boards по ним берется потолок скорости и чип для незнакомой платы
+    """
+
+    def __init__(self, settings, identities: IdentityStore, links: LinkProfileStore, log=None,
+                 translate=_english, boards: list = None):
+        self.settings = settings
+        self.identities = identities
+        self.links = links
+        self.boards = list(boards or [])
+        self._log = log
+        self._t = translate
+        # сессии которые переподключаются после подбора скорости на них подбор заново не запускаем
+        self._reconnecting = set()
+
+    def log(self, msg: str):
+        if self._log:
+            self._log(msg)
+
+    def open_session(self, port: str, profile: LinkProfile = None) -> EspSession:
+        """одно подключение esptool на всю задачу лог esptool идет прямо в наш лог
+
+        если плату уже видели и данные свежие то чип и размер флеша берем из identities без проб
+        скорость и способ сброса берутся из профиля usb адаптера
+        """
+        if profile is None:
+            profile = self.link_profile(port)
+        identity = self.identities.lookup_port(port)
+        baud = profile.session_baud
+        board = self.board_for_port(port)
+        if baud and board is not None and board.baud:
+            baud = min(baud, board.baud)
+        return EspSession(
+            port,
+            chip=self.chip_for_port(port),
+            baud=baud,
+            connect_mode=profile.reset,
+            fallback_modes=profile.reset_order()[1:],
+            log=self.log,
+            flash_size=identity.flash_size if identity is not None else None,
+            on_connect=lambda session: self._on_session_connected(port, profile, session),
+        )
+
+    def with_session(self, port: str, work):
+        """выполняет work(session) а если по дороге отвалилась связь то повторяет на скорость ниже
+
+        сбой запоминается в профиле адаптера так что следующая задача сразу начнет с рабочей скорости
+        """
+        profile = self.link_profile(port)
+        while True:
+            session = self.open_session(port, profile)
+            try:
+                with session:
+                    result = work(session)
+            except Exception as e:
+                if not is_link_error(e):
+                    raise
+                failed_baud = profile.baud
+                lower = self.links.record_failure(profile)
+                self.links.save()
+                if lower is None:
+                    raise
+                self.log(
+                    self._t(
+                        f"Сбой связи на {failed_baud} бод ({e}), повтор на {lower} бод...",
+                        f"Link failure at {failed_baud} baud ({e}), retrying at {lower} baud...",
+                    )
+                )
+                continue
+            self.links.record_success(profile, session.connected_mode)
+            self.links.save()
+            return result
+
+    def link_profile(self, port: str) -> LinkProfile:
+        key, native_usb = port_adapter(port)
+        return self.links.profile_for(key, native_usb)
+
+    def chip_for_port(self, port: str) -> str:
+        """--chip для этого порта ручной выбор из настроек важнее а иначе что запомнили или auto"""
+        if self.settings.chip_type and self.settings.chip_type != "auto":
+            return self.settings.chip_type
+        identity = self.identities.lookup_port(port)
+        if identity is not None and identity.chip:
+            return identity.chip
+        board = self.board_for_port(port)
+        return board.chip if board is not None and board.chip else "auto"
+
+    def board_for_port(self, port: str):
+        """профиль платы на этом порту если его можно определить без человека"""
+        if not self.boards:
+            return None
+        identity = self.identities.lookup_port(port, fresh_only=False)
+        serial_number, vid, pid = port_details(port)
+        return best_board(self.boards, identity, vid, pid)
+
+    def known_boards(self) -> list:
+        """профили всех плат что уже подключались и однозначно опознаны без повторов"""
+        found = []
+        for identity in self.identities.items():
+            board = best_board(self.boards, identity)
+            if board is not None and board not in found:
+                found.append(board)
+        return found
+
+    def pin_board(self, port: str, board_name: str):
+        """запоминаем выбор человека за платой на этом порту если ее вообще можно узнать по серийнику"""
+        identity = self.identities.lookup_port(port, fresh_only=False)
+        if identity is None or identity.board == board_name:
+            return
+        self.identities.record(DeviceIdentity(mac=identity.mac, usb_serial=identity.usb_serial, board=board_name))
+        self.identities.save()
+
+    def _on_session_connected(self, port: str, profile: LinkProfile, session: EspSession):
+        if id(session) in self._reconnecting:
+            return
+        self.remember_identity(port, session)
+        if profile.key and not profile.native_usb and not profile.benchmarked:
+            self.tune_link(profile, session)
+
+    def tune_link(self, profile: LinkProfile, session: EspSession):
+        """первое подключение через этот адаптер подбираем самую быструю скорость на которой данные не бьются"""
+        self.log(self._t("Подбор скорости порта для этого адаптера...", "Tuning port speed for this adapter..."))
+        bench = benchmark_baud(session)
+        for baud, ok, rate in bench.results:
+            state = f"{format_bytes(rate)}/s" if ok else self._t("сбой", "failed")
+            self.log(f"  {baud}: {state}")
+        if not bench.tuned:
+            # сбой на первой же ступени ничего не говорит об адаптере не пришпиливаем его к 115200 навсегда
+            self.log(
+                self._t(
+                    "Подобрать скорость не удалось, попробуем при следующем подключении.",
+                    "Port speed tuning failed, will try again on the next connection.",
+                )
+            )
+            if not bench.link_ok:
+                self._reconnect(session, bench.best)
+            return
+        profile.baud = profile.max_baud = bench.best
+        profile.rate = bench.rate
+        profile.benchmarked = time.time()
+        self.links.put(profile)
+        self.links.save()
+        self.log(
+            self._t(
+                f"Для адаптера {profile.key} выбрано {bench.best} бод.",
+                f"Using {bench.best} baud for adapter {profile.key}.",
+            )
+        )
+        if not bench.link_ok:
+            # связь порвалась на какой-то ступени переподключаемся уже на выбранной скорости
+            self._reconnect(session, bench.best)
+
+    def _reconnect(self, session: EspSession, baud: int):
+        """connect снова дергает on_connect а профиль после неудачного подбора еще не помечен
+        так что без этой отметки адаптер который рвет связь на первой ступени ушел бы в бесконечный подбор
+        """
+        self._reconnecting.add(id(session))
+        try:
+            session.close(reset=False)
+            session.baud = baud
+            session.connect()
+        finally:
+            self._reconnecting.discard(id(session))
+
+    def remember_identity(self, port: str, session: EspSession):
+        usb_serial, vid, pid = port_details(port)
+        known = self.identities.lookup(usb_serial=usb_serial) if usb_serial else None
+        if self.identities.fresh(known) and known.chip == chip_arg(session.chip_name):
+            return
+        try:
+            identity = self.identities.record(probe_identity(session, usb_serial, vid, pid))
+        except Exception as e:
+            self.log(self._t(f"Не удалось опознать плату: {e}", f"Failed to identify device: {e}"))
+            return
+        self.identities.save()
+        self.log(
+            self._t(
+                f"Плата {identity.mac or port}: {identity.description or identity.chip}, "
+                f"флеш {format_bytes(identity.flash_size or 0)}, кварц {identity.crystal_mhz or '?'} МГц",
+                f"Device {identity.mac or port}: {identity.description or identity.chip}, "
+                f"flash {format_bytes(identity.flash_size or 0)}, crystal {identity.crystal_mhz or '?'} MHz",
+            )
+        )
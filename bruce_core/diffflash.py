@@ -0,0 +1,101 @@
+import time
+import hashlib
+
+from bruce_core.esp import EspSession
+from bruce_core.operations import SECTOR_SIZE
+
+BLOCK_SIZE = 64 * 1024
+# до скольких отличающихся блоков есть смысл сверять их по секторам
+# md5 сектора это отдельный запрос к плате и на свежем образе их тысячи а целый блок пишется быстрее
+SECTOR_BLOCKS = 4
+
+
+class DiffFlashStats:
+    """что сделала дифф прошивка сколько сверили сколько записали"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.identical = False
+        self.changed_blocks = 0
+        self.changed_sectors = 0
+        self.regions = 0
+        self.written = 0
+        self.md5_calls = 0
+        self.elapsed = 0.0
+
+    @property
+    def saved(self) -> int:
+        return self.size - self.written
+
+
+def _ranges(start: int, end: int, step: int):
+    for pos in range(start, end, step):
+        yield pos, min(step, end - pos)
+
+
+def diff_flash(session: EspSession, path: str, offset: int = 0, sector_size: int = SECTOR_SIZE,
+               block_size: int = BLOCK_SIZE, sector_blocks: int = SECTOR_BLOCKS, progress=None,
+               hash_progress=None) -> DiffFlashStats:
+    """заливает bin но пишет только те сектора которых на плате еще нет
+
+    сначала md5 всего образа на плате если совпал то не пишем вообще ничего
+    потом md5 по блокам 64к и если отличающихся блоков не больше sector_blocks то в них md5 по секторам
+    а если больше (новая версия прошивки) то отличающиеся блоки просто пишутся целиком
+    подряд идущие отличающиеся сектора пишутся одним куском с проверкой md5
+    progress(записано, всего к записи) hash_progress(блоков сверено, всего блоков)
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    started = time.time()
+    stats = DiffFlashStats(len(data))
+
+    stats.md5_calls += 1
+    if session.md5(offset, len(data)) == hashlib.md5(data).hexdigest():
+        stats.identical = True
+        stats.elapsed = time.time() - started
+        session.log(f"Image is already on the device at 0x{offset:08x}, nothing to write.")
+        return stats
+
+    changed_blocks = []
+    blocks = list(_ranges(0, len(data), block_size))
+    for i, (start, length) in enumerate(blocks):
+        stats.md5_calls += 1
+        if session.md5(offset + start, length) != hashlib.md5(data[start:start + length]).hexdigest():
+            changed_blocks.append((start, length))
+        if hash_progress:
+            hash_progress(i + 1, len(blocks))
+    stats.changed_blocks = len(changed_blocks)
+
+    changed = []
+    for start, length in changed_blocks:
+        if len(changed_blocks) > sector_blocks:
+            changed.append((start, length))
+            continue
+        for sector, sector_len in _ranges(start, start + length, sector_size):
+            stats.md5_calls += 1
+            local = hashlib.md5(data[sector:sector + sector_len]).hexdigest()
+            if session.md5(offset + sector, sector_len) != local:
+                changed.append((sector, sector_len))
+    stats.changed_sectors = sum((length + sector_size - 1) // sector_size for _, length in changed)
+
+    # соседние сектора склеиваем чтоб не дергать flash_defl_begin на каждый
+    runs = []
+    for start, length in changed:
+        if runs and runs[-1][0] + runs[-1][1] == start:
+            runs[-1][1] += length
+        else:
+            runs.append([start, length])
+    stats.regions = len(runs)
+
+    to_write = sum(length for _, length in runs)
+    for start, length in runs:
+        def cb(written, size, base=stats.written):
+            if progress:
+                progress(base + written, to_write)
+
+        session.write(offset + start, data[start:start + length], progress=cb)
+        stats.written += length
+    stats.elapsed = time.time() - started
+    session.log(f"Wrote {stats.written} of {stats.size} bytes in {stats.regions} regions "
+                f"({stats.changed_sectors} changed sectors), {stats.saved} bytes skipped.")
+    return stats
@@ -0,0 +1,252 @@
+import os
+import json
+import time
+from threading import Event, Lock, Thread
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+
+
+def new_http_session() -> "requests.Session":
+    """requests вместе с urllib3 и certifi грузится десятую долю секунды так что импортируем его только перед сетью"""
+    import requests
+
+    return requests.Session()
+
+
+class ThroughputMeter:
+    """считает скорость по скользящему окну чтоб цифра не скакала от каждого куска"""
+
+    def __init__(self, window: float = 2.0):
+        self.window = window
+        self._samples = []
+        self._lock = Lock()
+
+    def add(self, done: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            self._samples.append((now, done))
+            while len(self._samples) > 2 and now - self._samples[0][0] > self.window:
+                self._samples.pop(0)
+            (t0, d0), (t1, d1) = self._samples[0], self._samples[-1]
+        if t1 <= t0:
+            return 0.0
+        return (d1 - d0) / (t1 - t0)
+
+
+def stream_download(url: str, dest: str, progress=None, session: "requests.Session" = None, timeout: float = 60):
+    """самое простое скачивание одним потоком progress(скачано, всего, байт в секунду) если передали"""
+    if session is None:
+        import requests
+
+        session = requests
+    http = session
+    meter = ThroughputMeter()
+    with http.get(url, stream=True, timeout=timeout) as r:
+        r.raise_for_status()
+        total = int(r.headers.get("Content-Length") or 0)
+        done = 0
+        with open(dest, "wb") as f:
+            for chunk in r.iter_content(chunk_size=64 * 1024):
+                if chunk:
+                    f.write(chunk)
+                    done += len(chunk)
+                    if progress:
+                        progress(done, total, meter.add(done))
+
+
+def discard_partial(dest: str):
+    """удаляет недокачанный или битый файл вместе с его .state чтоб следующая закачка не продолжила мусор"""
+    for path in (dest, dest + ".state", dest + ".state.tmp"):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class RangedDownloader:
+    """докачка по Range и несколько соединений на один большой файл
+
+    файл сразу создается нужного размера и каждый кусок пишется прямо на свое место
+    рядом лежит dest.state где записано сколько скачано в каждом сегменте
+    так что после обрыва продолжаем с того же байта а не с нуля
+    """
+
+    def __init__(self, session: "requests.Session" = None, connections: int = 4, min_segment: int = 1024 * 1024,
+                 chunk_size: int = 64 * 1024, timeout: float = 60, retries: int = 3):
+        # сессию заводим при первом скачивании а не когда лаунчер собирает кэш прошивок на старте
+        self._session = session
+        self._session_lock = Lock()
+        self.connections = max(1, connections)
+        self.min_segment = min_segment
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.retries = retries
+
+    @property
+    def session(self) -> "requests.Session":
+        with self._session_lock:
+            if self._session is None:
+                self._session = new_http_session()
+            return self._session
+
+    def __call__(self, url: str, dest: str, progress=None):
+        self.download(url, dest, progress)
+
+    def _probe(self, url: str):
+        """узнаем размер и умеет ли сервер Range заодно проходим редиректы github"""
+        with self.session.get(url, headers={"Range": "bytes=0-0"}, stream=True, timeout=self.timeout) as r:
+            r.raise_for_status()
+            etag = r.headers.get("ETag")
+            if r.status_code == 206:
+                content_range = r.headers.get("Content-Range", "")
+                total = content_range.rsplit("/", 1)[-1]
+                if total.isdigit():
+                    return r.url, int(total), etag
+            return r.url, None, etag
+
+    def _load_state(self, state_path: str, url: str, total: int, etag: str):
+        if not os.path.isfile(state_path):
+            return None
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except Exception:
+            return None
+        # если файл на сервере поменялся то старые куски уже не годятся
+        if state.get("total") != total or state.get("etag") != etag or state.get("source") != url:
+            return None
+        return state
+
+    def _new_state(self, url: str, total: int, etag: str) -> dict:
+        count = max(1, min(self.connections, total // self.min_segment))
+        size = total // count
+        segments = []
+        for i in range(count):
+            start = i * size
+            end = total - 1 if i == count - 1 else start + size - 1
+            segments.append([start, end, 0])
+        return {"source": url, "total": total, "etag": etag, "segments": segments}
+
+    def download(self, url: str, dest: str, progress=None):
+        final_url, total, etag = self._probe(url)
+        if not total:
+            # сервер не умеет Range так что по старинке одним потоком и без докачки
+            stream_download(final_url, dest, progress, session=self.session, timeout=self.timeout)
+            return
+
+        state_path = dest + ".state"
+        state = None
+        if os.path.isfile(dest) and os.path.getsize(dest) == total:
+            state = self._load_state(state_path, url, total, etag)
+        if state is None:
+            state = self._new_state(url, total, etag)
+            with open(dest, "wb") as f:
+                f.truncate(total)
+
+        lock = Lock()
+        failed = Event()
+        errors = []
+        meter = ThroughputMeter()
+
+        def save_state():
+            with lock:
+                payload = json.dumps(state)
+            tmp = state_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp, state_path)
+
+        # сколько скачано в каждом сегменте а в state[segments] только то что уже сброшено на диск
+        # иначе после жесткого убийства .state мог бы показать байты которые так и не записались
+        written = [seg[2] for seg in state["segments"]]
+
+        def done_bytes() -> int:
+            with lock:
+                return sum(written)
+
+        def worker(i: int, seg: list):
+            attempt = 0
+            with open(dest, "r+b") as f:
+                def sync():
+                    f.flush()
+                    os.fsync(f.fileno())
+                    with lock:
+                        seg[2] = written[i]
+
+                synced = time.monotonic()
+                try:
+                    while not failed.is_set():
+                        start, end = seg[0], seg[1]
+                        got = written[i]
+                        if start + got > end:
+                            return
+                        headers = {"Range": f"bytes={start + got}-{end}"}
+                        if etag:
+                            headers["If-Range"] = etag
+                        try:
+                            with self.session.get(final_url, headers=headers, stream=True, timeout=self.timeout) as r:
+                                if r.status_code != 206:
+                                    raise IOError(f"server ignored Range request (HTTP {r.status_code})")
+                                f.seek(start + got)
+                                for chunk in r.iter_content(chunk_size=self.chunk_size):
+                                    if failed.is_set():
+                                        return
+                                    if not chunk:
+                                        continue
+                                    chunk = chunk[: end + 1 - (start + written[i])]
+                                    f.write(chunk)
+                                    with lock:
+                                        written[i] += len(chunk)
+                                    if time.monotonic() - synced > 1.0:
+                                        sync()
+                                        synced = time.monotonic()
+                            if written[i] > got:
+                                attempt = 0
+                                continue
+                            raise IOError("connection closed without data")
+                        except Exception as e:
+                            # если хоть что-то успели скачать то счетчик попыток начинаем заново
+                            attempt = 1 if written[i] > got else attempt + 1
+                            if attempt > self.retries:
+                                errors.append(e)
+                                failed.set()
+                                return
+                            time.sleep(min(5.0, 0.5 * 2 ** attempt))
+                finally:
+                    sync()
+
+        threads = [Thread(target=worker, args=(i, seg), daemon=True) for i, seg in enumerate(state["segments"])]
+        for t in threads:
+            t.start()
+
+        last_save = time.monotonic()
+        while any(t.is_alive() for t in threads):
+            next(t for t in threads if t.is_alive()).join(0.25)
+            done = done_bytes()
+            if progress:
+                try:
+                    progress(done, total, meter.add(done))
+                except BaseException:
+                    # progress может прервать закачку тогда останавливаем потоки и сохраняем где остановились
+                    failed.set()
+                    for t in threads:
+                        t.join()
+                    save_state()
+                    raise
+            if time.monotonic() - last_save > 1.0:
+                save_state()
+                last_save = time.monotonic()
+
+        if errors:
+            save_state()
+            raise errors[0]
+
+        done = done_bytes()
+        if progress:
+            progress(done, total, meter.add(done))
+        try:
+            os.remove(state_path)
+        except OSError:
+            pass
@@ -0,0 +1,129 @@
+import time
+import zlib
+import hashlib
+
+from bruce_core.esp import EspSessionError, VerifyError
+
+
+class EmulatedFlash:
+    """плата без платы флеш в памяти с тем же интерфейсом что у EspSession
+
+    нужна чтоб гонять прошивку бэкапы и дифф без железа и считать сколько байт ушло бы по uart
+    link_bps если задан то операции спят столько сколько шли бы байты на такой скорости порта
+    """
+
+    def __init__(self, size: int = 4 * 1024 * 1024, chip_name: str = "ESP32", mac: str = "24:0a:c4:00:00:01",
+                 link_bps: int = 0, log=None, on_connect=None):
+        self.flash = bytearray(b"\xff" * size)
+        self.chip_name = chip_name
+        self._mac = mac
+        self.link_bps = link_bps
+        self._log = log
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.bytes_sent = 0
+        self.bytes_erased = 0
+        self.md5_calls = 0
+        # как у EspSession зовется после каждого подключения
+        self._on_connect = on_connect
+
+    def log(self, msg: str):
+        if self._log:
+            self._log(msg)
+
+    def __enter__(self) -> "EmulatedFlash":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def connect(self):
+        if self._on_connect is not None:
+            self._on_connect(self)
+        return self
+
+    def close(self, reset: bool = True):
+        pass
+
+    def reset_counters(self):
+        self.bytes_read = self.bytes_written = self.bytes_sent = self.bytes_erased = self.md5_calls = 0
+
+    def _transfer(self, nbytes: int):
+        # 10 бит на байт с учетом старт и стоп битов
+        if self.link_bps:
+            time.sleep(nbytes * 10 / self.link_bps)
+
+    def _check(self, offset: int, size: int):
+        if offset < 0 or size < 0 or offset + size > len(self.flash):
+            raise EspSessionError(f"region 0x{offset:08x}+0x{size:x} is outside of {len(self.flash)} bytes flash")
+
+    def description(self) -> str:
+        return f"{self.chip_name} (emulated)"
+
+    def features(self) -> list:
+        return ["WiFi", "BLE"]
+
+    def crystal_mhz(self) -> int:
+        return 40
+
+    def mac(self) -> str:
+        return self._mac
+
+    def flash_size(self) -> int:
+        return len(self.flash)
+
+    def erase_all(self):
+        self.flash[:] = b"\xff" * len(self.flash)
+        self.bytes_erased += len(self.flash)
+
+    def erase_region(self, offset: int, size: int):
+        if offset % 4096 or size % 4096:
+            raise EspSessionError("erase region must be sector aligned")
+        self._check(offset, size)
+        self.flash[offset:offset + size] = b"\xff" * size
+        self.bytes_erased += size
+
+    def md5(self, offset: int, size: int) -> str:
+        self._check(offset, size)
+        self.md5_calls += 1
+        self._transfer(32)
+        return hashlib.md5(self.flash[offset:offset + size]).hexdigest()
+
+    def read(self, offset: int, size: int, progress=None) -> bytes:
+        self._check(offset, size)
+        self._transfer(size)
+        self.bytes_read += size
+        if progress:
+            progress(size, size)
+        return bytes(self.flash[offset:offset + size])
+
+    def write(self, offset: int, data: bytes, progress=None, verify: bool = True):
+        self.write_compressed(offset, len(data), zlib.compress(data, 9), progress,
+                              hashlib.md5(data).hexdigest() if verify else None)
+
+    def write_compressed(self, offset: int, size: int, comp: bytes, progress=None, md5: str = None,
+                         quiet: bool = False):
+        data = zlib.decompress(comp)
+        if len(data) != size:
+            raise EspSessionError(f"compressed block unpacks to {len(data)} bytes, expected {size}")
+        self._check(offset, size)
+        self._transfer(len(comp))
+        self.flash[offset:offset + size] = data
+        self.bytes_sent += len(comp)
+        self.bytes_written += size
+        if progress:
+            progress(size, size)
+        if not quiet:
+            self.log(f"Wrote {size} bytes ({len(comp)} compressed) at 0x{offset:08x}")
+        if md5:
+            self.verify_md5(offset, size, md5, quiet)
+
+    def verify(self, offset: int, data: bytes):
+        self.verify_md5(offset, len(data), hashlib.md5(data).hexdigest())
+
+    def verify_md5(self, offset: int, size: int, expected: str, quiet: bool = False):
+        actual = self.md5(offset, size)
+        if actual != expected:
+            raise VerifyError(f"verify failed at 0x{offset:08x}: flash md5 {actual}, expected {expected}")
+        if not quiet:
+            self.log("Hash of data verified.")
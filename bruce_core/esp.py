@@ -0,0 +1,289 @@
+import sys
+import time
+import zlib
+import hashlib
+
+import serial
+
+# esptool тянет за собой rich click и прочее это десятая доля секунды на старте
+# так что грузим его только когда правда понадобился None значит еще не пробовали
+_esptool = None
+
+
+ROM_BAUD = 115200
+DEFAULT_BAUD = 921600
+
+
+def _load_esptool():
+    """модуль esptool с уже импортированными cmds loader targets util или False если его нет"""
+    global _esptool
+    if _esptool is None:
+        try:
+            import esptool
+            import esptool.cmds
+            import esptool.loader
+            import esptool.targets
+            import esptool.util
+        except ImportError:
+            # без esptool как библиотеки лаунчер откатывается на запуск python -m esptool
+            esptool = False
+        _esptool = esptool
+    return _esptool
+
+
+def esptool_available() -> bool:
+    return bool(_load_esptool())
+
+
+def _esptool_major() -> int:
+    try:
+        return int(str(_load_esptool().__version__).split(".")[0])
+    except Exception:
+        return 4
+
+
+def connect_mode_name(mode: str) -> str:
+    """в esptool 4 режимы сброса через подчеркивание а в 5 через дефис приводим к нужному"""
+    mode = (mode or "default_reset").replace("-", "_")
+    if esptool_available() and _esptool_major() >= 5:
+        return mode.replace("_", "-")
+    return mode
+
+
+def parse_size(text: str):
+    """строки типо 16MB или 512KB в байты"""
+    text = (text or "").strip().upper()
+    try:
+        if text.endswith("MB"):
+            return int(text[:-2]) * 1024 * 1024
+        if text.endswith("KB"):
+            return int(text[:-2]) * 1024
+    except ValueError:
+        pass
+    return None
+
+
+class EspSessionError(Exception):
+    pass
+
+
+class VerifyError(EspSessionError):
+    """связь в порядке но то что легло во флеш не совпало с тем что писали"""
+
+
+def is_link_error(exc: BaseException) -> bool:
+    """ошибка связи (порт таймаут битый пакет) а не ошибка в самих данных или файле"""
+    if isinstance(exc, (serial.SerialException, TimeoutError)):
+        return True
+    # пока esptool не загружен его FatalError и прилететь не мог
+    util = sys.modules.get("esptool.util")
+    return util is not None and isinstance(exc, util.FatalError)
+
+
+class EspSession:
+    """одно подключение к плате на всю задачу через esptool как библиотеку
+
+    подключаемся и заливаем стаб один раз а дальше определение флеша стирание запись
+    и проверка идут по этому же соединению без новых процессов и повторных ресетов
+    """
+
+    def __init__(self, port: str, chip: str = "auto", baud: int = DEFAULT_BAUD, connect_mode: str = "default_reset",
+                 connect_attempts: int = 7, log=None, flash_size: int = None, on_connect=None,
+                 fallback_modes=()):
+        esptool = _load_esptool()
+        if not esptool:
+            raise EspSessionError("esptool is not installed")
+        self._tool = esptool
+        self.port = port
+        self.chip = (chip or "auto").lower()
+        self.baud = baud
+        self.connect_mode = connect_mode
+        # если основной способ сброса не сработал пробуем эти по очереди
+        self.fallback_modes = [m for m in fallback_modes if m != connect_mode]
+        self.connected_mode = None
+        self.connect_attempts = connect_attempts
+        self._log = log
+        self.esp = None
+        # размер флеша можно передать из кэша платы тогда flash_id вообще не дергаем
+        self._flash_size = flash_size
+        self._on_connect = on_connect
+
+    def log(self, msg: str):
+        if self._log:
+            self._log(msg)
+
+    def __enter__(self) -> "EspSession":
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(reset=exc_type is None)
+        return False
+
+    def connect(self):
+        modes = [self.connect_mode] + self.fallback_modes
+        for i, connect_mode in enumerate(modes):
+            try:
+                esp = self._connect(connect_mode_name(connect_mode))
+            except Exception as e:
+                if i + 1 == len(modes) or not is_link_error(e):
+                    raise
+                self.log(f"Connection with {connect_mode} failed: {e}")
+                continue
+            self.connected_mode = connect_mode
+            break
+        try:
+            self.log(f"Chip is {esp.get_chip_description()}")
+            if not esp.IS_STUB:
+                esp = esp.run_stub()
+            if self.baud and self.baud != ROM_BAUD:
+                esp.change_baud(self.baud)
+            self.esp = esp
+            self.log("Stub running.")
+            if self._on_connect is not None:
+                self._on_connect(self)
+        except Exception:
+            # порт уже открыт а __exit__ не позовут так что закрываем сами иначе повтор упрется в занятый порт
+            if self.esp is None:
+                try:
+                    esp._port.close()
+                except Exception:
+                    pass
+            self.close(reset=False)
+            raise
+        return esp
+
+    def _connect(self, mode: str):
+        self.log(f"Connecting to {self.port} ({self.chip}, {mode})...")
+        if self.chip == "auto":
+            return self._tool.cmds.detect_chip(self.port, ROM_BAUD, mode, False, self.connect_attempts)
+        chip_cls = self._tool.targets.CHIP_DEFS.get(self.chip)
+        if chip_cls is None:
+            raise EspSessionError(f"unknown chip type: {self.chip}")
+        esp = chip_cls(self.port, ROM_BAUD)
+        try:
+            esp.connect(mode, self.connect_attempts)
+        except Exception:
+            esp._port.close()
+            raise
+        return esp
+
+    def change_baud(self, baud: int):
+        self.esp.change_baud(baud)
+        self.baud = baud
+
+    def close(self, reset: bool = True):
+        if self.esp is None:
+            return
+        try:
+            if reset:
+                self.esp.hard_reset()
+        except Exception:
+            pass
+        try:
+            self.esp._port.close()
+        except Exception:
+            pass
+        self.esp = None
+
+    @property
+    def chip_name(self) -> str:
+        return self.esp.CHIP_NAME if self.esp is not None else ""
+
+    def description(self) -> str:
+        return self.esp.get_chip_description()
+
+    def features(self) -> list:
+        return list(self.esp.get_chip_features())
+
+    def crystal_mhz(self) -> int:
+        return self.esp.get_crystal_freq()
+
+    def mac(self) -> str:
+        mac = self.esp.read_mac()
+        return ":".join(f"{b:02x}" for b in mac) if mac else ""
+
+    def flash_size(self):
+        """размер флеша в байтах по jedec id или None если чип незнакомый"""
+        if self._flash_size is None:
+            flash_id = self.esp.flash_id()
+            self._flash_size = parse_size(self._tool.cmds.DETECTED_FLASH_SIZES.get((flash_id >> 16) & 0xFF))
+        return self._flash_size
+
+    def erase_all(self):
+        self.log("Erasing flash (this may take a while)...")
+        t = time.time()
+        self.esp.erase_flash()
+        self.log(f"Chip erase completed successfully in {time.time() - t:.1f}s")
+
+    def erase_region(self, offset: int, size: int):
+        self.esp.erase_region(offset, size)
+
+    def md5(self, offset: int, size: int) -> str:
+        return self.esp.flash_md5sum(offset, size)
+
+    def read(self, offset: int, size: int, progress=None) -> bytes:
+        """читает кусок флеша progress(прочитано, всего)"""
+        t = time.time()
+
+        def cb(done, total, *_):
+            if progress:
+                progress(done, total)
+
+        data = self.esp.read_flash(offset, size, cb)
+        elapsed = max(time.time() - t, 1e-6)
+        self.log(f"Read {len(data)} bytes at 0x{offset:08x} in {elapsed:.1f} seconds "
+                 f"({len(data) / elapsed * 8 / 1000:.1f} kbit/s)...")
+        return data
+
+    def write(self, offset: int, data: bytes, progress=None, verify: bool = True):
+        """пишет данные сжатыми блоками как write_flash и потом сверяет md5 на самой плате"""
+        self.write_compressed(offset, len(data), zlib.compress(data, 9), progress,
+                              hashlib.md5(data).hexdigest() if verify else None)
+
+    def write_compressed(self, offset: int, size: int, comp: bytes, progress=None, md5: str = None,
+                         quiet: bool = False):
+        """то же самое но данные уже сжаты zlib например лежат так в контейнере бэкапа
+
+        size это размер после распаковки а md5 если передали то им проверяем записанное
+        quiet убирает строчки в лог когда пишем кучу мелких блоков подряд
+        """
+        esp = self.esp
+        t = time.time()
+        esp.flash_defl_begin(size, len(comp), offset)
+        decompress = zlib.decompressobj()
+        seq = 0
+        sent = 0
+        written = 0
+        loader = self._tool.loader
+        timeout = loader.DEFAULT_TIMEOUT
+        while sent < len(comp):
+            block = comp[sent:sent + esp.FLASH_WRITE_SIZE]
+            block_uncompressed = len(decompress.decompress(block))
+            esp.flash_defl_block(block, seq, timeout=timeout)
+            # стаб подтверждает блок сразу а пишет его пока принимает следующий
+            timeout = max(loader.DEFAULT_TIMEOUT, loader.timeout_per_mb(loader.ERASE_WRITE_TIMEOUT_PER_MB,
+                                                                         block_uncompressed))
+            sent += len(block)
+            written += block_uncompressed
+            seq += 1
+            if progress:
+                progress(written, size)
+        # пустая команда на которую стаб ответит только когда допишет последний блок
+        esp.read_reg(esp.CHIP_DETECT_MAGIC_REG_ADDR, timeout=timeout)
+        elapsed = max(time.time() - t, 1e-6)
+        if not quiet:
+            self.log(f"Wrote {size} bytes ({len(comp)} compressed) at 0x{offset:08x} in {elapsed:.1f} seconds "
+                     f"(effective {size / elapsed * 8 / 1000:.1f} kbit/s)...")
+        if md5:
+            self.verify_md5(offset, size, md5, quiet)
+
+    def verify(self, offset: int, data: bytes):
+        self.verify_md5(offset, len(data), hashlib.md5(data).hexdigest())
+
+    def verify_md5(self, offset: int, size: int, expected: str, quiet: bool = False):
+        actual = self.md5(offset, size)
+        if actual != expected:
+            raise VerifyError(f"verify failed at 0x{offset:08x}: flash md5 {actual}, expected {expected}")
+        if not quiet:
+            self.log("Hash of data verified.")
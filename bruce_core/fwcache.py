@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import hashlib
+from threading import Lock
+
+from bruce_core.download import discard_partial, stream_download
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FirmwareCache:
+    """кэш прошивок по содержимому чтоб один и тот же bin не качать по сорок раз
+
+    файлы лежат в blobs/<sha256>.bin а index.json помнит какой ассет github
+    какому хэшу соответствует и когда его последний раз брали для вытеснения по lru
+    """
+
+    def __init__(self, root: str, max_bytes: int = 512 * 1024 * 1024, downloader=stream_download):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.downloader = downloader
+        self.blobs_dir = os.path.join(root, "blobs")
+        self.tmp_dir = os.path.join(root, "tmp")
+        self.index_path = os.path.join(root, "index.json")
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+        self._lock = Lock()
+        # отдельный замок на каждый ассет чтоб параллельные задачи ждали одну закачку а не качали сами
+        self._key_locks = {}
+        # сколько задач сейчас шьют файл такие при вытеснении не трогаем
+        self._pins = {}
+        self._index = {"assets": {}, "blobs": {}}
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.isfile(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return
+        if isinstance(data, dict):
+            self._index["assets"] = dict(data.get("assets") or {})
+            self._index["blobs"] = dict(data.get("blobs") or {})
+
+    def _save_index(self):
+        tmp = self.index_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._index, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.index_path)
+        except Exception:
+            pass
+
+    @staticmethod
+    def asset_key(asset: dict) -> str:
+        # id у ассета github стабильный а если его нет то хотя бы ссылка
+        if asset.get("id") is not None:
+            return f"id:{asset['id']}"
+        return f"url:{asset.get('browser_download_url', '')}"
+
+    @staticmethod
+    def expected_sha256(asset: dict):
+        # github с недавних пор отдает digest вида sha256:abc... им и проверяем скачанное
+        digest = asset.get("digest") or ""
+        if digest.startswith("sha256:"):
+            return digest.split(":", 1)[1].lower()
+        return None
+
+    def _blob_path(self, sha: str) -> str:
+        return os.path.join(self.blobs_dir, f"{sha}.bin")
+
+    def _key_lock(self, key: str) -> Lock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = Lock()
+            return lock
+
+    def lookup(self, asset: dict, pin: bool = False):
+        """путь к уже скачанному файлу ассета или None
+
+        с pin=True файл сразу закрепляется и потом его надо отпустить через release
+        """
+        key = self.asset_key(asset)
+        with self._lock:
+            sha = self._index["assets"].get(key)
+            meta = self._index["blobs"].get(sha) if sha else None
+            if not meta:
+                return None
+            path = self._blob_path(sha)
+            if not os.path.isfile(path) or os.path.getsize(path) != meta.get("size"):
+                # файл кто-то удалил руками значит и запись больше не нужна
+                self._index["blobs"].pop(sha, None)
+                self._index["assets"].pop(key, None)
+                return None
+            meta["last_used"] = time.time()
+            if pin:
+                self._pins[path] = self._pins.get(path, 0) + 1
+            self._save_index()
+            return path
+
+    def fetch(self, asset: dict, progress=None, pin: bool = False) -> str:
+        """отдает путь к прошивке из кэша а если ее нет то сначала качает"""
+        key = self.asset_key(asset)
+        with self._key_lock(key):
+            path = self.lookup(asset, pin=pin)
+            if path:
+                return path
+
+            url = asset.get("browser_download_url")
+            if not url:
+                raise ValueError("asset has no download url")
+            tmp = os.path.join(self.tmp_dir, hashlib.sha1(key.encode()).hexdigest() + ".part")
+            self.downloader(url, tmp, progress)
+
+            sha = file_sha256(tmp)
+            expected = self.expected_sha256(asset)
+            if expected and expected != sha:
+                discard_partial(tmp)
+                raise ValueError(f"sha256 mismatch: expected {expected}, got {sha}")
+
+            path = self._blob_path(sha)
+            if os.path.isfile(path):
+                # такой же файл уже лежит под другим ассетом так что второй раз не храним
+                os.remove(tmp)
+            else:
+                os.replace(tmp, path)
+
+            with self._lock:
+                self._index["assets"][key] = sha
+                self._index["blobs"][sha] = {
+                    "size": os.path.getsize(path),
+                    "name": asset.get("name", ""),
+                    "last_used": time.time(),
+                }
+                if pin:
+                    self._pins[path] = self._pins.get(path, 0) + 1
+                self._save_index()
+        # только что скачанный файл не выкидываем даже если он один больше квоты
+        self.evict(keep=path)
+        return path
+
+    def acquire(self, path: str):
+        """пометить файл как занятый чтоб его не выкинуло пока идет прошивка"""
+        with self._lock:
+            self._pins[path] = self._pins.get(path, 0) + 1
+
+    def release(self, path: str):
+        with self._lock:
+            left = self._pins.get(path, 0) - 1
+            if left > 0:
+                self._pins[path] = left
+            else:
+                self._pins.pop(path, None)
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(meta.get("size", 0) for meta in self._index["blobs"].values())
+
+    def evict(self, max_bytes: int = None, keep: str = None) -> int:
+        """выкидываем самые давно не нужные файлы пока не влезем в квоту возвращает сколько освободили"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        freed = 0
+        with self._lock:
+            total = sum(meta.get("size", 0) for meta in self._index["blobs"].values())
+            by_age = sorted(self._index["blobs"].items(), key=lambda kv: kv[1].get("last_used", 0))
+            for sha, meta in by_age:
+                if total <= limit:
+                    break
+                path = self._blob_path(sha)
+                if self._pins.get(path) or path == keep:
+                    continue
+                try:
+                    if os.path.isfile(path):
+                        os.remove(path)
+                except OSError:
+                    continue
+                total -= meta.get("size", 0)
+                freed += meta.get("size", 0)
+                del self._index["blobs"][sha]
+
+            live = set(self._index["blobs"])
+            self._index["assets"] = {k: v for k, v in self._index["assets"].items() if v in live}
+
+            # недокачанные куски совсем старых закачек тоже подчищаем свежие пусть лежат
+            stale_before = time.time() - 7 * 24 * 3600
+            for name in os.listdir(self.tmp_dir):
+                tmp = os.path.join(self.tmp_dir, name)
+                try:
+                    if os.path.getmtime(tmp) < stale_before:
+                        os.remove(tmp)
+                except OSError:
+                    pass
+            self._save_index()
+        return freed
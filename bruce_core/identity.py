@@ -0,0 +1,197 @@
+import os
+import json
+import time
+from threading import Lock
+
+from bruce_core.esp import parse_size
+from bruce_core.ports import default_registry
+
+# раз в неделю данные платы все равно перепроверяем вдруг ее перепаяли или поменяли флешку
+IDENTITY_TTL = 7 * 24 * 3600
+
+# длинные имена первыми чтоб esp32c61 не узнавался как esp32c6 а esp32s3 как esp32
+_CHIP_ARGS = sorted(
+    ["esp8266", "esp32", "esp32s2", "esp32s3", "esp32c2", "esp32c3", "esp32c5", "esp32c6", "esp32c61", "esp32h2",
+     "esp32p4"],
+    key=len,
+    reverse=True,
+)
+
+
+def chip_arg(name: str) -> str:
+    """ESP32-S3 (QFN56) или ESP32-D0WD-V3 в то что понимает --chip у esptool"""
+    norm = "".join(c for c in (name or "").split("(")[0].lower() if c.isalnum())
+    for arg in _CHIP_ARGS:
+        if norm.startswith(arg):
+            return arg
+    return ""
+
+
+class DeviceIdentity:
+    """что знаем про конкретную плату чип размер флеша кварц и с какого usb адаптера она
+
+    board это имя профиля платы если его выбрал человек тогда прошивка для нее подбирается сама
+    """
+
+    FIELDS = ("mac", "usb_serial", "vid", "pid", "chip", "description", "flash_size", "crystal_mhz", "features",
+              "checked", "board")
+
+    def __init__(self, mac: str = "", usb_serial: str = "", vid: int = None, pid: int = None, chip: str = "",
+                 description: str = "", flash_size: int = None, crystal_mhz: int = None, features: list = None,
+                 checked: float = 0.0, board: str = ""):
+        self.mac = mac
+        self.usb_serial = usb_serial
+        self.vid = vid
+        self.pid = pid
+        self.chip = chip
+        self.description = description
+        self.flash_size = flash_size
+        self.crystal_mhz = crystal_mhz
+        self.features = list(features or [])
+        self.checked = checked
+        self.board = board
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DeviceIdentity":
+        return cls(**{name: data[name] for name in cls.FIELDS if name in data})
+
+    def __repr__(self):
+        return f"DeviceIdentity({self.mac or self.usb_serial!r}, {self.chip}, {self.flash_size})"
+
+
+def port_details(port: str):
+    """usb серийник vid и pid адаптера на этом порту если система их отдает
+
+    за одну задачу это спрашивают раз пять так что берем из общего списка портов а не зовем comports каждый раз
+    """
+    info = default_registry().details(port)
+    if info is None:
+        return "", None, None
+    return info.serial_number, info.vid, info.pid
+
+
+def probe_identity(session, usb_serial: str = "", vid: int = None, pid: int = None) -> DeviceIdentity:
+    """собирает все про плату по уже открытой сессии"""
+    identity = DeviceIdentity(usb_serial=usb_serial, vid=vid, pid=pid, chip=chip_arg(session.chip_name),
+                              checked=time.time())
+    for name, getter in (("mac", session.mac), ("description", session.description),
+                         ("flash_size", session.flash_size), ("crystal_mhz", session.crystal_mhz),
+                         ("features", session.features)):
+        try:
+            setattr(identity, name, getter())
+        except Exception:
+            pass
+    identity.chip = chip_arg(identity.description) or identity.chip
+    return identity
+
+
+def parse_identity_output(text: str, usb_serial: str = "", vid: int = None, pid: int = None):
+    """то же самое из вывода python -m esptool flash_id для запасного пути без библиотеки
+
+    понимает и esptool 4 (Chip is ..., Crystal is 40MHz) и 5 (Chip type: ..., Crystal frequency: 40MHz)
+    """
+    identity = DeviceIdentity(usb_serial=usb_serial, vid=vid, pid=pid, checked=time.time())
+    for line in text.splitlines():
+        line = line.strip()
+        key, sep, value = line.partition(":")
+        value = value.strip()
+        if line.startswith("Chip is "):
+            identity.description = line[len("Chip is "):].strip()
+        elif sep and key == "Chip type":
+            identity.description = value
+        elif sep and key == "Features":
+            identity.features = [f.strip() for f in value.split(",") if f.strip()]
+        elif line.startswith("Crystal is ") or (sep and key == "Crystal frequency"):
+            digits = "".join(c for c in line.split()[-1] if c.isdigit())
+            identity.crystal_mhz = int(digits) if digits else None
+        elif sep and key == "MAC" and not identity.mac:
+            identity.mac = value.lower()
+        elif sep and key == "Detected flash size":
+            identity.flash_size = parse_size(value)
+    identity.chip = chip_arg(identity.description)
+    return identity if identity.chip else None
+
+
+class IdentityStore:
+    """json файл с платами ищем по mac или по usb серийнику адаптера
+
+    до подключения mac еще не знаем так что для выбора --chip нужен именно серийник
+    у платы без серийника (дешевые ch340) каждый раз просто работает автоопределение
+    """
+
+    def __init__(self, path: str, ttl: float = IDENTITY_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = Lock()
+        self._items = []
+        self._load()
+
+    def _load(self):
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._items = [DeviceIdentity.from_dict(item) for item in data.get("devices", [])]
+        except Exception:
+            self._items = []
+
+    def save(self):
+        with self._lock:
+            data = {"devices": [item.to_dict() for item in self._items]}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def fresh(self, identity) -> bool:
+        return identity is not None and time.time() - identity.checked < self.ttl
+
+    def lookup(self, mac: str = "", usb_serial: str = ""):
+        with self._lock:
+            for item in self._items:
+                if (mac and item.mac == mac) or (usb_serial and item.usb_serial == usb_serial):
+                    return item
+        return None
+
+    def items(self) -> list:
+        with self._lock:
+            return list(self._items)
+
+    def lookup_port(self, port: str, fresh_only: bool = True):
+        usb_serial, _, _ = port_details(port)
+        identity = self.lookup(usb_serial=usb_serial) if usb_serial else None
+        if fresh_only and not self.fresh(identity):
+            return None
+        return identity
+
+    def record(self, identity: DeviceIdentity) -> DeviceIdentity:
+        """новая запись или обновление старой по mac или серийнику пустые поля старые данные не затирают"""
+        with self._lock:
+            item = None
+            if identity.mac:
+                item = next((x for x in self._items if x.mac == identity.mac), None)
+            if item is None and identity.usb_serial:
+                # на этом адаптере может сидеть уже другая плата тогда запись не ее
+                item = next((x for x in self._items if x.usb_serial == identity.usb_serial
+                             and (not x.mac or not identity.mac or x.mac == identity.mac)), None)
+            if item is None:
+                item = DeviceIdentity()
+                self._items.append(item)
+            for name in DeviceIdentity.FIELDS:
+                value = getattr(identity, name)
+                if value not in (None, "", []):
+                    setattr(item, name, value)
+            if identity.usb_serial:
+                # серийник адаптера теперь у этой платы у остальных его убираем
+                for other in self._items:
+                    if other is not item and other.usb_serial == identity.usb_serial:
+                        other.usb_serial = ""
+            return item
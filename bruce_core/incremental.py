@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import hashlib
+
+from bruce_core.container import open_image, save_image
+from bruce_core.esp import EspSession
+from bruce_core.operations import DEFAULT_FLASH_SIZE, device_meta
+
+BLOCK_SIZE = 64 * 1024
+
+
+class IncrementalStats:
+    """сколько чего было при инкрементальном бэкапе"""
+
+    def __init__(self, size: int, block_size: int):
+        self.size = size
+        self.block_size = block_size
+        self.blank_blocks = 0
+        self.reused_blocks = 0
+        self.read_blocks = 0
+        self.transferred = 0
+        self.elapsed = 0.0
+
+    @property
+    def blocks(self) -> int:
+        return self.blank_blocks + self.reused_blocks + self.read_blocks
+
+
+def blank_md5(size: int) -> str:
+    return hashlib.md5(b"\xff" * size).hexdigest()
+
+
+def manifest_path(backup_dir: str, mac: str) -> str:
+    """у каждой платы свой список md5 блоков с прошлого бэкапа по ее mac"""
+    name = "".join(c for c in mac if c.isalnum()) or "unknown"
+    return os.path.join(backup_dir, "manifests", f"{name}.json")
+
+
+def load_manifest(path: str):
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def save_manifest(path: str, data: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp, path)
+
+
+def _block_ranges(size: int, block_size: int):
+    for offset in range(0, size, block_size):
+        yield offset, min(block_size, size - offset)
+
+
+def incremental_backup(session: EspSession, path: str, manifest_path: str, size: int = None, offset: int = 0,
+                       block_size: int = BLOCK_SIZE, progress=None, hash_progress=None,
+                       catalog=None) -> IncrementalStats:
+    """бэкап который тянет с платы только изменившиеся блоки
+
+    сначала просим у стаба md5 каждого блока потом блоки из одних 0xFF просто заполняем сами
+    блоки у которых md5 совпал с прошлым бэкапом этой же платы берем из прошлого файла (.bin или .bbk)
+    а читаем по uart только оставшиеся подряд идущими кусками
+    progress(прочитано, всего к чтению) hash_progress(блоков сверено, всего блоков)
+    catalog это BackupCatalog куда записать готовый бэкап
+    """
+    if not size:
+        size = session.flash_size() or DEFAULT_FLASH_SIZE
+    started = time.time()
+    stats = IncrementalStats(size, block_size)
+
+    previous = load_manifest(manifest_path)
+    prev_hashes = []
+    prev_image = None
+    if (previous and previous.get("block_size") == block_size and previous.get("offset", 0) == offset
+            and os.path.isfile(previous.get("image") or "")):
+        prev_hashes = previous.get("blocks") or []
+        prev_image = previous["image"]
+
+    ranges = list(_block_ranges(size, block_size))
+    hashes = []
+    for i, (start, length) in enumerate(ranges):
+        hashes.append(session.md5(offset + start, length))
+        if hash_progress:
+            hash_progress(i + 1, len(ranges))
+
+    blank_full = blank_md5(block_size)
+    prev_file = None
+    if prev_image:
+        try:
+            prev_file = open_image(prev_image)
+        except Exception:
+            prev_file = None
+
+    # решаем для каждого блока откуда он возьмется: blank / prev / read
+    plan = []
+    out = bytearray()
+    try:
+        for i, (start, length) in enumerate(ranges):
+            md5 = hashes[i]
+            if md5 == (blank_full if length == block_size else blank_md5(length)):
+                plan.append("blank")
+                continue
+            if prev_file is not None and i < len(prev_hashes) and prev_hashes[i] == md5:
+                # прошлый файл могли поменять руками так что его кусок тоже сверяем
+                if hashlib.md5(prev_file.read(start, length)).hexdigest() == md5:
+                    plan.append("prev")
+                    continue
+            plan.append("read")
+
+        to_read = sum(length for (start, length), kind in zip(ranges, plan) if kind == "read")
+        done = 0
+        i = 0
+        while i < len(ranges):
+            kind = plan[i]
+            start, length = ranges[i]
+            if kind == "blank":
+                out += b"\xff" * length
+                stats.blank_blocks += 1
+                i += 1
+            elif kind == "prev":
+                out += prev_file.read(start, length)
+                stats.reused_blocks += 1
+                i += 1
+            else:
+                # соседние блоки на чтение склеиваем в одно чтение так быстрее
+                j = i
+                while j < len(ranges) and plan[j] == "read":
+                    j += 1
+                run_len = sum(length for _, length in ranges[i:j])
+
+                def cb(got, total, base=done):
+                    if progress:
+                        progress(base + got, to_read)
+
+                data = session.read(offset + start, run_len, progress=cb)
+                pos = 0
+                for k in range(i, j):
+                    block_start, block_len = ranges[k]
+                    if hashlib.md5(data[pos:pos + block_len]).hexdigest() != hashes[k]:
+                        raise IOError(f"block at 0x{offset + block_start:08x} changed while reading")
+                    pos += block_len
+                out += data
+                done += len(data)
+                stats.read_blocks += j - i
+                stats.transferred += len(data)
+                i = j
+    finally:
+        if prev_file is not None:
+            prev_file.close()
+    # прошлый файл уже закрыт так что его можно спокойно перезаписать новым
+    saved = save_image(path, out, offset, device_meta(session))
+    if catalog is not None:
+        catalog.add(saved, port=getattr(session, "port", ""), kind="incremental")
+
+    save_manifest(manifest_path, {
+        "image": os.path.abspath(path),
+        "size": size,
+        "offset": offset,
+        "block_size": block_size,
+        "blocks": hashes,
+        "created": time.time(),
+    })
+    stats.elapsed = time.time() - started
+    return stats
@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import hashlib
+from threading import Lock
+
+from bruce_core.esp import DEFAULT_BAUD, ROM_BAUD, EspSession
+from bruce_core.identity import port_details
+
+# скорости от быстрой к медленной ниже 115200 уже не падаем это скорость загрузчика
+BAUD_LADDER = [2000000, 1500000, 921600, 460800, 230400, 115200]
+# способы сброса по порядку usb_reset выручает некоторые платы где usb прямо в чипе
+RESET_STRATEGIES = ["default_reset", "usb_reset", "no_reset"]
+# у espressif свой vid на платах с usb в самом чипе скорость порта там ни на что не влияет
+NATIVE_USB_VIDS = {0x303A}
+# что пробуем при подборе и сколько читаем на каждой скорости хватает чтоб поймать битые пакеты и не ждать долго
+BENCHMARK_LADDER = [460800, 921600, 1500000, 2000000]
+BENCHMARK_SIZE = 32 * 1024
+# после скольких удачных операций подряд снова пробуем подняться на ступень выше
+PROMOTE_AFTER = 20
+
+
+def adapter_key(vid, pid, serial_number: str = "") -> str:
+    if vid is None or pid is None:
+        return ""
+    return f"{vid:04x}:{pid:04x}:{serial_number or ''}"
+
+
+def port_adapter(port: str):
+    """ключ адаптера и признак родного usb для порта или ("", False) если это не usb"""
+    serial_number, vid, pid = port_details(port)
+    return adapter_key(vid, pid, serial_number), vid in NATIVE_USB_VIDS
+
+
+class LinkProfile:
+    """что работает на конкретном usb адаптере скорость способ сброса и как часто он сбоит"""
+
+    FIELDS = ("key", "baud", "max_baud", "reset", "native_usb", "rate", "successes", "failures", "benchmarked")
+
+    def __init__(self, key: str = "", baud: int = DEFAULT_BAUD, max_baud: int = None, reset: str = "default_reset",
+                 native_usb: bool = False, rate: float = 0.0, successes: int = 0, failures: int = 0,
+                 benchmarked: float = 0.0):
+        self.key = key
+        self.baud = baud
+        # быстрее этого адаптер не тянет по результатам подбора
+        self.max_baud = max_baud or baud
+        self.reset = reset
+        self.native_usb = native_usb
+        self.rate = rate
+        self.successes = successes
+        self.failures = failures
+        self.benchmarked = benchmarked
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LinkProfile":
+        return cls(**{name: data[name] for name in cls.FIELDS if name in data})
+
+    @property
+    def session_baud(self):
+        """на родном usb менять скорость незачем так что сессия остается на скорости загрузчика"""
+        return None if self.native_usb else self.baud
+
+    def reset_order(self) -> list:
+        return [self.reset] + [m for m in RESET_STRATEGIES if m != self.reset]
+
+
+def lower_baud(baud: int):
+    for step in BAUD_LADDER:
+        if step < baud:
+            return step
+    return None
+
+
+class LinkProfileStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = Lock()
+        self._profiles = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._profiles = {p["key"]: LinkProfile.from_dict(p) for p in data.get("adapters", []) if p.get("key")}
+        except Exception:
+            self._profiles = {}
+
+    def save(self):
+        with self._lock:
+            data = {"adapters": [p.to_dict() for p in self._profiles.values()]}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def get(self, key: str):
+        with self._lock:
+            return self._profiles.get(key) if key else None
+
+    def profile_for(self, key: str, native_usb: bool = False) -> LinkProfile:
+        """профиль адаптера а для незнакомого профиль по умолчанию который еще не сохранен"""
+        profile = self.get(key)
+        if profile is not None:
+            return profile
+        return LinkProfile(key, native_usb=native_usb)
+
+    def put(self, profile: LinkProfile):
+        if not profile.key:
+            return
+        with self._lock:
+            self._profiles[profile.key] = profile
+
+    def record_success(self, profile: LinkProfile, reset: str = None):
+        with self._lock:
+            profile.successes += 1
+            if reset:
+                # запоминаем тот способ сброса с которым подключились чтоб в следующий раз начинать с него
+                profile.reset = reset
+            # долго без сбоев значит можно опять попробовать скорость повыше но не выше найденного потолка
+            if profile.successes >= PROMOTE_AFTER and profile.baud < profile.max_baud:
+                higher = [b for b in BAUD_LADDER if profile.baud < b <= profile.max_baud]
+                profile.baud = higher[-1] if higher else profile.baud
+                profile.successes = 0
+        self.put(profile)
+
+    def record_failure(self, profile: LinkProfile):
+        """сбой передачи опускаем профиль на ступень ниже вернет новую скорость или None если ниже некуда"""
+        with self._lock:
+            profile.failures += 1
+            profile.successes = 0
+            if profile.native_usb:
+                return None
+            lower = lower_baud(profile.baud)
+            if lower is None:
+                return None
+            profile.baud = lower
+        self.put(profile)
+        return lower
+
+
+class BaudBenchmark:
+    def __init__(self, best: int, rate: float = 0.0):
+        self.best = best
+        self.rate = rate
+        # (скорость, данные сошлись, байт в секунду) на каждой опробованной ступени
+        self.results = []
+        # False если на какой-то скорости связь порвалась и сессию надо переподключить
+        self.link_ok = True
+
+    @property
+    def tuned(self) -> bool:
+        """хоть одна ступень прошла чисто иначе best это просто скорость загрузчика а не замер"""
+        return any(ok for _, ok, _ in self.results)
+
+
+def benchmark_baud(session: EspSession, ladder=BENCHMARK_LADDER, size: int = BENCHMARK_SIZE,
+                   offset: int = 0) -> BaudBenchmark:
+    """гоняет чтение флеша на каждой скорости снизу вверх и оставляет сессию на самой быстрой рабочей
+
+    после каждого чтения сверяем md5 с тем что посчитала сама плата так что битые пакеты тоже ловятся
+    скорость загрузчика 115200 рабочая заранее раз уж подключились на ней
+    """
+    bench = BaudBenchmark(ROM_BAUD)
+    for baud in sorted(ladder):
+        try:
+            session.change_baud(baud)
+            started = time.monotonic()
+            data = session.read(offset, size)
+            elapsed = max(time.monotonic() - started, 1e-6)
+            ok = hashlib.md5(data).hexdigest() == session.md5(offset, size)
+        except Exception:
+            bench.results.append((baud, False, 0.0))
+            bench.link_ok = False
+            return bench
+        rate = len(data) / elapsed if ok else 0.0
+        bench.results.append((baud, ok, rate))
+        if not ok:
+            break
+        # бывает что на большей скорости адаптер захлебывается и реально выходит медленнее
+        if rate > bench.rate:
+            bench.best, bench.rate = baud, rate
+    if session.baud != bench.best:
+        session.change_baud(bench.best)
+    return bench
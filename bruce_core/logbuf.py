@@ -0,0 +1,57 @@
+import time
+from collections import deque
+from threading import Lock
+
+
+class LogBuffer:
+    """кольцевой буфер строк лога между рабочими потоками и гуи
+
+    потоки только складывают строки сюда а гуи забирает их пачкой по таймеру
+    строки прогресса с одним и тем же ключом не копятся а перезаписывают друг друга
+    если гуи не успевает то самые старые строки выкидываются и считаются в dropped
+    """
+
+    def __init__(self, capacity: int = 5000):
+        self.capacity = max(1, capacity)
+        self._lock = Lock()
+        self._items = deque()
+        # ключ прогресса -> его запись в очереди чтоб новую строку писать поверх старой
+        self._progress = {}
+        self.dropped = 0
+        self.collapsed = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+
+    def push(self, text: str, collapse_key: str = None):
+        now = time.monotonic()
+        with self._lock:
+            if collapse_key is not None:
+                entry = self._progress.get(collapse_key)
+                if entry is not None:
+                    entry[1] = text
+                    self.collapsed += 1
+                    return
+            entry = [collapse_key, text, now]
+            if len(self._items) >= self.capacity:
+                old = self._items.popleft()
+                self.dropped += 1
+                if old[0] is not None and self._progress.get(old[0]) is old:
+                    del self._progress[old[0]]
+            self._items.append(entry)
+            if collapse_key is not None:
+                self._progress[collapse_key] = entry
+
+    def drain(self) -> list:
+        """забирает все накопленное списком (ключ, строка) и запоминает насколько гуи отстал"""
+        with self._lock:
+            if not self._items:
+                return []
+            items, self._items = self._items, deque()
+            self._progress = {}
+        self.lag = time.monotonic() - items[0][2]
+        self.max_lag = max(self.max_lag, self.lag)
+        return [(key, text) for key, text, _ in items]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
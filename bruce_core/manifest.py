@@ -0,0 +1,459 @@
+"""манифест пакетной подготовки плат
+
+какой порт или usb серийник получает какой релиз и файл стирать ли флеш и снимать ли бэкап перед прошивкой
+flash: false оставляет только бэкап
+один и тот же json или yaml запускается и из гуи и из командной строки а в конце пишется отчет по каждой плате
+
+    release: latest
+    backup: true
+    jobs: 4
+    devices:
+      - port: COM5
+        board: m5stack-cplus2
+      - usb_serial: 5A2F0123
+        release: beta
+        erase: true
+      - port: /dev/ttyACM*
+
+ключи верхнего уровня кроме devices jobs и report это значения по умолчанию для каждой строки
+"""
+import os
+import json
+import time
+import fnmatch
+
+from bruce_core.batch import BatchRunner
+from bruce_core.boards import find_profile
+from bruce_core.diffflash import diff_flash
+from bruce_core.operations import backup_flash, default_backup_name, flash_image
+from bruce_core.releases import bin_assets, match_assets, pick_release
+
+MANIFEST_EXTS = (".json", ".yaml", ".yml")
+
+
+def _english(ru: str, en: str) -> str:
+    return en
+
+
+class ManifestError(ValueError):
+    """манифест не разобрать или то что в нем написано не сходится с релизами и платами"""
+
+
+class DeviceSpec:
+    """одна строка манифеста port можно шаблоном вроде COM* или /dev/ttyACM* тогда строка берет все такие порты"""
+
+    FIELDS = ("name", "port", "usb_serial", "release", "asset", "board", "file", "erase", "backup", "flash", "offset")
+
+    def __init__(self, name: str = "", port: str = "", usb_serial: str = "", release: str = "latest", asset: str = "",
+                 board: str = "", file: str = "", erase: bool = False, backup: bool = False, flash: bool = True,
+                 offset: int = None):
+        self.name = name
+        self.port = port
+        self.usb_serial = usb_serial
+        self.release = release
+        self.asset = asset
+        self.board = board
+        self.file = file
+        self.erase = erase
+        self.backup = backup
+        self.flash = flash
+        self.offset = offset
+
+    @property
+    def label(self) -> str:
+        return self.name or self.port or self.usb_serial
+
+    @property
+    def is_pattern(self) -> bool:
+        return any(c in self.port for c in "*?[")
+
+    def matches(self, device: str, serial_number: str = "") -> bool:
+        if self.usb_serial and (serial_number or "") != self.usb_serial:
+            return False
+        if self.port and not fnmatch.fnmatchcase(device, self.port):
+            return False
+        return True
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: dict, defaults: dict = None) -> "DeviceSpec":
+        if not isinstance(data, dict):
+            raise ManifestError(f"device entry must be a mapping, got {data!r}")
+        unknown = sorted(set(data) - set(cls.FIELDS))
+        if unknown:
+            raise ManifestError(f"unknown keys in device entry: {', '.join(unknown)}")
+        merged = dict(defaults or {})
+        merged.update(data)
+        if not merged.get("port") and not merged.get("usb_serial"):
+            raise ManifestError(f"device entry needs port or usb_serial: {data!r}")
+        offset = merged.get("offset")
+        try:
+            offset = None if offset is None else int(str(offset), 0)
+        except ValueError:
+            raise ManifestError(f"bad offset {offset!r}")
+        return cls(
+            name=str(merged.get("name") or ""),
+            port=str(merged.get("port") or ""),
+            usb_serial=str(merged.get("usb_serial") or ""),
+            release=str(merged.get("release") or "latest"),
+            asset=str(merged.get("asset") or ""),
+            board=str(merged.get("board") or ""),
+            file=str(merged.get("file") or ""),
+            erase=bool(merged.get("erase", False)),
+            backup=bool(merged.get("backup", False)),
+            flash=bool(merged.get("flash", True)),
+            offset=offset,
+        )
+
+
+class Manifest:
+    DEFAULT_KEYS = ("release", "asset", "board", "file", "erase", "backup", "flash", "offset")
+
+    def __init__(self, devices: list, jobs: int = None, report: str = "", path: str = ""):
+        self.devices = devices
+        self.jobs = jobs
+        self.report = report
+        self.path = path
+
+    @classmethod
+    def from_dict(cls, data: dict, path: str = "") -> "Manifest":
+        if not isinstance(data, dict):
+            raise ManifestError("manifest must be a mapping with a devices list")
+        unknown = sorted(set(data) - set(cls.DEFAULT_KEYS) - {"devices", "jobs", "report"})
+        if unknown:
+            raise ManifestError(f"unknown keys in manifest: {', '.join(unknown)}")
+        entries = data.get("devices")
+        if not isinstance(entries, list) or not entries:
+            raise ManifestError("manifest has no devices")
+        defaults = {key: data[key] for key in cls.DEFAULT_KEYS if key in data}
+        base = os.path.dirname(os.path.abspath(path)) if path else ""
+        devices = []
+        for entry in entries:
+            spec = DeviceSpec.from_dict(entry, defaults)
+            if spec.file and base and not os.path.isabs(spec.file):
+                # относительные пути в манифесте считаем от папки самого манифеста
+                spec.file = os.path.join(base, spec.file)
+            devices.append(spec)
+        jobs = data.get("jobs")
+        if jobs is not None:
+            try:
+                jobs = max(1, int(jobs))
+            except (TypeError, ValueError):
+                raise ManifestError(f"bad jobs {jobs!r}")
+        report = str(data.get("report") or "")
+        if report and base and not os.path.isabs(report):
+            report = os.path.join(base, report)
+        return cls(devices, jobs, report, path)
+
+
+def load_manifest(path: str) -> Manifest:
+    """json или yaml по расширению yaml нужен pyyaml и грузится только когда он правда нужен"""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if path.lower().endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ManifestError("PyYAML is needed to read YAML manifests (pip install pyyaml)")
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ManifestError(f"{path}: {e}")
+    else:
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            raise ManifestError(f"{path}: {e}")
+    return Manifest.from_dict(data, path)
+
+
+def assign_ports(manifest: Manifest, ports) -> tuple:
+    """какой подключенный порт какой строке манифеста достается
+
+    ports это [(порт, usb серийник)] каждый порт берет первая подходящая строка
+    вернет ([(порт, строка)], [строки для которых платы не нашлось])
+    """
+    ports = list(ports)
+    taken = set()
+    assigned = []
+    missing = []
+    for spec in manifest.devices:
+        hits = [device for device, serial_number in ports if device not in taken and spec.matches(device, serial_number)]
+        if not spec.is_pattern:
+            hits = hits[:1]
+        if not hits:
+            missing.append(spec)
+            continue
+        for device in hits:
+            taken.add(device)
+            assigned.append((device, spec))
+    return assigned, missing
+
+
+class Target:
+    """что именно шьем на плату релиз и ассет или локальный файл и по какому адресу"""
+
+    def __init__(self, release: dict = None, asset: dict = None, file: str = "", board=None, offset: int = 0):
+        self.release = release
+        self.asset = asset
+        self.file = file
+        self.board = board
+        self.offset = offset
+
+    @property
+    def name(self) -> str:
+        if self.asset is not None:
+            return self.asset.get("name", "firmware.bin")
+        return os.path.basename(self.file)
+
+
+class DeviceResult:
+    """итог по одной плате для отчета steps это сколько секунд занял каждый шаг"""
+
+    def __init__(self, port: str, spec: DeviceSpec):
+        self.port = port
+        self.spec = spec
+        self.ok = False
+        self.skipped = False
+        self.error = ""
+        self.started = 0.0
+        self.finished = 0.0
+        self.steps = {}
+        self.target = None
+        self.backup = ""
+        self.written = None
+
+    @property
+    def duration(self) -> float:
+        return max(0.0, self.finished - self.started)
+
+    @property
+    def status(self) -> str:
+        if self.ok:
+            return "ok"
+        if self.skipped:
+            return "skipped"
+        return "failed" if self.port else "missing"
+
+    def to_dict(self) -> dict:
+        target = self.target
+        return {
+            "device": self.spec.label,
+            "port": self.port,
+            "usb_serial": self.spec.usb_serial,
+            "status": self.status,
+            "error": self.error,
+            "release": target.release.get("tag") if target is not None and target.release else None,
+            "firmware": (target.name or None) if target is not None else None,
+            "board": target.board.name if target is not None and target.board is not None else None,
+            "erase": self.spec.erase,
+            "backup": self.backup or None,
+            "written": self.written,
+            "started": round(self.started, 3) if self.started else None,
+            "finished": round(self.finished, 3) if self.finished else None,
+            "duration": round(self.duration, 3),
+            "steps": {name: round(took, 3) for name, took in self.steps.items()},
+        }
+
+
+class Provisioner:
+    """шаги для одной платы скачать прошивку снять бэкап и прошить одной сессией esptool
+
+    progress(порт, стадия, сделано, всего) стадии download backup write и hash (у hash это блоки а не байты)
+    step(порт, шаг) дергается в начале каждого шага download backup flash
+    """
+
+    def __init__(self, devices, cache, releases: list, backup_dir: str, differential: bool = True, asset_index=None,
+                 log=None, translate=_english, catalog=None):
+        self.devices = devices
+        self.cache = cache
+        self.releases = list(releases or [])
+        self.backup_dir = backup_dir
+        self.differential = differential
+        self.asset_index = asset_index
+        # BackupCatalog куда пишем снятые бэкапы
+        self.catalog = catalog
+        self._log = log
+        self._t = translate
+
+    def log(self, msg: str):
+        if self._log:
+            self._log(msg)
+
+    def resolve(self, port: str, spec: DeviceSpec) -> Target:
+        """подбирает прошивку для платы до того как кого-то трогать ошибки сразу ManifestError"""
+        board = None
+        if spec.board:
+            board = find_profile(self.devices.boards, spec.board)
+            if board is None:
+                raise ManifestError(f"unknown board {spec.board}")
+        if not spec.flash:
+            if not spec.backup:
+                raise ManifestError("nothing to do: flash and backup are both off")
+            return Target(board=board)
+        if spec.file:
+            if not os.path.isfile(spec.file):
+                raise ManifestError(f"file not found: {spec.file}")
+            return Target(file=spec.file, board=board, offset=self._offset(spec, board))
+
+        rel = pick_release(self.releases, spec.release)
+        if rel is None:
+            raise ManifestError(f"no release matches {spec.release}")
+        bins = bin_assets(rel)
+        if not bins:
+            raise ManifestError(f"release {rel.get('tag')} has no .bin files")
+        if spec.asset:
+            matches = match_assets(bins, spec.asset)
+            if len(matches) != 1:
+                reason = "matches several" if matches else "matches none of"
+                raise ManifestError(f"asset {spec.asset} {reason} the .bin files of {rel.get('tag')}")
+            asset = matches[0]
+        else:
+            if board is None:
+                board = self.devices.board_for_port(port)
+            asset = None
+            if board is not None and self.asset_index is not None:
+                asset = self.asset_index.asset_for(rel, board)
+            if asset is None:
+                if len(bins) != 1:
+                    what = f"no .bin for board {board.name}" if board is not None else "the board is not recognized"
+                    raise ManifestError(f"release {rel.get('tag')}: {what}, set asset or board in the manifest")
+                asset = bins[0]
+        return Target(rel, asset, board=board, offset=self._offset(spec, board))
+
+    @staticmethod
+    def _offset(spec: DeviceSpec, board) -> int:
+        if spec.offset is not None:
+            return spec.offset
+        return board.offset if board is not None else 0
+
+    def provision(self, result: DeviceResult, progress=None, step=None):
+        port = result.port
+        spec = result.spec
+        target = result.target
+
+        def report(stage: str):
+            if progress is None:
+                return None
+            return lambda done, total, *rest: progress(port, stage, done, total)
+
+        def begin(name: str) -> float:
+            if step is not None:
+                step(port, name)
+            return time.monotonic()
+
+        path = target.file
+        pinned = False
+        if spec.flash and not path:
+            started = begin("download")
+            path = self.cache.fetch(target.asset, progress=report("download"), pin=True)
+            pinned = True
+            result.steps["download"] = time.monotonic() - started
+        try:
+
+            def work(session):
+                if spec.backup:
+                    started = begin("backup")
+                    os.makedirs(self.backup_dir, exist_ok=True)
+                    backup_path = os.path.join(self.backup_dir, default_backup_name(port))
+                    backup_flash(session, backup_path, progress=report("backup"), catalog=self.catalog)
+                    result.backup = backup_path
+                    result.steps["backup"] = time.monotonic() - started
+                    self.log(self._t(f"{port}: бэкап сохранён {backup_path}", f"{port}: backup saved to {backup_path}"))
+                if not spec.flash:
+                    return
+                started = begin("flash")
+                if spec.erase:
+                    flash_image(session, path, erase=True, offset=target.offset, progress=report("write"))
+                    result.written = os.path.getsize(path)
+                elif self.differential:
+                    stats = diff_flash(
+                        session, path, target.offset, progress=report("write"), hash_progress=report("hash")
+                    )
+                    result.written = stats.written
+                else:
+                    flash_image(session, path, offset=target.offset, progress=report("write"))
+                    result.written = os.path.getsize(path)
+                result.steps["flash"] = time.monotonic() - started
+
+            self.devices.with_session(port, work)
+        finally:
+            if pinned:
+                self.cache.release(path)
+        if spec.flash:
+            self.log(self._t(f"{port}: прошито {target.name}", f"{port}: flashed {target.name}"))
+
+
+def run_manifest(manifest: Manifest, provisioner: Provisioner, ports, runner: BatchRunner = None, on_start=None,
+                 on_done=None, progress=None, step=None) -> list:
+    """гоняет манифест по подключенным платам не больше runner.max_workers одновременно
+
+    сначала для каждой платы подбирается прошивка и только потом что-то шьется
+    on_start(порт) и on_done(DeviceResult) зовутся из рабочих потоков для плат которые нашлись
+    вернет результаты по порядку строк манифеста и те что не нашлись в конце
+    """
+    assigned, missing = assign_ports(manifest, ports)
+    results = {}
+    runnable = []
+    for port, spec in assigned:
+        result = results[port] = DeviceResult(port, spec)
+        try:
+            result.target = provisioner.resolve(port, spec)
+        except ManifestError as e:
+            result.error = str(e)
+            if on_done is not None:
+                on_done(result)
+            continue
+        runnable.append(port)
+
+    def job(port: str) -> bool:
+        provisioner.provision(results[port], progress, step)
+        return True
+
+    def done(job_result):
+        result = results[job_result.key]
+        result.ok = job_result.ok
+        result.skipped = job_result.skipped
+        result.started = job_result.started
+        result.finished = job_result.finished
+        if job_result.error is not None:
+            result.error = str(job_result.error) or type(job_result.error).__name__
+        if on_done is not None:
+            on_done(result)
+
+    if runner is None:
+        runner = BatchRunner(manifest.jobs or 4)
+    runner.run(runnable, job, on_start, done)
+
+    ordered = [results[port] for port, _ in assigned]
+    for spec in missing:
+        result = DeviceResult("", spec)
+        result.error = "device not connected"
+        ordered.append(result)
+    return ordered
+
+
+def report_path(manifest: Manifest, reports_dir: str) -> str:
+    if manifest.report:
+        return manifest.report
+    name = os.path.splitext(os.path.basename(manifest.path or "manifest"))[0]
+    return os.path.join(reports_dir, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+
+
+def write_report(path: str, manifest: Manifest, results: list) -> dict:
+    """отчет json по каждой плате со временем шагов пишется через временный файл"""
+    report = {
+        "manifest": os.path.abspath(manifest.path) if manifest.path else None,
+        "created": round(time.time(), 3),
+        "ok": sum(1 for r in results if r.ok),
+        "failed": sum(1 for r in results if not r.ok),
+        "devices": [r.to_dict() for r in results],
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+    return report
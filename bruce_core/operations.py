@@ -0,0 +1,118 @@
+import time
+import zlib
+
+from bruce_core.container import BBK_EXT, KIND_BLANK, KIND_ZLIB, BackupContainer, is_container, save_image
+from bruce_core.esp import EspSession
+
+
+DEFAULT_FLASH_SIZE = 16 * 1024 * 1024
+# erase_region умеет стирать только целыми секторами
+SECTOR_SIZE = 4096
+
+
+def flash_image(session: EspSession, path: str, erase: bool = False, offset: int = 0, progress=None):
+    """заливает bin целиком по уже открытой сессии erase=True сначала стирает весь чип"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if erase:
+        session.erase_all()
+    session.write(offset, data, progress=progress)
+
+
+def default_backup_name(port: str) -> str:
+    """имя с портом и временем чтоб новый бэкап не затирал прошлый"""
+    safe_port = "".join(c if c.isalnum() else "_" for c in port).strip("_")
+    return f"bruce_backup_{safe_port}_{time.strftime('%Y%m%d_%H%M%S')}{BBK_EXT}"
+
+
+def device_meta(session: EspSession) -> dict:
+    """что знаем про плату то и кладем в метаданные контейнера"""
+    meta = {"chip": session.chip_name, "created": time.time()}
+    try:
+        meta["mac"] = session.mac()
+    except Exception:
+        pass
+    try:
+        meta["flash_size"] = session.flash_size()
+    except Exception:
+        pass
+    return meta
+
+
+def backup_flash(session: EspSession, path: str, size: int = None, offset: int = 0, progress=None,
+                 catalog=None) -> int:
+    """читает флеш в файл и возвращает сколько байт прочитали
+
+    без size берем размер который сообщила сама плата а пишем сначала во временный файл
+    чтоб при обрыве не оставить рядом с нормальными бэкапами обрезанный
+    если путь кончается на .bbk то сохраняем сжатым контейнером
+    catalog это BackupCatalog куда записать бэкап если он нужен
+    """
+    if not size:
+        size = session.flash_size() or DEFAULT_FLASH_SIZE
+    data = session.read(offset, size, progress=progress)
+    saved = save_image(path, data, offset, device_meta(session))
+    if catalog is not None:
+        catalog.add(saved, port=getattr(session, "port", ""))
+    return len(data)
+
+
+def restore_container(session: EspSession, container: BackupContainer, offset: int = None, progress=None,
+                      verify: bool = True) -> int:
+    """пишет .bbk на плату блок за блоком прямо из файла без распаковки во временный образ
+
+    сжатые блоки уходят в flash_defl как лежат и проверяются по md5 из заголовка
+    verify=False не проверяет каждый блок сразу если сверять будут потом одним проходом
+    подряд идущие пустые блоки просто стираются одной командой
+    возвращает сколько байт реально ушло по uart
+    """
+    base = container.offset if offset is None else offset
+    total = container.image_size
+    done = 0
+    sent = 0
+    blocks = container.blocks
+    i = 0
+    while i < len(blocks):
+        block = blocks[i]
+        if block.kind == KIND_BLANK:
+            j = i
+            while j < len(blocks) and blocks[j].kind == KIND_BLANK:
+                j += 1
+            run = sum(b.size for b in blocks[i:j])
+            aligned = run - run % SECTOR_SIZE
+            if aligned:
+                session.erase_region(base + block.offset, aligned)
+            if run != aligned:
+                # хвост меньше сектора стереть нельзя так что пишем туда 0xFF честно
+                tail = b"\xff" * (run - aligned)
+                session.write_compressed(base + block.offset + aligned, len(tail), zlib.compress(tail, 9), quiet=True)
+            done += run
+            i = j
+        else:
+            payload = container.stored_block(block)
+            md5 = block.md5.hex() if verify else None
+
+            def cb(written, size, start=done):
+                if progress:
+                    progress(start + written, total)
+
+            if block.kind == KIND_ZLIB:
+                session.write_compressed(base + block.offset, block.size, payload, cb, md5, quiet=True)
+            else:
+                session.write_compressed(base + block.offset, block.size, zlib.compress(payload, 9), cb, md5, quiet=True)
+            sent += len(payload)
+            done += block.size
+            i += 1
+        if progress:
+            progress(done, total)
+    return sent
+
+
+def restore_image(session: EspSession, path: str, offset: int = 0, progress=None):
+    """пишет бэкап обратно на плату с проверкой md5 хоть сырой .bin хоть .bbk"""
+    if is_container(path):
+        with BackupContainer(path) as container:
+            sent = restore_container(session, container, progress=progress)
+        session.log(f"Restored {container.image_size} bytes from container ({sent} bytes sent), hashes verified.")
+        return
+    flash_image(session, path, erase=False, offset=offset, progress=progress)
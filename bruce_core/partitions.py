@@ -0,0 +1,197 @@
+import struct
+import hashlib
+
+from bruce_core.container import open_image, save_image
+from bruce_core.esp import EspSession
+from bruce_core.operations import device_meta
+
+# таблица разделов esp32 лежит по 0x8000 и занимает один сектор
+PARTITION_TABLE_OFFSET = 0x8000
+PARTITION_TABLE_SIZE = 0xC00
+
+_ENTRY = struct.Struct("<2sBBII16sI")
+_ENTRY_MAGIC = b"\xaa\x50"
+_MD5_MAGIC = b"\xeb\xeb"
+
+TYPE_NAMES = {0x00: "app", 0x01: "data"}
+APP_SUBTYPES = {0x00: "factory", 0x20: "test"}
+APP_SUBTYPES.update({0x10 + i: f"ota_{i}" for i in range(16)})
+DATA_SUBTYPES = {
+    0x00: "ota",
+    0x01: "phy",
+    0x02: "nvs",
+    0x03: "coredump",
+    0x04: "nvs_keys",
+    0x05: "efuse",
+    0x06: "undefined",
+    0x80: "esphttpd",
+    0x81: "fat",
+    0x82: "spiffs",
+    0x83: "littlefs",
+}
+
+
+class Partition:
+    def __init__(self, label: str, type_: int, subtype: int, offset: int, size: int, flags: int = 0):
+        self.label = label
+        self.type = type_
+        self.subtype = subtype
+        self.offset = offset
+        self.size = size
+        self.flags = flags
+
+    @property
+    def type_name(self) -> str:
+        return TYPE_NAMES.get(self.type, f"0x{self.type:02x}")
+
+    @property
+    def subtype_name(self) -> str:
+        names = APP_SUBTYPES if self.type == 0x00 else DATA_SUBTYPES if self.type == 0x01 else {}
+        return names.get(self.subtype, f"0x{self.subtype:02x}")
+
+    @property
+    def encrypted(self) -> bool:
+        return bool(self.flags & 1)
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.size
+
+    def __repr__(self):
+        return f"Partition({self.label!r}, {self.type_name}/{self.subtype_name}, 0x{self.offset:x}, 0x{self.size:x})"
+
+
+def safe_label(label: str) -> str:
+    """метка раздела которую можно вставить в имя файла"""
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in label) or "part"
+
+
+def select_partitions(partitions: list, labels) -> list:
+    """разделы с такими метками в порядке таблицы ValueError если какой-то метки в таблице нет"""
+    wanted = list(labels)
+    missing = [label for label in wanted if not any(p.label == label for p in partitions)]
+    if missing:
+        raise ValueError(f"no such partitions: {', '.join(missing)}")
+    return [p for p in partitions if p.label in wanted]
+
+
+def parse_partition_table(data: bytes) -> list:
+    """разбирает бинарную таблицу разделов если в конце есть md5 то сверяем и его"""
+    partitions = []
+    for pos in range(0, len(data) - _ENTRY.size + 1, _ENTRY.size):
+        chunk = data[pos:pos + _ENTRY.size]
+        magic = chunk[:2]
+        if magic == _ENTRY_MAGIC:
+            _, type_, subtype, offset, size, label, flags = _ENTRY.unpack(chunk)
+            label = label.split(b"\0", 1)[0].decode("utf-8", errors="replace")
+            partitions.append(Partition(label, type_, subtype, offset, size, flags))
+        elif magic == _MD5_MAGIC:
+            if hashlib.md5(data[:pos]).digest() != chunk[16:32]:
+                raise ValueError("partition table md5 mismatch")
+        elif chunk == b"\xff" * _ENTRY.size:
+            break
+        else:
+            raise ValueError(f"bad partition table entry at +0x{pos:x}")
+    if not partitions:
+        raise ValueError("partition table is empty")
+    return partitions
+
+
+def read_partition_table(session: EspSession) -> list:
+    return parse_partition_table(session.read(PARTITION_TABLE_OFFSET, PARTITION_TABLE_SIZE))
+
+
+def image_partition_table(path: str):
+    """таблица разделов из полного образа или None если файл не с нуля или таблицы там нет"""
+    with open_image(path) as image:
+        if getattr(image, "offset", 0) != 0 or image.image_size < PARTITION_TABLE_OFFSET + PARTITION_TABLE_SIZE:
+            return None
+        try:
+            return parse_partition_table(image.read(PARTITION_TABLE_OFFSET, PARTITION_TABLE_SIZE))
+        except ValueError:
+            return None
+
+
+# esp_app_desc_t лежит сразу за заголовком образа (24 байта) и заголовком первого сегмента (8 байт)
+APP_DESC_OFFSET = 0x20
+APP_DESC_MAGIC = 0xABCD5432
+_APP_DESC = struct.Struct("<II8x32s32s")
+_OTA_SELECT = struct.Struct("<I20sII")
+OTA_SELECT_SECTOR = 0x1000
+
+
+def _active_app(image, base: int, table: list):
+    """раздел приложения с которого плата грузится по otadata а без нее factory или первый ota"""
+    apps = [p for p in table if p.type == 0x00]
+    if not apps:
+        return None
+    factory = next((p for p in apps if p.subtype == 0x00), None)
+    slots = sorted((p for p in apps if 0x10 <= p.subtype < 0x20), key=lambda p: p.subtype)
+    otadata = next((p for p in table if p.type == 0x01 and p.subtype == 0x00), None)
+    if otadata is not None and slots and otadata.offset - base + 2 * OTA_SELECT_SECTOR <= image.image_size:
+        seqs = []
+        for sector in (0, OTA_SELECT_SECTOR):
+            seq = _OTA_SELECT.unpack(image.read(otadata.offset - base + sector, _OTA_SELECT.size))[0]
+            if seq not in (0, 0xFFFFFFFF):
+                seqs.append(seq)
+        if seqs:
+            return slots[(max(seqs) - 1) % len(slots)]
+    return factory or apps[0]
+
+
+def app_version(data: bytes) -> str:
+    """версия из esp_app_desc_t если data это начало образа приложения иначе пустая строка"""
+    if len(data) < APP_DESC_OFFSET + _APP_DESC.size:
+        return ""
+    magic, _secure, version, _project = _APP_DESC.unpack_from(data, APP_DESC_OFFSET)
+    if magic != APP_DESC_MAGIC:
+        return ""
+    return version.split(b"\0", 1)[0].decode("utf-8", errors="replace").strip()
+
+
+def image_firmware(image, base: int = None) -> str:
+    """версия прошивки в образе image это BackupContainer или RawImage base откуда образ начинается во флеше
+
+    в полном образе ищем загрузочный раздел приложения по таблице и otadata
+    а бэкап одного раздела приложения читаем прямо с начала
+    """
+    if base is None:
+        base = getattr(image, "offset", 0)
+    head = APP_DESC_OFFSET + _APP_DESC.size
+    try:
+        if base <= PARTITION_TABLE_OFFSET and PARTITION_TABLE_OFFSET + PARTITION_TABLE_SIZE - base <= image.image_size:
+            table = parse_partition_table(image.read(PARTITION_TABLE_OFFSET - base, PARTITION_TABLE_SIZE))
+            app = _active_app(image, base, table)
+            if app is None or app.offset < base or app.offset - base + head > image.image_size:
+                return ""
+            return app_version(image.read(app.offset - base, head))
+        return app_version(image.read(0, head))
+    except (ValueError, struct.error):
+        return ""
+
+
+def backup_partitions(session: EspSession, partitions: list, path_for, progress=None, catalog=None) -> list:
+    """каждый выбранный раздел в свой файл path_for(раздел) с его смещением в метаданных
+
+    progress(прочитано, всего) идет по сумме размеров всех разделов
+    catalog это BackupCatalog куда записать каждый файл
+    """
+    total = sum(p.size for p in partitions)
+    done = 0
+    meta = device_meta(session)
+    paths = []
+    for p in partitions:
+        def cb(got, size, base=done):
+            if progress:
+                progress(base + got, total)
+
+        data = session.read(p.offset, p.size, progress=cb)
+        path = path_for(p)
+        part_meta = dict(meta, partition=p.label, type=p.type_name, subtype=p.subtype_name)
+        saved = save_image(path, data, p.offset, part_meta)
+        if catalog is not None:
+            catalog.add(saved, port=getattr(session, "port", ""))
+        paths.append(path)
+        done += p.size
+    return paths
+
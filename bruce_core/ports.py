@@ -0,0 +1,168 @@
+import time
+from threading import Event, Lock, Thread
+
+import serial.tools.list_ports
+
+# как часто опрашиваем систему на предмет новых и пропавших портов
+POLL_INTERVAL = 1.0
+# сколько секунд список портов считается свежим и comports заново не зовем
+MAX_AGE = 1.0
+
+
+class PortInfo:
+    """порт и что за адаптер на нем key не меняется когда у той же платы поменялся номер COM порта
+
+    ключ берем по usb серийнику а если его нет (дешевые ch340) то по месту в usb дереве
+    """
+
+    def __init__(self, device: str, serial_number: str = "", vid: int = None, pid: int = None, location: str = "",
+                 description: str = "", hwid: str = ""):
+        self.device = device
+        self.serial_number = serial_number or ""
+        self.vid = vid
+        self.pid = pid
+        self.location = location or ""
+        self.description = description or ""
+        self.hwid = hwid or ""
+
+    @property
+    def key(self) -> str:
+        if self.vid is not None and self.serial_number:
+            return f"usb:{self.vid:04x}:{self.pid:04x}:{self.serial_number}"
+        if self.location:
+            return f"loc:{self.location}"
+        return f"dev:{self.device}"
+
+    @property
+    def is_usb(self) -> bool:
+        return self.vid is not None
+
+    @classmethod
+    def from_listing(cls, info) -> "PortInfo":
+        return cls(
+            info.device,
+            getattr(info, "serial_number", "") or "",
+            getattr(info, "vid", None),
+            getattr(info, "pid", None),
+            getattr(info, "location", "") or "",
+            getattr(info, "description", "") or "",
+            getattr(info, "hwid", "") or "",
+        )
+
+    def __repr__(self):
+        return f"PortInfo({self.device!r}, {self.key!r})"
+
+
+def list_ports() -> list:
+    return [PortInfo.from_listing(info) for info in serial.tools.list_ports.comports()]
+
+
+class PortRegistry:
+    """живой список портов общий на весь лаунчер
+
+    snapshot() отдает закэшированный список и перечитывает систему только если он устарел
+    start() запускает опрос в фоне и подписчики subscribe(callback) получают callback(пришли, ушли)
+    сравнение идет по key так что смена номера порта у той же платы не считается новой платой
+    """
+
+    def __init__(self, lister=list_ports, interval: float = POLL_INTERVAL, max_age: float = MAX_AGE):
+        self.lister = lister
+        self.interval = interval
+        self.max_age = max_age
+        self._lock = Lock()
+        self._ports = {}
+        self._signature = None
+        self._updated = 0.0
+        self._listeners = []
+        self._stop = Event()
+        self._thread = None
+        self._users = 0
+
+    def refresh(self) -> tuple:
+        """перечитывает порты и рассылает разницу вернет (пришли, ушли) списками PortInfo"""
+        try:
+            ports = self.lister()
+        except Exception:
+            return [], []
+        signature = sorted((p.device, p.hwid) for p in ports)
+        with self._lock:
+            self._updated = time.monotonic()
+            if signature == self._signature:
+                return [], []
+            self._signature = signature
+            old = self._ports
+            self._ports = {p.key: p for p in ports}
+            added = [p for key, p in self._ports.items() if key not in old]
+            removed = [p for key, p in old.items() if key not in self._ports]
+            listeners = list(self._listeners)
+        if added or removed:
+            for callback in listeners:
+                try:
+                    callback(added, removed)
+                except Exception:
+                    pass
+        return added, removed
+
+    def _fresh(self) -> bool:
+        with self._lock:
+            return self._signature is not None and time.monotonic() - self._updated < self.max_age
+
+    def snapshot(self) -> list:
+        if not self._fresh():
+            self.refresh()
+        with self._lock:
+            return sorted(self._ports.values(), key=lambda p: p.device)
+
+    def details(self, device: str):
+        """PortInfo порта по его имени или None если такого нет"""
+        return next((p for p in self.snapshot() if p.device == device), None)
+
+    def find(self, key: str):
+        """где сейчас плата с этим ключом номер порта мог уже смениться"""
+        if not self._fresh():
+            self.refresh()
+        with self._lock:
+            return self._ports.get(key)
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def start(self):
+        """фоновый опрос считает кто его попросил и останавливается когда последний сказал stop"""
+        with self._lock:
+            self._users += 1
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            if self._users:
+                return
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+
+_default = None
+_default_lock = Lock()
+
+
+def default_registry() -> PortRegistry:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = PortRegistry()
+        return _default
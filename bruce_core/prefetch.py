@@ -0,0 +1,177 @@
+import time
+from contextlib import contextmanager
+from threading import Event, Lock, Thread
+
+from bruce_core.releases import pick_release
+
+# каналы которые подкачиваем это то что кнопки последний релиз и бета выберут при нажатии
+PREFETCH_CHANNELS = ("latest", "beta")
+# сколько секунд после старта или конца задачи ждем тишины прежде чем начать качать
+IDLE_DELAY = 15.0
+# как часто фоновый поток проверяет не пора ли продолжить
+POLL_INTERVAL = 1.0
+
+
+def _english(ru: str, en: str) -> str:
+    return en
+
+
+class PrefetchPaused(Exception):
+    """закачку прервали потому что началась задача человека она докачается потом с того же места"""
+
+
+class Prefetcher:
+    """заранее качает в кэш прошивки свежих latest и beta для нужных плат пока лаунчер простаивает
+
+    boards() отдает список профилей под которые качать index это AssetIndex с ассетами по релизам
+    пока идет хоть одна задача из foreground() ничего не качаем а начатая закачка обрывается
+    и потом продолжается по Range с того же байта
+    """
+
+    def __init__(self, cache, index, boards, log=None, translate=_english, idle_delay: float = IDLE_DELAY,
+                 poll_interval: float = POLL_INTERVAL):
+        self.cache = cache
+        self.index = index
+        self.boards = boards
+        self.idle_delay = idle_delay
+        self.poll_interval = poll_interval
+        self._log = log
+        self._t = translate
+        self._lock = Lock()
+        self._busy = 0
+        self._last_busy = time.monotonic()
+        self._releases = None
+        self._scheduled = None
+        self._wake = Event()
+        self._stop = Event()
+        self._thread = None
+        # ассеты на которых закачка упала больше не трогаем пока не придет другой список релизов
+        self._failed = set()
+        self.fetched = []
+
+    def log(self, msg: str):
+        if self._log:
+            self._log(msg)
+
+    # задачи человека
+
+    def begin(self):
+        with self._lock:
+            self._busy += 1
+            self._last_busy = time.monotonic()
+
+    def end(self):
+        with self._lock:
+            self._busy = max(0, self._busy - 1)
+            self._last_busy = time.monotonic()
+        self._wake.set()
+
+    @contextmanager
+    def foreground(self):
+        self.begin()
+        try:
+            yield
+        finally:
+            self.end()
+
+    def busy(self) -> bool:
+        with self._lock:
+            return self._busy > 0
+
+    def idle(self) -> bool:
+        with self._lock:
+            return self._busy == 0 and time.monotonic() - self._last_busy >= self.idle_delay
+
+    # план и фоновый поток
+
+    def plan(self, releases: list) -> list:
+        """[(релиз, профиль, ассет)] которых еще нет в кэше без повторов одного и того же файла"""
+        wanted = []
+        seen = set()
+        for channel in PREFETCH_CHANNELS:
+            rel = pick_release(releases, channel)
+            if rel is None:
+                continue
+            for profile in self.boards():
+                asset = self.index.asset_for(rel, profile)
+                if asset is None:
+                    continue
+                key = self.cache.asset_key(asset)
+                if key in seen or key in self._failed:
+                    continue
+                seen.add(key)
+                if self.cache.lookup(asset) is None:
+                    wanted.append((rel, profile, asset))
+        return wanted
+
+    def schedule(self, releases: list):
+        """новый список релизов план считается уже в фоновом потоке так что вызывать можно хоть на каждый чих"""
+        with self._lock:
+            if releases != self._scheduled:
+                self._failed = set()
+                self._scheduled = list(releases)
+                self._releases = self._scheduled
+        self._stop.clear()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _wait_idle(self) -> bool:
+        while not self._stop.is_set():
+            if self.idle():
+                return True
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+        return False
+
+    def _check(self, done, total, rate):
+        if self._stop.is_set() or self.busy():
+            raise PrefetchPaused()
+
+    def _run(self):
+        while self._wait_idle():
+            with self._lock:
+                releases = self._releases
+                self._releases = None
+            if releases is None:
+                # новых релизов нет спим до следующего schedule
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            queue = self.plan(releases)
+            while queue and self._wait_idle():
+                rel, profile, asset = queue[0]
+                with self._lock:
+                    if self._releases is not None:
+                        # пока качали пришел свежий список пересчитываем план по нему
+                        break
+                name = asset.get("name", "firmware.bin")
+                try:
+                    self.cache.fetch(asset, progress=self._check)
+                except PrefetchPaused:
+                    self.log(
+                        self._t(
+                            f"Фоновая загрузка {name} приостановлена до простоя.",
+                            f"Background download of {name} paused until idle.",
+                        )
+                    )
+                    continue
+                except Exception as e:
+                    self._failed.add(self.cache.asset_key(asset))
+                    self.log(
+                        self._t(f"Фоновая загрузка {name} не удалась: {e}", f"Background download of {name} failed: {e}")
+                    )
+                else:
+                    self.fetched.append(name)
+                    self.log(
+                        self._t(
+                            f"Заранее загружена прошивка {rel.get('tag')} для {profile.title}: {name}",
+                            f"Prefetched firmware {rel.get('tag')} for {profile.title}: {name}",
+                        )
+                    )
+                queue.pop(0)
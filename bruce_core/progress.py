@@ -0,0 +1,192 @@
+import re
+
+from bruce_core.download import ThroughputMeter
+
+
+class ProgressEvent:
+    """одно событие прогресса от esptool
+
+    stage это write read erase или verify а final=True у итоговой строки
+    типо Wrote N bytes ... in T seconds где скорость уже посчитана самим esptool
+    """
+
+    def __init__(self, stage: str, percent: float = None, done: int = None, total: int = None, offset: int = None,
+                 rate: float = None, elapsed: float = None, final: bool = False):
+        self.stage = stage
+        self.percent = percent
+        self.done = done
+        self.total = total
+        self.offset = offset
+        self.rate = rate
+        self.elapsed = elapsed
+        self.final = final
+
+    def __repr__(self):
+        return (f"ProgressEvent({self.stage!r}, percent={self.percent}, done={self.done}, total={self.total}, "
+                f"offset={self.offset}, rate={self.rate}, final={self.final})")
+
+
+_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+_ADDR = r"0x([0-9a-fA-F]+)"
+_PERCENT = r"(\d+(?:\.\d+)?)\s?%"
+_COUNT = r"(\d+(?:\.\d+)?)\s?([kKmMgG]?B)?"
+
+# esptool 4: Writing at 0x00010000... (5 %)
+# esptool 5: Writing at 0x00010000 [=====>      ]  45.2% 123.00kB/456.00kB [0:05]
+_RE_WRITING = re.compile(r"Writing at " + _ADDR + r".*?" + _PERCENT + r"(?:\s+" + _COUNT + "/" + _COUNT + ")?")
+_RE_READING = re.compile(r"Reading (?:from|at) " + _ADDR + r".*?" + _PERCENT + r"(?:\s+" + _COUNT + "/" + _COUNT + ")?")
+# esptool 4 при read_flash печатает просто 12345 (3 %)
+_RE_READ_V4 = re.compile(r"^(\d+) \((\d+) %\)$")
+_RE_WROTE = re.compile(r"Wrote (\d+) bytes(?: \((\d+) compressed\))? at " + _ADDR
+                       + r" in (\d+(?:\.\d+)?) seconds(?: \((?:effective )?(\d+(?:\.\d+)?) kbit/s\))?")
+_RE_READ_DONE = re.compile(r"Read (\d+) bytes (?:at|from) " + _ADDR
+                           + r" in (\d+(?:\.\d+)?) seconds(?: \((\d+(?:\.\d+)?) kbit/s\))?")
+_RE_ERASE_START = re.compile(r"^Erasing flash|^Erasing region|Chip erase", re.IGNORECASE)
+# esptool 4: Chip erase completed successfully in 2.1s
+# esptool 5: Flash memory erased successfully in 2.1 seconds. (и Flash memory region erased ...)
+_RE_ERASE_DONE = re.compile(r"(?:erase completed|erased) successfully in (\d+(?:\.\d+)?)\s?s", re.IGNORECASE)
+_RE_VERIFIED = re.compile(r"Hash of data verified")
+
+
+def _count(number: str, unit: str) -> int:
+    return int(float(number) * _UNITS.get((unit or "").upper(), 1))
+
+
+def _kbit_to_bytes(kbit: str):
+    return float(kbit) * 1000 / 8 if kbit else None
+
+
+def parse_esptool_line(line: str):
+    """разбирает одну строку вывода esptool в ProgressEvent или None если это не прогресс"""
+    line = line.strip()
+    if not line:
+        return None
+
+    m = _RE_WRITING.search(line)
+    if m:
+        done = total = None
+        if m.group(3) is not None:
+            done, total = _count(m.group(3), m.group(4)), _count(m.group(5), m.group(6))
+        return ProgressEvent("write", percent=float(m.group(2)), done=done, total=total, offset=int(m.group(1), 16))
+
+    m = _RE_READING.search(line)
+    if m:
+        done = total = None
+        if m.group(3) is not None:
+            done, total = _count(m.group(3), m.group(4)), _count(m.group(5), m.group(6))
+        return ProgressEvent("read", percent=float(m.group(2)), done=done, total=total, offset=int(m.group(1), 16))
+
+    m = _RE_READ_V4.match(line)
+    if m:
+        return ProgressEvent("read", percent=float(m.group(2)), done=int(m.group(1)))
+
+    m = _RE_WROTE.search(line)
+    if m:
+        size = int(m.group(1))
+        return ProgressEvent("write", percent=100.0, done=size, total=size, offset=int(m.group(3), 16),
+                             rate=_kbit_to_bytes(m.group(5)), elapsed=float(m.group(4)), final=True)
+
+    m = _RE_READ_DONE.search(line)
+    if m:
+        size = int(m.group(1))
+        return ProgressEvent("read", percent=100.0, done=size, total=size, offset=int(m.group(2), 16),
+                             rate=_kbit_to_bytes(m.group(4)), elapsed=float(m.group(3)), final=True)
+
+    m = _RE_ERASE_DONE.search(line)
+    if m:
+        return ProgressEvent("erase", percent=100.0, elapsed=float(m.group(1)), final=True)
+    if _RE_ERASE_START.search(line):
+        return ProgressEvent("erase")
+
+    if _RE_VERIFIED.search(line):
+        return ProgressEvent("verify", percent=100.0, final=True)
+    return None
+
+
+class EsptoolOutputParser:
+    """потоковый разбор вывода esptool куски могут рваться где угодно
+
+    esptool перерисовывает прогресс через \\r так что строкой считается все что между \\r или \\n
+    """
+
+    def __init__(self):
+        self._tail = ""
+
+    def feed(self, text: str) -> list:
+        """отдает список (строка, событие или None) по всем строкам которые уже закончились"""
+        data = self._tail + text
+        parts = re.split(r"\r\n|\r|\n", data)
+        self._tail = parts.pop()
+        return [(line, parse_esptool_line(line)) for line in parts if line.strip()]
+
+    def flush(self) -> list:
+        tail, self._tail = self._tail, ""
+        if not tail.strip():
+            return []
+        return [(tail, parse_esptool_line(tail))]
+
+
+class ProgressTracker:
+    """сводит события в процент скорость и оставшееся время
+
+    total можно передать заранее например размер файла если esptool сам шлет только проценты
+    """
+
+    def __init__(self, total: int = None, window: float = 2.0):
+        self.total = total
+        self.stage = None
+        self.percent = None
+        self.done = None
+        self.rate = None
+        self.eta = None
+        self.final = False
+        self._window = window
+        self._meter = ThroughputMeter(window)
+
+    def update(self, event: ProgressEvent) -> "ProgressTracker":
+        if event.stage != self.stage:
+            # новый этап значит и скорость считаем заново
+            self.stage = event.stage
+            self._meter = ThroughputMeter(self._window)
+            self.rate = None
+        if event.total:
+            self.total = event.total
+
+        done = event.done
+        if done is None and event.percent is not None and self.total:
+            done = int(self.total * event.percent / 100)
+        percent = event.percent
+        if percent is None and done is not None and self.total:
+            percent = done * 100.0 / self.total
+
+        self.done = done
+        self.percent = min(100.0, percent) if percent is not None else None
+        self.final = event.final
+        if event.rate is not None:
+            self.rate = event.rate
+        elif done is not None:
+            self.rate = self._meter.add(done) or self.rate
+
+        if self.final or self.percent == 100.0:
+            self.eta = 0.0
+        elif self.rate and done is not None and self.total:
+            self.eta = max(0.0, (self.total - done) / self.rate)
+        else:
+            self.eta = None
+        return self
+
+
+def format_bytes(n: float) -> str:
+    n = float(n or 0)
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.2f} GB"
+
+
+def format_eta(seconds: float) -> str:
+    seconds = int(round(seconds or 0))
+    minutes, seconds = divmod(seconds, 60)
+    return f"{minutes}:{seconds:02d}"
@@ -0,0 +1,378 @@
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Event, Lock, Thread
+from typing import TYPE_CHECKING
+from urllib.parse import parse_qs, urlparse
+
+from bruce_core.download import new_http_session
+
+if TYPE_CHECKING:
+    import requests
+
+
+GITHUB_API_RELEASES = "https://api.github.com/repos/BruceDevices/firmware/releases"
+# github больше сотни на страницу не отдает а по умолчанию вообще тридцать
+RELEASES_PER_PAGE = 100
+
+
+def parse_release(rel: dict) -> dict:
+    """из сырого ответа github оставляем только то что реально нужно лаунчеру"""
+    return {
+        "name": rel.get("name") or rel.get("tag_name"),
+        "tag": rel.get("tag_name"),
+        "prerelease": rel.get("prerelease", False),
+        "assets": rel.get("assets", []),
+    }
+
+
+def pick_release(releases: list, kind: str):
+    """latest это последний стабильный beta последний пререлиз а все остальное ищется как тег
+
+    вернет None если ничего подходящего нет
+    """
+    if not releases:
+        return None
+    if kind not in ("latest", "beta"):
+        wanted = kind.lower()
+        return next((rel for rel in releases if (rel.get("tag") or "").lower() == wanted), None)
+
+    stable_list = []
+    prerelease_list = []
+    beta_by_name_list = []
+    for rel in releases:
+        name = (rel.get("name") or "").lower()
+        tag = (rel.get("tag") or "").lower()
+        prerelease = bool(rel.get("prerelease", False))
+
+        # В репозитории Bruce есть спец-тег lastRelease, который указывает на последний стабильный релиз,
+        # но помечен как prerelease=True. Его нужно считать стабильным, а не бетой.
+        is_last_release_alias = (tag == "lastrelease")
+
+        if prerelease and not is_last_release_alias:
+            prerelease_list.append(rel)
+        elif ("beta" in name) or ("beta" in tag):
+            beta_by_name_list.append(rel)
+        else:
+            stable_list.append(rel)
+
+    if kind == "latest":
+        # если по какой-то причине стабильных нет — берём первый из всех
+        return stable_list[0] if stable_list else releases[0]
+    # сначала строго prerelease (кроме lastRelease) а если их нет то "beta" в имени/теге
+    if prerelease_list:
+        return prerelease_list[0]
+    if beta_by_name_list:
+        return beta_by_name_list[0]
+    return None
+
+
+def bin_assets(rel: dict) -> list:
+    """все .bin файлы релиза которые вообще можно шить"""
+    return [a for a in rel.get("assets", []) if (a.get("name") or "").lower().endswith(".bin")]
+
+
+def match_assets(bins: list, wanted: str) -> list:
+    """ассеты с таким именем а если точного нет то те где оно встречается как кусок имени"""
+    wanted = (wanted or "").lower()
+    exact = [a for a in bins if (a.get("name") or "").lower() == wanted]
+    return exact or [a for a in bins if wanted in (a.get("name") or "").lower()]
+
+
+class RefreshResult:
+    """что получилось при обновлении списка релизов
+
+    status бывает updated not_modified rate_limited cancelled или error
+    """
+
+    def __init__(self, releases: list, status: str, error: Exception = None):
+        self.releases = releases
+        self.status = status
+        self.error = error
+
+    @property
+    def changed(self) -> bool:
+        return self.status == "updated"
+
+
+class _RateLimited(Exception):
+    pass
+
+
+class ReleaseIndex:
+    """список релизов который живет на диске и обновляется условными запросами
+
+    github на If-None-Match отвечает 304 и такой ответ не тратит лимит запросов
+    поэтому держим у себя etag и last-modified на каждую страницу и отдаем кэш сразу даже без сети
+    """
+
+    def __init__(self, cache_path: str, url: str = GITHUB_API_RELEASES, session: "requests.Session" = None,
+                 max_workers: int = 4):
+        self.cache_path = cache_path
+        self.url = url
+        self.max_workers = max_workers
+        # кэш с диска нужен сразу а http сессия только когда пойдем в github
+        self._session = self._configure(session) if session is not None else None
+        # _lock только на данные а _refresh_lock чтоб два обновления не шли одновременно
+        self._lock = Lock()
+        self._refresh_lock = Lock()
+        self._data = {"pages": {}, "page_count": 0, "rate_limit_reset": 0, "fetched_at": 0}
+        self._read_cache()
+
+    @property
+    def session(self) -> "requests.Session":
+        with self._lock:
+            if self._session is None:
+                self._session = self._configure(new_http_session())
+            return self._session
+
+    @staticmethod
+    def _configure(session: "requests.Session") -> "requests.Session":
+        session.headers.setdefault("Accept", "application/vnd.github+json")
+        # если есть токен то лимит у github сильно больше чем у анонимных запросов
+        token = os.environ.get("GITHUB_TOKEN")
+        if token:
+            session.headers.setdefault("Authorization", f"Bearer {token}")
+        return session
+
+    def _read_cache(self):
+        if not os.path.isfile(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return
+        if not isinstance(data, dict):
+            return
+        if isinstance(data.get("pages"), dict):
+            self._data.update(data)
+        elif isinstance(data.get("releases"), list):
+            # старый кэш одним списком без страниц берем как первую страницу без валидаторов
+            self._data["pages"] = {"1": {"etag": None, "last_modified": None, "items": data["releases"]}}
+            self._data["page_count"] = 1
+
+    def _write_cache(self):
+        # пишем во временный файл и подменяем чтоб при вылете не остался обрезанный json
+        tmp = self.cache_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            with self._lock:
+                payload = json.dumps(self._data, ensure_ascii=False)
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp, self.cache_path)
+        except Exception:
+            pass
+
+    def _joined(self, pages: dict, page_count: int) -> list:
+        releases = []
+        for n in range(1, page_count + 1):
+            releases.extend(pages.get(str(n), {}).get("items", []))
+        return releases
+
+    def cached(self) -> list:
+        """то что лежит в кэше без всякой сети"""
+        with self._lock:
+            return self._joined(self._data["pages"], self._data["page_count"])
+
+    def cached_pages(self) -> dict:
+        """кэш по страницам номер страницы на список релизов"""
+        with self._lock:
+            return {
+                int(n): list(page.get("items", []))
+                for n, page in self._data["pages"].items()
+                if int(n) <= self._data["page_count"]
+            }
+
+    @property
+    def fetched_at(self) -> float:
+        return self._data.get("fetched_at") or 0
+
+    def rate_limited_until(self) -> float:
+        """до какого времени github нас не пустит или ноль если лимит не кончился"""
+        reset = self._data.get("rate_limit_reset") or 0
+        return reset if reset > time.time() else 0
+
+    def _remember_rate_limit(self, resp: "requests.Response"):
+        headers = resp.headers
+        reset = 0
+        if resp.status_code in (403, 429):
+            retry_after = headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                reset = time.time() + int(retry_after)
+        if headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                reset = max(reset, float(headers.get("X-RateLimit-Reset", 0)))
+            except ValueError:
+                pass
+        with self._lock:
+            if reset:
+                # страницы качаются параллельно так что берем самый поздний сброс
+                self._data["rate_limit_reset"] = max(reset, self._data.get("rate_limit_reset") or 0)
+            elif resp.status_code not in (403, 429):
+                self._data["rate_limit_reset"] = 0
+
+    def _page_url(self, n: int) -> str:
+        return f"{self.url}?per_page={RELEASES_PER_PAGE}&page={n}"
+
+    @staticmethod
+    def _last_page(resp: "requests.Response") -> int:
+        last = resp.links.get("last", {}).get("url")
+        if not last:
+            return 0
+        try:
+            return int(parse_qs(urlparse(last).query).get("page", ["0"])[0])
+        except ValueError:
+            return 0
+
+    def _fetch_page(self, n: int, timeout: float):
+        """качает одну страницу и возвращает (items, changed, response)"""
+        with self._lock:
+            cached = dict(self._data["pages"].get(str(n)) or {})
+        headers = {}
+        if "items" not in cached:
+            cached = {}
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        resp = self.session.get(self._page_url(n), headers=headers, timeout=timeout)
+        self._remember_rate_limit(resp)
+
+        if resp.status_code == 304 and "items" in cached:
+            return cached["items"], False, resp
+        if resp.status_code in (403, 429) and self.rate_limited_until():
+            raise _RateLimited()
+        resp.raise_for_status()
+
+        items = [parse_release(rel) for rel in resp.json()]
+        with self._lock:
+            self._data["pages"][str(n)] = {
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "items": items,
+            }
+        return items, items != cached.get("items"), resp
+
+    def refresh(self, timeout: float = 10, on_page=None, cancel: Event = None) -> RefreshResult:
+        """сходить в github если можно и вернуть свежий или закэшированный список
+
+        первая страница качается сразу а по заголовку Link узнаем сколько их всего
+        и остальные тянем параллельно on_page(номер, релизы) дергается по мере прихода
+        """
+        cancel = cancel or Event()
+        with self._refresh_lock:
+            if self.rate_limited_until():
+                return RefreshResult(self.cached(), "rate_limited")
+            if cancel.is_set():
+                return RefreshResult(self.cached(), "cancelled")
+
+            try:
+                items, changed, resp = self._fetch_page(1, timeout)
+            except _RateLimited:
+                self._write_cache()
+                return RefreshResult(self.cached(), "rate_limited")
+            except Exception as e:
+                return RefreshResult(self.cached(), "error", e)
+
+            if resp.status_code == 304:
+                # в 304 ответе Link нету так что верим количеству страниц из кэша
+                page_count = self._data["page_count"] or 1
+            else:
+                page_count = self._last_page(resp) or 1
+            if cancel.is_set():
+                return RefreshResult(self.cached(), "cancelled")
+            if on_page:
+                on_page(1, items)
+
+            pages = {1: items}
+            error = None
+            if page_count > 1:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                    futures = {pool.submit(self._fetch_page, n, timeout): n for n in range(2, page_count + 1)}
+                    for fut in as_completed(futures):
+                        n = futures[fut]
+                        if cancel.is_set():
+                            for other in futures:
+                                other.cancel()
+                            break
+                        try:
+                            page_items, page_changed, _ = fut.result()
+                        except _RateLimited:
+                            error = error or "rate_limited"
+                            continue
+                        except Exception as e:
+                            error = error or e
+                            continue
+                        changed = changed or page_changed
+                        pages[n] = page_items
+                        if on_page:
+                            on_page(n, page_items)
+
+            if cancel.is_set():
+                self._write_cache()
+                return RefreshResult(self.cached(), "cancelled")
+
+            if error is not None:
+                # часть страниц не пришла так что количество страниц не трогаем чтоб не потерять кэш
+                self._write_cache()
+                if error == "rate_limited":
+                    return RefreshResult(self.cached(), "rate_limited")
+                return RefreshResult(self.cached(), "error", error)
+
+            with self._lock:
+                changed = changed or page_count != self._data["page_count"]
+                self._data["page_count"] = page_count
+                # страницы которые пропали после удаления релизов выкидываем
+                for key in [k for k in self._data["pages"] if int(k) > page_count]:
+                    del self._data["pages"][key]
+                self._data["fetched_at"] = time.time()
+            self._write_cache()
+            releases = [rel for n in sorted(pages) for rel in pages[n]]
+            return RefreshResult(releases, "updated" if changed else "not_modified")
+
+
+class ReleaseFetcher:
+    """фоновая загрузка релизов которую можно отменить или перебить новой
+
+    каждый запуск получает свой номер поколения и колбэки от старых запусков
+    просто не вызываются так что гуи никогда не увидит устаревшие страницы
+    """
+
+    def __init__(self, index: ReleaseIndex, on_page=None, on_done=None):
+        self.index = index
+        self.on_page = on_page
+        self.on_done = on_done
+        self.generation = 0
+        self._cancel = None
+        self._lock = Lock()
+
+    def start(self, timeout: float = 10) -> int:
+        with self._lock:
+            if self._cancel is not None:
+                self._cancel.set()
+            self.generation += 1
+            gen = self.generation
+            cancel = self._cancel = Event()
+        Thread(target=self._run, args=(gen, cancel, timeout), daemon=True).start()
+        return gen
+
+    def cancel(self):
+        with self._lock:
+            if self._cancel is not None:
+                self._cancel.set()
+
+    def is_current(self, gen: int) -> bool:
+        return gen == self.generation
+
+    def _run(self, gen: int, cancel: Event, timeout: float):
+        def page_cb(n, items):
+            if not cancel.is_set() and self.on_page:
+                self.on_page(gen, n, items)
+
+        result = self.index.refresh(timeout=timeout, on_page=page_cb, cancel=cancel)
+        if not cancel.is_set() and self.on_done:
+            self.on_done(gen, result)
@@ -0,0 +1,147 @@
+import time
+import hashlib
+
+from bruce_core.container import BackupContainer, is_container, open_image
+from bruce_core.esp import EspSession
+from bruce_core.operations import restore_container
+
+REGION_SIZE = 64 * 1024
+DEFAULT_RETRIES = 3
+
+
+class RegionReport:
+    """один кусок флеша после восстановления что ждали что получили и с какой попытки сошлось"""
+
+    def __init__(self, offset: int, size: int, expected: str, label: str = "", image_offset: int = None):
+        self.offset = offset
+        # где этот кусок лежит внутри файла бэкапа
+        self.image_offset = offset if image_offset is None else image_offset
+        self.size = size
+        self.expected = expected
+        self.label = label
+        self.actual = ""
+        self.attempts = 1
+        self.error = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.actual == self.expected
+
+    @property
+    def retried(self) -> bool:
+        return self.attempts > 1
+
+    def describe(self) -> str:
+        where = f"0x{self.offset:08x}+0x{self.size:x}"
+        if self.label:
+            where += f" ({self.label})"
+        if self.ok:
+            state = f"ok after {self.attempts} writes" if self.retried else "ok"
+        else:
+            state = f"FAILED after {self.attempts} writes: md5 {self.actual or '?'}, expected {self.expected}"
+            if self.error:
+                state += f", {self.error}"
+        return f"{where}: {state}"
+
+
+class RestoreReport:
+    def __init__(self, path: str):
+        self.path = path
+        self.regions = []
+        self.written = 0
+        self.rewritten = 0
+        self.elapsed = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(r.ok for r in self.regions)
+
+    @property
+    def failed(self) -> list:
+        return [r for r in self.regions if not r.ok]
+
+    @property
+    def retried(self) -> list:
+        return [r for r in self.regions if r.retried]
+
+    def summary(self) -> str:
+        return (f"{len(self.regions)} regions verified, {len(self.retried)} rewritten "
+                f"({self.rewritten} bytes), {len(self.failed)} failed")
+
+
+def _plan_regions(image, base: int, ranges: list, region_size: int) -> list:
+    """режем (смещение в образе, длина, метка) на регионы и считаем md5 каждого по бэкапу"""
+    regions = []
+    for start, length, label in ranges:
+        for pos in range(start, start + length, region_size):
+            size = min(region_size, start + length - pos)
+            if isinstance(image, BackupContainer) and pos % image.block_size == 0 and size == image.blocks[
+                    pos // image.block_size].size:
+                # у контейнера md5 блоков уже лежит в заголовке
+                expected = image.blocks[pos // image.block_size].md5.hex()
+            else:
+                expected = hashlib.md5(image.read(pos, size)).hexdigest()
+            regions.append(RegionReport(base + pos, size, expected, label, pos))
+    return regions
+
+
+def verified_restore(session: EspSession, path: str, partitions: list = None, region_size: int = REGION_SIZE,
+                     retries: int = DEFAULT_RETRIES, progress=None, verify_progress=None) -> RestoreReport:
+    """пишет бэкап а потом сверяет каждый регион md5 прямо на плате
+
+    регионы которые не сошлись переписываются по отдельности до retries раз
+    так что битый пакет на плохом кабеле стоит одной перезаписи 64к а не всего образа
+    partitions это разделы которые надо взять из полного образа остальное не трогаем
+    progress(записано, всего) verify_progress(регионов сверено, всего)
+    """
+    started = time.time()
+    report = RestoreReport(path)
+    with open_image(path) as image:
+        container = image if is_container(path) else None
+        base = container.offset if container is not None else 0
+        if partitions:
+            ranges = [(p.offset, p.size, p.label) for p in partitions]
+        else:
+            ranges = [(0, image.image_size, "")]
+        if container is not None:
+            region_size = container.block_size
+        report.regions = _plan_regions(image, base, ranges, region_size)
+
+        # запись без проверки каждого куска проверка будет одним проходом в конце
+        if partitions:
+            total = sum(length for _, length, _ in ranges)
+            for start, length, _ in ranges:
+                data = image.read(start, length)
+
+                def cb(written, size, done=report.written):
+                    if progress:
+                        progress(done + written, total)
+
+                session.write(base + start, data, progress=cb, verify=False)
+                report.written += length
+        elif container is not None:
+            restore_container(session, container, progress=progress, verify=False)
+            report.written = container.image_size
+        else:
+            session.write(base, image.read(0, image.image_size), progress=progress, verify=False)
+            report.written = image.image_size
+
+        for i, region in enumerate(report.regions):
+            region.actual = session.md5(region.offset, region.size)
+            if verify_progress:
+                verify_progress(i + 1, len(report.regions))
+
+        for region in report.regions:
+            while not region.ok and region.attempts <= retries:
+                region.attempts += 1
+                session.log(f"Region 0x{region.offset:08x} md5 mismatch, rewriting (attempt {region.attempts})...")
+                try:
+                    session.write(region.offset, image.read(region.image_offset, region.size), verify=False)
+                    report.rewritten += region.size
+                    region.actual = session.md5(region.offset, region.size)
+                    region.error = ""
+                except Exception as e:
+                    region.error = str(e)
+    report.elapsed = time.time() - started
+    session.log(f"Restore verification: {report.summary()}.")
+    return report
@@ -0,0 +1,154 @@
+import time
+import codecs
+from collections import deque
+from threading import Event, Lock, Thread, current_thread
+
+from bruce_core.capture import read_capture
+from bruce_core.download import ThroughputMeter
+
+
+class LineSplitter:
+    """декодирует поток байт кусками и приводит переводы строк к \\n
+
+    utf-8 символ или \\r\\n могут порваться между кусками поэтому хвост держим до следующего раза
+    """
+
+    def __init__(self, encoding: str = "utf-8"):
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._cr = False
+
+    def feed(self, data: bytes) -> str:
+        text = self._decoder.decode(data)
+        if self._cr:
+            text = "\r" + text
+            self._cr = False
+        if text.endswith("\r"):
+            # может это начало \r\n а вторая половина придет в следующем куске
+            text = text[:-1]
+            self._cr = True
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+
+    def flush(self) -> str:
+        text = self._decoder.decode(b"", final=True)
+        if self._cr:
+            text += "\n"
+            self._cr = False
+        return text
+
+
+class SerialReader:
+    """поток который вычитывает порт целиком сколько там накопилось а не по строке
+
+    текст складывается в ограниченный буфер и гуи забирает его по таймеру через drain
+    если гуи не успевает то старый текст выкидывается и считается в dropped_bytes
+    on_chunk(bytes, время) дергается прямо из потока чтения для каждого сырого куска
+    """
+
+    def __init__(self, ser, max_pending: int = 1024 * 1024, on_chunk=None, on_error=None):
+        self.ser = ser
+        self.max_pending = max_pending
+        self.on_chunk = on_chunk
+        self.on_error = on_error
+        self.total_bytes = 0
+        self.dropped_bytes = 0
+        self._splitter = LineSplitter()
+        self._meter = ThroughputMeter()
+        self._pending = deque()
+        self._pending_size = 0
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def start_replay(self, path: str, speed: float = 0.0):
+        """прогоняет файл записи через тот же конвейер что и живой порт
+
+        speed=0 как можно быстрее а 1.0 в том же темпе как байты шли с платы
+        """
+        self._stop.clear()
+        self._thread = Thread(target=self._run_replay, args=(path, speed), daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        self._stop.set()
+        if self._thread is not None and self._thread is not current_thread():
+            self._thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        ser = self.ser
+        while not self._stop.is_set():
+            try:
+                # сколько лежит в буфере порта столько и берем а если пусто то ждем байт до таймаута порта
+                data = ser.read(ser.in_waiting or 1)
+            except Exception as e:
+                if not self._stop.is_set() and self.on_error:
+                    self.on_error(e)
+                break
+            if not data:
+                continue
+            self.feed(data, time.time())
+
+    def _run_replay(self, path: str, speed: float):
+        first = started = None
+        try:
+            for timestamp, data in read_capture(path):
+                if self._stop.is_set():
+                    break
+                if speed > 0:
+                    if first is None:
+                        first, started = timestamp, time.monotonic()
+                    delay = (timestamp - first) / speed - (time.monotonic() - started)
+                    if delay > 0:
+                        self._stop.wait(delay)
+                # при воспроизведении ждем гуи а не выкидываем текст как с живого порта
+                while self._pending_size > self.max_pending // 2 and not self._stop.is_set():
+                    time.sleep(0.01)
+                self.feed(data, timestamp)
+        except Exception as e:
+            if self.on_error:
+                self.on_error(e)
+        tail = self._splitter.flush()
+        if tail:
+            with self._lock:
+                self._pending.append(tail)
+                self._pending_size += len(tail)
+
+    def feed(self, data: bytes, timestamp: float = None):
+        """кусок сырых байт будто он пришел из порта тоже используется для воспроизведения записей"""
+        if self.on_chunk:
+            try:
+                self.on_chunk(data, timestamp if timestamp is not None else time.time())
+            except Exception:
+                pass
+        text = self._splitter.feed(data)
+        with self._lock:
+            self.total_bytes += len(data)
+            if text:
+                self._pending.append(text)
+                self._pending_size += len(text)
+            while self._pending_size > self.max_pending and len(self._pending) > 1:
+                old = self._pending.popleft()
+                self._pending_size -= len(old)
+                self.dropped_bytes += len(old)
+
+    def drain(self) -> str:
+        with self._lock:
+            if not self._pending:
+                return ""
+            text = "".join(self._pending)
+            self._pending.clear()
+            self._pending_size = 0
+        return text
+
+    def rate(self) -> float:
+        with self._lock:
+            total = self.total_bytes
+        return self._meter.add(total)
@@ -0,0 +1,141 @@
+"""настройки лаунчера и где он хранит свои файлы
+
+общие для гуи и командной строки так что тут только json на диске и никакого qt
+"""
+import os
+import sys
+import json
+
+APP_VERSION = "V1.2"
+APP_DIR = os.path.join(os.path.expanduser("~"), "BruceLauncher")
+SETTINGS_PATH = os.path.join(APP_DIR, "settings.json")
+RELEASES_CACHE_PATH = os.path.join(APP_DIR, "releases_cache.json")
+# сюда серийная консоль пишет сырые записи порта
+CAPTURES_DIR = os.path.join(APP_DIR, "captures")
+# отчеты по прогонам манифестов пакетной прошивки
+REPORTS_DIR = os.path.join(APP_DIR, "reports")
+# что знаем про уже подключавшиеся платы чип флеш кварц по mac и usb серийнику
+DEVICES_PATH = os.path.join(APP_DIR, "devices.json")
+# подобранные скорость и способ сброса для каждого usb адаптера
+LINKS_PATH = os.path.join(APP_DIR, "links.json")
+# свои профили плат в дополнение к встроенным или вместо них с тем же именем
+BOARDS_PATH = os.path.join(APP_DIR, "boards.json")
+# каталог всех снятых бэкапов чей когда и с какой прошивкой
+CATALOG_PATH = os.path.join(APP_DIR, "backups.sqlite")
+
+
+def get_python_cmd() -> str:
+    """возвращаем чем именно дергать esptool чтоб собранный exe не запускал сам себя по кругу"""
+    if getattr(sys, "frozen", False):
+        # в сборке через pyinstaller sys.executable указывает на этот лаунчер
+        # поэтому тут просто полагаемся на системный python/py
+        if sys.platform == "win32":
+            return "py"
+        return "python3"
+    return sys.executable
+
+
+class AppSettings:
+    def __init__(self):
+        os.makedirs(APP_DIR, exist_ok=True)
+        # тут короче стоят такие значения по умолчанию типо
+        self.firmware_dir = os.path.join(APP_DIR, "firmware")
+        # сколько мегабайт прошивок держим в кэше дальше старые выкидываются
+        self.firmware_cache_mb = 512
+        # на сколько параллельных соединений резать большие файлы при скачивании
+        self.download_connections = 4
+        # сколько плат одновременно обрабатываем в режиме нескольких устройств
+        self.parallel_jobs = 4
+        self.backup_dir = os.path.join(APP_DIR, "backups")
+        # правила хранения бэкапов 0 значит без ограничения последний полный бэкап платы не удаляется никогда
+        # правила хранения выключены пока пользователь сам их не задаст чтоб старые дампы не пропадали молча
+        self.backup_keep_last = 0
+        self.backup_max_age_days = 0
+        self.backup_max_total_mb = 0
+        self.send_tone_on_connect = True
+        # сколько строк помнит серийная консоль старые уходят сверху
+        self.console_scrollback = 10000
+        # при перепрошивке без стирания пишем только сектора которые отличаются от того что уже на плате
+        self.differential_flash = True
+        # пока лаунчер простаивает заранее качаем свежие latest и beta для известных плат
+        self.prefetch_firmware = True
+        # имена профилей плат для подкачки пустой список значит платы которые уже подключались
+        self.prefetch_boards = []
+        self.ask_firmware_path_each_time = False
+        self.ask_backup_path_each_time = False
+        # auto значит чип определяем сами и запоминаем по плате esp32 или esp32s3 если задать руками
+        self.chip_type = "auto"
+        self.graphic_progress = True
+        self.language = "ru"
+        self._load()
+
+    def _load(self):
+        if not os.path.isfile(SETTINGS_PATH):
+            return
+        try:
+            with open(SETTINGS_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return
+
+        self.firmware_dir = data.get("firmware_dir", self.firmware_dir)
+        self.backup_dir = data.get("backup_dir", self.backup_dir)
+        try:
+            self.firmware_cache_mb = max(0, int(data.get("firmware_cache_mb", self.firmware_cache_mb)))
+        except (TypeError, ValueError):
+            pass
+        try:
+            self.download_connections = max(1, min(16, int(data.get("download_connections", self.download_connections))))
+        except (TypeError, ValueError):
+            pass
+        try:
+            self.parallel_jobs = max(1, min(32, int(data.get("parallel_jobs", self.parallel_jobs))))
+        except (TypeError, ValueError):
+            pass
+        for name in ("backup_keep_last", "backup_max_age_days", "backup_max_total_mb"):
+            try:
+                setattr(self, name, max(0, int(data.get(name, getattr(self, name)))))
+            except (TypeError, ValueError):
+                pass
+        self.send_tone_on_connect = bool(data.get("send_tone_on_connect", self.send_tone_on_connect))
+        try:
+            self.console_scrollback = max(100, min(1000000, int(data.get("console_scrollback", self.console_scrollback))))
+        except (TypeError, ValueError):
+            pass
+        self.differential_flash = bool(data.get("differential_flash", self.differential_flash))
+        self.prefetch_firmware = bool(data.get("prefetch_firmware", self.prefetch_firmware))
+        prefetch_boards = data.get("prefetch_boards", self.prefetch_boards)
+        if isinstance(prefetch_boards, list):
+            self.prefetch_boards = [str(name) for name in prefetch_boards]
+        self.ask_firmware_path_each_time = bool(data.get("ask_firmware_path_each_time", self.ask_firmware_path_each_time))
+        self.ask_backup_path_each_time = bool(data.get("ask_backup_path_each_time", self.ask_backup_path_each_time))
+        self.chip_type = data.get("chip_type", self.chip_type)
+        self.graphic_progress = bool(data.get("graphic_progress", self.graphic_progress))
+        self.language = data.get("language", self.language)
+
+    def save(self):
+        data = {
+            "firmware_dir": self.firmware_dir,
+            "backup_dir": self.backup_dir,
+            "backup_keep_last": self.backup_keep_last,
+            "backup_max_age_days": self.backup_max_age_days,
+            "backup_max_total_mb": self.backup_max_total_mb,
+            "firmware_cache_mb": self.firmware_cache_mb,
+            "download_connections": self.download_connections,
+            "parallel_jobs": self.parallel_jobs,
+            "send_tone_on_connect": self.send_tone_on_connect,
+            "console_scrollback": self.console_scrollback,
+            "differential_flash": self.differential_flash,
+            "prefetch_firmware": self.prefetch_firmware,
+            "prefetch_boards": self.prefetch_boards,
+            "ask_firmware_path_each_time": self.ask_firmware_path_each_time,
+            "ask_backup_path_each_time": self.ask_backup_path_each_time,
+            "chip_type": self.chip_type,
+            "graphic_progress": self.graphic_progress,
+            "language": self.language,
+        }
+        try:
+            with open(SETTINGS_PATH, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        except Exception:
+            pass
@@ -0,0 +1,35 @@
+import time
+
+
+class StartupTrace:
+    """засекает фазы запуска от старта лаунчера до момента когда окно уже отвечает
+
+    mark(фаза) ставится в конце каждой фазы так что длительность фазы это разница с предыдущей отметкой
+    """
+
+    def __init__(self, started: float = None):
+        self.started = time.perf_counter() if started is None else started
+        self.marks = []
+
+    def mark(self, phase: str):
+        self.marks.append((phase, time.perf_counter()))
+
+    @property
+    def total(self) -> float:
+        return self.marks[-1][1] - self.started if self.marks else 0.0
+
+    def phases(self) -> list:
+        """[(фаза, сколько заняла, сколько прошло от старта)] в секундах"""
+        result = []
+        prev = self.started
+        for phase, t in self.marks:
+            result.append((phase, t - prev, t - self.started))
+            prev = t
+        return result
+
+    def report(self) -> str:
+        lines = ["Startup trace (phase, duration, since start):"]
+        for phase, took, since in self.phases():
+            lines.append(f"  {phase:<22} {took * 1000:8.1f} ms {since * 1000:8.1f} ms")
+        lines.append(f"  {'time to interactive':<22} {self.total * 1000:8.1f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,172 @@
+"""режим станции каждая новая подключенная плата сразу получает бэкап и или прошивку без кликов
+
+оператор только меняет кабели а станция сама видит кто пришел через PortRegistry и гонит его через Provisioner
+плата узнается по ключу порта (usb серийник или место в usb дереве) так что пересброс после прошивки
+когда порт пропадает и появляется снова не запускает ее второй раз
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from threading import Event, Lock
+
+from bruce_core.manifest import DeviceResult, DeviceSpec, ManifestError
+
+# сколько секунд даем порту успокоиться после появления usb мост и драйвер не сразу готовы
+SETTLE = 1.5
+# плата что сразу после своей задачи пропала и вернулась быстрее этого просто перезагрузилась
+REARM = 2.0
+
+
+def _english(ru: str, en: str) -> str:
+    return en
+
+
+class Station:
+    """следит за портами и запускает spec на каждой новой плате не больше max_workers одновременно
+
+    spec это DeviceSpec как строка манифеста port в нем можно задать шаблоном чтоб станция брала только свои порты
+    on_start(порт) и on_done(DeviceResult) зовутся из рабочих потоков progress и step как у Provisioner.provision
+    foreground() если задан оборачивает каждую задачу например Prefetcher.foreground
+    """
+
+    def __init__(self, registry, provisioner, spec: DeviceSpec, max_workers: int = 2, settle: float = SETTLE,
+                 rearm: float = REARM, log=None, translate=_english, on_start=None, on_done=None, progress=None,
+                 step=None, foreground=None):
+        self.registry = registry
+        self.provisioner = provisioner
+        self.spec = spec
+        self.max_workers = max(1, max_workers)
+        self.settle = settle
+        self.rearm = rearm
+        self.on_start = on_start
+        self.on_done = on_done
+        self.progress = progress
+        self.step = step
+        self.foreground = foreground
+        self._log = log
+        self._t = translate
+        self._lock = Lock()
+        self._stop = Event()
+        self._pool = None
+        # ключ -> когда закончили задачу и когда порт в последний раз пропадал
+        self._active = set()
+        self._finished = {}
+        self._gone = {}
+        self.results = []
+
+    def log(self, msg: str):
+        if self._log:
+            self._log(msg)
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None and not self._stop.is_set()
+
+    def counts(self) -> dict:
+        with self._lock:
+            done = list(self.results)
+            active = len(self._active)
+        return {
+            "ok": sum(1 for r in done if r.ok),
+            "failed": sum(1 for r in done if not r.ok and not r.skipped),
+            "skipped": sum(1 for r in done if r.skipped),
+            "active": active,
+        }
+
+    def start(self, include_present: bool = False):
+        """платы что уже подключены трогаем только с include_present остальные ждут своего кабеля"""
+        if self.running:
+            return
+        self._stop.clear()
+        with self._lock:
+            self._active.clear()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        present = self.registry.snapshot()
+        self.registry.subscribe(self._changed)
+        self.registry.start()
+        if include_present:
+            self._changed(present, [])
+
+    def stop(self, wait: bool = False):
+        """новые платы больше не берем задачи что еще ждут отменяются а начатые дорабатывают"""
+        if self._pool is None:
+            return
+        self._stop.set()
+        self.registry.unsubscribe(self._changed)
+        self.registry.stop()
+        pool = self._pool
+        self._pool = None
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _accepts(self, info) -> bool:
+        if not info.is_usb:
+            # встроенные uart материнки и bluetooth порты это не платы
+            return False
+        return self.spec.matches(info.device, info.serial_number)
+
+    def _changed(self, added: list, removed: list):
+        now = time.monotonic()
+        with self._lock:
+            for info in removed:
+                self._gone[info.key] = now
+            fresh = []
+            for info in added:
+                key = info.key
+                if key in self._active or not self._accepts(info):
+                    continue
+                finished = self._finished.get(key)
+                gone = self._gone.get(key, now)
+                if finished is not None and gone - finished < self.rearm and now - gone < self.rearm:
+                    # после нашей же прошивки плата перезагрузилась и вернулась ждем пока ее правда переподключат
+                    continue
+                self._active.add(key)
+                fresh.append(info)
+            pool = self._pool
+        for info in fresh:
+            self.log(
+                self._t(f"Подключена плата {info.device} ({info.key}).", f"Device attached: {info.device} ({info.key}).")
+            )
+            try:
+                pool.submit(self._job, info)
+            except RuntimeError:
+                # станцию как раз остановили
+                with self._lock:
+                    self._active.discard(info.key)
+
+    def _job(self, info):
+        key = info.key
+        spec = DeviceSpec(**self.spec.to_dict())
+        spec.port = info.device
+        spec.usb_serial = info.serial_number
+        result = DeviceResult(info.device, spec)
+        try:
+            if self._stop.wait(self.settle):
+                result.skipped = True
+                return
+            current = self.registry.find(key)
+            if current is None:
+                result.skipped = True
+                result.error = "device unplugged"
+                return
+            # пока ждали у платы мог смениться номер порта
+            result.port = spec.port = current.device
+            if self.on_start is not None:
+                self.on_start(result.port)
+            result.started = time.time()
+            try:
+                result.target = self.provisioner.resolve(result.port, spec)
+                with self.foreground() if self.foreground is not None else nullcontext():
+                    self.provisioner.provision(result, self.progress, self.step)
+                result.ok = True
+            except ManifestError as e:
+                result.error = str(e)
+            except Exception as e:
+                result.error = str(e) or type(e).__name__
+            result.finished = time.time()
+        finally:
+            with self._lock:
+                self._active.discard(key)
+                self._finished[key] = time.monotonic()
+                self.results.append(result)
+            if self.on_done is not None:
+                self.on_done(result)
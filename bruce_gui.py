@@ -0,0 +1,4196 @@
+import sys
+import os
+import subprocess
+import shutil
+import time
+from threading import Thread, local
+
+from PyQt5 import QtWidgets, QtGui, QtCore
+import serial
+
+from bruce_core.batch import BatchRunner
+from bruce_core.boards import AssetIndex, find_profile, load_profiles
+from bruce_core.capture import CAPTURE_EXT, CaptureWriter
+from bruce_core.catalog import BackupCatalog, RetentionPolicy
+from bruce_core.container import BBK_EXT, BackupContainer, is_container, open_image, save_image
+from bruce_core.diffflash import diff_flash
+from bruce_core.download import RangedDownloader
+from bruce_core.devices import DeviceManager
+from bruce_core.esp import EspSession, esptool_available
+from bruce_core.fwcache import FirmwareCache
+from bruce_core.identity import IdentityStore, parse_identity_output, port_details
+from bruce_core.incremental import incremental_backup, manifest_path
+from bruce_core.linkprofile import LinkProfileStore
+from bruce_core.logbuf import LogBuffer
+from bruce_core.manifest import (
+    DeviceSpec,
+    ManifestError,
+    Provisioner,
+    assign_ports,
+    load_manifest,
+    report_path,
+    run_manifest,
+    write_report,
+)
+from bruce_core.operations import backup_flash, default_backup_name, flash_image
+from bruce_core.partitions import backup_partitions, image_partition_table, read_partition_table, safe_label
+from bruce_core.ports import default_registry
+from bruce_core.prefetch import Prefetcher
+from bruce_core.progress import ProgressEvent, ProgressTracker, format_bytes, format_eta, parse_esptool_line
+from bruce_core.releases import ReleaseFetcher, ReleaseIndex, bin_assets, pick_release
+from bruce_core.restore import RestoreReport, verified_restore
+from bruce_core.serialio import SerialReader
+from bruce_core.settings import (
+    APP_DIR,
+    APP_VERSION,
+    BOARDS_PATH,
+    CAPTURES_DIR,
+    CATALOG_PATH,
+    DEVICES_PATH,
+    LINKS_PATH,
+    RELEASES_CACHE_PATH,
+    REPORTS_DIR,
+    AppSettings,
+    get_python_cmd,
+)
+from bruce_core.startup import StartupTrace
+from bruce_core.station import Station
+
+try:
+    import ctypes
+except ImportError:
+    ctypes = None
+
+
+# сколько строк держит окно лога и как часто в него сбрасываются накопленные строки
+LOG_MAX_LINES = 5000
+LOG_FLUSH_MS = 33
+# бэкапы по умолчанию сохраняем сжатым .bbk но старые .bin тоже понимаем
+BACKUP_SAVE_FILTER = "Bruce backup (*.bbk);;BIN files (*.bin)"
+BACKUP_OPEN_FILTER = "Backups (*.bbk *.bin);;Bruce backup (*.bbk);;BIN files (*.bin)"
+MANIFEST_OPEN_FILTER = "Manifests (*.json *.yaml *.yml)"
+
+
+def get_resource_path(name: str) -> str:
+    """простая штука чтоб картинки и прочие файлы искались рядом с exe а не где попало"""
+    if getattr(sys, "frozen", False):
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_dir, name)
+
+
+# уже декодированные и отмасштабированные картинки из ресурсов по (имя, размер)
+_PIXMAPS = {}
+
+
+def cached_pixmap(name: str, size: int = None) -> QtGui.QPixmap:
+    """картинка из ресурсов с диска читается один раз а окна прогресса и about потом берут готовую
+
+    если файла нет вернется пустой QPixmap так что проверять надо через isNull
+    """
+    key = (name, size)
+    pix = _PIXMAPS.get(key)
+    if pix is None:
+        if size:
+            pix = cached_pixmap(name)
+            if not pix.isNull():
+                pix = pix.scaled(size, size, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+        else:
+            path = get_resource_path(name)
+            pix = QtGui.QPixmap(path) if os.path.isfile(path) else QtGui.QPixmap()
+        _PIXMAPS[key] = pix
+    return pix
+
+
+class BruceStyle:
+    """тут чутка намутили палитру и стили чтоб было как на bruce.computer но не прям один в один"""
+
+    BG_DARK = "#050608"
+    BG_CARD = "#0d1117"
+    ACCENT = "#00ff99"
+    ACCENT_SOFT = "#00cc7a"
+    TEXT_MAIN = "#e6edf3"
+    TEXT_MUTED = "#8b949e"
+    BORDER = "#161b22"
+
+    @staticmethod
+    def apply(app: QtWidgets.QApplication):
+        palette = app.palette()
+        palette.setColor(QtGui.QPalette.Window, QtGui.QColor(BruceStyle.BG_DARK))
+        palette.setColor(QtGui.QPalette.WindowText, QtGui.QColor(BruceStyle.TEXT_MAIN))
+        palette.setColor(QtGui.QPalette.Base, QtGui.QColor(BruceStyle.BG_CARD))
+        palette.setColor(QtGui.QPalette.AlternateBase, QtGui.QColor(BruceStyle.BG_DARK))
+        palette.setColor(QtGui.QPalette.ToolTipBase, QtGui.QColor(BruceStyle.BG_CARD))
+        palette.setColor(QtGui.QPalette.ToolTipText, QtGui.QColor(BruceStyle.TEXT_MAIN))
+        palette.setColor(QtGui.QPalette.Text, QtGui.QColor(BruceStyle.TEXT_MAIN))
+        palette.setColor(QtGui.QPalette.Button, QtGui.QColor(BruceStyle.BG_CARD))
+        palette.setColor(QtGui.QPalette.ButtonText, QtGui.QColor(BruceStyle.TEXT_MAIN))
+        palette.setColor(QtGui.QPalette.Highlight, QtGui.QColor(BruceStyle.ACCENT_SOFT))
+        palette.setColor(QtGui.QPalette.HighlightedText, QtGui.QColor(BruceStyle.BG_DARK))
+        app.setPalette(palette)
+
+        app.setStyleSheet(f"""
+            QWidget {{
+                background-color: {BruceStyle.BG_DARK};
+                color: {BruceStyle.TEXT_MAIN};
+                font-family: "Segoe UI", "Inter", "Roboto", sans-serif;
+                font-size: 11pt;
+            }}
+
+            QMainWindow {{
+                background-color: {BruceStyle.BG_DARK};
+                border: none;
+            }}
+
+            QWidget#RootCentral {{
+                background-color: {BruceStyle.BG_DARK};
+                background-image: url(bruce.png);
+                background-position: center;
+                background-repeat: no-repeat;
+                background-origin: content;
+            }}
+
+            QDialog {{
+                background-color: {BruceStyle.BG_DARK};
+                border: none;
+            }}
+
+            QGroupBox {{
+                border: 1px solid {BruceStyle.BORDER};
+                border-top: 2px solid {BruceStyle.ACCENT_SOFT};
+                border-radius: 10px;
+                margin-top: 18px;
+                padding: 14px;
+                background-color: {BruceStyle.BG_CARD};
+            }}
+
+            QGroupBox::title {{
+                subcontrol-origin: margin;
+                left: 10px;
+                padding: 0 3px;
+                color: {BruceStyle.TEXT_MUTED};
+                font-weight: 600;
+                letter-spacing: 0.5px;
+            }}
+
+            QLabel#TitleLabel {{
+                font-size: 22pt;
+                font-weight: 800;
+            }}
+
+            QLabel#SubtitleLabel {{
+                color: {BruceStyle.TEXT_MUTED};
+                font-size: 10pt;
+            }}
+
+            /* Яркое, но читаемое выделение элементов */
+            QTreeView::item:selected,
+            QListView::item:selected,
+            QTableView::item:selected,
+            QAbstractItemView::item:selected {{
+                background-color: {BruceStyle.ACCENT_SOFT};
+                color: {BruceStyle.BG_DARK};
+            }}
+
+            QComboBox QAbstractItemView::item:selected {{
+                background-color: {BruceStyle.ACCENT_SOFT};
+                color: {BruceStyle.BG_DARK};
+            }}
+
+            QLineEdit:focus,
+            QComboBox:focus,
+            QPlainTextEdit:focus {{
+                border: 1px solid {BruceStyle.ACCENT_SOFT};
+            }}
+
+            QPushButton {{
+                background-color: {BruceStyle.BG_CARD};
+                border-radius: 6px;
+                border: 1px solid {BruceStyle.BORDER};
+                padding: 6px 12px;
+                color: {BruceStyle.TEXT_MAIN};
+            }}
+
+            QPushButton:hover {{
+                border-color: {BruceStyle.ACCENT_SOFT};
+                background-color: #0f151f;
+            }}
+
+            QPushButton:pressed {{
+                background-color: #050b10;
+            }}
+
+            QPushButton[accent="true"] {{
+                background-color: {BruceStyle.ACCENT};
+                color: {BruceStyle.BG_DARK};
+                font-weight: 600;
+            }}
+
+            QPushButton[accent="true"]:hover {{
+                background-color: {BruceStyle.ACCENT_SOFT};
+            }}
+
+            QComboBox, QLineEdit {{
+                background-color: {BruceStyle.BG_CARD};
+                border-radius: 4px;
+                border: 1px solid {BruceStyle.BORDER};
+                padding: 4px 6px;
+            }}
+
+            QPlainTextEdit {{
+                background-color: #050608;
+                border-radius: 4px;
+                border: 1px solid {BruceStyle.BORDER};
+                font-family: "JetBrains Mono", "Consolas", monospace;
+                font-size: 9pt;
+            }}
+
+            QMenuBar {{
+                background-color: #050608;
+                color: {BruceStyle.TEXT_MAIN};
+            }}
+
+            QMenuBar::item:selected {{
+                background-color: #0f151f;
+            }}
+
+            QMenu {{
+                background-color: #050608;
+                color: {BruceStyle.TEXT_MAIN};
+                border: 1px solid {BruceStyle.BORDER};
+            }}
+
+            QMenu::item:selected {{
+                background-color: #0f151f;
+            }}
+
+            QProgressBar {{
+                background-color: {BruceStyle.BG_CARD};
+                border: 1px solid {BruceStyle.BORDER};
+                border-radius: 4px;
+                max-height: 8px;
+            }}
+
+            QProgressBar::chunk {{
+                background-color: {BruceStyle.ACCENT};
+                border-radius: 3px;
+            }}
+
+            QScrollBar:vertical {{
+                background: {BruceStyle.BG_DARK};
+                width: 8px;
+                margin: 0px;
+            }}
+
+            QScrollBar::handle:vertical {{
+                background: {BruceStyle.BORDER};
+                border-radius: 4px;
+            }}
+        """)
+
+
+class SerialConsole(QtWidgets.QDialog):
+    # как часто текст из потока чтения попадает в окно
+    FLUSH_MS = 50
+
+    def __init__(self, parent=None, send_tone_on_connect: bool = True, language: str = "ru", scrollback: int = 10000,
+                 capture_dir: str = CAPTURES_DIR):
+        super().__init__(parent)
+        self._language = language if language in ("ru", "en") else "ru"
+
+        def _t(ru: str, en: str) -> str:
+            return en if self._language == "en" else ru
+
+        self.setWindowTitle("Bruce Serial Console")
+        # убрал эту дурацкую кнопку с вопросиком вверху она тут вообще не нужна
+        self.setWindowFlags(self.windowFlags() & ~QtCore.Qt.WindowContextHelpButtonHint)
+        self.resize(700, 400)
+
+        self.port_box = QtWidgets.QComboBox()
+        self.baud_box = QtWidgets.QComboBox()
+        self.baud_box.addItems(["115200", "921600"])
+        self.refresh_ports()
+
+        self.open_btn = QtWidgets.QPushButton(_t("Открыть", "Open"))
+        self.close_btn = QtWidgets.QPushButton(_t("Закрыть", "Close"))
+        self.close_btn.setEnabled(False)
+        # запись идет сырыми байтами с временем на каждый кусок так что потом можно разбирать что угодно
+        self.capture_chk = QtWidgets.QCheckBox(_t("Запись в файл", "Capture to file"))
+        self.replay_btn = QtWidgets.QPushButton(_t("Воспроизвести…", "Replay…"))
+
+        self.text = QtWidgets.QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setMaximumBlockCount(max(100, scrollback))
+
+        # это типа верхняя панель тут порт скорость и всякие кнопки
+        top = QtWidgets.QHBoxLayout()
+        top.addWidget(QtWidgets.QLabel(_t("Порт:", "Port:")))
+        top.addWidget(self.port_box)
+        top.addWidget(QtWidgets.QLabel(_t("Скорость:", "Baudrate:")))
+        top.addWidget(self.baud_box)
+        top.addWidget(self.open_btn)
+        top.addWidget(self.close_btn)
+        top.addWidget(self.capture_chk)
+        top.addWidget(self.replay_btn)
+
+        # Нижняя панель ввода команды
+        self.input_edit = QtWidgets.QLineEdit()
+        self.input_edit.setPlaceholderText(
+            _t("Команда для отправки на устройство...", "Command to send to device...")
+        )
+        self.send_btn = QtWidgets.QPushButton(_t("Отправить", "Send"))
+        self.send_btn.setEnabled(False)
+
+        bottom = QtWidgets.QHBoxLayout()
+        bottom.addWidget(self.input_edit, 1)
+        bottom.addWidget(self.send_btn)
+
+        # скорость приема и сколько текста пришлось выкинуть если окно не успевало
+        self.stats_label = QtWidgets.QLabel()
+        self.stats_label.setObjectName("SubtitleLabel")
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.addLayout(top)
+        layout.addWidget(self.text, 1)
+        layout.addWidget(self.stats_label)
+        layout.addLayout(bottom)
+        self.setLayout(layout)
+
+        self.serial = None
+        self._reader = None
+        self._capture = None
+        self._capture_dir = capture_dir
+        self._closing = False
+        self.send_tone_on_connect = send_tone_on_connect
+        self._stats_at = 0.0
+
+        self._flush_timer = QtCore.QTimer(self)
+        self._flush_timer.setInterval(self.FLUSH_MS)
+        self._flush_timer.timeout.connect(self._flush)
+
+        self.open_btn.clicked.connect(self.open_port)
+        self.close_btn.clicked.connect(self.close_port)
+        self.capture_chk.toggled.connect(self._on_capture_toggled)
+        self.replay_btn.clicked.connect(self.replay_capture)
+        self.send_btn.clicked.connect(self.send_command)
+        self.input_edit.returnPressed.connect(self.send_command)
+
+    def refresh_ports(self):
+        self.port_box.clear()
+        ports = default_registry().snapshot()
+        for p in ports:
+            self.port_box.addItem(f"{p.device} - {p.description}", p.device)
+
+    def open_port(self):
+        device = self.port_box.currentData()
+        if not device:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Serial",
+                "No available COM port found." if self._language == "en" else "Не найден доступный COM порт.",
+            )
+            return
+        baud = int(self.baud_box.currentText())
+        try:
+            self.serial = serial.Serial(device, baudrate=baud, timeout=0.1)
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(
+                self,
+                "Serial",
+                (f"Port open error:\n{e}" if self._language == "en" else f"Ошибка открытия порта:\n{e}"),
+            )
+            return
+
+        # Автоматически отправляем команду tone при подключении, если включено в настройках
+        if self.send_tone_on_connect:
+            try:
+                self.serial.write(b"tone\n")
+            except Exception:
+                pass
+
+        self._reader = SerialReader(self.serial)
+        if self.capture_chk.isChecked():
+            self._start_capture()
+        self._reader.start()
+        self._flush_timer.start()
+        self.open_btn.setEnabled(False)
+        self.close_btn.setEnabled(True)
+        self.send_btn.setEnabled(True)
+        self.replay_btn.setEnabled(False)
+
+    def _start_capture(self):
+        if self._capture is not None or self.serial is None:
+            return
+        device = self.serial.port or "serial"
+        safe_port = "".join(c if c.isalnum() else "_" for c in device).strip("_")
+        try:
+            self._capture = CaptureWriter(self._capture_dir, prefix=safe_port)
+        except Exception as e:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Serial",
+                (f"Failed to start capture:\n{e}" if self._language == "en" else f"Не удалось начать запись:\n{e}"),
+            )
+            self.capture_chk.setChecked(False)
+            return
+        if self._reader is not None:
+            self._reader.on_chunk = self._capture.write
+
+    def _stop_capture(self):
+        capture, self._capture = self._capture, None
+        if capture is None:
+            return
+        if self._reader is not None:
+            self._reader.on_chunk = None
+        capture.close()
+
+    def _on_capture_toggled(self, checked: bool):
+        # галку можно ставить и до открытия порта и прямо во время работы
+        if not checked:
+            self._stop_capture()
+        elif self._reader is not None and self.serial is not None:
+            self._start_capture()
+
+    def replay_capture(self):
+        """прогоняет сохраненную запись через консоль как будто это живой порт"""
+        if self._reader is not None:
+            return
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self,
+            "Serial",
+            self._capture_dir,
+            f"Bruce capture (*{CAPTURE_EXT})",
+        )
+        if not path:
+            return
+        self.text.appendPlainText(f"--- {os.path.basename(path)} ---\n")
+        self._reader = SerialReader(None, on_error=lambda e: None)
+        self._reader.start_replay(path)
+        self._flush_timer.start()
+        self.open_btn.setEnabled(False)
+        self.replay_btn.setEnabled(False)
+        self.close_btn.setEnabled(True)
+
+    def _flush(self):
+        """по таймеру забираем все что начитал поток и дописываем в конец одним куском
+
+        недописанная строка без перевода тоже сразу видна а когда дойдет остаток просто продолжится
+        """
+        if self._reader is None:
+            return
+        text = self._reader.drain()
+        if text:
+            bar = self.text.verticalScrollBar()
+            at_bottom = bar.value() >= bar.maximum()
+            cursor = QtGui.QTextCursor(self.text.document())
+            cursor.movePosition(QtGui.QTextCursor.End)
+            cursor.insertText(text)
+            if at_bottom:
+                bar.setValue(bar.maximum())
+
+        now = time.monotonic()
+        if now - self._stats_at >= 0.5:
+            self._stats_at = now
+            self._update_stats()
+        if not self._reader.running and not text:
+            # поток чтения умер сам например плату выдернули значит и порт закрываем
+            self._update_stats()
+            self._flush_timer.stop()
+            if not self._closing:
+                self.close_port()
+
+    def _update_stats(self):
+        reader = self._reader
+        if reader is None:
+            return
+        rate = format_bytes(reader.rate())
+        total = format_bytes(reader.total_bytes)
+        dropped = format_bytes(reader.dropped_bytes)
+        if self._language == "en":
+            text = f"{rate}/s · received {total}"
+            if reader.dropped_bytes:
+                text += f" · dropped {dropped}"
+        else:
+            text = f"{rate}/с · принято {total}"
+            if reader.dropped_bytes:
+                text += f" · пропущено {dropped}"
+        capture = self._capture
+        if capture is not None:
+            name = os.path.basename(capture.current_path or "")
+            written = format_bytes(capture.bytes_written)
+            if self._language == "en":
+                text += f" · capture {name} ({written})"
+                if capture.dropped_bytes:
+                    text += f", lost {format_bytes(capture.dropped_bytes)}"
+            else:
+                text += f" · запись {name} ({written})"
+                if capture.dropped_bytes:
+                    text += f", потеряно {format_bytes(capture.dropped_bytes)}"
+        self.stats_label.setText(text)
+
+    def close_port(self):
+        self._closing = True
+        if self._reader is not None:
+            self._reader.stop(timeout=0.5)
+            self._flush()
+            self._stop_capture()
+            self._reader = None
+        self._flush_timer.stop()
+        self._closing = False
+        if self.serial:
+            try:
+                self.serial.close()
+            except Exception:
+                pass
+            self.serial = None
+        self.open_btn.setEnabled(True)
+        self.close_btn.setEnabled(False)
+        self.send_btn.setEnabled(False)
+        self.replay_btn.setEnabled(True)
+
+    def send_command(self):
+        if not self.serial or not self.serial.is_open:
+            return
+        cmd = self.input_edit.text()
+        if not cmd:
+            return
+        # если в конце нет перевода строки то дописываем сами а то порт иногда тупит без него
+        if not cmd.endswith("\n"):
+            cmd += "\n"
+        try:
+            self.serial.write(cmd.encode(errors="ignore"))
+            self.input_edit.clear()
+        except Exception:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Serial",
+                "Failed to send command." if self._language == "en" else "Не удалось отправить команду.",
+            )
+
+    def closeEvent(self, event: QtGui.QCloseEvent) -> None:
+        self.close_port()
+        super().closeEvent(event)
+
+
+class PartitionList(QtWidgets.QTreeWidget):
+    """список разделов с галочками метка тип смещение и размер"""
+
+    def __init__(self, parent=None, language: str = "ru"):
+        super().__init__(parent)
+        en = language == "en"
+        self.setHeaderLabels(
+            ["Label", "Type", "Offset", "Size"] if en else ["Метка", "Тип", "Смещение", "Размер"]
+        )
+        self.setRootIsDecorated(False)
+        self.setMinimumHeight(180)
+        self._partitions = []
+
+    def set_partitions(self, partitions: list, checked: bool = True):
+        self.clear()
+        self._partitions = list(partitions)
+        for p in self._partitions:
+            item = QtWidgets.QTreeWidgetItem(
+                [p.label, f"{p.type_name}/{p.subtype_name}", f"0x{p.offset:06x}", format_bytes(p.size)]
+            )
+            item.setCheckState(0, QtCore.Qt.Checked if checked else QtCore.Qt.Unchecked)
+            self.addTopLevelItem(item)
+        for col in range(self.columnCount()):
+            self.resizeColumnToContents(col)
+
+    def selected(self) -> list:
+        return [
+            p for i, p in enumerate(self._partitions)
+            if self.topLevelItem(i).checkState(0) == QtCore.Qt.Checked
+        ]
+
+
+class BackupModeDialog(QtWidgets.QDialog):
+    """окно где выбираем как бэкап делать полный образ инкрементальный по блокам или только нужные разделы
+
+    partition_loader() вызывается в отдельном потоке и должен вернуть таблицу разделов с платы
+    """
+
+    partitions_signal = QtCore.pyqtSignal(object, str)
+
+    def __init__(self, parent=None, language: str = "ru", incremental_available: bool = True,
+                 partition_loader=None):
+        super().__init__(parent)
+        self._language = language if language in ("ru", "en") else "ru"
+        self._partition_loader = partition_loader
+        self._partitions_requested = False
+
+        def _t(ru: str, en: str) -> str:
+            return en if self._language == "en" else ru
+
+        self._t = _t
+        self.setWindowTitle(_t("Режим бэкапа", "Backup mode"))
+        self.setWindowFlags(self.windowFlags() & ~QtCore.Qt.WindowContextHelpButtonHint)
+        self.mode = "full"
+        self.partitions = []
+
+        layout = QtWidgets.QVBoxLayout()
+
+        desc = QtWidgets.QLabel(
+            _t(
+                "Инкрементальный бэкап сверяет md5 блоков прямо на плате и читает только те\n"
+                "что поменялись с прошлого бэкапа этой платы, пустые блоки (0xFF) не читаются вовсе.\n"
+                "Бэкап разделов читает только отмеченные разделы из таблицы по 0x8000, каждый в свой файл.",
+                "Incremental backup compares block MD5s on the device and reads only blocks\n"
+                "changed since this device's previous backup; blank (0xFF) blocks are never read.\n"
+                "Partition backup reads only the checked partitions from the table at 0x8000, one file each.",
+            )
+        )
+        desc.setObjectName("SubtitleLabel")
+        layout.addWidget(desc)
+
+        self.rb_full = QtWidgets.QRadioButton(_t("Полный образ (вся флеш‑память)", "Full image (whole flash)"))
+        self.rb_incremental = QtWidgets.QRadioButton(
+            _t("Инкрементальный (только изменившиеся блоки)", "Incremental (changed blocks only)")
+        )
+        self.rb_partitions = QtWidgets.QRadioButton(
+            _t("Только выбранные разделы (nvs, app, spiffs...)", "Selected partitions only (nvs, app, spiffs...)")
+        )
+        self.rb_incremental.setEnabled(incremental_available)
+        self.rb_partitions.setEnabled(incremental_available and partition_loader is not None)
+        if incremental_available:
+            self.rb_incremental.setChecked(True)
+        else:
+            self.rb_full.setChecked(True)
+        layout.addWidget(self.rb_full)
+        layout.addWidget(self.rb_incremental)
+        layout.addWidget(self.rb_partitions)
+
+        self.partitions_status = QtWidgets.QLabel("")
+        self.partitions_status.setObjectName("SubtitleLabel")
+        self.partitions_status.setVisible(False)
+        layout.addWidget(self.partitions_status)
+        self.partition_list = PartitionList(self, self._language)
+        self.partition_list.setVisible(False)
+        layout.addWidget(self.partition_list)
+
+        btn_box = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel
+        )
+        layout.addWidget(btn_box)
+
+        btn_box.accepted.connect(self.on_accept)
+        btn_box.rejected.connect(self.reject)
+        self.rb_partitions.toggled.connect(self._on_partitions_toggled)
+        self.partitions_signal.connect(self._on_partitions_loaded)
+
+        self.setLayout(layout)
+
+    def _on_partitions_toggled(self, checked: bool):
+        self.partitions_status.setVisible(checked)
+        self.partition_list.setVisible(checked and self.partition_list.topLevelItemCount() > 0)
+        if not checked or self._partitions_requested:
+            return
+        # таблицу читаем с платы только когда правда выбрали этот режим
+        self._partitions_requested = True
+        self.partitions_status.setText(self._t("Чтение таблицы разделов...", "Reading partition table..."))
+
+        def worker():
+            try:
+                self.partitions_signal.emit(self._partition_loader(), "")
+            except Exception as e:
+                self.partitions_signal.emit(None, str(e))
+
+        Thread(target=worker, daemon=True).start()
+
+    def _on_partitions_loaded(self, partitions, error: str):
+        if partitions is None:
+            self._partitions_requested = False
+            self.partitions_status.setText(
+                self._t(f"Не удалось прочитать таблицу разделов: {error}", f"Failed to read partition table: {error}")
+            )
+            return
+        self.partitions_status.setText(
+            self._t(f"Разделов в таблице: {len(partitions)}", f"Partitions in table: {len(partitions)}")
+        )
+        self.partition_list.set_partitions(partitions, checked=False)
+        self.partition_list.setVisible(self.rb_partitions.isChecked())
+
+    def on_accept(self):
+        if self.rb_partitions.isChecked():
+            self.partitions = self.partition_list.selected()
+            if not self.partitions:
+                QtWidgets.QMessageBox.warning(
+                    self,
+                    self._t("Режим бэкапа", "Backup mode"),
+                    self._t("Отметьте хотя бы один раздел.", "Check at least one partition."),
+                )
+                return
+            self.mode = "partitions"
+        else:
+            self.mode = "incremental" if self.rb_incremental.isChecked() else "full"
+        self.accept()
+
+
+class PartitionSelectDialog(QtWidgets.QDialog):
+    """при восстановлении полного образа можно записать не все а только отмеченные разделы"""
+
+    def __init__(self, parent=None, language: str = "ru", partitions: list = None):
+        super().__init__(parent)
+        self._language = language if language in ("ru", "en") else "ru"
+
+        def _t(ru: str, en: str) -> str:
+            return en if self._language == "en" else ru
+
+        self.setWindowTitle(_t("Что восстановить", "What to restore"))
+        self.setWindowFlags(self.windowFlags() & ~QtCore.Qt.WindowContextHelpButtonHint)
+        self.partitions = []
+        self.whole_image = True
+
+        layout = QtWidgets.QVBoxLayout()
+        desc = QtWidgets.QLabel(
+            _t(
+                "В образе найдена таблица разделов. Снимите галочки с разделов\n"
+                "которые трогать не нужно, остальная флеш‑память останется как есть.",
+                "The image contains a partition table. Uncheck the partitions you want\n"
+                "to keep; the rest of the flash will be left untouched.",
+            )
+        )
+        desc.setObjectName("SubtitleLabel")
+        layout.addWidget(desc)
+
+        self.partition_list = PartitionList(self, self._language)
+        self.partition_list.set_partitions(partitions or [], checked=True)
+        layout.addWidget(self.partition_list)
+
+        self.whole_chk = QtWidgets.QCheckBox(
+            _t("Весь образ целиком (загрузчик, таблица и все разделы)",
+               "Whole image (bootloader, table and all partitions)")
+        )
+        self.whole_chk.setChecked(True)
+        self.whole_chk.toggled.connect(lambda on: self.partition_list.setEnabled(not on))
+        self.partition_list.setEnabled(False)
+        layout.addWidget(self.whole_chk)
+
+        btn_box = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel
+        )
+        layout.addWidget(btn_box)
+        btn_box.accepted.connect(self.on_accept)
+        btn_box.rejected.connect(self.reject)
+        self.setLayout(layout)
+
+    def on_accept(self):
+        self.whole_image = self.whole_chk.isChecked()
+        self.partitions = [] if self.whole_image else self.partition_list.selected()
+        if not self.whole_image and not self.partitions:
+            QtWidgets.QMessageBox.warning(
+                self,
+                self.windowTitle(),
+                "Check at least one partition." if self._language == "en" else "Отметьте хотя бы один раздел.",
+            )
+            return
+        self.accept()
+
+
+class LoadingSpinner(QtWidgets.QWidget):
+    """просто такой крутящийся кружок загрузки без всяких изысков но смотрится норм"""
+
+    def __init__(self, parent=None, size: int = 64):
+        super().__init__(parent)
+        self._angle = 0
+        self._timer = QtCore.QTimer(self)
+        self._timer.timeout.connect(self._on_timeout)
+        self._timer.start(80)
+        self._size = size
+        self.setFixedSize(size, size)
+
+    def _on_timeout(self):
+        self._angle = (self._angle + 30) % 360
+        self.update()
+
+    def paintEvent(self, event: QtGui.QPaintEvent) -> None:
+        painter = QtGui.QPainter(self)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+
+        rect = self.rect().adjusted(4, 4, -4, -4)
+        pen = QtGui.QPen(QtGui.QColor(BruceStyle.ACCENT))
+        pen.setWidth(3)
+        painter.setPen(pen)
+
+        # тут рисуется такая дуга почти полный круг и она крутится короче как спиннер
+        start_angle = int(self._angle * 16)
+        span_angle = int(270 * 16)
+        painter.drawArc(rect, start_angle, span_angle)
+
+        painter.end()
+
+
+class SplashScreen(QtWidgets.QDialog):
+    """короткий экранчик при старте чтоб логотип мелькнул и выглядело как будто все по взрослому"""
+
+    def __init__(self, parent: QtWidgets.QWidget = None):
+        super().__init__(parent)
+        self.setWindowFlags(
+            QtCore.Qt.FramelessWindowHint
+            | QtCore.Qt.Dialog
+            | QtCore.Qt.WindowStaysOnTopHint
+        )
+        self.setAttribute(QtCore.Qt.WA_TranslucentBackground)
+
+        size = 260
+        self.resize(size, size)
+
+        # тут по тихому ставим окно почти по центру монитора чтоб не улетело в угол
+        screen = QtWidgets.QApplication.primaryScreen()
+        if screen:
+            geo = screen.geometry()
+            self.move(
+                geo.center().x() - size // 2,
+                geo.center().y() - size // 2,
+            )
+
+        outer = QtWidgets.QFrame()
+        outer.setObjectName("SplashOuter")
+        outer_layout = QtWidgets.QVBoxLayout()
+        outer_layout.setContentsMargins(20, 20, 20, 20)
+        outer_layout.setSpacing(10)
+        outer.setLayout(outer_layout)
+
+        ring = QtWidgets.QFrame()
+        ring.setObjectName("SplashRing")
+        ring.setFixedSize(200, 200)
+
+        ring_layout = QtWidgets.QVBoxLayout()
+        ring_layout.setContentsMargins(16, 16, 16, 16)
+        ring_layout.setSpacing(8)
+        ring_layout.setAlignment(QtCore.Qt.AlignCenter)
+        ring.setLayout(ring_layout)
+
+        logo = QtWidgets.QLabel()
+        logo.setAlignment(QtCore.Qt.AlignCenter)
+        pix = cached_pixmap("wLogo.png", 72)
+        if not pix.isNull():
+            logo.setPixmap(pix)
+        logo.setObjectName("SplashLogo")
+
+        spinner = LoadingSpinner(self, size=72)
+
+        ring_layout.addWidget(logo)
+        ring_layout.addWidget(spinner, alignment=QtCore.Qt.AlignCenter)
+
+        title = QtWidgets.QLabel("Bruce Launcher")
+        title.setAlignment(QtCore.Qt.AlignCenter)
+        title.setObjectName("TitleLabel")
+
+        outer_layout.addWidget(ring, alignment=QtCore.Qt.AlignCenter)
+        outer_layout.addWidget(title, alignment=QtCore.Qt.AlignCenter)
+
+        root = QtWidgets.QVBoxLayout()
+        root.addWidget(outer)
+        self.setLayout(root)
+
+
+class ProgressDialog(QtWidgets.QDialog):
+    """окошко где крутится загрузка и снизу меняется текст прогресса чтоб было понятно что оно не зависло"""
+
+    def __init__(self, parent: QtWidgets.QWidget, title: str, initial_text: str):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.setWindowFlags(
+            QtCore.Qt.FramelessWindowHint
+            | QtCore.Qt.Dialog
+            | QtCore.Qt.WindowStaysOnTopHint
+        )
+        self.setModal(True)
+        self.setAttribute(QtCore.Qt.WA_TranslucentBackground)
+
+        size = 280
+        self.resize(size, size)
+
+        screen = QtWidgets.QApplication.primaryScreen()
+        if screen:
+            geo = screen.geometry()
+            self.move(
+                geo.center().x() - size // 2,
+                geo.center().y() - size // 2,
+            )
+
+        outer = QtWidgets.QFrame()
+        outer.setObjectName("SplashOuter")
+        outer_layout = QtWidgets.QVBoxLayout()
+        outer_layout.setContentsMargins(20, 20, 20, 20)
+        outer_layout.setSpacing(10)
+        outer.setLayout(outer_layout)
+
+        ring = QtWidgets.QFrame()
+        ring.setObjectName("SplashRing")
+        ring.setFixedSize(200, 200)
+
+        ring_layout = QtWidgets.QVBoxLayout()
+        ring_layout.setContentsMargins(16, 16, 16, 16)
+        ring_layout.setSpacing(8)
+        ring_layout.setAlignment(QtCore.Qt.AlignCenter)
+        ring.setLayout(ring_layout)
+
+        logo = QtWidgets.QLabel()
+        logo.setAlignment(QtCore.Qt.AlignCenter)
+        pix = cached_pixmap("wLogo.png", 56)
+        if not pix.isNull():
+            logo.setPixmap(pix)
+        logo.setObjectName("SplashLogo")
+
+        self.spinner = LoadingSpinner(self, size=64)
+
+        self.success_icon = QtWidgets.QLabel("✓")
+        self.success_icon.setAlignment(QtCore.Qt.AlignCenter)
+        self.success_icon.setFixedSize(64, 64)
+        self.success_icon.setStyleSheet(
+            f"background-color: {BruceStyle.ACCENT}; color: {BruceStyle.BG_DARK};"
+            "border-radius: 32px; font-size: 28pt; font-weight: 700;"
+        )
+        self.success_icon.hide()
+
+        ring_layout.addWidget(logo)
+        ring_layout.addWidget(self.spinner, alignment=QtCore.Qt.AlignCenter)
+        ring_layout.addWidget(self.success_icon, alignment=QtCore.Qt.AlignCenter)
+
+        self.msg_label = QtWidgets.QLabel(initial_text)
+        self.msg_label.setObjectName("SubtitleLabel")
+        self.msg_label.setAlignment(QtCore.Qt.AlignCenter)
+
+        # полоска появляется только когда от esptool пришли настоящие проценты
+        self.bar = QtWidgets.QProgressBar()
+        self.bar.setRange(0, 100)
+        self.bar.setTextVisible(False)
+        self.bar.setFixedWidth(200)
+        self.bar.hide()
+
+        outer_layout.addWidget(ring, alignment=QtCore.Qt.AlignCenter)
+        outer_layout.addWidget(self.bar, alignment=QtCore.Qt.AlignCenter)
+        outer_layout.addWidget(self.msg_label, alignment=QtCore.Qt.AlignCenter)
+
+        root = QtWidgets.QVBoxLayout()
+        root.addWidget(outer)
+        self.setLayout(root)
+
+    @QtCore.pyqtSlot(str)
+    def set_message(self, text: str):
+        self.msg_label.setText(text)
+
+    @QtCore.pyqtSlot(int, str)
+    def set_progress(self, percent: int, text: str):
+        self.bar.show()
+        self.bar.setValue(max(0, min(100, percent)))
+        if text:
+            self.msg_label.setText(text)
+
+    @QtCore.pyqtSlot(str)
+    def set_success(self, text: str = ""):
+        self.spinner.hide()
+        self.success_icon.show()
+        self.bar.setValue(100)
+        if text:
+            self.msg_label.setText(text)
+        QtCore.QTimer.singleShot(800, self.accept)
+
+
+class SettingsDialog(QtWidgets.QDialog):
+    def __init__(self, parent: QtWidgets.QWidget, settings: AppSettings, language: str = "ru"):
+        super().__init__(parent)
+        self._language = language if language in ("ru", "en") else "ru"
+
+        def _t(ru: str, en: str) -> str:
+            return en if self._language == "en" else ru
+
+        self.setWindowTitle(_t("Настройки", "Settings"))
+        self.setWindowFlags(self.windowFlags() & ~QtCore.Qt.WindowContextHelpButtonHint)
+        self._settings = settings
+        self.resize(520, 440)
+
+        fw_edit = QtWidgets.QLineEdit(settings.firmware_dir)
+        fw_btn = QtWidgets.QPushButton("…")
+        fw_btn.setFixedWidth(32)
+
+        cache_spin = QtWidgets.QSpinBox()
+        cache_spin.setRange(0, 100000)
+        cache_spin.setSingleStep(64)
+        cache_spin.setSuffix(_t(" МБ", " MB"))
+        cache_spin.setValue(settings.firmware_cache_mb)
+
+        conn_spin = QtWidgets.QSpinBox()
+        conn_spin.setRange(1, 16)
+        conn_spin.setValue(settings.download_connections)
+
+        bk_edit = QtWidgets.QLineEdit(settings.backup_dir)
+        bk_btn = QtWidgets.QPushButton("…")
+        bk_btn.setFixedWidth(32)
+
+        # правила хранения бэкапов 0 значит без ограничения
+        keep_spin = QtWidgets.QSpinBox()
+        keep_spin.setRange(0, 10000)
+        keep_spin.setSpecialValueText(_t("все", "all"))
+        keep_spin.setValue(settings.backup_keep_last)
+
+        age_spin = QtWidgets.QSpinBox()
+        age_spin.setRange(0, 36500)
+        age_spin.setSpecialValueText(_t("без ограничения", "no limit"))
+        age_spin.setSuffix(_t(" дн.", " days"))
+        age_spin.setValue(settings.backup_max_age_days)
+
+        total_spin = QtWidgets.QSpinBox()
+        total_spin.setRange(0, 10000000)
+        total_spin.setSingleStep(256)
+        total_spin.setSpecialValueText(_t("без ограничения", "no limit"))
+        total_spin.setSuffix(_t(" МБ", " MB"))
+        total_spin.setValue(settings.backup_max_total_mb)
+
+        tone_chk = QtWidgets.QCheckBox(
+            _t("Отправлять команду 'tone' при подключении к Serial", "Send 'tone' command when connecting to Serial")
+        )
+        tone_chk.setChecked(settings.send_tone_on_connect)
+
+        scrollback_label = QtWidgets.QLabel(_t("Строк в серийной консоли:", "Serial console scrollback:"))
+        scrollback_spin = QtWidgets.QSpinBox()
+        scrollback_spin.setRange(100, 1000000)
+        scrollback_spin.setSingleStep(1000)
+        scrollback_spin.setValue(settings.console_scrollback)
+
+        diff_chk = QtWidgets.QCheckBox(
+            _t(
+                "Дифференциальная прошивка (писать только изменившиеся сектора)",
+                "Differential flashing (write changed sectors only)",
+            )
+        )
+        diff_chk.setChecked(settings.differential_flash)
+
+        prefetch_chk = QtWidgets.QCheckBox(
+            _t(
+                "Заранее скачивать свежие latest и beta для моих плат в простое",
+                "Prefetch latest and beta firmware for my boards while idle",
+            )
+        )
+        prefetch_chk.setChecked(settings.prefetch_firmware)
+
+        ask_fw_chk = QtWidgets.QCheckBox(
+            _t("Каждый раз выбирать файл для прошивки вручную", "Ask firmware file every time")
+        )
+        ask_fw_chk.setChecked(settings.ask_firmware_path_each_time)
+        ask_bk_chk = QtWidgets.QCheckBox(
+            _t("Каждый раз выбирать файл для бэкапа вручную", "Ask backup file every time")
+        )
+        ask_bk_chk.setChecked(settings.ask_backup_path_each_time)
+
+        gfx_prog_chk = QtWidgets.QCheckBox(
+            _t("Графическое окно прогресса (сплэш при прошивке/бэкапе)", "Graphical progress window (flash/backup)")
+        )
+        gfx_prog_chk.setChecked(settings.graphic_progress)
+
+        chip_label = QtWidgets.QLabel(_t("Чип ESP:", "ESP chip:"))
+        chip_combo = QtWidgets.QComboBox()
+        chip_combo.addItem(_t("Авто (по плате)", "Auto (per device)"), "auto")
+        chip_combo.addItem("ESP32", "esp32")
+        chip_combo.addItem("ESP32-S3", "esp32s3")
+        # установить текущее значение
+        idx = chip_combo.findData(settings.chip_type)
+        if idx >= 0:
+            chip_combo.setCurrentIndex(idx)
+
+        # --- блок путей ---
+        fw_row = QtWidgets.QHBoxLayout()
+        fw_row.setContentsMargins(0, 0, 0, 0)
+        fw_row.setSpacing(6)
+        fw_row.addWidget(fw_edit, 1)
+        fw_row.addWidget(fw_btn)
+
+        bk_row = QtWidgets.QHBoxLayout()
+        bk_row.setContentsMargins(0, 0, 0, 0)
+        bk_row.setSpacing(6)
+        bk_row.addWidget(bk_edit, 1)
+        bk_row.addWidget(bk_btn)
+
+        paths_form = QtWidgets.QFormLayout()
+        paths_form.setLabelAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        paths_form.setFormAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop)
+        paths_form.setHorizontalSpacing(10)
+        paths_form.setVerticalSpacing(8)
+        paths_form.addRow(_t("Папка кэша прошивок:", "Firmware cache folder:"), fw_row)
+        paths_form.addRow(_t("Размер кэша прошивок:", "Firmware cache size:"), cache_spin)
+        paths_form.addRow(_t("Соединений при скачивании:", "Download connections:"), conn_spin)
+        paths_form.addRow("", ask_fw_chk)
+        paths_form.addRow(_t("Папка для бэкапов:", "Folder for backups:"), bk_row)
+        paths_form.addRow("", ask_bk_chk)
+        paths_form.addRow(_t("Хранить бэкапов на плату:", "Backups to keep per device:"), keep_spin)
+        paths_form.addRow(_t("Удалять бэкапы старше:", "Delete backups older than:"), age_spin)
+        paths_form.addRow(_t("Всего места под бэкапы:", "Total space for backups:"), total_spin)
+
+        paths_group = QtWidgets.QGroupBox(_t("Пути и файлы", "Paths and files"))
+        paths_group.setLayout(paths_form)
+
+        # --- блок поведения ---
+        behavior_layout = QtWidgets.QVBoxLayout()
+        behavior_layout.setContentsMargins(8, 8, 8, 8)
+        behavior_layout.setSpacing(6)
+        behavior_layout.addWidget(tone_chk)
+
+        scrollback_row = QtWidgets.QHBoxLayout()
+        scrollback_row.addWidget(scrollback_label)
+        scrollback_row.addWidget(scrollback_spin, 1)
+        behavior_layout.addLayout(scrollback_row)
+
+        chip_row = QtWidgets.QHBoxLayout()
+        chip_row.addWidget(chip_label)
+        chip_row.addWidget(chip_combo, 1)
+        behavior_layout.addLayout(chip_row)
+        behavior_layout.addWidget(diff_chk)
+        behavior_layout.addWidget(prefetch_chk)
+        behavior_layout.addWidget(gfx_prog_chk)
+        behavior_layout.addStretch(1)
+
+        behavior_group = QtWidgets.QGroupBox(_t("Поведение", "Behavior"))
+        behavior_group.setLayout(behavior_layout)
+
+        btn_box = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel
+        )
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.setContentsMargins(14, 14, 14, 14)
+        layout.setSpacing(10)
+        layout.addWidget(paths_group)
+        layout.addWidget(behavior_group)
+        layout.addStretch(1)
+        layout.addWidget(btn_box)
+        self.setLayout(layout)
+
+        def choose_dir(edit: QtWidgets.QLineEdit):
+            path = QtWidgets.QFileDialog.getExistingDirectory(
+                self,
+                _t("Выбор папки", "Select folder"),
+                edit.text() or APP_DIR,
+            )
+            if path:
+                edit.setText(path)
+
+        def update_fw_path_enabled(checked: bool):
+            enabled = not checked
+            fw_edit.setEnabled(enabled)
+            fw_btn.setEnabled(enabled)
+
+        def update_bk_path_enabled(checked: bool):
+            enabled = not checked
+            bk_edit.setEnabled(enabled)
+            bk_btn.setEnabled(enabled)
+
+        fw_btn.clicked.connect(lambda: choose_dir(fw_edit))
+        bk_btn.clicked.connect(lambda: choose_dir(bk_edit))
+        ask_fw_chk.toggled.connect(update_fw_path_enabled)
+        ask_bk_chk.toggled.connect(update_bk_path_enabled)
+        btn_box.accepted.connect(self.accept)
+        btn_box.rejected.connect(self.reject)
+
+        # начальное состояние доступности путей в зависимости от чекбоксов
+        update_fw_path_enabled(ask_fw_chk.isChecked())
+        update_bk_path_enabled(ask_bk_chk.isChecked())
+
+        self._fw_edit = fw_edit
+        self._bk_edit = bk_edit
+        self._cache_spin = cache_spin
+        self._conn_spin = conn_spin
+        self._keep_spin = keep_spin
+        self._age_spin = age_spin
+        self._total_spin = total_spin
+        self._tone_chk = tone_chk
+        self._scrollback_spin = scrollback_spin
+        self._diff_chk = diff_chk
+        self._prefetch_chk = prefetch_chk
+        self._ask_fw_chk = ask_fw_chk
+        self._ask_bk_chk = ask_bk_chk
+        self._chip_combo = chip_combo
+        self._gfx_prog_chk = gfx_prog_chk
+
+    def apply_changes(self) -> AppSettings:
+        self._settings.firmware_dir = self._fw_edit.text().strip() or self._settings.firmware_dir
+        self._settings.backup_dir = self._bk_edit.text().strip() or self._settings.backup_dir
+        self._settings.firmware_cache_mb = self._cache_spin.value()
+        self._settings.download_connections = self._conn_spin.value()
+        self._settings.backup_keep_last = self._keep_spin.value()
+        self._settings.backup_max_age_days = self._age_spin.value()
+        self._settings.backup_max_total_mb = self._total_spin.value()
+        self._settings.send_tone_on_connect = self._tone_chk.isChecked()
+        self._settings.console_scrollback = self._scrollback_spin.value()
+        self._settings.differential_flash = self._diff_chk.isChecked()
+        self._settings.prefetch_firmware = self._prefetch_chk.isChecked()
+        self._settings.ask_firmware_path_each_time = self._ask_fw_chk.isChecked()
+        self._settings.ask_backup_path_each_time = self._ask_bk_chk.isChecked()
+        self._settings.chip_type = self._chip_combo.currentData()
+        self._settings.graphic_progress = self._gfx_prog_chk.isChecked()
+        return self._settings
+
+
+class AboutDialog(QtWidgets.QDialog):
+    def __init__(self, parent: QtWidgets.QWidget = None, language: str = "ru", version: str = APP_VERSION):
+        super().__init__(parent)
+        self._language = language if language in ("ru", "en") else "ru"
+        self._version = version
+
+        if self._language == "en":
+            self.setWindowTitle("About Bruce Launcher")
+        else:
+            self.setWindowTitle("О программе Bruce Launcher")
+        self.setWindowFlags(self.windowFlags() & ~QtCore.Qt.WindowContextHelpButtonHint)
+        self.resize(420, 260)
+
+        layout = QtWidgets.QVBoxLayout()
+
+        top = QtWidgets.QHBoxLayout()
+
+        logo_label = QtWidgets.QLabel()
+        logo_label.setFixedSize(72, 72)
+        pix = cached_pixmap("wLogo.png", 72)
+        if not pix.isNull():
+            logo_label.setPixmap(pix)
+        top.addWidget(logo_label)
+
+        text_box = QtWidgets.QVBoxLayout()
+        title = QtWidgets.QLabel("Bruce Launcher")
+        title.setObjectName("TitleLabel")
+        if self._language == "en":
+            subtitle = QtWidgets.QLabel("Developed by ErkinKraft\nLicense: MIT")
+        else:
+            subtitle = QtWidgets.QLabel("Разработано ErkinKraft\nЛицензия: MIT")
+        subtitle.setObjectName("SubtitleLabel")
+
+        text_box.addWidget(title)
+        text_box.addWidget(subtitle)
+        top.addLayout(text_box)
+        top.addStretch(1)
+
+        layout.addLayout(top)
+
+        info = QtWidgets.QLabel()
+        info.setTextFormat(QtCore.Qt.RichText)
+        if self._language == "en":
+            info.setText(
+                "A handy launcher for flashing Bruce ESP32 devices,<br>"
+                "supporting release installation, backups and Serial console.<br>"
+                f"Current launcher version: <b>{self._version}</b><br>"
+                "Official firmware website: "
+                "<a href=\"https://bruce.computer/\">bruce.computer</a>"
+            )
+        else:
+            info.setText(
+                "Удобный лаунчер для прошивки устройств Bruce ESP32,<br>"
+                "поддерживающий установку релизов, бэкапы и Serial консоль.<br>"
+                f"Текущая версия лаунчера: <b>{self._version}</b><br>"
+                "Официальный сайт прошивки: "
+                "<a href=\"https://bruce.computer/\">bruce.computer</a>"
+            )
+        info.setOpenExternalLinks(True)
+        layout.addWidget(info)
+
+        github_btn = QtWidgets.QPushButton("GitHub: ErkinKraft")
+        github_btn.setProperty("accent", True)
+        github_btn.setMinimumHeight(34)
+        github_btn.clicked.connect(
+            lambda: QtGui.QDesktopServices.openUrl(QtCore.QUrl("https://github.com/ErkinKraft"))
+        )
+        layout.addWidget(github_btn, alignment=QtCore.Qt.AlignLeft)
+
+        btn_box = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Close)
+        btn_box.rejected.connect(self.reject)
+        btn_box.accepted.connect(self.accept)
+        # Кнопка Close по умолчанию на правой стороне
+        layout.addWidget(btn_box)
+
+        self.setLayout(layout)
+
+
+class FlashConfirmDialog(QtWidgets.QDialog):
+    """диалог перед тем как шить плату тут решаем стирать ли флеш и еще раз спрашиваем точно ли ты уверен"""
+
+    def __init__(self, parent, release_info: dict, port: str, language: str = "ru"):
+        super().__init__(parent)
+        self._language = language if language in ("ru", "en") else "ru"
+
+        def _t(ru: str, en: str) -> str:
+            return en if self._language == "en" else ru
+
+        self.setWindowTitle(_t("Подтверждение прошивки", "Flash confirmation"))
+        self.setWindowFlags(self.windowFlags() & ~QtCore.Qt.WindowContextHelpButtonHint)
+        self.erase_flash = False
+
+        tag = release_info.get("tag") or release_info.get("name") or "unknown"
+
+        layout = QtWidgets.QVBoxLayout()
+
+        text = QtWidgets.QLabel(
+            _t(
+                f"Будет прошита прошивка <b>{tag}</b> на устройство <b>{port}</b>",
+                f"Firmware <b>{tag}</b> will be flashed to device <b>{port}</b>",
+            )
+        )
+        text.setTextFormat(QtCore.Qt.RichText)
+        layout.addWidget(text)
+
+        self.erase_chk = QtWidgets.QCheckBox(
+            _t(
+                "Полностью стереть флеш перед прошивкой (erase_flash)",
+                "Erase flash completely before flashing (erase_flash)",
+            )
+        )
+        layout.addWidget(self.erase_chk)
+
+        btn_box = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel
+        )
+        layout.addWidget(btn_box)
+
+        btn_box.accepted.connect(self.on_accept)
+        btn_box.rejected.connect(self.reject)
+
+        self.setLayout(layout)
+
+    def on_accept(self):
+        if self.erase_chk.isChecked():
+            res = QtWidgets.QMessageBox.question(
+                self,
+                "Стирание данных" if self._language == "ru" else "Data erase",
+                (
+                    "Внимание! При включённом erase_flash ВСЕ данные на устройстве будут стёрты.\n"
+                    "Ты точно хочешь продолжить?"
+                    if self._language == "ru"
+                    else "Warning! With erase_flash enabled ALL data on the device will be erased.\n"
+                    "Are you sure you want to continue?"
+                ),
+            )
+            if res != QtWidgets.QMessageBox.Yes:
+                self.reject()
+                return
+            self.erase_flash = True
+        self.accept()
+
+
+class DeviceRowReporter(QtCore.QObject):
+    """заменитель ProgressDialog для одной строки в таблице устройств у него те же слоты"""
+
+    def __init__(self, table: QtWidgets.QTableWidget, row: int, language: str = "ru"):
+        super().__init__(table)
+        self._table = table
+        self._row = row
+        self._language = language
+
+    def _set(self, col: int, text: str, color: str = None):
+        item = self._table.item(self._row, col)
+        if item is None:
+            item = QtWidgets.QTableWidgetItem()
+            self._table.setItem(self._row, col, item)
+        item.setText(text)
+        if color:
+            item.setForeground(QtGui.QBrush(QtGui.QColor(color)))
+
+    @QtCore.pyqtSlot(str)
+    def set_message(self, text: str):
+        self._set(2, text)
+
+    @QtCore.pyqtSlot(int, str)
+    def set_progress(self, percent: int, text: str):
+        self._set(2, text or f"{percent}%")
+
+    @QtCore.pyqtSlot(str)
+    def set_success(self, text: str = ""):
+        if text:
+            self._set(2, text)
+
+    @QtCore.pyqtSlot()
+    def reject(self):
+        self._set(2, "Ошибка" if self._language == "ru" else "Error", "#ff5555")
+
+    @QtCore.pyqtSlot(bool, str)
+    def set_result(self, ok: bool, text: str):
+        self._set(3, text, BruceStyle.ACCENT if ok else "#ff5555")
+
+
+class MultiDeviceDialog(QtWidgets.QDialog):
+    """окно для пачки плат сразу тут отмечаем порты и операцию и тут же смотрим как идет каждая"""
+
+    def __init__(self, parent, ports: list, parallel_jobs: int = 4, language: str = "ru"):
+        super().__init__(parent)
+        self._language = language if language in ("ru", "en") else "ru"
+
+        def _t(ru: str, en: str) -> str:
+            return en if self._language == "en" else ru
+
+        self.setWindowTitle(_t("Несколько устройств", "Multiple devices"))
+        self.setWindowFlags(self.windowFlags() & ~QtCore.Qt.WindowContextHelpButtonHint)
+        self.resize(760, 460)
+
+        self.op_combo = QtWidgets.QComboBox()
+        self.op_combo.addItem(_t("Прошивка", "Flash"), "flash")
+        self.op_combo.addItem(_t("Бэкап", "Backup"), "backup")
+        self.op_combo.addItem(_t("Восстановление", "Restore"), "restore")
+
+        self.release_combo = QtWidgets.QComboBox()
+        self.release_combo.addItem(_t("Последний релиз", "Latest release"), "latest")
+        self.release_combo.addItem(_t("Последняя бета", "Latest beta"), "beta")
+        self.release_combo.addItem(_t("Выбранная версия", "Selected version"), "selected")
+
+        self.erase_chk = QtWidgets.QCheckBox(_t("Стирать флеш (erase_flash)", "Erase flash (erase_flash)"))
+
+        self.jobs_spin = QtWidgets.QSpinBox()
+        self.jobs_spin.setRange(1, 32)
+        self.jobs_spin.setValue(parallel_jobs)
+
+        top = QtWidgets.QHBoxLayout()
+        top.addWidget(QtWidgets.QLabel(_t("Операция:", "Operation:")))
+        top.addWidget(self.op_combo)
+        top.addWidget(self.release_combo)
+        top.addWidget(self.erase_chk)
+        top.addStretch(1)
+        top.addWidget(QtWidgets.QLabel(_t("Параллельно:", "Parallel:")))
+        top.addWidget(self.jobs_spin)
+
+        self.table = QtWidgets.QTableWidget(len(ports), 4)
+        self.table.setHorizontalHeaderLabels(
+            [_t("Порт", "Port"), _t("Описание", "Description"), _t("Статус", "Status"), _t("Результат", "Result")]
+        )
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(2, QtWidgets.QHeaderView.Stretch)
+        for row, p in enumerate(ports):
+            port_item = QtWidgets.QTableWidgetItem(p.device)
+            port_item.setFlags(port_item.flags() | QtCore.Qt.ItemIsUserCheckable)
+            port_item.setCheckState(QtCore.Qt.Checked)
+            self.table.setItem(row, 0, port_item)
+            self.table.setItem(row, 1, QtWidgets.QTableWidgetItem(p.description or ""))
+            self.table.setItem(row, 2, QtWidgets.QTableWidgetItem(""))
+            self.table.setItem(row, 3, QtWidgets.QTableWidgetItem(""))
+
+        self.start_btn = QtWidgets.QPushButton(_t("Запустить", "Start"))
+        self.start_btn.setProperty("accent", True)
+        self.stop_btn = QtWidgets.QPushButton(_t("Остановить очередь", "Stop queue"))
+        self.stop_btn.setEnabled(False)
+        self.manifest_btn = QtWidgets.QPushButton(_t("Манифест...", "Manifest..."))
+        self.manifest_btn.setToolTip(
+            _t("Запустить манифест JSON/YAML: что шить на какие платы", "Run a JSON/YAML manifest: what goes on which board")
+        )
+        close_btn = QtWidgets.QPushButton(_t("Закрыть", "Close"))
+        close_btn.clicked.connect(self.close)
+
+        self.summary_label = QtWidgets.QLabel("")
+        self.summary_label.setObjectName("SubtitleLabel")
+
+        bottom = QtWidgets.QHBoxLayout()
+        bottom.addWidget(self.summary_label, 1)
+        bottom.addWidget(self.manifest_btn)
+        bottom.addWidget(self.start_btn)
+        bottom.addWidget(self.stop_btn)
+        bottom.addWidget(close_btn)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.addLayout(top)
+        layout.addWidget(self.table, 1)
+        layout.addLayout(bottom)
+        self.setLayout(layout)
+
+        self.op_combo.currentIndexChanged.connect(self._update_controls)
+        self._update_controls()
+        self._reporters = {}
+
+    def _update_controls(self):
+        is_flash = self.op_combo.currentData() == "flash"
+        self.release_combo.setEnabled(is_flash)
+        self.erase_chk.setEnabled(is_flash)
+
+    def operation(self) -> str:
+        return self.op_combo.currentData()
+
+    def release_kind(self) -> str:
+        return self.release_combo.currentData()
+
+    def selected_ports(self) -> list:
+        ports = []
+        for row in range(self.table.rowCount()):
+            item = self.table.item(row, 0)
+            if item.checkState() == QtCore.Qt.Checked:
+                ports.append(item.text())
+        return ports
+
+    def reporter(self, port: str) -> DeviceRowReporter:
+        if port not in self._reporters:
+            for row in range(self.table.rowCount()):
+                if self.table.item(row, 0).text() == port:
+                    self._reporters[port] = DeviceRowReporter(self.table, row, self._language)
+                    break
+        return self._reporters.get(port)
+
+    def set_running(self, running: bool):
+        self.start_btn.setEnabled(not running)
+        self.manifest_btn.setEnabled(not running)
+        self.stop_btn.setEnabled(running)
+        self.op_combo.setEnabled(not running)
+        self.jobs_spin.setEnabled(not running)
+        if not running:
+            self._update_controls()
+            return
+        self.release_combo.setEnabled(False)
+        self.erase_chk.setEnabled(False)
+        self.summary_label.setText("")
+        for row in range(self.table.rowCount()):
+            self.table.item(row, 2).setText("")
+            self.table.item(row, 3).setText("")
+
+    @QtCore.pyqtSlot(str)
+    def on_batch_finished(self, summary: str):
+        self.set_running(False)
+        self.summary_label.setText(summary)
+
+
+class StationDialog(QtWidgets.QDialog):
+    """режим станции пока окно запущено каждая новая подключенная плата сама уходит в работу
+
+    строка в таблице заводится на каждое подключение так что видно всю историю смены
+    """
+
+    def __init__(self, parent, parallel_jobs: int = 4, language: str = "ru"):
+        super().__init__(parent)
+        self._language = language if language in ("ru", "en") else "ru"
+
+        def _t(ru: str, en: str) -> str:
+            return en if self._language == "en" else ru
+
+        self._t = _t
+        self.setWindowTitle(_t("Станция прошивки", "Flashing station"))
+        self.setWindowFlags(self.windowFlags() & ~QtCore.Qt.WindowContextHelpButtonHint)
+        self.resize(760, 460)
+
+        self.action_combo = QtWidgets.QComboBox()
+        self.action_combo.addItem(_t("Прошивка", "Flash"), "flash")
+        self.action_combo.addItem(_t("Бэкап и прошивка", "Backup and flash"), "backup_flash")
+        self.action_combo.addItem(_t("Только бэкап", "Backup only"), "backup")
+
+        self.source_combo = QtWidgets.QComboBox()
+        self.source_combo.addItem(_t("Последний релиз", "Latest release"), "latest")
+        self.source_combo.addItem(_t("Последняя бета", "Latest beta"), "beta")
+        self.source_combo.addItem(_t("Выбранная версия", "Selected version"), "selected")
+        self.source_combo.addItem(_t("Файл .bin...", "File .bin..."), "file")
+
+        self.erase_chk = QtWidgets.QCheckBox(_t("Стирать флеш (erase_flash)", "Erase flash (erase_flash)"))
+
+        self.jobs_spin = QtWidgets.QSpinBox()
+        self.jobs_spin.setRange(1, 32)
+        self.jobs_spin.setValue(parallel_jobs)
+
+        top = QtWidgets.QHBoxLayout()
+        top.addWidget(QtWidgets.QLabel(_t("Операция:", "Operation:")))
+        top.addWidget(self.action_combo)
+        top.addWidget(self.source_combo)
+        top.addWidget(self.erase_chk)
+        top.addStretch(1)
+        top.addWidget(QtWidgets.QLabel(_t("Параллельно:", "Parallel:")))
+        top.addWidget(self.jobs_spin)
+
+        self.hint_label = QtWidgets.QLabel(
+            _t(
+                "Запустите станцию и подключайте платы по одной: каждая новая плата обрабатывается сама.",
+                "Start the station and plug boards in: every newly attached board is processed automatically.",
+            )
+        )
+        self.hint_label.setObjectName("SubtitleLabel")
+        self.hint_label.setWordWrap(True)
+
+        self.table = QtWidgets.QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(
+            [_t("Порт", "Port"), _t("Плата", "Board"), _t("Статус", "Status"), _t("Результат", "Result")]
+        )
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(2, QtWidgets.QHeaderView.Stretch)
+
+        self.start_btn = QtWidgets.QPushButton(_t("Запустить станцию", "Start station"))
+        self.start_btn.setProperty("accent", True)
+        self.stop_btn = QtWidgets.QPushButton(_t("Остановить", "Stop"))
+        self.stop_btn.setEnabled(False)
+        close_btn = QtWidgets.QPushButton(_t("Закрыть", "Close"))
+        close_btn.clicked.connect(self.close)
+
+        self.summary_label = QtWidgets.QLabel("")
+        self.summary_label.setObjectName("SubtitleLabel")
+
+        bottom = QtWidgets.QHBoxLayout()
+        bottom.addWidget(self.summary_label, 1)
+        bottom.addWidget(self.start_btn)
+        bottom.addWidget(self.stop_btn)
+        bottom.addWidget(close_btn)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.addLayout(top)
+        layout.addWidget(self.hint_label)
+        layout.addWidget(self.table, 1)
+        layout.addLayout(bottom)
+        self.setLayout(layout)
+
+        self.action_combo.currentIndexChanged.connect(self._update_controls)
+        self._update_controls()
+        # порт -> строка его последнего подключения
+        self._reporters = {}
+        self.station = None
+
+    def _update_controls(self):
+        flashes = self.action_combo.currentData() != "backup"
+        self.source_combo.setEnabled(flashes)
+        self.erase_chk.setEnabled(flashes)
+
+    def action(self) -> str:
+        return self.action_combo.currentData()
+
+    def source(self) -> str:
+        return self.source_combo.currentData()
+
+    def reporter(self, port: str) -> DeviceRowReporter:
+        return self._reporters.get(port)
+
+    @QtCore.pyqtSlot(str, str)
+    def add_row(self, port: str, description: str):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.table.setItem(row, 0, QtWidgets.QTableWidgetItem(port))
+        self.table.setItem(row, 1, QtWidgets.QTableWidgetItem(description))
+        self.table.setItem(row, 2, QtWidgets.QTableWidgetItem(""))
+        self.table.setItem(row, 3, QtWidgets.QTableWidgetItem(""))
+        self.table.scrollToBottom()
+        self._reporters[port] = DeviceRowReporter(self.table, row, self._language)
+
+    @QtCore.pyqtSlot(str)
+    def set_summary(self, text: str):
+        self.summary_label.setText(text)
+
+    def set_running(self, running: bool):
+        self.start_btn.setEnabled(not running)
+        self.stop_btn.setEnabled(running)
+        self.action_combo.setEnabled(not running)
+        self.jobs_spin.setEnabled(not running)
+        if not running:
+            self._update_controls()
+            return
+        self.source_combo.setEnabled(False)
+        self.erase_chk.setEnabled(False)
+
+    def stop_station(self):
+        if self.station is not None:
+            self.station.stop()
+            self.station = None
+        self.set_running(False)
+
+    def closeEvent(self, event: QtGui.QCloseEvent) -> None:
+        # начатые платы дошьются в фоне а новые уже не берем
+        self.stop_station()
+        super().closeEvent(event)
+
+
+class BackupCatalogDialog(QtWidgets.QDialog):
+    """все снятые бэкапы из каталога с поиском закреплением удалением и восстановлением
+
+    после Восстановить выбранные файлы лежат в restore_paths а порт уже спрашивает главное окно
+    """
+
+    def __init__(self, parent, catalog: BackupCatalog, backup_dir: str, policy: RetentionPolicy, language: str = "ru"):
+        super().__init__(parent)
+        self._language = language if language in ("ru", "en") else "ru"
+
+        def _t(ru: str, en: str) -> str:
+            return en if self._language == "en" else ru
+
+        self._t = _t
+        self.catalog = catalog
+        self.backup_dir = backup_dir
+        self.policy = policy
+        self.restore_paths = []
+        self._records = []
+        self.setWindowTitle(_t("Каталог бэкапов", "Backup catalog"))
+        self.setWindowFlags(self.windowFlags() & ~QtCore.Qt.WindowContextHelpButtonHint)
+        self.resize(860, 480)
+
+        self.search_edit = QtWidgets.QLineEdit()
+        self.search_edit.setPlaceholderText(
+            _t("MAC, чип, версия прошивки, порт или имя файла", "MAC, chip, firmware version, port or file name")
+        )
+        self.search_edit.setClearButtonEnabled(True)
+        self.kind_combo = QtWidgets.QComboBox()
+        self.kind_combo.addItem(_t("Все", "All"), "")
+        self.kind_combo.addItem(_t("Полные", "Full"), "full")
+        self.kind_combo.addItem(_t("Инкрементальные", "Incremental"), "incremental")
+        self.kind_combo.addItem(_t("Разделы", "Partitions"), "partition")
+
+        top = QtWidgets.QHBoxLayout()
+        top.addWidget(QtWidgets.QLabel(_t("Поиск:", "Search:")))
+        top.addWidget(self.search_edit, 1)
+        top.addWidget(self.kind_combo)
+
+        self.table = QtWidgets.QTableWidget(0, 7)
+        self.table.setHorizontalHeaderLabels(
+            [
+                _t("Дата", "Date"),
+                "MAC",
+                _t("Чип", "Chip"),
+                _t("Прошивка", "Firmware"),
+                _t("Тип", "Kind"),
+                _t("Размер", "Size"),
+                _t("Файл", "File"),
+            ]
+        )
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(6, QtWidgets.QHeaderView.Stretch)
+
+        self.pin_btn = QtWidgets.QPushButton(_t("Закрепить", "Pin"))
+        self.delete_btn = QtWidgets.QPushButton(_t("Удалить", "Delete"))
+        scan_btn = QtWidgets.QPushButton(_t("Найти в папке", "Scan folder"))
+        prune_btn = QtWidgets.QPushButton(_t("Очистить старые", "Prune old"))
+        self.restore_btn = QtWidgets.QPushButton(_t("Восстановить…", "Restore…"))
+        self.restore_btn.setProperty("accent", True)
+        close_btn = QtWidgets.QPushButton(_t("Закрыть", "Close"))
+
+        self.summary_label = QtWidgets.QLabel("")
+        self.summary_label.setObjectName("SubtitleLabel")
+
+        bottom = QtWidgets.QHBoxLayout()
+        bottom.addWidget(self.summary_label, 1)
+        bottom.addWidget(self.pin_btn)
+        bottom.addWidget(self.delete_btn)
+        bottom.addWidget(scan_btn)
+        bottom.addWidget(prune_btn)
+        bottom.addWidget(self.restore_btn)
+        bottom.addWidget(close_btn)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.addLayout(top)
+        layout.addWidget(self.table, 1)
+        layout.addLayout(bottom)
+        self.setLayout(layout)
+
+        self.search_edit.textChanged.connect(self.refresh)
+        self.kind_combo.currentIndexChanged.connect(self.refresh)
+        self.table.itemSelectionChanged.connect(self._update_controls)
+        self.table.itemDoubleClicked.connect(self.on_restore)
+        self.pin_btn.clicked.connect(self.on_pin)
+        self.delete_btn.clicked.connect(self.on_delete)
+        scan_btn.clicked.connect(self.on_scan)
+        prune_btn.clicked.connect(self.on_prune)
+        self.restore_btn.clicked.connect(self.on_restore)
+        close_btn.clicked.connect(self.reject)
+        self.refresh()
+
+    def refresh(self):
+        self._records = self.catalog.search(self.search_edit.text(), kind=self.kind_combo.currentData())
+        self.table.setRowCount(len(self._records))
+        for row, r in enumerate(self._records):
+            kind = {
+                "full": self._t("полный", "full"),
+                "incremental": self._t("инкрементальный", "incremental"),
+            }.get(r.kind, r.partition)
+            cells = [
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(r.created)),
+                r.mac or "?",
+                r.chip or "?",
+                r.firmware or "?",
+                kind,
+                format_bytes(r.size),
+                ("📌 " if r.pinned else "") + r.path,
+            ]
+            for col, text in enumerate(cells):
+                item = QtWidgets.QTableWidgetItem(text)
+                if col == 6:
+                    item.setToolTip(f"SHA-256 {r.sha256}")
+                self.table.setItem(row, col, item)
+        self.summary_label.setText(
+            self._t(
+                f"Бэкапов: {len(self._records)}, всего {format_bytes(self.catalog.total_size())}",
+                f"Backups: {len(self._records)}, {format_bytes(self.catalog.total_size())} in total",
+            )
+        )
+        self._update_controls()
+
+    def selected(self) -> list:
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        return [self._records[row] for row in rows]
+
+    def _update_controls(self):
+        records = self.selected()
+        self.pin_btn.setEnabled(bool(records))
+        self.delete_btn.setEnabled(bool(records))
+        self.restore_btn.setEnabled(bool(records))
+        pinned = bool(records) and all(r.pinned for r in records)
+        self.pin_btn.setText(self._t("Открепить", "Unpin") if pinned else self._t("Закрепить", "Pin"))
+
+    def on_pin(self):
+        records = self.selected()
+        pin = not all(r.pinned for r in records)
+        for r in records:
+            self.catalog.set_pinned(r.path, pin)
+        self.refresh()
+
+    def on_delete(self):
+        records = self.selected()
+        if not records:
+            return
+        if QtWidgets.QMessageBox.question(
+            self,
+            self._t("Подтверждение", "Confirmation"),
+            self._t(f"Удалить файлы бэкапов ({len(records)})?", f"Delete {len(records)} backup file(s)?"),
+        ) != QtWidgets.QMessageBox.Yes:
+            return
+        for r in records:
+            self.catalog.remove(r)
+        self.refresh()
+
+    def on_scan(self):
+        gone = self.catalog.sync()
+        added = self.catalog.scan(self.backup_dir)
+        self.refresh()
+        QtWidgets.QMessageBox.information(
+            self,
+            self._t("Каталог бэкапов", "Backup catalog"),
+            self._t(
+                f"Добавлено бэкапов: {len(added)}, убрано пропавших файлов: {gone}.",
+                f"Backups added: {len(added)}, missing files dropped: {gone}.",
+            ),
+        )
+
+    def on_prune(self):
+        if self.policy.empty:
+            QtWidgets.QMessageBox.information(
+                self,
+                self._t("Каталог бэкапов", "Backup catalog"),
+                self._t("Правила хранения не заданы в настройках.", "No retention rules are set in settings."),
+            )
+            return
+        victims = self.catalog.prune(self.policy, dry_run=True)
+        if not victims:
+            QtWidgets.QMessageBox.information(
+                self, self._t("Каталог бэкапов", "Backup catalog"), self._t("Удалять нечего.", "Nothing to delete.")
+            )
+            return
+        freed = format_bytes(sum(r.size for r in victims))
+        if QtWidgets.QMessageBox.question(
+            self,
+            self._t("Подтверждение", "Confirmation"),
+            self._t(
+                f"Удалить старые бэкапы ({len(victims)}, {freed})?",
+                f"Delete {len(victims)} old backup(s) ({freed})?",
+            ),
+        ) != QtWidgets.QMessageBox.Yes:
+            return
+        self.catalog.prune(self.policy)
+        self.refresh()
+
+    def on_restore(self, *args):
+        records = [r for r in self.selected() if r.exists]
+        if not records:
+            return
+        self.restore_paths = [r.path for r in records]
+        self.accept()
+
+
+class BruceLauncher(QtWidgets.QMainWindow):
+    # этими из фонового потока прилетают страницы релизов и итог обновления (номер поколения первым)
+    release_page_signal = QtCore.pyqtSignal(int, int, object)
+    releases_signal = QtCore.pyqtSignal(int, object)
+    # ошибки из фоновых задач которые надо показать окошком (заголовок, текст)
+    error_signal = QtCore.pyqtSignal(str, str)
+
+    def __init__(self, trace: StartupTrace = None):
+        super().__init__()
+        self._trace = trace
+        self.setWindowTitle("Bruce Launcher")
+        self.resize(900, 600)
+
+        self.settings = AppSettings()
+        self.firmware_cache = self._make_firmware_cache()
+        self.boards = load_profiles(BOARDS_PATH)
+        self.asset_index = AssetIndex(self.boards)
+        self.devices = DeviceManager(
+            self.settings,
+            IdentityStore(DEVICES_PATH),
+            LinkProfileStore(LINKS_PATH),
+            log=self.log,
+            translate=self._t,
+            boards=self.boards,
+        )
+        self.prefetcher = Prefetcher(
+            self.firmware_cache, self.asset_index, self._prefetch_boards, log=self.log, translate=self._t
+        )
+        # общий список портов диалоги берут его а не опрашивают систему каждый раз заново
+        self.ports = default_registry()
+        # у каждого рабочего потока свой префикс в логе чтоб строки разных плат не путались
+        self._log_local = local()
+        # потоки пишут лог сюда а в окно он попадает пачками по таймеру
+        self._log_buffer = LogBuffer(LOG_MAX_LINES)
+        self._log_last_key = None
+        self._log_stats = (0, 0)
+        self._multi_dialog = None
+        self._station_dialog = None
+        self._catalog = None
+        self._trace_mark("settings and stores")
+
+        icon = QtGui.QIcon()
+        self.setWindowIcon(icon)
+
+        central = QtWidgets.QWidget()
+        central.setObjectName("RootCentral")
+        self.setCentralWidget(central)
+
+        main_layout = QtWidgets.QVBoxLayout()
+        main_layout.setContentsMargins(16, 16, 16, 16)
+        main_layout.setSpacing(12)
+        central.setLayout(main_layout)
+
+        header = self._build_header()
+        main_layout.addLayout(header)
+
+        content_layout = QtWidgets.QHBoxLayout()
+        main_layout.addLayout(content_layout, 1)
+
+        left = QtWidgets.QVBoxLayout()
+        right = QtWidgets.QVBoxLayout()
+        content_layout.addLayout(left, 2)
+        content_layout.addLayout(right, 1)
+
+        self.releases_combo = QtWidgets.QComboBox()
+        self.refresh_releases_btn = QtWidgets.QPushButton("Обновить список")
+        self.flash_latest_btn = QtWidgets.QPushButton("Последний релиз")
+        self.flash_latest_btn.setProperty("accent", True)
+        self.flash_beta_btn = QtWidgets.QPushButton("Последняя бета")
+        self.flash_specific_btn = QtWidgets.QPushButton("Выбранная версия")
+
+        fw_group = QtWidgets.QGroupBox("Прошивка")
+        fw_l = QtWidgets.QVBoxLayout()
+        fw_group.setLayout(fw_l)
+
+        row1 = QtWidgets.QHBoxLayout()
+        self.fw_version_label = QtWidgets.QLabel("Версия:")
+        row1.addWidget(self.fw_version_label)
+        row1.addWidget(self.releases_combo, 1)
+        row1.addWidget(self.refresh_releases_btn)
+        fw_l.addLayout(row1)
+
+        row2 = QtWidgets.QHBoxLayout()
+        row2.addWidget(self.flash_latest_btn)
+        row2.addWidget(self.flash_beta_btn)
+        row2.addWidget(self.flash_specific_btn)
+        fw_l.addLayout(row2)
+
+        left.addWidget(fw_group)
+
+        backup_group = QtWidgets.QGroupBox("Бэкап")
+        b_l = QtWidgets.QVBoxLayout()
+        backup_group.setLayout(b_l)
+
+        self.backup_btn = QtWidgets.QPushButton("Создать бэкап")
+        self.restore_btn = QtWidgets.QPushButton("Восстановить из бэкапа")
+        self.catalog_btn = QtWidgets.QPushButton("Каталог бэкапов…")
+        b_l.addWidget(self.backup_btn)
+        b_l.addWidget(self.restore_btn)
+        b_l.addWidget(self.catalog_btn)
+
+        left.addWidget(backup_group)
+
+        tools_group = QtWidgets.QGroupBox("Инструменты")
+        t_l = QtWidgets.QVBoxLayout()
+        tools_group.setLayout(t_l)
+
+        self.serial_btn = QtWidgets.QPushButton("Открыть Serial консоль")
+        self.multi_btn = QtWidgets.QPushButton("Несколько устройств…")
+        self.station_btn = QtWidgets.QPushButton("Станция прошивки…")
+        t_l.addWidget(self.serial_btn)
+        t_l.addWidget(self.multi_btn)
+        t_l.addWidget(self.station_btn)
+
+        left.addWidget(tools_group)
+        left.addStretch(1)
+
+        log_group = QtWidgets.QGroupBox("Лог")
+        log_l = QtWidgets.QVBoxLayout()
+        log_group.setLayout(log_l)
+
+        self.log_view = QtWidgets.QPlainTextEdit()
+        self.log_view.setReadOnly(True)
+        self.log_view.setMaximumBlockCount(LOG_MAX_LINES)
+        log_l.addWidget(self.log_view)
+
+        right.addWidget(log_group, 1)
+
+        self.status_bar = self.statusBar()
+        self.status_bar.showMessage("Готово")
+        self.log_stats_label = QtWidgets.QLabel()
+        self.log_stats_label.setObjectName("SubtitleLabel")
+        self.status_bar.addPermanentWidget(self.log_stats_label)
+
+        # лог рисуем примерно 30 раз в секунду сколько бы строк за это время ни прилетело
+        self._log_timer = QtCore.QTimer(self)
+        self._log_timer.setInterval(LOG_FLUSH_MS)
+        self._log_timer.timeout.connect(self._flush_log)
+        self._log_timer.start()
+        self.release_page_signal.connect(self._on_release_page)
+        self.releases_signal.connect(self._on_releases_refreshed)
+        self.error_signal.connect(self._show_error)
+
+        # Меню
+        menubar = self.menuBar()
+        self.menu_app = menubar.addMenu("")
+        self.menu_lang = menubar.addMenu("")
+
+        self.act_settings = QtWidgets.QAction(self)
+        self.act_about = QtWidgets.QAction(self)
+        self.menu_app.addAction(self.act_settings)
+        self.menu_app.addSeparator()
+        self.menu_app.addAction(self.act_about)
+
+        self.act_lang_ru = QtWidgets.QAction(self)
+        self.act_lang_en = QtWidgets.QAction(self)
+        self.act_lang_ru.setCheckable(True)
+        self.act_lang_en.setCheckable(True)
+        lang_group = QtWidgets.QActionGroup(self)
+        lang_group.setExclusive(True)
+        lang_group.addAction(self.act_lang_ru)
+        lang_group.addAction(self.act_lang_en)
+        self.menu_lang.addAction(self.act_lang_ru)
+        self.menu_lang.addAction(self.act_lang_en)
+
+        self.act_settings.triggered.connect(self.open_settings)
+        self.act_about.triggered.connect(self.show_about)
+        self.act_lang_ru.triggered.connect(lambda: self.change_language("ru"))
+        self.act_lang_en.triggered.connect(lambda: self.change_language("en"))
+
+        self.refresh_releases_btn.clicked.connect(self.load_releases)
+        self.flash_latest_btn.clicked.connect(lambda: self.flash("latest"))
+        self.flash_beta_btn.clicked.connect(lambda: self.flash("beta"))
+        self.flash_specific_btn.clicked.connect(lambda: self.flash("selected"))
+        self.backup_btn.clicked.connect(self.create_backup)
+        self.restore_btn.clicked.connect(lambda: self.restore_backup())
+        self.catalog_btn.clicked.connect(self.open_backup_catalog)
+        self.serial_btn.clicked.connect(self.open_serial)
+        self.multi_btn.clicked.connect(self.open_multi_device)
+        self.station_btn.clicked.connect(self.open_station)
+
+        self._trace_mark("widgets")
+
+        # сначала сразу показываем то что лежит в кэше а свежий список подтянется в фоне
+        self.release_index = ReleaseIndex(RELEASES_CACHE_PATH)
+        self.release_fetcher = ReleaseFetcher(
+            self.release_index,
+            on_page=self.release_page_signal.emit,
+            on_done=self.releases_signal.emit,
+        )
+        self._release_pages = {}
+        self.releases = []
+        self._fill_releases_combo(self.release_index.cached())
+        # в сеть идем уже после того как окно показалось
+        QtCore.QTimer.singleShot(0, self.load_releases)
+        self._trace_mark("release cache")
+
+        # пробуем включить темную рамку окна в винде если она вообще это подтянет
+        self._enable_windows_dark_titlebar()
+
+        # делаем маленькую анимацию появления чтоб не выскакивало резко в лицо
+        self.setWindowOpacity(0.0)
+        fade = QtCore.QPropertyAnimation(self, b"windowOpacity")
+        fade.setDuration(220)
+        fade.setStartValue(0.0)
+        fade.setEndValue(1.0)
+        fade.setEasingCurve(QtCore.QEasingCurve.OutCubic)
+        self._fade_anim = fade
+        self._fade_anim.start(QtCore.QAbstractAnimation.DeleteWhenStopped)
+
+        # добавил легкие тени под блоками чисто для красоты чтоб выглядело поживее
+        for group in (fw_group, backup_group, tools_group, log_group):
+            shadow = QtWidgets.QGraphicsDropShadowEffect(self)
+            shadow.setBlurRadius(24)
+            shadow.setOffset(0, 0)
+            shadow.setColor(QtGui.QColor(0, 0, 0, 180))
+            group.setGraphicsEffect(shadow)
+
+        # в самом конце подтягиваем язык из настроек и раскладываем все надписи
+        self._current_language = self.settings.language or "ru"
+        self.apply_language()
+
+    def _trace_mark(self, phase: str):
+        if self._trace is not None:
+            self._trace.mark(phase)
+
+    def closeEvent(self, event: QtGui.QCloseEvent) -> None:
+        self.release_fetcher.cancel()
+        self.prefetcher.stop()
+        if self._station_dialog is not None:
+            self._station_dialog.stop_station()
+        # кэш прошивок больше не сносим целиком а просто ужимаем до квоты выкидывая самые старые
+        try:
+            self.firmware_cache.evict()
+        except Exception:
+            pass
+        super().closeEvent(event)
+
+    def _prefetch_boards(self) -> list:
+        """для каких плат подкачивать прошивки из настроек а если там пусто то те что уже подключались"""
+        if self.settings.prefetch_boards:
+            return [p for p in (find_profile(self.boards, n) for n in self.settings.prefetch_boards) if p is not None]
+        return self.devices.known_boards()
+
+    def _foreground_job(self, target):
+        """обертка для рабочих потоков пока они идут фоновая подкачка прошивок стоит"""
+
+        def run(*args, **kwargs):
+            with self.prefetcher.foreground():
+                return target(*args, **kwargs)
+
+        return run
+
+    @property
+    def catalog(self) -> BackupCatalog:
+        # базу открываем при первом бэкапе а не на старте
+        if self._catalog is None:
+            self._catalog = BackupCatalog(CATALOG_PATH)
+        return self._catalog
+
+    def _prune_backups(self):
+        """после удачного бэкапа убираем старые по правилам хранения из настроек"""
+        try:
+            removed = self.catalog.prune(RetentionPolicy.from_settings(self.settings))
+        except Exception as e:
+            self.log(self._t(f"Ошибка очистки старых бэкапов: {e}", f"Old backups cleanup error: {e}"))
+            return
+        for record in removed:
+            self.log(
+                self._t(
+                    f"Удалён старый бэкап {record.path} ({format_bytes(record.size)}).",
+                    f"Removed old backup {record.path} ({format_bytes(record.size)}).",
+                )
+            )
+        if removed:
+            freed = format_bytes(sum(r.size for r in removed))
+            self.log(
+                self._t(
+                    f"Удалено старых бэкапов: {len(removed)} ({freed}).",
+                    f"Old backups removed: {len(removed)} ({freed}).",
+                )
+            )
+
+    def _make_firmware_cache(self) -> FirmwareCache:
+        return FirmwareCache(
+            self.settings.firmware_dir,
+            self.settings.firmware_cache_mb * 1024 * 1024,
+            downloader=RangedDownloader(connections=self.settings.download_connections),
+        )
+
+    # выбор самого устройства тут убрали чип либо задан в настройках либо берется из identities по порту
+
+    def _enable_windows_dark_titlebar(self):
+        """пытаемся включить темную рамку окна в windows десять и выше если повезет"""
+        if sys.platform != "win32" or ctypes is None:
+            return
+        try:
+            hwnd = int(self.winId())
+            DWMWA_USE_IMMERSIVE_DARK_MODE = 20
+            value = ctypes.c_int(1)
+            ctypes.windll.dwmapi.DwmSetWindowAttribute(
+                ctypes.wintypes.HWND(hwnd),
+                ctypes.wintypes.DWORD(DWMWA_USE_IMMERSIVE_DARK_MODE),
+                ctypes.byref(value),
+                ctypes.sizeof(value),
+            )
+        except Exception:
+            # Если не получилось — просто игнорируем
+            pass
+
+    def change_language(self, lang: str):
+        """сюда прилетает выбор языка из меню и мы просто сохраняем и перерисовываем подписи"""
+        if lang not in ("ru", "en"):
+            return
+        if getattr(self, "_current_language", "ru") == lang:
+            return
+        self._current_language = lang
+        self.settings.language = lang
+        self.settings.save()
+        self.apply_language()
+
+    def _t(self, ru: str, en: str) -> str:
+        """простой помощник для перевода строк в логах и сообщениях"""
+        return en if getattr(self, "_current_language", "ru") == "en" else ru
+
+    def apply_language(self):
+        """тут просто руками меняем все подписи в зависимости от выбранного языка"""
+        lang = self._current_language
+
+        if lang == "en":
+            self.setWindowTitle("Bruce Launcher")
+
+            # меню
+            self.menu_app.setTitle("Application")
+            self.menu_lang.setTitle("Language")
+            self.act_settings.setText("Settings…")
+            self.act_about.setText("About…")
+            self.act_lang_ru.setText("Русский")
+            self.act_lang_en.setText("English")
+
+            # заголовок и сабтайтл
+            if hasattr(self, "_header_title_label"):
+                self._header_title_label.setText("Bruce Launcher")
+            if hasattr(self, "_header_subtitle_label"):
+                self._header_subtitle_label.setText("Simple flashing launcher for Bruce ESP32 devices")
+
+            # группы
+            for g in self.findChildren(QtWidgets.QGroupBox):
+                if g.title() == "Прошивка":
+                    g.setTitle("Firmware")
+                elif g.title() == "Бэкап":
+                    g.setTitle("Backup")
+                elif g.title() == "Инструменты":
+                    g.setTitle("Tools")
+                elif g.title() == "Лог":
+                    g.setTitle("Log")
+
+            # кнопки
+            self.refresh_releases_btn.setText("Refresh list")
+            self.flash_latest_btn.setText("Latest release")
+            self.flash_beta_btn.setText("Latest beta")
+            self.flash_specific_btn.setText("Selected version")
+            self.backup_btn.setText("Create backup")
+            self.restore_btn.setText("Restore from backup")
+            self.catalog_btn.setText("Backup catalog…")
+            self.serial_btn.setText("Open Serial console")
+            self.multi_btn.setText("Multiple devices…")
+            self.station_btn.setText("Flashing station…")
+
+            if hasattr(self, "fw_version_label"):
+                self.fw_version_label.setText("Version:")
+
+            self.status_bar.showMessage("Ready")
+
+        else:
+            self.setWindowTitle("Bruce Launcher")
+
+            self.menu_app.setTitle("Приложение")
+            self.menu_lang.setTitle("Language")
+            self.act_settings.setText("Настройки…")
+            self.act_about.setText("О программе…")
+            self.act_lang_ru.setText("Русский")
+            self.act_lang_en.setText("English")
+
+            if hasattr(self, "_header_title_label"):
+                self._header_title_label.setText("Bruce Launcher")
+            if hasattr(self, "_header_subtitle_label"):
+                self._header_subtitle_label.setText("Простой лаунчер прошивки Bruce для устройств ESP32")
+
+            for g in self.findChildren(QtWidgets.QGroupBox):
+                if g.title() == "Firmware":
+                    g.setTitle("Прошивка")
+                elif g.title() == "Backup":
+                    g.setTitle("Бэкап")
+                elif g.title() == "Tools":
+                    g.setTitle("Инструменты")
+                elif g.title() == "Log":
+                    g.setTitle("Лог")
+
+            self.refresh_releases_btn.setText("Обновить список")
+            self.flash_latest_btn.setText("Последний релиз")
+            self.flash_beta_btn.setText("Последняя бета")
+            self.flash_specific_btn.setText("Выбранная версия")
+            self.backup_btn.setText("Создать бэкап")
+            self.restore_btn.setText("Восстановить из бэкапа")
+            self.catalog_btn.setText("Каталог бэкапов…")
+            self.serial_btn.setText("Открыть Serial консоль")
+            self.multi_btn.setText("Несколько устройств…")
+            self.station_btn.setText("Станция прошивки…")
+
+            if hasattr(self, "fw_version_label"):
+                self.fw_version_label.setText("Версия:")
+
+            self.status_bar.showMessage("Готово")
+
+        # галочки на выборе языка
+        self.act_lang_ru.setChecked(lang == "ru")
+        self.act_lang_en.setChecked(lang == "en")
+
+    def _build_header(self) -> QtWidgets.QHBoxLayout:
+        layout = QtWidgets.QHBoxLayout()
+
+        title_box = QtWidgets.QVBoxLayout()
+        title = QtWidgets.QLabel("Bruce Launcher")
+        title.setObjectName("TitleLabel")
+        title_font = QtGui.QFont()
+        title_font.setPointSize(18)
+        title_font.setBold(True)
+        title.setFont(title_font)
+
+        subtitle = QtWidgets.QLabel("Простой лаунчер прошивки Bruce для устройств ESP32")
+        subtitle.setObjectName("SubtitleLabel")
+
+        # сохраняем ссылки на заголовок и подзаголовок, чтобы легко менять язык
+        self._header_title_label = title
+        self._header_subtitle_label = subtitle
+
+        title_box.addWidget(title)
+        title_box.addWidget(subtitle)
+
+        layout.addLayout(title_box)
+        layout.addStretch(1)
+
+        links_box = QtWidgets.QVBoxLayout()
+        def make_link(text: str, url: str) -> QtWidgets.QLabel:
+            lbl = QtWidgets.QLabel(f'<a href="{url}">{text}</a>')
+            lbl.setOpenExternalLinks(True)
+            lbl.setStyleSheet(f"color: {BruceStyle.ACCENT};")
+            return lbl
+
+        links_box.addWidget(make_link("Website", "https://bruce.computer/"))
+        links_box.addWidget(make_link("Wiki", "https://wiki.bruce.computer/"))
+        links_box.addWidget(make_link("GitHub", "https://github.com/BruceDevices/firmware"))
+
+        layout.addLayout(links_box)
+
+        return layout
+
+    def _flush_log(self):
+        """крутится по таймеру в гуи потоке и дописывает в лог все что накопилось одним куском
+
+        если подряд идут строки прогресса с одним ключом то последняя строка в окне просто переписывается
+        """
+        entries = self._log_buffer.drain()
+        if entries:
+            lines = []
+            for key, text in entries:
+                if key is not None and key == self._log_last_key:
+                    if lines:
+                        lines[-1] = text
+                    else:
+                        cursor = self.log_view.textCursor()
+                        cursor.movePosition(QtGui.QTextCursor.End)
+                        cursor.movePosition(QtGui.QTextCursor.StartOfBlock, QtGui.QTextCursor.KeepAnchor)
+                        cursor.insertText(text)
+                else:
+                    lines.append(text)
+                self._log_last_key = key
+            if lines:
+                self.log_view.appendPlainText("\n".join(lines))
+            self.log_view.verticalScrollBar().setValue(self.log_view.verticalScrollBar().maximum())
+            self.status_bar.showMessage(entries[-1][1])
+        self._update_log_stats()
+
+    def _update_log_stats(self):
+        buf = self._log_buffer
+        stats = (buf.dropped, int(buf.max_lag * 1000))
+        if stats == self._log_stats:
+            return
+        self._log_stats = stats
+        # счетчик показываем только когда лог реально не успевал а то глаза мозолит
+        if buf.dropped:
+            self.log_stats_label.setText(
+                self._t(f"лог: пропущено {buf.dropped}", f"log: dropped {buf.dropped}")
+            )
+        self.log_stats_label.setToolTip(
+            self._t(
+                f"Пропущено строк: {buf.dropped}\nСхлопнуто строк прогресса: {buf.collapsed}\n"
+                f"Макс. задержка лога: {stats[1]} мс",
+                f"Dropped lines: {buf.dropped}\nCollapsed progress lines: {buf.collapsed}\n"
+                f"Max log lag: {stats[1]} ms",
+            )
+        )
+
+    def log(self, msg: str, collapse_key: str = None):
+        """лог который можно дергать из любого потока строка сама долетит до окна со следующим кадром
+
+        collapse_key ставят строкам прогресса чтоб свежая строка затирала предыдущую с тем же ключом
+        """
+        prefix = getattr(self._log_local, "prefix", "")
+        if collapse_key is not None:
+            collapse_key = prefix + collapse_key
+        self._log_buffer.push(prefix + msg, collapse_key)
+
+    def load_releases(self):
+        """обновление списка релизов идет в фоне а в гуи страницы прилетают через сигналы
+
+        повторное нажатие просто перебивает предыдущую загрузку она дальше молча доработает
+        """
+        self.log(self._t("Загрузка списка релизов из GitHub...", "Downloading release list from GitHub..."))
+        self._release_pages = self.release_index.cached_pages()
+        self.release_fetcher.start(timeout=10)
+
+    def _on_release_page(self, gen: int, page: int, items: list):
+        if not self.release_fetcher.is_current(gen):
+            return
+        if self._release_pages.get(page) == items:
+            return
+        # пока не пришли все страницы остальное добираем из кэша
+        self._release_pages[page] = items
+        self._fill_releases_combo([rel for n in sorted(self._release_pages) for rel in self._release_pages[n]])
+
+    def _fill_releases_combo(self, releases: list):
+        # запоминаем что было выбрано чтоб после обновления список не прыгал на первый релиз
+        current_tag = self.releases_combo.currentData()
+        self.releases = list(releases)
+        self.asset_index.update(self.releases)
+        if self.settings.prefetch_firmware:
+            self.prefetcher.schedule(self.releases)
+        self.releases_combo.clear()
+        for rel in self.releases:
+            label = f"{rel.get('name')} ({'beta' if rel.get('prerelease') else 'stable'})"
+            self.releases_combo.addItem(label, rel.get("tag"))
+        idx = self.releases_combo.findData(current_tag)
+        if idx >= 0:
+            self.releases_combo.setCurrentIndex(idx)
+
+    def _on_releases_refreshed(self, gen: int, result):
+        if not self.release_fetcher.is_current(gen):
+            return
+
+        if result.status == "error":
+            self.log(self._t(f"Ошибка получения релизов: {result.error}", f"Error getting releases: {result.error}"))
+            if self.releases:
+                # сети нет но кэш есть так что просто работаем с тем что сохранили раньше
+                self.log(
+                    self._t(
+                        f"Используется сохранённый список релизов ({len(self.releases)}).",
+                        f"Using cached release list ({len(self.releases)}).",
+                    )
+                )
+                return
+            QtWidgets.QMessageBox.critical(
+                self,
+                "GitHub",
+                self._t(
+                    f"Не удалось получить список релизов:\n{result.error}",
+                    f"Failed to get release list:\n{result.error}",
+                ),
+            )
+            return
+
+        if result.status == "rate_limited":
+            until = time.strftime("%H:%M:%S", time.localtime(self.release_index.rate_limited_until()))
+            self.log(
+                self._t(
+                    f"Лимит запросов GitHub исчерпан до {until}, используется сохранённый список.",
+                    f"GitHub rate limit exceeded until {until}, using cached list.",
+                )
+            )
+        elif result.status == "not_modified":
+            self.log(self._t("Список релизов не изменился.", "Release list is up to date."))
+
+        if result.changed or result.releases != self.releases:
+            self._fill_releases_combo(result.releases)
+        self.log(self._t(f"Загружено релизов: {len(self.releases)}", f"Releases loaded: {len(self.releases)}"))
+
+    def _pick_release(self, kind: str):
+        if not self.releases:
+            QtWidgets.QMessageBox.warning(
+                self,
+                self._t("Релизы", "Releases"),
+                self._t("Список релизов пуст. Обновите список.", "Release list is empty. Refresh the list."),
+            )
+            return None
+
+        if kind in ("latest", "beta"):
+            rel = pick_release(self.releases, kind)
+            if rel is None:
+                QtWidgets.QMessageBox.information(
+                    self,
+                    self._t("Бета", "Beta"),
+                    self._t("Бета‑версий не найдено.", "No beta versions found."),
+                )
+            return rel
+
+        # kind == "selected"
+        idx = self.releases_combo.currentIndex()
+        if idx < 0 or idx >= len(self.releases):
+            QtWidgets.QMessageBox.warning(
+                self,
+                self._t("Релизы", "Releases"),
+                self._t("Выберите версию.", "Select a version."),
+            )
+            return None
+        return self.releases[idx]
+
+    def flash(self, kind: str):
+        rel = self._pick_release(kind)
+        if not rel:
+            return
+
+        # Явно показываем какой релиз выбран (чтобы было видно, beta это или stable)
+        self.log(
+            f"Выбран релиз: tag={rel.get('tag')} name={rel.get('name')} prerelease={rel.get('prerelease')}"
+        )
+
+        ports = self.ports.snapshot()
+        if not ports:
+            QtWidgets.QMessageBox.warning(
+                self,
+                self._t("Прошивка", "Firmware"),
+                self._t("ESP32 устройство не найдено (COM порт).", "ESP32 device not found (COM port)."),
+            )
+            return
+
+        items = [f"{p.device} - {p.description}" for p in ports]
+        item, ok = QtWidgets.QInputDialog.getItem(
+            self,
+            self._t("Выбор порта", "Port selection"),
+            self._t("COM порт:", "COM port:"),
+            items,
+            0,
+            False,
+        )
+        if not ok:
+            return
+        sel_idx = items.index(item)
+        port = ports[sel_idx].device
+
+        # порт выбираем раньше файла чтоб по плате на нем сразу подсветить подходящий bin
+        asset = self._choose_bin_asset(rel, port)
+        if not asset:
+            return
+        board = self.devices.board_for_port(port)
+        offset = board.offset if board is not None else 0
+
+        default_name = asset.get("name", "firmware.bin")
+
+        save_copy_path = None
+        if self.settings.ask_firmware_path_each_time:
+            path, _ = QtWidgets.QFileDialog.getSaveFileName(
+                self,
+                self._t("Куда сохранить прошивку", "Where to save firmware"),
+                os.path.join(self.settings.firmware_dir, default_name),
+                "BIN files (*.bin)",
+            )
+            if not path:
+                return
+            save_copy_path = path
+
+        # перед прошивкой еще раз выскакивает окно чтоб точно подтвердить и можно включить стирание флеша
+        confirm = FlashConfirmDialog(
+            self,
+            rel,
+            port,
+            language=getattr(self, "_current_language", "ru"),
+        )
+        if confirm.exec_() != QtWidgets.QDialog.Accepted:
+            return
+        erase_flash = confirm.erase_flash
+        self.log(f"Запуск прошивки на {port} (erase_flash={erase_flash})...")
+
+        progress = None
+        if self.settings.graphic_progress:
+            progress = ProgressDialog(self, "Прошивка", "Подключение к устройству...")
+            progress.show()
+
+        cache = self.firmware_cache
+
+        def job():
+            # скачивание тоже идет в этом потоке чтоб окно не висело пока тянется файл
+            local_path = self._fetch_firmware(cache, rel, asset, save_copy_path, progress)
+            if not local_path:
+                return
+            try:
+                self._run_esptool_flash(port, local_path, erase_flash, progress, offset)
+            finally:
+                cache.release(local_path)
+
+        Thread(target=self._foreground_job(job), daemon=True).start()
+
+    def _choose_bin_asset(self, rel: dict, port: str = None):
+        """спрашиваем какой bin из релиза шить возвращает ассет или None если передумали
+
+        если на порту узнали плату то ее bin уже выбран в списке а выбор человека запоминается за платой
+        """
+        assets = rel.get("assets", [])
+        if not assets:
+            QtWidgets.QMessageBox.warning(
+                self,
+                self._t("Прошивка", "Firmware"),
+                self._t("В релизе нет файлов прошивки.", "This release has no firmware files."),
+            )
+            return None
+
+        # собираем тут список всех bin файлов из этого релиза
+        bins = bin_assets(rel)
+        if not bins:
+            QtWidgets.QMessageBox.warning(
+                self,
+                self._t("Прошивка", "Firmware"),
+                self._t("В релизе нет .bin файлов прошивки.", "No .bin firmware files found in this release."),
+            )
+            return None
+
+        board = self.devices.board_for_port(port) if port else None
+        matched = self.asset_index.asset_for(rel, board)
+        current = bins.index(matched) if matched in bins else 0
+        label = self._t(
+            "Выберите файл прошивки (.bin), подходящий вашему устройству:",
+            "Select a firmware (.bin) file suitable for your device:",
+        )
+        if matched is not None:
+            label = self._t(
+                f"Плата: {board.title}. Подходящий файл уже выбран.\n",
+                f"Board: {board.title}. The matching file is preselected.\n",
+            ) + label
+
+        # открываем окошко где уже руками выбираем какой именно bin под свое железо ставить
+        items = [a.get("name") or "firmware.bin" for a in bins]
+        item, ok = QtWidgets.QInputDialog.getItem(
+            self,
+            self._t("Выбор файла прошивки", "Firmware file selection"),
+            label,
+            items,
+            current,
+            False,
+        )
+        if not ok:
+            return None
+        sel_idx = items.index(item)
+        asset = bins[sel_idx]
+        if port:
+            chosen = self.asset_index.profile_for_asset(rel, asset)
+            if chosen is not None and chosen is not board:
+                self.devices.pin_board(port, chosen.name)
+
+        url = asset.get("browser_download_url")
+        if not url:
+            QtWidgets.QMessageBox.warning(self, "Прошивка", "Не найден URL файла прошивки.")
+            return None
+
+        return asset
+
+    def _fetch_firmware(self, cache: FirmwareCache, rel: dict, asset: dict, save_copy_path: str,
+                        progress: "ProgressDialog | None"):
+        """достает прошивку из кэша или качает ее возвращает закрепленный путь или None при ошибке"""
+        name = asset.get("name", "firmware.bin")
+        local_path = cache.lookup(asset, pin=True)
+        if local_path:
+            self.log(
+                self._t(
+                    f"Прошивка {rel['tag']} ({name}) взята из кэша.",
+                    f"Firmware {rel['tag']} ({name}) taken from cache.",
+                )
+            )
+        else:
+            self.log(
+                self._t(
+                    f"Скачивание прошивки {rel['tag']} ({name})...",
+                    f"Downloading firmware {rel['tag']} ({name})...",
+                )
+            )
+            last_report = [0.0]
+
+            def on_progress(done: int, total: int, rate: float):
+                # чаще пары раз в секунду писать смысла нет только лог засорим
+                now = time.monotonic()
+                if now - last_report[0] < 0.5 and done != total:
+                    return
+                last_report[0] = now
+                mb = 1024 * 1024
+                text = self._t(
+                    f"Скачивание: {done / mb:.1f} / {total / mb:.1f} МБ ({rate / mb:.2f} МБ/с)",
+                    f"Downloading: {done / mb:.1f} / {total / mb:.1f} MB ({rate / mb:.2f} MB/s)",
+                )
+                self.log(text)
+                self._set_progress_message(progress, text)
+
+            started = time.monotonic()
+            try:
+                local_path = cache.fetch(asset, progress=on_progress, pin=True)
+            except Exception as e:
+                self.log(self._t(f"Ошибка скачивания: {e}", f"Download error: {e}"))
+                if progress is not None:
+                    QtCore.QMetaObject.invokeMethod(progress, "reject", QtCore.Qt.QueuedConnection)
+                self.error_signal.emit(
+                    self._t("Скачивание", "Download"),
+                    self._t(f"Не удалось скачать прошивку:\n{e}", f"Failed to download firmware:\n{e}"),
+                )
+                return None
+            elapsed = max(time.monotonic() - started, 1e-6)
+            size = os.path.getsize(local_path)
+            self.log(
+                self._t(
+                    f"Скачано {size} байт за {elapsed:.1f} с ({size / elapsed / 1024 / 1024:.2f} МБ/с).",
+                    f"Downloaded {size} bytes in {elapsed:.1f} s ({size / elapsed / 1024 / 1024:.2f} MB/s).",
+                )
+            )
+
+        if save_copy_path:
+            # файл из кэша копируем туда куда попросили а шьем все равно из кэша
+            try:
+                shutil.copyfile(local_path, save_copy_path)
+                self.log(
+                    self._t(
+                        f"Прошивка сохранена: {save_copy_path}",
+                        f"Firmware saved to: {save_copy_path}",
+                    )
+                )
+            except Exception as e:
+                self.log(self._t(f"Не удалось сохранить копию прошивки: {e}", f"Failed to save firmware copy: {e}"))
+        return local_path
+
+    def _set_progress_message(self, progress: "ProgressDialog | None", text: str):
+        """поменять текст в окне прогресса из любого потока"""
+        if progress is None:
+            return
+        try:
+            QtCore.QMetaObject.invokeMethod(
+                progress,
+                "set_message",
+                QtCore.Qt.QueuedConnection,
+                QtCore.Q_ARG(str, text),
+            )
+        except Exception:
+            pass
+
+    def _show_error(self, title: str, text: str):
+        QtWidgets.QMessageBox.critical(self, title, text)
+
+    def _format_progress(self, label: str, tracker: ProgressTracker) -> str:
+        parts = [f"{label} {int(tracker.percent)}%"]
+        if tracker.rate:
+            parts.append(self._t(f"{format_bytes(tracker.rate)}/с", f"{format_bytes(tracker.rate)}/s"))
+        if tracker.eta and not tracker.final:
+            parts.append(self._t(f"осталось {format_eta(tracker.eta)}", f"ETA {format_eta(tracker.eta)}"))
+        return " · ".join(parts)
+
+    def _progress_sink(self, progress: "ProgressDialog | None", label: str, total: int = None):
+        """функция которая принимает ProgressEvent и рисует проценты скорость и eta
+
+        в окно пишем не чаще трех раз в секунду а в лог только каждые 10% и итог
+        """
+        tracker = ProgressTracker(total)
+        last = [0.0, -1, 0]
+
+        def on_event(event: ProgressEvent):
+            tracker.update(event)
+            if tracker.percent is None:
+                return
+            percent = int(tracker.percent)
+            now = time.monotonic()
+            if event.final or (percent != last[1] and (now - last[0] >= 0.3 or percent >= 100)):
+                last[0], last[1] = now, percent
+                self._set_progress_value(progress, percent, self._format_progress(label, tracker))
+            if event.final:
+                if tracker.done and event.elapsed:
+                    self.log(
+                        self._t(
+                            f"{label} {format_bytes(tracker.done)} за {event.elapsed:.1f} с "
+                            f"({format_bytes(tracker.rate or 0)}/с)",
+                            f"{label} {format_bytes(tracker.done)} in {event.elapsed:.1f} s "
+                            f"({format_bytes(tracker.rate or 0)}/s)",
+                        )
+                    )
+            elif percent // 10 > last[2]:
+                last[2] = percent // 10
+                self.log(self._format_progress(label, tracker))
+
+        return on_event
+
+    def _progress_callback(self, progress: "ProgressDialog | None", label: str, stage: str = "write"):
+        """то же самое но в виде колбэка progress(сделано, всего) для EspSession"""
+        sink = self._progress_sink(progress, label)
+
+        def cb(done: int, total: int):
+            sink(ProgressEvent(stage, done=done, total=total))
+
+        return cb
+
+    def _pipe_esptool_output(self, proc: subprocess.Popen, on_event=None):
+        """гонит вывод esptool в лог и заодно вытаскивает из него события прогресса"""
+        for line in proc.stdout:
+            line = line.rstrip("\n")
+            event = parse_esptool_line(line)
+            # перерисовки прогресса esptool схлопываем в одну строку а итоги и прочее пишем как есть
+            if event is not None and not event.final and event.percent is not None:
+                self.log(line, collapse_key=f"esptool:{event.stage}")
+            else:
+                self.log(line)
+            if on_event is not None and event is not None:
+                on_event(event)
+
+    def _set_progress_value(self, progress: "ProgressDialog | None", percent: int, text: str):
+        if progress is None:
+            return
+        try:
+            QtCore.QMetaObject.invokeMethod(
+                progress,
+                "set_progress",
+                QtCore.Qt.QueuedConnection,
+                QtCore.Q_ARG(int, percent),
+                QtCore.Q_ARG(str, text),
+            )
+        except Exception:
+            pass
+
+    def _set_progress_success(self, progress: "ProgressDialog | None", text: str):
+        if progress is None:
+            return
+        try:
+            QtCore.QMetaObject.invokeMethod(
+                progress,
+                "set_success",
+                QtCore.Qt.QueuedConnection,
+                QtCore.Q_ARG(str, text),
+            )
+        except Exception:
+            pass
+
+    def _run_esptool_flash(self, port: str, path: str, erase_flash: bool, progress: "ProgressDialog | None",
+                           offset: int = 0) -> bool:
+        if not esptool_available():
+            return self._run_esptool_flash_subprocess(port, path, erase_flash, progress, offset)
+
+        # одно подключение на стирание запись и проверку без перезапуска esptool между шагами
+        try:
+            def work(session: EspSession):
+                if erase_flash:
+                    self._set_progress_message(
+                        progress, self._t("Стирание флеша (erase_flash)...", "Erasing flash (erase_flash)...")
+                    )
+                    session.erase_all()
+                    flash_image(
+                        session,
+                        path,
+                        offset=offset,
+                        progress=self._progress_callback(progress, self._t("Запись прошивки:", "Writing firmware:")),
+                    )
+                elif self.settings.differential_flash:
+                    self._run_diff_flash(session, path, progress, offset)
+                else:
+                    flash_image(
+                        session,
+                        path,
+                        offset=offset,
+                        progress=self._progress_callback(progress, self._t("Запись прошивки:", "Writing firmware:")),
+                    )
+
+            self.devices.with_session(port, work)
+        except Exception as e:
+            self.log(self._t(f"Ошибка прошивки: {e}", f"Flashing error: {e}"))
+            self._set_progress_message(progress, self._t("Ошибка прошивки.", "Flashing error."))
+            return False
+
+        self.log(self._t("Прошивка завершена успешно.", "Flashing completed successfully."))
+        self._set_progress_success(progress, self._t("Прошивка завершена успешно.", "Flashing completed successfully."))
+        return True
+
+    def _run_diff_flash(self, session: EspSession, path: str, progress: "ProgressDialog | None", offset: int = 0):
+        self._set_progress_message(
+            progress, self._t("Сверка секторов с платой...", "Comparing sectors with the device...")
+        )
+        hash_sink = self._progress_sink(progress, self._t("Сверка секторов:", "Comparing sectors:"))
+        stats = diff_flash(
+            session,
+            path,
+            offset,
+            progress=self._progress_callback(progress, self._t("Запись изменившихся секторов:", "Writing changed sectors:")),
+            hash_progress=lambda done, total: hash_sink(ProgressEvent("hash", percent=done * 100.0 / total)),
+        )
+        if stats.identical:
+            self.log(
+                self._t(
+                    "Эта прошивка уже на плате, запись пропущена.",
+                    "This firmware is already on the device, write skipped.",
+                )
+            )
+            return
+        self.log(
+            self._t(
+                f"Записано {format_bytes(stats.written)} из {format_bytes(stats.size)} "
+                f"({stats.changed_sectors} секторов в {stats.regions} кусках), "
+                f"сэкономлено {format_bytes(stats.saved)} за {stats.elapsed:.1f} с.",
+                f"Wrote {format_bytes(stats.written)} of {format_bytes(stats.size)} "
+                f"({stats.changed_sectors} sectors in {stats.regions} regions), "
+                f"saved {format_bytes(stats.saved)} in {stats.elapsed:.1f} s.",
+            )
+        )
+
+    def _run_esptool_flash_subprocess(self, port: str, path: str, erase_flash: bool, progress: "ProgressDialog | None",
+                                      offset: int = 0) -> bool:
+        """старый путь через python -m esptool если esptool как библиотеку импортировать не вышло"""
+        chip = self.devices.chip_for_port(port)
+        base_cmd = [
+            get_python_cmd(),
+            "-m",
+            "esptool",
+            "--chip",
+            chip,
+            "--port",
+            port,
+            "--baud",
+            str(self.devices.link_profile(port).baud),
+        ]
+
+        def run_cmd(args, message: str = "", on_event=None):
+            if progress is not None and message:
+                try:
+                    QtCore.QMetaObject.invokeMethod(
+                        progress,
+                        "set_message",
+                        QtCore.Qt.QueuedConnection,
+                        QtCore.Q_ARG(str, message),
+                    )
+                except Exception:
+                    pass
+            self.log(" ".join(args))
+            try:
+                proc = subprocess.Popen(
+                    args,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    bufsize=1,
+                )
+                self._pipe_esptool_output(proc, on_event)
+                proc.wait()
+                return proc.returncode
+            except Exception as e:
+                self.log(self._t(f"Ошибка запуска esptool: {e}", f"Error starting esptool: {e}"))
+                return -1
+
+        # если юзер включил стирание флеша то сначала пробуем его почистить а уже потом шить
+        if erase_flash:
+            rc = run_cmd(
+                base_cmd + ["erase_flash"],
+                self._t("Стирание флеша (erase_flash)...", "Erasing flash (erase_flash)..."),
+            )
+            if rc != 0:
+                self.log(
+                    self._t(
+                        "Стирание флеша завершилось с ошибкой, прошивка отменена.",
+                        "Flash erase finished with error, flashing cancelled.",
+                    )
+                )
+                if progress is not None:
+                    try:
+                        QtCore.QMetaObject.invokeMethod(
+                            progress,
+                            "set_message",
+                            QtCore.Qt.QueuedConnection,
+                            QtCore.Q_ARG(
+                                str,
+                                self._t("Ошибка стирания флеша.", "Flash erase error."),
+                            ),
+                        )
+                    except Exception:
+                        pass
+                return False
+
+        # основная прошивка здесь без всяких фокусов просто пишем bin по адресу из профиля платы обычно ноль
+        rc = run_cmd(
+            base_cmd + ["write_flash", hex(offset), path],
+            self._t("Запись прошивки во флеш...", "Writing firmware to flash..."),
+            self._progress_sink(progress, self._t("Запись прошивки:", "Writing firmware:"), os.path.getsize(path)),
+        )
+        if rc == 0:
+            self.log(self._t("Прошивка завершена успешно.", "Flashing completed successfully."))
+            if progress is not None:
+                try:
+                    QtCore.QMetaObject.invokeMethod(
+                        progress,
+                        "set_success",
+                        QtCore.Qt.QueuedConnection,
+                        QtCore.Q_ARG(
+                            str,
+                            self._t("Прошивка завершена успешно.", "Flashing completed successfully."),
+                        ),
+                    )
+                except Exception:
+                    pass
+            return True
+        else:
+            self.log(
+                self._t(
+                    f"Ошибка прошивки, код {rc}",
+                    f"Flashing error, code {rc}",
+                )
+            )
+            if progress is not None:
+                try:
+                    QtCore.QMetaObject.invokeMethod(
+                        progress,
+                        "set_message",
+                        QtCore.Qt.QueuedConnection,
+                        QtCore.Q_ARG(
+                            str,
+                            self._t(
+                                f"Ошибка прошивки, код {rc}.",
+                                f"Flashing error, code {rc}.",
+                            ),
+                        ),
+                    )
+                except Exception:
+                    pass
+            return False
+
+    def create_backup(self):
+        ports = self.ports.snapshot()
+        if not ports:
+            QtWidgets.QMessageBox.warning(
+                self,
+                self._t("Бэкап", "Backup"),
+                self._t("ESP32 устройство не найдено (COM порт).", "ESP32 device not found (COM port)."),
+            )
+            return
+
+        items = [f"{p.device} - {p.description}" for p in ports]
+        item, ok = QtWidgets.QInputDialog.getItem(
+            self,
+            self._t("Выбор порта", "Port selection"),
+            self._t("COM порт:", "COM port:"),
+            items,
+            0,
+            False,
+        )
+        if not ok:
+            return
+        sel_idx = items.index(item)
+        port = ports[sel_idx].device
+
+        mode_dlg = BackupModeDialog(
+            self,
+            language=getattr(self, "_current_language", "ru"),
+            incremental_available=esptool_available(),
+            partition_loader=lambda: self._load_partition_table(port),
+        )
+        if mode_dlg.exec_() != QtWidgets.QDialog.Accepted:
+            return
+        incremental = mode_dlg.mode == "incremental"
+
+        save_dir = self.settings.backup_dir
+        os.makedirs(save_dir, exist_ok=True)
+        default_name = default_backup_name(port)
+
+        if mode_dlg.mode == "partitions":
+            # каждый раздел ляжет в свой файл так что спрашиваем только папку
+            if self.settings.ask_backup_path_each_time:
+                save_dir = QtWidgets.QFileDialog.getExistingDirectory(
+                    self, self._t("Папка для бэкапа разделов", "Folder for partition backup"), save_dir
+                )
+                if not save_dir:
+                    return
+            progress = None
+            if self.settings.graphic_progress:
+                progress = ProgressDialog(
+                    self,
+                    self._t("Бэкап", "Backup"),
+                    self._t("Чтение разделов устройства...", "Reading device partitions..."),
+                )
+                progress.show()
+            Thread(
+                target=self._foreground_job(self._run_partition_backup),
+                args=(port, mode_dlg.partitions, save_dir, default_name[: -len(BBK_EXT)], progress),
+                daemon=True,
+            ).start()
+            return
+
+        if self.settings.ask_backup_path_each_time:
+            path, _ = QtWidgets.QFileDialog.getSaveFileName(
+                self,
+                self._t("Сохранить бэкап", "Save backup"),
+                os.path.join(save_dir, default_name),
+                BACKUP_SAVE_FILTER,
+            )
+            if not path:
+                return
+        else:
+            path = os.path.join(save_dir, default_name)
+
+        # размер флеша сначала пытаемся вытащить через esptool flash_id
+        # если вдруг не смогли тогда просто берем по старинке 16мб
+        # с esptool как библиотекой размер узнается в той же сессии что и чтение так что тут не дергаем
+        flash_size = None
+        if not esptool_available():
+            flash_size = self._detect_flash_size(port) or (16 * 1024 * 1024)
+
+        progress = None
+        if self.settings.graphic_progress:
+            progress = ProgressDialog(
+                self,
+                self._t("Бэкап", "Backup"),
+                self._t("Чтение флеша устройства...", "Reading device flash..."),
+            )
+            progress.show()
+
+        Thread(
+            target=self._foreground_job(self._run_esptool_backup),
+            args=(port, flash_size, path, "0x0", progress),
+            kwargs={"incremental": incremental},
+            daemon=True,
+        ).start()
+
+    def _detect_flash_size(self, port: str):
+        """размер флеша для запасного пути без библиотеки свежие данные платы берем из identities"""
+        identity = self.devices.identities.lookup_port(port)
+        if identity is not None and identity.flash_size:
+            return identity.flash_size
+        chip = self.devices.chip_for_port(port)
+        cmd = [
+            get_python_cmd(),
+            "-m",
+            "esptool",
+            "--chip",
+            chip,
+            "--port",
+            port,
+            "--baud",
+            str(self.devices.link_profile(port).baud),
+            "flash_id",
+        ]
+        try:
+            out = subprocess.check_output(cmd, stderr=subprocess.STDOUT, text=True)
+        except Exception:
+            return None
+
+        # из того же вывода flash_id вытаскиваем чип mac кварц и Detected flash size: 16MB
+        usb_serial, vid, pid = port_details(port)
+        identity = parse_identity_output(out, usb_serial, vid, pid)
+        if identity is None:
+            return None
+        self.devices.identities.record(identity)
+        self.devices.identities.save()
+        return identity.flash_size
+
+    def _load_partition_table(self, port: str) -> list:
+        return self.devices.with_session(port, read_partition_table)
+
+    def _run_partition_backup(self, port: str, partitions: list, directory: str, base_name: str,
+                              progress: "ProgressDialog | None" = None) -> bool:
+        labels = ", ".join(p.label for p in partitions)
+        total = sum(p.size for p in partitions)
+        self.log(
+            self._t(
+                f"Бэкап разделов {labels} с устройства {port} ({format_bytes(total)})...",
+                f"Backing up partitions {labels} from device {port} ({format_bytes(total)})...",
+            )
+        )
+        started = time.time()
+        try:
+            paths = self.devices.with_session(
+                port,
+                lambda session: backup_partitions(
+                    session,
+                    partitions,
+                    lambda p: os.path.join(directory, f"{base_name}_{safe_label(p.label)}{BBK_EXT}"),
+                    progress=self._progress_callback(progress, self._t("Чтение разделов:", "Reading partitions:"), "read"),
+                    catalog=self.catalog,
+                ),
+            )
+        except Exception as e:
+            self.log(self._t(f"Ошибка бэкапа: {e}", f"Backup error: {e}"))
+            self._set_progress_message(progress, self._t("Ошибка бэкапа.", "Backup error."))
+            return False
+        for path in paths:
+            self.log(path)
+        self._prune_backups()
+        done = self._t(
+            f"Бэкап разделов создан за {time.time() - started:.1f} с.",
+            f"Partition backup created in {time.time() - started:.1f} s.",
+        )
+        self.log(done)
+        self._set_progress_success(progress, done)
+        return True
+
+    def _run_incremental_backup(self, session: EspSession, port: str, size: "int | None", path: str, offset: int,
+                                progress: "ProgressDialog | None"):
+        mac = session.mac()
+        self.log(
+            self._t(
+                f"Инкрементальный бэкап с устройства {port} (MAC {mac}), сверка блоков...",
+                f"Incremental backup from device {port} (MAC {mac}), comparing blocks...",
+            )
+        )
+        hash_sink = self._progress_sink(progress, self._t("Сверка блоков:", "Comparing blocks:"))
+        stats = incremental_backup(
+            session,
+            path,
+            manifest_path(self.settings.backup_dir, mac),
+            size,
+            offset,
+            progress=self._progress_callback(progress, self._t("Чтение изменившихся блоков:", "Reading changed blocks:"), "read"),
+            hash_progress=lambda done, total: hash_sink(ProgressEvent("hash", percent=done * 100.0 / total)),
+            catalog=self.catalog,
+        )
+        self.log(
+            self._t(
+                f"Передано {format_bytes(stats.transferred)} из {format_bytes(stats.size)} за {stats.elapsed:.1f} с "
+                f"(блоков прочитано {stats.read_blocks}, пустых {stats.blank_blocks}, "
+                f"из прошлого бэкапа {stats.reused_blocks}).",
+                f"Transferred {format_bytes(stats.transferred)} of {format_bytes(stats.size)} in {stats.elapsed:.1f} s "
+                f"(blocks read {stats.read_blocks}, blank {stats.blank_blocks}, "
+                f"reused from previous backup {stats.reused_blocks}).",
+            )
+        )
+
+    def _run_esptool_backup(self, port: str, size: "int | None", path: str, offset_hex: str = "0x0",
+                            progress: "ProgressDialog | None" = None, open_folder: bool = True,
+                            incremental: bool = False) -> bool:
+        if not esptool_available():
+            size = size or (16 * 1024 * 1024)
+            self.log(
+                self._t(
+                    f"Создание ПОЛНОГО бэкапа с устройства {port} (объём {size} байт)...",
+                    f"Creating FULL backup from device {port} (size {size} bytes)...",
+                )
+            )
+            if path.lower().endswith(BBK_EXT):
+                # python -m esptool умеет писать только сырой файл так что потом пакуем его сами
+                raw_path = path + ".raw"
+                ok = self._run_esptool_backup_subprocess(port, size, raw_path, offset_hex, progress)
+                if ok:
+                    try:
+                        with open(raw_path, "rb") as f:
+                            saved = save_image(path, f.read(), int(offset_hex, 16), self._port_meta(port))
+                        self.catalog.add(saved, port)
+                    except Exception as e:
+                        self.log(self._t(f"Ошибка упаковки бэкапа: {e}", f"Backup packing error: {e}"))
+                        ok = False
+                try:
+                    os.remove(raw_path)
+                except OSError:
+                    pass
+            else:
+                ok = self._run_esptool_backup_subprocess(port, size, path, offset_hex, progress)
+                if ok:
+                    # файл писал сам esptool так что хеш считаем вторым проходом
+                    try:
+                        self.catalog.add_file(path, dict(self._port_meta(port), offset=int(offset_hex, 16)), port)
+                    except Exception as e:
+                        self.log(self._t(f"Бэкап не попал в каталог: {e}", f"Backup was not added to the catalog: {e}"))
+        else:
+            ok = False
+            try:
+                def work(session: EspSession):
+                    nonlocal size
+                    if not size:
+                        size = session.flash_size() or (16 * 1024 * 1024)
+                    if incremental:
+                        self._run_incremental_backup(session, port, size, path, int(offset_hex, 16), progress)
+                    else:
+                        self.log(
+                            self._t(
+                                f"Создание ПОЛНОГО бэкапа с устройства {port} (объём {size} байт)...",
+                                f"Creating FULL backup from device {port} (size {size} bytes)...",
+                            )
+                        )
+                        backup_flash(
+                            session,
+                            path,
+                            size,
+                            int(offset_hex, 16),
+                            progress=self._progress_callback(progress, self._t("Чтение флеша:", "Reading flash:"), "read"),
+                            catalog=self.catalog,
+                        )
+
+                self.devices.with_session(port, work)
+                ok = True
+            except Exception as e:
+                self.log(self._t(f"Ошибка бэкапа: {e}", f"Backup error: {e}"))
+                self._set_progress_message(progress, self._t("Ошибка бэкапа.", "Backup error."))
+
+        if not ok:
+            return False
+        self._prune_backups()
+        self.log(self._t("Бэкап успешно создан.", "Backup created successfully."))
+        self._set_progress_success(progress, self._t("Бэкап успешно создан.", "Backup created successfully."))
+        # после удачного бэкапа сразу открываем папку где он лежит чтоб долго не искать
+        if open_folder:
+            try:
+                folder = os.path.dirname(path)
+                if sys.platform == "win32":
+                    os.startfile(folder)
+                elif sys.platform == "darwin":
+                    subprocess.Popen(["open", folder])
+                else:
+                    subprocess.Popen(["xdg-open", folder])
+            except Exception:
+                pass
+        return True
+
+    def _port_meta(self, port: str) -> dict:
+        """что знаем о плате без сессии esptool для бэкапов снятых отдельным процессом"""
+        meta = {"chip": self.devices.chip_for_port(port)}
+        identity = self.devices.identities.lookup_port(port, fresh_only=False)
+        if identity is not None:
+            meta["mac"] = identity.mac
+            if identity.flash_size:
+                meta["flash_size"] = identity.flash_size
+        return meta
+
+    def _run_esptool_backup_subprocess(self, port: str, size: int, path: str, offset_hex: str,
+                                       progress: "ProgressDialog | None") -> bool:
+        chip = self.devices.chip_for_port(port)
+        cmd = [
+            get_python_cmd(),
+            "-m",
+            "esptool",
+            "--chip",
+            chip,
+            "--port",
+            port,
+            "--baud",
+            str(self.devices.link_profile(port).baud),
+            "read-flash",
+            offset_hex,
+            str(size),
+            path,
+        ]
+        self.log(" ".join(cmd))
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+            )
+            self._pipe_esptool_output(
+                proc, self._progress_sink(progress, self._t("Чтение флеша:", "Reading flash:"), size)
+            )
+            proc.wait()
+            if proc.returncode == 0:
+                return True
+            else:
+                self.log(
+                    self._t(
+                        f"Ошибка бэкапа, код {proc.returncode}",
+                        f"Backup error, code {proc.returncode}",
+                    )
+                )
+                if progress is not None:
+                    try:
+                        QtCore.QMetaObject.invokeMethod(
+                            progress,
+                            "set_message",
+                            QtCore.Qt.QueuedConnection,
+                            QtCore.Q_ARG(
+                                str,
+                                self._t(
+                                    f"Ошибка бэкапа, код {proc.returncode}.",
+                                    f"Backup error, code {proc.returncode}.",
+                                ),
+                            ),
+                        )
+                    except Exception:
+                        pass
+                return False
+        except Exception as e:
+            self.log(self._t(f"Ошибка запуска esptool: {e}", f"Error starting esptool: {e}"))
+            return False
+
+    def restore_backup(self, paths: list = None):
+        ports = self.ports.snapshot()
+        if not ports:
+            QtWidgets.QMessageBox.warning(
+                self,
+                self._t("Бэкап", "Backup"),
+                self._t("ESP32 устройство не найдено (COM порт).", "ESP32 device not found (COM port)."),
+            )
+            return
+
+        items = [f"{p.device} - {p.description}" for p in ports]
+        item, ok = QtWidgets.QInputDialog.getItem(
+            self,
+            self._t("Выбор порта", "Port selection"),
+            self._t("COM порт:", "COM port:"),
+            items,
+            0,
+            False,
+        )
+        if not ok:
+            return
+        sel_idx = items.index(item)
+        port = ports[sel_idx].device
+
+        if not paths:
+            paths = self._choose_restore_files(port)
+        if not paths:
+            return
+
+        partitions = None
+        if len(paths) == 1:
+            try:
+                table = image_partition_table(paths[0])
+            except Exception:
+                table = None
+            if table:
+                select_dlg = PartitionSelectDialog(
+                    self, language=getattr(self, "_current_language", "ru"), partitions=table
+                )
+                if select_dlg.exec_() != QtWidgets.QDialog.Accepted:
+                    return
+                if not select_dlg.whole_image:
+                    partitions = select_dlg.partitions
+
+        if partitions:
+            what = self._t(
+                f"разделы {', '.join(p.label for p in partitions)}", f"partitions {', '.join(p.label for p in partitions)}"
+            )
+        else:
+            what = self._t("флеш", "flash")
+        if QtWidgets.QMessageBox.question(
+            self,
+            self._t("Подтверждение", "Confirmation"),
+            self._t(
+                f"Перезаписать {what} устройства {port} содержимым бэкапа?\nДействие нельзя отменить.",
+                f"Overwrite device {port} {what} with backup contents?\nThis action cannot be undone.",
+            ),
+        ) != QtWidgets.QMessageBox.Yes:
+            return
+
+        self.log(
+            self._t(
+                f"Восстановление бэкапа на {port}...",
+                f"Restoring backup to {port}...",
+            )
+        )
+        progress = None
+        if self.settings.graphic_progress:
+            progress = ProgressDialog(
+                self,
+                self._t("Восстановление", "Restore"),
+                self._t("Запись бэкапа во флеш...", "Writing backup to flash..."),
+            )
+            progress.show()
+
+        Thread(
+            target=self._foreground_job(self._run_esptool_restore),
+            args=(port, paths, progress),
+            kwargs={"partitions": partitions},
+            daemon=True,
+        ).start()
+
+    def _choose_restore_files(self, port: str) -> list:
+        """если плата уже знакома сначала предлагаем ее последний целый образ из каталога а не диалог файлов"""
+        identity = self.devices.identities.lookup_port(port, fresh_only=False)
+        record = None
+        if identity is not None and identity.mac:
+            try:
+                record = self.catalog.latest(identity.mac)
+            except Exception as e:
+                self.log(self._t(f"Ошибка каталога бэкапов: {e}", f"Backup catalog error: {e}"))
+        if record is not None:
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(record.created))
+            firmware = record.firmware or "?"
+            box = QtWidgets.QMessageBox(self)
+            box.setIcon(QtWidgets.QMessageBox.Question)
+            box.setWindowTitle(self._t("Восстановление", "Restore"))
+            box.setText(
+                self._t(
+                    f"Последний бэкап платы {identity.mac}: {os.path.basename(record.path)}\n"
+                    f"от {created}, прошивка {firmware}, {format_bytes(record.size)}.",
+                    f"Latest backup of device {identity.mac}: {os.path.basename(record.path)}\n"
+                    f"from {created}, firmware {firmware}, {format_bytes(record.size)}.",
+                )
+            )
+            latest_btn = box.addButton(self._t("Восстановить его", "Restore it"), QtWidgets.QMessageBox.AcceptRole)
+            other_btn = box.addButton(self._t("Другой файл…", "Other file…"), QtWidgets.QMessageBox.ActionRole)
+            box.addButton(QtWidgets.QMessageBox.Cancel)
+            box.setDefaultButton(latest_btn)
+            box.exec_()
+            if box.clickedButton() is latest_btn:
+                return [record.path]
+            if box.clickedButton() is not other_btn:
+                return []
+        # можно выбрать сразу несколько файлов например бэкапы отдельных разделов
+        paths, _ = QtWidgets.QFileDialog.getOpenFileNames(
+            self,
+            self._t("Выбрать файлы бэкапа", "Select backup files"),
+            self.settings.backup_dir,
+            BACKUP_OPEN_FILTER,
+        )
+        return paths
+
+    def open_backup_catalog(self):
+        try:
+            catalog = self.catalog
+        except Exception as e:
+            self._show_error(self._t("Каталог бэкапов", "Backup catalog"), str(e))
+            return
+        dlg = BackupCatalogDialog(
+            self,
+            catalog,
+            self.settings.backup_dir,
+            RetentionPolicy.from_settings(self.settings),
+            language=getattr(self, "_current_language", "ru"),
+        )
+        if dlg.exec_() == QtWidgets.QDialog.Accepted and dlg.restore_paths:
+            self.restore_backup(dlg.restore_paths)
+
+    def _run_esptool_restore(self, port: str, path: "str | list", progress: "ProgressDialog | None" = None,
+                             partitions: list = None) -> bool:
+        """path это один файл или список файлов partitions это какие разделы взять из полного образа"""
+        paths = [path] if isinstance(path, str) else list(path)
+        if not esptool_available():
+            ok = self._run_esptool_restore_fallback(port, paths, progress, partitions)
+        else:
+            ok = False
+            try:
+                def work(session: EspSession) -> list:
+                    reports = []
+                    for file_path in paths:
+                        if len(paths) > 1:
+                            self.log(self._t(f"Запись {file_path}", f"Writing {file_path}"))
+                        verify_sink = self._progress_sink(progress, self._t("Проверка записи:", "Verifying:"))
+                        reports.append(
+                            verified_restore(
+                                session,
+                                file_path,
+                                partitions,
+                                progress=self._progress_callback(progress, self._t("Запись бэкапа:", "Writing backup:")),
+                                verify_progress=lambda done, total: verify_sink(
+                                    ProgressEvent("verify", percent=done * 100.0 / total)
+                                ),
+                            )
+                        )
+                    return reports
+
+                reports = self.devices.with_session(port, work)
+                ok = all(self._log_restore_report(report) for report in reports)
+                if not ok:
+                    self._set_progress_message(
+                        progress,
+                        self._t("Часть регионов не совпала с бэкапом.", "Some regions do not match the backup."),
+                    )
+            except Exception as e:
+                self.log(self._t(f"Ошибка восстановления: {e}", f"Restore error: {e}"))
+                self._set_progress_message(progress, self._t("Ошибка восстановления.", "Restore error."))
+
+        if not ok:
+            return False
+        self.log(self._t("Бэкап успешно восстановлен.", "Backup restored successfully."))
+        self._set_progress_success(progress, self._t("Бэкап успешно восстановлен.", "Backup restored successfully."))
+        return True
+
+    def _log_restore_report(self, report: RestoreReport) -> bool:
+        """итог проверки по регионам в лог проблемные регионы каждый отдельной строкой"""
+        for region in report.regions:
+            if region.retried or not region.ok:
+                self.log(region.describe())
+        if report.ok:
+            self.log(
+                self._t(
+                    f"Проверка: все {len(report.regions)} регионов совпали с бэкапом "
+                    f"(перезаписано повторно {len(report.retried)}, {format_bytes(report.rewritten)}).",
+                    f"Verification: all {len(report.regions)} regions match the backup "
+                    f"(rewritten {len(report.retried)}, {format_bytes(report.rewritten)}).",
+                )
+            )
+        else:
+            self.log(
+                self._t(
+                    f"Проверка: {len(report.failed)} из {len(report.regions)} регионов НЕ совпали с бэкапом "
+                    f"даже после повторной записи.",
+                    f"Verification: {len(report.failed)} of {len(report.regions)} regions do NOT match the backup "
+                    f"even after rewriting.",
+                )
+            )
+        return report.ok
+
+    def _run_esptool_restore_fallback(self, port: str, paths: list, progress: "ProgressDialog | None",
+                                      partitions: list = None) -> bool:
+        """без esptool-библиотеки потоково не получится так что нужные куски распаковываем во временные файлы"""
+        regions = []
+        temp_files = []
+        try:
+            for path in paths:
+                if partitions:
+                    with open_image(path) as image:
+                        for p in partitions:
+                            part_path = f"{path}.{safe_label(p.label)}.restore.bin"
+                            temp_files.append(part_path)
+                            with open(part_path, "wb") as f:
+                                f.write(image.read(p.offset, p.size))
+                            regions.append((p.offset, part_path))
+                elif is_container(path):
+                    raw_path = path + ".restore.bin"
+                    temp_files.append(raw_path)
+                    with BackupContainer(path) as container, open(raw_path, "wb") as f:
+                        for block in container.blocks:
+                            f.write(container.read_block(block.index))
+                        regions.append((container.offset, raw_path))
+                else:
+                    regions.append((0, path))
+            return self._run_esptool_restore_subprocess(port, regions, progress)
+        except Exception as e:
+            self.log(self._t(f"Ошибка распаковки бэкапа: {e}", f"Backup unpacking error: {e}"))
+            return False
+        finally:
+            for temp in temp_files:
+                try:
+                    os.remove(temp)
+                except OSError:
+                    pass
+
+    def _run_esptool_restore_subprocess(self, port: str, regions: list, progress: "ProgressDialog | None") -> bool:
+        """regions это список (смещение, файл) все пишется одним вызовом write_flash"""
+        chip = self.devices.chip_for_port(port)
+        cmd = [
+            get_python_cmd(),
+            "-m",
+            "esptool",
+            "--chip",
+            chip,
+            "--port",
+            port,
+            "--baud",
+            str(self.devices.link_profile(port).baud),
+            "write_flash",
+        ]
+        for offset, path in regions:
+            cmd += [f"0x{offset:x}", path]
+        total = sum(os.path.getsize(path) for _, path in regions)
+        self.log(" ".join(cmd))
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+            )
+            self._pipe_esptool_output(
+                proc, self._progress_sink(progress, self._t("Запись бэкапа:", "Writing backup:"), total)
+            )
+            proc.wait()
+            if proc.returncode == 0:
+                return True
+            self.log(
+                self._t(
+                    f"Ошибка восстановления, код {proc.returncode}",
+                    f"Restore error, code {proc.returncode}",
+                )
+            )
+            self._set_progress_message(
+                progress,
+                self._t(
+                    f"Ошибка восстановления, код {proc.returncode}.",
+                    f"Restore error, code {proc.returncode}.",
+                ),
+            )
+            return False
+        except Exception as e:
+            self.log(self._t(f"Ошибка запуска esptool: {e}", f"Error starting esptool: {e}"))
+            return False
+
+    def open_multi_device(self):
+        ports = self.ports.snapshot()
+        if not ports:
+            QtWidgets.QMessageBox.warning(
+                self,
+                self._t("Несколько устройств", "Multiple devices"),
+                self._t("ESP32 устройства не найдены (COM порты).", "No ESP32 devices found (COM ports)."),
+            )
+            return
+        if self._multi_dialog is not None and self._multi_dialog.isVisible():
+            self._multi_dialog.raise_()
+            return
+        dlg = MultiDeviceDialog(
+            self,
+            ports,
+            parallel_jobs=self.settings.parallel_jobs,
+            language=getattr(self, "_current_language", "ru"),
+        )
+        dlg.start_btn.clicked.connect(lambda: self._start_multi_device(dlg))
+        dlg.manifest_btn.clicked.connect(lambda: self._start_manifest(dlg))
+        self._multi_dialog = dlg
+        dlg.show()
+
+    def _start_multi_device(self, dlg: MultiDeviceDialog):
+        ports = dlg.selected_ports()
+        if not ports:
+            QtWidgets.QMessageBox.warning(
+                dlg,
+                self._t("Несколько устройств", "Multiple devices"),
+                self._t("Отметьте хотя бы один порт.", "Select at least one port."),
+            )
+            return
+
+        op = dlg.operation()
+        rel = restore_path = None
+        assets = {}
+        offsets = {}
+        erase_flash = False
+        if op == "flash":
+            rel = self._pick_release(dlg.release_kind())
+            if not rel:
+                return
+            # каждой узнанной плате свой bin а общий файл спрашиваем только для тех что узнать не вышло
+            unknown = []
+            for port in ports:
+                board = self.devices.board_for_port(port)
+                asset = self.asset_index.asset_for(rel, board)
+                if asset is None:
+                    unknown.append(port)
+                    continue
+                assets[port] = asset
+                offsets[port] = board.offset
+                self.log(f"[{port}] {board.title}: {asset.get('name')}")
+            if unknown:
+                self.log(
+                    self._t(
+                        f"Плата не опознана на {', '.join(unknown)}, нужен общий файл прошивки.",
+                        f"Board not recognized on {', '.join(unknown)}, a common firmware file is needed.",
+                    )
+                )
+                asset = self._choose_bin_asset(rel)
+                if not asset:
+                    return
+                assets.update((port, asset) for port in unknown)
+            erase_flash = dlg.erase_chk.isChecked()
+            names = sorted({a.get("name") for a in assets.values()})
+            question = self._t(
+                f"Прошить {rel.get('tag')} ({', '.join(names)}) на {len(ports)} устройств(а)?",
+                f"Flash {rel.get('tag')} ({', '.join(names)}) to {len(ports)} device(s)?",
+            )
+            if erase_flash:
+                question += "\n" + self._t(
+                    "ВСЕ данные на устройствах будут стёрты (erase_flash).",
+                    "ALL data on the devices will be erased (erase_flash).",
+                )
+        elif op == "restore":
+            restore_path, _ = QtWidgets.QFileDialog.getOpenFileName(
+                dlg,
+                self._t("Выбрать файл бэкапа", "Select backup file"),
+                self.settings.backup_dir,
+                BACKUP_OPEN_FILTER,
+            )
+            if not restore_path:
+                return
+            question = self._t(
+                f"Перезаписать флеш {len(ports)} устройств(а) содержимым бэкапа?\nДействие нельзя отменить.",
+                f"Overwrite flash of {len(ports)} device(s) with backup contents?\nThis action cannot be undone.",
+            )
+        else:
+            question = self._t(
+                f"Сделать бэкап с {len(ports)} устройств(а)?",
+                f"Back up {len(ports)} device(s)?",
+            )
+        if QtWidgets.QMessageBox.question(dlg, self._t("Подтверждение", "Confirmation"), question) != QtWidgets.QMessageBox.Yes:
+            return
+
+        self.settings.parallel_jobs = dlg.jobs_spin.value()
+        self.settings.save()
+        reporters = {port: dlg.reporter(port) for port in ports}
+        cache = self.firmware_cache
+        runner = BatchRunner(self.settings.parallel_jobs)
+        dlg.stop_btn.clicked.connect(runner.cancel)
+        dlg.set_running(True)
+        self.log(
+            self._t(
+                f"Пакетная операция {op} на {len(ports)} устройствах, параллельно {runner.max_workers}...",
+                f"Batch {op} on {len(ports)} devices, {runner.max_workers} in parallel...",
+            )
+        )
+
+        def job(port: str) -> bool:
+            reporter = reporters[port]
+            self._log_local.prefix = f"[{port}] "
+            try:
+                if op == "flash":
+                    path = self._fetch_firmware(cache, rel, assets[port], None, reporter)
+                    if not path:
+                        return False
+                    try:
+                        return self._run_esptool_flash(port, path, erase_flash, reporter, offsets.get(port, 0))
+                    finally:
+                        cache.release(path)
+                if op == "backup":
+                    size = None
+                    if not esptool_available():
+                        self._set_progress_message(reporter, self._t("Определение размера флеша...", "Detecting flash size..."))
+                        size = self._detect_flash_size(port) or (16 * 1024 * 1024)
+                    path = os.path.join(self.settings.backup_dir, default_backup_name(port))
+                    os.makedirs(self.settings.backup_dir, exist_ok=True)
+                    self._set_progress_message(reporter, self._t("Чтение флеша устройства...", "Reading device flash..."))
+                    return self._run_esptool_backup(port, size, path, "0x0", reporter, open_folder=False)
+                self._set_progress_message(reporter, self._t("Запись бэкапа во флеш...", "Writing backup to flash..."))
+                return self._run_esptool_restore(port, restore_path, reporter)
+            finally:
+                self._log_local.prefix = ""
+
+        def on_done(result):
+            if result.skipped:
+                text = self._t("пропущено", "skipped")
+            elif result.ok:
+                text = self._t(f"OK за {result.duration:.1f} с", f"OK in {result.duration:.1f} s")
+            else:
+                text = self._t(f"ошибка за {result.duration:.1f} с", f"failed in {result.duration:.1f} s")
+                if result.error is not None:
+                    text += f": {result.error}"
+            QtCore.QMetaObject.invokeMethod(
+                reporters[result.key],
+                "set_result",
+                QtCore.Qt.QueuedConnection,
+                QtCore.Q_ARG(bool, result.ok),
+                QtCore.Q_ARG(str, text),
+            )
+
+        def on_finished(results):
+            ok = sum(1 for r in results if r.ok)
+            summary = self._t(
+                f"Готово: успешно {ok} из {len(results)}.",
+                f"Done: {ok} of {len(results)} succeeded.",
+            )
+            self.log(summary)
+            self.prefetcher.end()
+            QtCore.QMetaObject.invokeMethod(dlg, "on_batch_finished", QtCore.Qt.QueuedConnection, QtCore.Q_ARG(str, summary))
+
+        self.prefetcher.begin()
+        runner.start(ports, job, on_done=on_done, on_finished=on_finished)
+
+    def _start_manifest(self, dlg: MultiDeviceDialog):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            dlg,
+            self._t("Выбрать манифест", "Select manifest"),
+            APP_DIR,
+            MANIFEST_OPEN_FILTER,
+        )
+        if not path:
+            return
+        try:
+            manifest = load_manifest(path)
+        except (ManifestError, OSError) as e:
+            QtWidgets.QMessageBox.warning(dlg, self._t("Манифест", "Manifest"), str(e))
+            return
+
+        ports = [(p.device, p.serial_number) for p in self.ports.snapshot()]
+        assigned, missing = assign_ports(manifest, ports)
+        if not assigned:
+            QtWidgets.QMessageBox.warning(
+                dlg,
+                self._t("Манифест", "Manifest"),
+                self._t("Ни одна плата из манифеста не подключена.", "None of the manifest devices is connected."),
+            )
+            return
+        question = self._t(
+            f"Запустить манифест на {len(assigned)} устройств(а)?",
+            f"Run the manifest on {len(assigned)} device(s)?",
+        )
+        if missing:
+            labels = ", ".join(spec.label for spec in missing)
+            question += "\n" + self._t(f"Не подключены: {labels}", f"Not connected: {labels}")
+        if any(spec.erase for _, spec in assigned):
+            question += "\n" + self._t(
+                "На части устройств ВСЕ данные будут стёрты (erase_flash).",
+                "ALL data will be erased on some devices (erase_flash).",
+            )
+        if QtWidgets.QMessageBox.question(dlg, self._t("Подтверждение", "Confirmation"), question) != QtWidgets.QMessageBox.Yes:
+            return
+
+        # в таблице отмечаем только те порты которые достались манифесту
+        assigned_ports = {port for port, _ in assigned}
+        for row in range(dlg.table.rowCount()):
+            item = dlg.table.item(row, 0)
+            item.setCheckState(QtCore.Qt.Checked if item.text() in assigned_ports else QtCore.Qt.Unchecked)
+        # строки таблицы заводим тут в гуи потоке рабочие потоки их только дергают
+        reporters = {port: dlg.reporter(port) for port in assigned_ports}
+
+        provisioner = Provisioner(
+            self.devices,
+            self.firmware_cache,
+            self.releases,
+            self.settings.backup_dir,
+            self.settings.differential_flash,
+            self.asset_index,
+            log=self.log,
+            translate=self._t,
+            catalog=self.catalog,
+        )
+        runner = BatchRunner(manifest.jobs or dlg.jobs_spin.value())
+        dlg.stop_btn.clicked.connect(runner.cancel)
+        dlg.set_running(True)
+        self.log(
+            self._t(
+                f"Манифест {path}: {len(assigned)} устройств, параллельно {runner.max_workers}...",
+                f"Manifest {path}: {len(assigned)} devices, {runner.max_workers} in parallel...",
+            )
+        )
+
+        labels = {
+            "download": self._t("Скачивание:", "Downloading:"),
+            "backup": self._t("Бэкап:", "Backup:"),
+            "write": self._t("Запись прошивки:", "Writing firmware:"),
+            "hash": self._t("Сверка секторов:", "Comparing sectors:"),
+        }
+        steps = {
+            "download": self._t("Скачивание прошивки...", "Downloading firmware..."),
+            "backup": self._t("Чтение флеша устройства...", "Reading device flash..."),
+            "flash": self._t("Запись прошивки во флеш...", "Writing firmware to flash..."),
+        }
+        sinks = {}
+
+        def progress(port: str, stage: str, done: int, total: int):
+            sink = sinks.get((port, stage))
+            if sink is None:
+                sink = sinks[(port, stage)] = self._progress_sink(reporters[port], labels.get(stage, stage))
+            if stage == "hash":
+                sink(ProgressEvent(stage, percent=done * 100.0 / total, final=done >= total))
+            else:
+                sink(ProgressEvent(stage, done=done, total=total, final=done >= total))
+
+        def on_start(port: str):
+            self._log_local.prefix = f"[{port}] "
+
+        def on_done(result):
+            self._log_local.prefix = ""
+            if result.backup:
+                self._prune_backups()
+            if result.ok:
+                text = self._t(f"OK за {result.duration:.1f} с", f"OK in {result.duration:.1f} s")
+            elif result.skipped:
+                text = self._t("пропущено", "skipped")
+            else:
+                text = self._t(f"ошибка: {result.error}", f"failed: {result.error}")
+            QtCore.QMetaObject.invokeMethod(
+                reporters[result.port],
+                "set_result",
+                QtCore.Qt.QueuedConnection,
+                QtCore.Q_ARG(bool, result.ok),
+                QtCore.Q_ARG(str, text),
+            )
+
+        def work():
+            try:
+                results = run_manifest(
+                    manifest,
+                    provisioner,
+                    ports,
+                    runner,
+                    on_start=on_start,
+                    on_done=on_done,
+                    progress=progress,
+                    step=lambda port, name: self._set_progress_message(reporters[port], steps.get(name, name)),
+                )
+                report = report_path(manifest, REPORTS_DIR)
+                summary = write_report(report, manifest, results)
+                text = self._t(
+                    f"Готово: успешно {summary['ok']} из {len(results)}. Отчёт: {report}",
+                    f"Done: {summary['ok']} of {len(results)} succeeded. Report: {report}",
+                )
+            except Exception as e:
+                text = self._t(f"Ошибка манифеста: {e}", f"Manifest error: {e}")
+            self.log(text)
+            QtCore.QMetaObject.invokeMethod(dlg, "on_batch_finished", QtCore.Qt.QueuedConnection, QtCore.Q_ARG(str, text))
+
+        Thread(target=self._foreground_job(work), daemon=True).start()
+
+    def open_station(self):
+        if self._station_dialog is not None and self._station_dialog.isVisible():
+            self._station_dialog.raise_()
+            return
+        dlg = StationDialog(
+            self,
+            parallel_jobs=self.settings.parallel_jobs,
+            language=getattr(self, "_current_language", "ru"),
+        )
+        dlg.start_btn.clicked.connect(lambda: self._start_station(dlg))
+        dlg.stop_btn.clicked.connect(dlg.stop_station)
+        self._station_dialog = dlg
+        dlg.show()
+
+    def _start_station(self, dlg: StationDialog):
+        action = dlg.action()
+        spec = DeviceSpec(backup=action != "flash", flash=action != "backup")
+        if spec.flash:
+            if dlg.source() == "file":
+                path, _ = QtWidgets.QFileDialog.getOpenFileName(
+                    dlg,
+                    self._t("Выбрать файл прошивки", "Select firmware file"),
+                    APP_DIR,
+                    "BIN files (*.bin)",
+                )
+                if not path:
+                    return
+                spec.file = path
+                what = os.path.basename(path)
+            else:
+                rel = self._pick_release(dlg.source())
+                if not rel:
+                    return
+                # релиз фиксируем на старте чтоб вся смена получила одну и ту же прошивку
+                spec.release = rel.get("tag")
+                what = rel.get("tag")
+            spec.erase = dlg.erase_chk.isChecked()
+            question = self._t(
+                f"Прошивать {what} на каждую новую подключённую плату?",
+                f"Flash {what} to every newly attached board?",
+            )
+            if spec.erase:
+                question += "\n" + self._t(
+                    "ВСЕ данные на платах будут стёрты (erase_flash).",
+                    "ALL data on the boards will be erased (erase_flash).",
+                )
+        else:
+            question = self._t(
+                "Снимать бэкап с каждой новой подключённой платы?",
+                "Back up every newly attached board?",
+            )
+        if QtWidgets.QMessageBox.question(dlg, self._t("Подтверждение", "Confirmation"), question) != QtWidgets.QMessageBox.Yes:
+            return
+
+        self.settings.parallel_jobs = dlg.jobs_spin.value()
+        self.settings.save()
+        provisioner = Provisioner(
+            self.devices,
+            self.firmware_cache,
+            self.releases,
+            self.settings.backup_dir,
+            self.settings.differential_flash,
+            self.asset_index,
+            log=self.log,
+            translate=self._t,
+            catalog=self.catalog,
+        )
+        labels = {
+            "download": self._t("Скачивание:", "Downloading:"),
+            "backup": self._t("Бэкап:", "Backup:"),
+            "write": self._t("Запись прошивки:", "Writing firmware:"),
+            "hash": self._t("Сверка секторов:", "Comparing sectors:"),
+        }
+        steps = {
+            "download": self._t("Скачивание прошивки...", "Downloading firmware..."),
+            "backup": self._t("Чтение флеша устройства...", "Reading device flash..."),
+            "flash": self._t("Запись прошивки во флеш...", "Writing firmware to flash..."),
+        }
+        sinks = {}
+
+        def progress(port: str, stage: str, done: int, total: int):
+            sink = sinks.get((port, stage))
+            if sink is None:
+                sink = sinks[(port, stage)] = self._progress_sink(dlg.reporter(port), labels.get(stage, stage))
+            if stage == "hash":
+                sink(ProgressEvent(stage, percent=done * 100.0 / total, final=done >= total))
+            else:
+                sink(ProgressEvent(stage, done=done, total=total, final=done >= total))
+
+        def on_start(port: str):
+            self._log_local.prefix = f"[{port}] "
+            board = self.devices.board_for_port(port)
+            info = self.ports.details(port)
+            description = board.title if board is not None else (info.description if info is not None else "")
+            # строку заводит гуи поток а мы ждем ее чтоб прогресс было куда рисовать
+            QtCore.QMetaObject.invokeMethod(
+                dlg,
+                "add_row",
+                QtCore.Qt.BlockingQueuedConnection,
+                QtCore.Q_ARG(str, port),
+                QtCore.Q_ARG(str, description),
+            )
+
+        def on_done(result):
+            self._log_local.prefix = ""
+            for key in [key for key in sinks if key[0] == result.port]:
+                del sinks[key]
+            if result.backup:
+                self._prune_backups()
+            counts = station.counts()
+            summary = self._t(
+                f"Успешно: {counts['ok']}, ошибок: {counts['failed']}, в работе: {counts['active']}",
+                f"Succeeded: {counts['ok']}, failed: {counts['failed']}, in progress: {counts['active']}",
+            )
+            QtCore.QMetaObject.invokeMethod(dlg, "set_summary", QtCore.Qt.QueuedConnection, QtCore.Q_ARG(str, summary))
+            if not result.started:
+                # плату выдернули раньше чем до нее дошла очередь строки для нее нет
+                return
+            if result.ok:
+                text = self._t(f"OK за {result.duration:.1f} с", f"OK in {result.duration:.1f} s")
+            else:
+                text = self._t(f"ошибка: {result.error}", f"failed: {result.error}")
+            self.log(f"[{result.port}] {text}")
+            QtCore.QMetaObject.invokeMethod(
+                dlg.reporter(result.port),
+                "set_result",
+                QtCore.Qt.QueuedConnection,
+                QtCore.Q_ARG(bool, result.ok),
+                QtCore.Q_ARG(str, text),
+            )
+
+        station = Station(
+            self.ports,
+            provisioner,
+            spec,
+            max_workers=self.settings.parallel_jobs,
+            log=self.log,
+            translate=self._t,
+            on_start=on_start,
+            on_done=on_done,
+            progress=progress,
+            step=lambda port, name: self._set_progress_message(dlg.reporter(port), steps.get(name, name)),
+            foreground=self.prefetcher.foreground,
+        )
+        dlg.station = station
+        dlg.set_running(True)
+        dlg.set_summary(self._t("Ждём плату...", "Waiting for a board..."))
+        self.log(
+            self._t(
+                f"Станция запущена, параллельно {station.max_workers}. Подключайте платы.",
+                f"Station started, {station.max_workers} in parallel. Plug boards in.",
+            )
+        )
+        station.start()
+
+    def open_serial(self):
+        dlg = SerialConsole(
+            self,
+            send_tone_on_connect=self.settings.send_tone_on_connect,
+            language=getattr(self, "_current_language", "ru"),
+            scrollback=self.settings.console_scrollback,
+        )
+        dlg.refresh_ports()
+        dlg.exec_()
+
+    def open_settings(self):
+        dlg = SettingsDialog(self, self.settings, language=getattr(self, "_current_language", "ru"))
+        if dlg.exec_() == QtWidgets.QDialog.Accepted:
+            self.settings = dlg.apply_changes()
+            self.settings.save()
+            # папка или квота кэша могли поменяться так что пересобираем его
+            self.firmware_cache = self._make_firmware_cache()
+            self.firmware_cache.evict()
+            self.prefetcher.cache = self.firmware_cache
+            if self.settings.prefetch_firmware:
+                self.prefetcher.schedule(self.releases)
+            else:
+                self.prefetcher.stop()
+            self.log("Настройки сохранены.")
+
+    def show_about(self):
+        dlg = AboutDialog(self, language=getattr(self, "_current_language", "ru"), version=APP_VERSION)
+        dlg.exec_()
+
+
+def main(trace: StartupTrace = None):
+    """trace если передали собирает время по фазам запуска и в конце печатает отчет"""
+
+    def mark(phase: str):
+        if trace is not None:
+            trace.mark(phase)
+
+    app = QtWidgets.QApplication(sys.argv)
+    mark("qt application")
+    BruceStyle.apply(app)
+    mark("style")
+
+    # сплэш висит только пока строится окно а не фиксированную секунду
+    splash = SplashScreen()
+    splash.show()
+    QtWidgets.QApplication.processEvents()
+    mark("splash")
+
+    win = BruceLauncher(trace)
+    win.show()
+    splash.close()
+    mark("window shown")
+
+    if trace is not None:
+        def report():
+            # первый оборот цикла событий после показа окна с этого момента им уже можно пользоваться
+            trace.mark("interactive")
+            text = trace.report()
+            if sys.stderr is not None:
+                print(text, file=sys.stderr)
+            for line in text.splitlines():
+                win.log(line)
+
+        QtCore.QTimer.singleShot(0, report)
+    sys.exit(app.exec_())
+
+
+if __name__ == "__main__":
+    main()
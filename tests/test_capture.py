@@ -0,0 +1,35 @@
+import os
+import shutil
+import time
+
+from bruce_core.capture import CaptureWriter, read_capture
+
+
+def test_capture_round_trip(tmp_path):
+    writer = CaptureWriter(str(tmp_path), queue_size=16)
+    writer.write(b"hello\r\n", timestamp=1.0)
+    writer.write(b"world\r\n", timestamp=2.0)
+    writer.close()
+    assert writer.error is None
+    assert list(read_capture(writer.current_path)) == [(1.0, b"hello\r\n"), (2.0, b"world\r\n")]
+
+
+def test_close_does_not_hang_when_writer_died_with_full_queue(tmp_path):
+    directory = str(tmp_path / "capture")
+    writer = CaptureWriter(directory, queue_size=2)
+    # без каталога первый же файл не откроется и поток записи умрет
+    shutil.rmtree(directory)
+    writer.write(b"first")
+    deadline = time.monotonic() + 5
+    while writer.error is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.error is not None
+    writer.write(b"a")
+    writer.write(b"b")
+    writer.write(b"dropped")
+    assert writer.dropped_chunks == 1
+
+    started = time.monotonic()
+    writer.close(timeout=0.5)
+    assert time.monotonic() - started < 2
+    assert not os.path.exists(directory)
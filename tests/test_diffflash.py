@@ -0,0 +1,65 @@
+import random
+
+from bruce_core.diffflash import BLOCK_SIZE, SECTOR_BLOCKS, diff_flash
+from bruce_core.emulated import EmulatedFlash
+from bruce_core.operations import SECTOR_SIZE
+
+IMAGE_SIZE = 1024 * 1024
+OFFSET = 0x10000
+
+
+def image(seed: int = 1) -> bytes:
+    return random.Random(seed).randbytes(IMAGE_SIZE)
+
+
+def flashed(data: bytes) -> EmulatedFlash:
+    session = EmulatedFlash(size=2 * 1024 * 1024)
+    session.flash[OFFSET:OFFSET + len(data)] = data
+    session.reset_counters()
+    return session
+
+
+def write_bin(tmp_path, data: bytes) -> str:
+    path = tmp_path / "firmware.bin"
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_identical_image_is_skipped(tmp_path):
+    data = image()
+    session = flashed(data)
+    stats = diff_flash(session, write_bin(tmp_path, data), OFFSET)
+    assert stats.identical
+    assert stats.written == 0
+    assert session.bytes_written == 0
+    assert session.md5_calls == 1
+
+
+def test_small_change_writes_only_changed_sectors(tmp_path):
+    old = image()
+    new = bytearray(old)
+    new[5] ^= 0xFF
+    new[3 * BLOCK_SIZE + 2 * SECTOR_SIZE + 7] ^= 0xFF
+    new[3 * BLOCK_SIZE + 3 * SECTOR_SIZE] ^= 0xFF
+    session = flashed(old)
+    stats = diff_flash(session, write_bin(tmp_path, bytes(new)), OFFSET)
+    assert stats.changed_blocks == 2
+    assert stats.changed_sectors == 3
+    # два соседних сектора в одном блоке пишутся одним куском
+    assert stats.regions == 2
+    assert stats.written == session.bytes_written == 3 * SECTOR_SIZE
+    assert bytes(session.flash[OFFSET:OFFSET + IMAGE_SIZE]) == bytes(new)
+
+
+def test_new_image_writes_whole_blocks_without_sector_hashes(tmp_path):
+    new = image(seed=2)
+    session = flashed(image())
+    stats = diff_flash(session, write_bin(tmp_path, new), OFFSET)
+    blocks = IMAGE_SIZE // BLOCK_SIZE
+    assert stats.changed_blocks == blocks > SECTOR_BLOCKS
+    assert stats.written == session.bytes_written == IMAGE_SIZE
+    assert stats.regions == 1
+    # md5 образа и по одному на блок плюс проверка записанного куска
+    assert stats.md5_calls == 1 + blocks
+    assert session.md5_calls == stats.md5_calls + stats.regions
+    assert bytes(session.flash[OFFSET:OFFSET + IMAGE_SIZE]) == new
@@ -0,0 +1,137 @@
+import json
+import os
+import random
+import time
+
+import pytest
+
+from benchmarks.standins import FakeGitHub
+from bruce_core.download import RangedDownloader, new_http_session
+from bruce_core.fwcache import FirmwareCache
+
+MB = 1024 * 1024
+DATA = random.Random(4).randbytes(3 * MB + 12345)
+
+
+def downloader() -> RangedDownloader:
+    return RangedDownloader(connections=3, min_segment=MB, chunk_size=16 * 1024, timeout=10)
+
+
+def test_full_download_leaves_no_state(tmp_path):
+    dest = str(tmp_path / "fw.bin")
+    with FakeGitHub(assets={"fw.bin": DATA}) as server:
+        downloader().download(server.url + "/assets/fw.bin", dest)
+    assert open(dest, "rb").read() == DATA
+    assert not os.path.exists(dest + ".state")
+
+
+def test_resume_continues_each_segment_where_it_stopped(tmp_path):
+    dest = str(tmp_path / "fw.bin")
+    with FakeGitHub(assets={"fw.bin": DATA}) as server:
+        url = server.url + "/assets/fw.bin"
+        loader = downloader()
+        _, total, etag = loader._probe(url)
+        # как будто прошлая закачка оборвалась на половине каждого сегмента
+        state = loader._new_state(url, total, etag)
+        partial = bytearray(total)
+        for seg in state["segments"]:
+            start, end, _ = seg
+            seg[2] = (end - start + 1) // 2
+            partial[start:start + seg[2]] = DATA[start:start + seg[2]]
+        with open(dest, "wb") as f:
+            f.write(partial)
+        with open(dest + ".state", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        del server.ranges_asked[:]
+
+        loader.download(url, dest)
+        asked = sorted(server.ranges_asked[1:])
+    assert open(dest, "rb").read() == DATA
+    assert not os.path.exists(dest + ".state")
+    assert asked == sorted(f"bytes={start + got}-{end}" for start, end, got in state["segments"])
+
+
+class SlowSession:
+    """http сессия которая отдает куски с задержкой чтоб закачку можно было прервать на середине"""
+
+    def __init__(self):
+        self.http = new_http_session()
+
+    def get(self, url, **kwargs):
+        resp = self.http.get(url, **kwargs)
+        chunks = resp.iter_content
+
+        def slow(chunk_size=1, decode_unicode=False):
+            for chunk in chunks(chunk_size=chunk_size):
+                time.sleep(0.005)
+                yield chunk
+
+        resp.iter_content = slow
+        return resp
+
+
+def test_interrupted_download_saves_only_written_bytes(tmp_path):
+    dest = str(tmp_path / "fw.bin")
+
+    def stop(done, total, rate):
+        raise KeyboardInterrupt
+
+    with FakeGitHub(assets={"fw.bin": DATA}) as server:
+        url = server.url + "/assets/fw.bin"
+        loader = RangedDownloader(SlowSession(), connections=3, min_segment=MB, chunk_size=16 * 1024, timeout=10)
+        with pytest.raises(KeyboardInterrupt):
+            loader.download(url, dest, stop)
+        with open(dest + ".state", encoding="utf-8") as f:
+            state = json.load(f)
+        data = open(dest, "rb").read()
+        assert 0 < sum(got for _, _, got in state["segments"]) < len(DATA)
+        for start, end, got in state["segments"]:
+            assert data[start:start + got] == DATA[start:start + got]
+
+        downloader().download(url, dest)
+    assert open(dest, "rb").read() == DATA
+    assert not os.path.exists(dest + ".state")
+
+
+def test_state_of_another_file_is_not_resumed(tmp_path):
+    dest = str(tmp_path / "fw.bin")
+    with FakeGitHub(assets={"fw.bin": DATA}) as server:
+        url = server.url + "/assets/fw.bin"
+        loader = downloader()
+        state = loader._new_state(url, len(DATA), '"old"')
+        for seg in state["segments"]:
+            seg[2] = 100
+        with open(dest, "wb") as f:
+            f.write(b"\0" * len(DATA))
+        with open(dest + ".state", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        loader.download(url, dest)
+    assert open(dest, "rb").read() == DATA
+
+
+def test_server_without_range_falls_back_to_single_stream(tmp_path):
+    dest = str(tmp_path / "fw.bin")
+    progress = []
+    with FakeGitHub(assets={"fw.bin": DATA}, ranges=False) as server:
+        downloader().download(server.url + "/assets/fw.bin", dest, lambda done, total, rate: progress.append(done))
+        asked = list(server.ranges_asked)
+    assert open(dest, "rb").read() == DATA
+    assert not os.path.exists(dest + ".state")
+    # пробный запрос с Range и дальше одна обычная закачка целиком
+    assert asked == ["bytes=0-0", ""]
+    assert progress[-1] == len(DATA)
+
+
+def test_sha_mismatch_discards_partial_and_state(tmp_path):
+    def broken_download(url, dest, progress=None):
+        with open(dest, "wb") as f:
+            f.write(b"corrupt")
+        with open(dest + ".state", "w", encoding="utf-8") as f:
+            f.write("{}")
+
+    cache = FirmwareCache(str(tmp_path / "cache"), downloader=broken_download)
+    asset = {"id": 1, "name": "fw.bin", "browser_download_url": "http://example.invalid/fw.bin",
+             "digest": "sha256:" + "0" * 64}
+    with pytest.raises(ValueError):
+        cache.fetch(asset)
+    assert os.listdir(cache.tmp_dir) == []
@@ -0,0 +1,73 @@
+import pytest
+
+from bruce_core.esp import EspSession
+
+
+class FakePort:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeLoader:
+    """esptool загрузчик который уже подключился по порту"""
+
+    IS_STUB = False
+
+    def __init__(self, stub_fails: bool = False, baud_fails: bool = False):
+        self._port = FakePort()
+        self.stub_fails = stub_fails
+        self.baud_fails = baud_fails
+
+    def get_chip_description(self):
+        return "ESP32-D0WD-V3"
+
+    def run_stub(self):
+        if self.stub_fails:
+            raise OSError("stub upload failed")
+        return self
+
+    def change_baud(self, baud: int):
+        if self.baud_fails:
+            raise OSError("baud change failed")
+
+    def hard_reset(self):
+        pass
+
+
+def session_with(loader: FakeLoader, on_connect=None) -> EspSession:
+    session = EspSession("/dev/null", chip="esp32", baud=921600, on_connect=on_connect)
+    session._connect = lambda mode: loader
+    return session
+
+
+@pytest.mark.parametrize("loader", [FakeLoader(stub_fails=True), FakeLoader(baud_fails=True)])
+def test_failed_setup_closes_port(loader):
+    session = session_with(loader)
+    with pytest.raises(OSError):
+        session.connect()
+    assert loader._port.closed
+    assert session.esp is None
+
+
+def test_failed_on_connect_closes_port():
+    def on_connect(session):
+        raise RuntimeError("callback failed")
+
+    loader = FakeLoader()
+    session = session_with(loader, on_connect)
+    with pytest.raises(RuntimeError):
+        session.connect()
+    assert loader._port.closed
+    assert session.esp is None
+
+
+def test_connect_keeps_port_open():
+    loader = FakeLoader()
+    session = session_with(loader)
+    assert session.connect() is loader
+    assert not loader._port.closed
+    session.close(reset=False)
+    assert loader._port.closed
@@ -0,0 +1,20 @@
+import sys
+
+import pytest
+
+import bruce_launcher
+from bruce_core import settings
+
+
+def test_cli_without_stdout_writes_to_log(tmp_path, monkeypatch):
+    # так выглядит запуск команды из exe собранного без консоли и не из терминала
+    monkeypatch.setattr(settings, "APP_DIR", str(tmp_path))
+    monkeypatch.setattr(sys, "platform", "linux")
+    monkeypatch.setattr(sys, "stdout", None)
+    monkeypatch.setattr(sys, "stderr", None)
+    with pytest.raises(SystemExit) as exit_info:
+        bruce_launcher.main(["--version"])
+    sys.stdout.close()
+    assert exit_info.value.code == 0
+    text = (tmp_path / bruce_launcher.CLI_LOG_NAME).read_text(encoding="utf-8")
+    assert settings.APP_VERSION in text
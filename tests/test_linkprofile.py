@@ -0,0 +1,51 @@
+from bruce_core.devices import DeviceManager
+from bruce_core.emulated import EmulatedFlash
+from bruce_core.identity import IdentityStore
+from bruce_core.linkprofile import ROM_BAUD, LinkProfile, LinkProfileStore, benchmark_baud
+
+
+class FlakyLink(EmulatedFlash):
+    """эмулятор у которого смена скорости падает начиная с fail_from бод"""
+
+    def __init__(self, fail_from: int, on_connect=None):
+        super().__init__(size=1024 * 1024, on_connect=on_connect)
+        self.fail_from = fail_from
+        self.baud = ROM_BAUD
+        self.connects = 0
+
+    def change_baud(self, baud: int):
+        if baud >= self.fail_from:
+            raise OSError("port busy")
+        self.baud = baud
+
+    def connect(self):
+        self.connects += 1
+        if self.connects > 5:
+            raise RuntimeError("reconnect loop")
+        return super().connect()
+
+
+def make_manager(tmp_path):
+    links = LinkProfileStore(str(tmp_path / "links.json"))
+    return DeviceManager(None, IdentityStore(str(tmp_path / "devices.json")), links), links
+
+
+def test_benchmark_keeps_fastest_clean_step():
+    bench = benchmark_baud(FlakyLink(fail_from=2000000), ladder=(460800, 921600, 2000000), size=64 * 1024)
+    assert bench.tuned
+    assert bench.best in (460800, 921600)
+    assert not bench.link_ok
+
+
+def test_failed_benchmark_leaves_profile_untouched(tmp_path):
+    manager, links = make_manager(tmp_path)
+    profile = LinkProfile("1a86:7523:", baud=921600)
+    # подключение идет тем же путем что у EspSession connect и дальше on_connect с подбором скорости
+    session = FlakyLink(fail_from=0, on_connect=lambda s: manager._on_session_connected("/dev/null", profile, s))
+    session.connect()
+    assert profile.baud == profile.max_baud == 921600
+    assert not profile.benchmarked
+    assert links.get(profile.key) is None
+    # связь порвалась так что сессию подняли заново на скорости загрузчика и подбор второй раз не пошел
+    assert session.connects == 2
+    assert session.baud == ROM_BAUD
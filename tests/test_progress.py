@@ -0,0 +1,26 @@
+import pytest
+
+from bruce_core.progress import parse_esptool_line
+
+# (строка esptool, стадия, процент, final) для 4 и 5 версии
+SAMPLES = [
+    ("Writing at 0x00010000... (5 %)", "write", 5.0, False),
+    ("Writing at 0x00010000 [=====>      ]  45.2% 123.00kB/456.00kB [0:05]", "write", 45.2, False),
+    ("Wrote 1048576 bytes (524288 compressed) at 0x00010000 in 9.2 seconds (911.8 kbit/s).", "write", 100.0, True),
+    ("Erasing flash (this may take a while)...", "erase", None, False),
+    ("Chip erase completed successfully in 2.1s", "erase", 100.0, True),
+    ("Erasing flash memory (this may take a while)...", "erase", None, False),
+    ("Flash memory erased successfully in 2.1 seconds.", "erase", 100.0, True),
+    ("Flash memory region erased successfully in 0.4 seconds.", "erase", 100.0, True),
+]
+
+
+@pytest.mark.parametrize("line, stage, percent, final", SAMPLES)
+def test_parse_esptool_line(line, stage, percent, final):
+    event = parse_esptool_line(line)
+    assert event is not None
+    assert (event.stage, event.percent, event.final) == (stage, percent, final)
+
+
+def test_erase_done_reports_elapsed():
+    assert parse_esptool_line("Flash memory erased successfully in 2.1 seconds.").elapsed == 2.1
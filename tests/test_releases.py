@@ -0,0 +1,43 @@
+from benchmarks.standins import FakeGitHub, github_releases
+from bruce_core.download import new_http_session
+from bruce_core.releases import RELEASES_PER_PAGE, ReleaseIndex
+
+
+def recording_session(statuses: list):
+    """http сессия которая запоминает коды всех ответов"""
+    session = new_http_session()
+    session.hooks["response"].append(lambda resp, *args, **kwargs: statuses.append(resp.status_code))
+    return session
+
+
+def test_refresh_fetches_all_pages_then_revalidates(tmp_path):
+    raw = github_releases(RELEASES_PER_PAGE * 2 + 17, assets_per_release=3)
+    cache = str(tmp_path / "releases.json")
+    with FakeGitHub(raw) as server:
+        statuses = []
+        index = ReleaseIndex(cache, url=server.url + "/releases", session=recording_session(statuses))
+        pages = []
+        result = index.refresh(on_page=lambda n, items: pages.append((n, len(items))))
+        assert result.status == "updated"
+        assert [rel["tag"] for rel in result.releases] == [rel["tag_name"] for rel in raw]
+        assert sorted(pages) == [(1, RELEASES_PER_PAGE), (2, RELEASES_PER_PAGE), (3, 17)]
+        assert statuses == [200, 200, 200]
+
+        # новый индекс на том же кэше шлет If-None-Match и получает 304 на каждую страницу
+        statuses = []
+        index = ReleaseIndex(cache, url=server.url + "/releases", session=recording_session(statuses))
+        assert len(index.cached()) == len(raw)
+        result = index.refresh()
+        assert result.status == "not_modified"
+        assert len(result.releases) == len(raw)
+        assert statuses == [304, 304, 304]
+
+
+def test_refresh_without_network_keeps_cache(tmp_path):
+    cache = str(tmp_path / "releases.json")
+    with FakeGitHub(github_releases(5, assets_per_release=3)) as server:
+        url = server.url + "/releases"
+        assert ReleaseIndex(cache, url=url, session=new_http_session()).refresh().status == "updated"
+    result = ReleaseIndex(cache, url=url, session=new_http_session()).refresh(timeout=2)
+    assert result.status == "error"
+    assert len(result.releases) == 5